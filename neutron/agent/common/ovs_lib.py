@@ -1378,9 +1378,12 @@ class DeferredOVSBridge:
         if not self.full_ordered:
             action_flow_tuples.sort(key=lambda flow: self.weights[flow.action])
 
-        flows_by_action = itertools.groupby(action_flow_tuples,
-                                            key=lambda af: af.action)
-        for action, flows in flows_by_action:
+        # NOTE: strict and non-strict flow modifications cannot be mixed in
+        # the same ovs-ofctl call.
+        flows_by_action = itertools.groupby(
+            action_flow_tuples,
+            key=lambda af: (af.action, af.flow.get('strict', False)))
+        for (action, _strict), flows in flows_by_action:
             flows_by_group_id = collections.defaultdict(list)
             for flow in flows:
                 flows_by_group_id[flow.flow_group_id].append(flow.flow)
@@ -15,6 +15,7 @@
 
 import datetime
 import queue
+import threading
 import time
 
 from oslo_utils import timeutils
@@ -167,25 +168,53 @@ class ResourceProcessingQueue:
     def __init__(self):
         self._queue = queue.PriorityQueue()
         self._run = True
+        self._updates_added = threading.Event()
 
     @property
     def qsize(self):
         """Returns the number of elements stored in the PriorityQueue"""
         return self._queue.qsize()
 
+    @property
+    def pending_resources(self):
+        """Returns the number of resources waiting for a worker
+
+        The resources with updates in the queue are only counted once, and
+        not at all if they are being processed: their updates will be handed
+        over to the ExclusiveResourceProcessor holding them.
+        """
+        with self._queue.mutex:
+            resource_ids = {update.id for update in self._queue.queue}
+        return sum(1 for resource_id in resource_ids
+                   if resource_id not in ExclusiveResourceProcessor._primaries)
+
     def add(self, update):
         update.tries -= 1
         self._queue.put(update)
+        self._updates_added.set()
+
+    def wait_for_updates(self, timeout=None):
+        """Waits until updates are added to the queue
+
+        Returns False if none was added before the timeout expired.
+        """
+        added = self._updates_added.wait(timeout)
+        self._updates_added.clear()
+        return added
 
-    def each_update_to_next_resource(self):
+    def each_update_to_next_resource(self, timeout=None):
         """Grabs the next resource from the queue and processes
 
         This method uses a for loop to process the resource repeatedly until
-        updates stop bubbling to the front of the queue.
+        updates stop bubbling to the front of the queue. If a timeout is
+        given and no update comes in before it expires, nothing is yielded.
         """
         if not self._run:
             yield None, None
-        next_update = self._queue.get()
+        try:
+            next_update = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return
 
         with ExclusiveResourceProcessor(next_update.id) as rp:
             # Queue the update whether this worker is the primary or not.
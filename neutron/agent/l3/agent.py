@@ -15,6 +15,7 @@
 
 import functools
 import threading
+import time
 
 import netaddr
 from neutron_lib.agent import constants as agent_consts
@@ -54,6 +55,8 @@ from neutron.agent.l3 import namespaces as l3_namespaces
 from neutron.agent.linux import external_process
 from neutron.agent.metadata import driver as metadata_driver
 from neutron.agent import rpc as agent_rpc
+from neutron.common import _constants as n_const
+from neutron.common import metrics
 from neutron.common import utils
 from neutron import manager
 
@@ -79,7 +82,21 @@ UPDATE_NETWORK = 5
 RELATED_ACTION_MAP = {DELETE_ROUTER: DELETE_RELATED_ROUTER,
                       ADD_UPDATE_ROUTER: ADD_UPDATE_RELATED_ROUTER}
 
-ROUTER_PROCESS_THREADS = 32
+PRIORITY_NAMES = {PRIORITY_RELATED_ROUTER: 'related_router',
+                  PRIORITY_RPC: 'rpc',
+                  PRIORITY_SYNC_ROUTERS_TASK: 'sync_routers_task'}
+
+# Seconds a router processing worker above the minimum waits for an update
+# before exiting.
+ROUTER_WORKER_IDLE_TIMEOUT = 60
+# Maximum number of seconds between two checks of the number of routers
+# waiting for a worker, they are also checked when updates are queued.
+ROUTER_WORKERS_CHECK_INTERVAL = 1
+
+UPDATE_WAIT_METRIC = 'neutron_l3_agent_update_wait_seconds'
+UPDATE_PROCESSING_METRIC = 'neutron_l3_agent_update_processing_seconds'
+# Minimum number of seconds between two writes of the metrics file.
+METRICS_WRITE_INTERVAL = 10
 
 
 def log_verbose_exc(message, router_payload):
@@ -113,6 +130,7 @@ class L3PluginApi:
         1.12 Added get_networks
         1.13 Removed get_external_network_id
         1.14 Removed process_prefix_update
+        1.15 Added router_digests to sync_routers (L3RpcCallback 1.14)
     """
 
     def __init__(self, topic, host):
@@ -121,11 +139,21 @@ class L3PluginApi:
         self.client = n_rpc.get_client(target)
 
     @utils.timecost
-    def get_routers(self, context, router_ids=None):
-        """Make a remote process call to retrieve the sync data for routers."""
-        cctxt = self.client.prepare()
+    def get_routers(self, context, router_ids=None, router_digests=None):
+        """Make a remote process call to retrieve the sync data for routers.
+
+        If router_digests, a dict of the digests of the routers already known
+        by the agent, is given, the unchanged routers are returned as their
+        ID and digest only.
+        """
+        if router_digests is None:
+            cctxt = self.client.prepare()
+            return cctxt.call(context, 'sync_routers', host=self.host,
+                              router_ids=router_ids)
+        cctxt = self.client.prepare(version='1.14')
         return cctxt.call(context, 'sync_routers', host=self.host,
-                          router_ids=router_ids)
+                          router_ids=router_ids,
+                          router_digests=router_digests)
 
     @utils.timecost
     def update_all_ha_network_port_statuses(self, context):
@@ -266,6 +294,9 @@ class L3NATAgent(ha.AgentMixin,
             self.conf = cfg.CONF
         self.check_config()
         self.router_info = {}
+        # The sync digests of the routers processed from a full sync, sent
+        # back to the server on the next full sync to skip the unchanged ones
+        self._router_digests = {}
         self.router_factory = RouterFactory()
         self._register_router_cls(self.router_factory)
 
@@ -280,6 +311,14 @@ class L3NATAgent(ha.AgentMixin,
         self._exiting = False
         self.legacy_state_change_check = True
         self.sync_routers_chunk_size = SYNC_ROUTERS_MAX_CHUNK_SIZE
+        self.update_metrics = metrics.MetricsRegistry()
+        self.update_metrics.describe(
+            UPDATE_WAIT_METRIC,
+            'Time spent by the updates in the queue, per priority.')
+        self.update_metrics.describe(
+            UPDATE_PROCESSING_METRIC,
+            'Time spent processing the updates, per priority.')
+        self._metrics_written_at = 0
         super().__init__(host=self.conf.host)
 
     def init_host(self):
@@ -321,9 +360,14 @@ class L3NATAgent(ha.AgentMixin,
             self.driver,
             self.metadata_driver)
 
-        # L3 agent router processing Thread Pool Executor
+        # L3 agent router processing Thread Pool Executor, its number of
+        # workers follows the number of updates waiting in the queue
         self._pool = utils.ThreadPoolExecutorWithBlock(
-            max_workers=ROUTER_PROCESS_THREADS)
+            max_workers=self.conf.router_processing_max_workers)
+        self._workers = 0
+        # Workers started but not processing an update
+        self._idle_workers = 0
+        self._workers_lock = threading.Lock()
         self._queue = queue.ResourceProcessingQueue()
 
         # Consume network updates to trigger router resync
@@ -412,6 +456,12 @@ class L3NATAgent(ha.AgentMixin,
                 LOG.error(msg, self.conf.ipv6_gateway)
                 raise SystemExit(1)
 
+        if (self.conf.router_processing_min_workers >
+                self.conf.router_processing_max_workers):
+            LOG.error('router_processing_min_workers must not be greater '
+                      'than router_processing_max_workers')
+            raise SystemExit(1)
+
     def _create_router(self, router_id, router):
         kwargs = {
             'agent': self,
@@ -512,6 +562,7 @@ class L3NATAgent(ha.AgentMixin,
                              resource_id=router_id))
 
         del self.router_info[router_id]
+        self._router_digests.pop(router_id, None)
         try:
             ri.delete()
         except Exception:
@@ -709,22 +760,59 @@ class L3NATAgent(ha.AgentMixin,
         router_update.resource = None  # Force the agent to resync the router
         self._queue.add(router_update)
 
-    def _process_update(self):
+    def _process_update(self, timeout=None):
+        """Process the updates of the next resource in the queue.
+
+        Return False if no update was processed, for instance because none
+        came in before the timeout.
+        """
         if self._exiting:
-            return
+            return False
 
-        for rp, update in self._queue.each_update_to_next_resource():
-            LOG.info("Starting processing update %s, action %s, priority %s, "
-                     "update_id %s. Wait time elapsed: %.3f",
-                     update.id, update.action, update.priority,
-                     update.update_id,
-                     update.time_elapsed_since_create)
-            if update.action == UPDATE_NETWORK:
-                self._process_network_update(
-                    router_id=update.id,
-                    network_id=update.resource)
-            else:
-                self._process_router_update(rp, update)
+        processed = False
+        try:
+            for rp, update in self._queue.each_update_to_next_resource(
+                    timeout=timeout):
+                if not processed:
+                    processed = True
+                    with self._workers_lock:
+                        self._idle_workers -= 1
+                self._process_resource_update(rp, update)
+        finally:
+            if processed:
+                with self._workers_lock:
+                    self._idle_workers += 1
+        return processed
+
+    def _process_resource_update(self, rp, update):
+        priority = PRIORITY_NAMES.get(update.priority, update.priority)
+        LOG.info("Starting processing update %s, action %s, priority %s, "
+                 "update_id %s. Wait time elapsed: %.3f",
+                 update.id, update.action, update.priority,
+                 update.update_id,
+                 update.time_elapsed_since_create)
+        self.update_metrics.observe(UPDATE_WAIT_METRIC,
+                                    update.time_elapsed_since_create,
+                                    priority=priority)
+        if update.action == UPDATE_NETWORK:
+            self._process_network_update(
+                router_id=update.id,
+                network_id=update.resource)
+        else:
+            self._process_router_update(rp, update)
+        self.update_metrics.observe(UPDATE_PROCESSING_METRIC,
+                                    update.time_elapsed_since_start,
+                                    priority=priority)
+        self._write_metrics()
+
+    def _write_metrics(self):
+        if not self.conf.AGENT.metrics_file:
+            return
+        now = time.monotonic()
+        if now - self._metrics_written_at < METRICS_WRITE_INTERVAL:
+            return
+        self._metrics_written_at = now
+        self.update_metrics.write_file(self.conf.AGENT.metrics_file)
 
     def _process_router_update(self, rp, update):
         LOG.info("Starting router update for %s, action %s, priority %s, "
@@ -809,8 +897,13 @@ class L3NATAgent(ha.AgentMixin,
                            'new_priority': new_update.priority})
                 continue
 
+            # The digest is only valid once the router has been processed
+            self._router_digests.pop(router['id'], None)
             try:
                 self._process_router_if_compatible(router)
+                if router.get(n_const.ROUTER_SYNC_DIGEST_KEY):
+                    self._router_digests[router['id']] = router[
+                        n_const.ROUTER_SYNC_DIGEST_KEY]
             except l3_exc.RouterNotCompatibleWithAgent as e:
                 log_verbose_exc(e.msg, router)
                 # Was the router previously handled by this agent?
@@ -828,7 +921,53 @@ class L3NATAgent(ha.AgentMixin,
     def _process_routers_loop(self):
         LOG.debug("Starting _process_routers_loop")
         while not self._exiting:
-            self._pool.submit(self._process_update)
+            for _i in range(self._get_router_workers_to_start()):
+                self._pool.submit(self._process_routers_worker)
+            self._queue.wait_for_updates(timeout=ROUTER_WORKERS_CHECK_INTERVAL)
+
+    def _get_router_workers_to_start(self):
+        """Return the number of router processing workers to start.
+
+        One worker is needed for each router with updates waiting in the
+        queue and not already being processed. The idle workers, including
+        the ones started but not running yet, will take some of them, one
+        more worker is started for each of the others, up to the maximum.
+        """
+        min_workers = self.conf.router_processing_min_workers
+        max_workers = self.conf.router_processing_max_workers
+        pending = self._queue.pending_resources
+        with self._workers_lock:
+            if self._workers < min_workers:
+                count = min_workers - self._workers
+            else:
+                count = max(0, min(pending - self._idle_workers,
+                                   max_workers - self._workers))
+            self._workers += count
+            self._idle_workers += count
+            workers = self._workers
+        if count and workers > min_workers:
+            LOG.debug("Starting %(count)s router processing workers, "
+                      "%(workers)s running", {'count': count,
+                                              'workers': workers})
+        return count
+
+    def _process_routers_worker(self):
+        """Process the updates until idle with more workers than needed."""
+        while not self._exiting:
+            try:
+                if self._process_update(timeout=ROUTER_WORKER_IDLE_TIMEOUT):
+                    continue
+            except Exception:
+                LOG.exception("Unexpected error while processing updates")
+                continue
+            with self._workers_lock:
+                if self._workers > self.conf.router_processing_min_workers:
+                    self._workers -= 1
+                    self._idle_workers -= 1
+                    return
+        with self._workers_lock:
+            self._workers -= 1
+            self._idle_workers -= 1
 
     # NOTE(kevinbenton): this is set to 1 second because the actual interval
     # is controlled by a FixedIntervalLoopingCall in neutron/service.py that
@@ -870,23 +1009,37 @@ class L3NATAgent(ha.AgentMixin,
             # start router processing earlier
             for i in range(0, len(router_ids), self.sync_routers_chunk_size):
                 chunk = router_ids[i:i + self.sync_routers_chunk_size]
-                routers = self.plugin_rpc.get_routers(context, chunk)
+                router_digests = {
+                    router_id: self._router_digests[router_id]
+                    for router_id in chunk
+                    if router_id in self._router_digests}
+                routers = self.plugin_rpc.get_routers(
+                    context, chunk, router_digests=router_digests)
                 LOG.debug('Processing :%r', routers)
                 for r in routers:
+                    router = r
+                    if r.get(n_const.ROUTER_UNCHANGED_KEY):
+                        # The server only returned the router ID, the router
+                        # has not changed since it was processed by the agent
+                        ri = self.router_info.get(r['id'])
+                        router = ri.router if ri else None
                     curr_router_ids.add(r['id'])
                     ns_manager.keep_router(r['id'])
-                    if r.get('distributed'):
+                    if router and router.get('distributed'):
                         # need to keep fip namespaces as well
-                        ext_net_id = (r['external_gateway_info'] or {}).get(
-                            'network_id')
+                        ext_net_id = (router['external_gateway_info'] or
+                                      {}).get('network_id')
                         if ext_net_id:
                             ns_manager.keep_ext_net(ext_net_id)
-                        elif is_snat_agent and not r.get('ha'):
+                        elif is_snat_agent and not router.get('ha'):
                             ns_manager.ensure_snat_cleanup(r['id'])
+                    if router is not None and router is not r:
+                        continue
+                    # An unknown unchanged router is fetched again
                     update = queue.ResourceUpdate(
                         r['id'],
                         PRIORITY_SYNC_ROUTERS_TASK,
-                        resource=r,
+                        resource=router,
                         action=ADD_UPDATE_ROUTER,
                         timestamp=timestamp)
                     self._queue.add(update)
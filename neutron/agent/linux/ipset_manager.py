@@ -11,6 +11,7 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import contextlib
 import copy
 
 import netaddr
@@ -24,17 +25,104 @@ SWAP_SUFFIX = '-n'
 IPSET_NAME_MAX_LENGTH = 31 - len(SWAP_SUFFIX)
 
 
+class IpsetTransaction:
+    """Set mutations pending while the ipset manager defers apply.
+
+       Keeps the members each set had when it was first mutated in the
+       transaction, the current members being tracked by the manager, so
+       several updates of the same set are merged into a single change.
+    """
+
+    def __init__(self):
+        # set name -> (ethertype, members before the transaction or None if
+        # the set is created in the transaction)
+        self.sets = {}
+
+    def record(self, set_name, ethertype, old_member_ips):
+        if set_name not in self.sets:
+            self.sets[set_name] = (
+                ethertype,
+                None if old_member_ips is None else set(old_member_ips))
+
+    def discard(self, set_name):
+        self.sets.pop(set_name, None)
+
+    def get_restore_input(self, ipset_sets):
+        """Return the ipset restore input applying all pending changes."""
+        process_input = []
+        for set_name, (ethertype, old_ips) in sorted(self.sets.items()):
+            member_ips = ipset_sets[set_name]
+            set_type = IpsetManager._get_ipset_set_type(ethertype)
+            if old_ips is not None:
+                new_ips = set(member_ips)
+                add_ips = new_ips - old_ips
+                del_ips = old_ips - new_ips
+                if len(add_ips) + len(del_ips) < IPSET_ADD_BULK_THRESHOLD:
+                    process_input += [f'add {set_name} {ip}'
+                                      for ip in sorted(add_ips)]
+                    process_input += [f'del {set_name} {ip}'
+                                      for ip in sorted(del_ips)]
+                    continue
+            # The set is replaced atomically, as done by
+            # IpsetManager._refresh_set, which also avoids any downtime
+            # for sets already existing in the system.
+            new_set_name = set_name + SWAP_SUFFIX
+            process_input.append(
+                f'create {set_name} hash:net family {set_type}')
+            process_input.append(
+                f'create {new_set_name} hash:net family {set_type}')
+            process_input.append(f'flush {new_set_name}')
+            process_input += [f'add {new_set_name} {ip}'
+                              for ip in member_ips]
+            process_input.append(f'swap {new_set_name} {set_name}')
+            process_input.append(f'destroy {new_set_name}')
+        return process_input
+
+
 class IpsetManager:
     """Smart wrapper for ipset.
 
        Keeps track of ip addresses per set, using bulk
        or single ip add/remove for smaller changes.
+
+       Within a defer_apply window, the set changes are only tracked and
+       are applied with a single ipset restore call when the window ends.
     """
 
     def __init__(self, execute=None, namespace=None):
         self.execute = execute or linux_utils.execute
         self.namespace = namespace
         self.ipset_sets = {}
+        self._transaction = None
+
+    @contextlib.contextmanager
+    def defer_apply(self):
+        """Defer apply context."""
+        self.defer_apply_on()
+        try:
+            yield
+        finally:
+            self.defer_apply_off()
+
+    def defer_apply_on(self):
+        if self._transaction is None:
+            self._transaction = IpsetTransaction()
+
+    def defer_apply_off(self):
+        transaction, self._transaction = self._transaction, None
+        if not transaction or not transaction.sets:
+            return
+        with lockutils.lock('neutron-ipset-%s' % self.namespace,
+                            external=True):
+            try:
+                self._restore_sets(
+                    transaction.get_restore_input(self.ipset_sets))
+            except Exception:
+                # The system sets are unknown now, they will be recreated
+                # and refreshed on their next update.
+                for set_name in transaction.sets:
+                    self.ipset_sets.pop(set_name, None)
+                raise
 
     def _sanitize_addresses(self, addresses):
         """This method converts any address to ipset format.
@@ -84,6 +172,11 @@ class IpsetManager:
         return add_ips, del_ips
 
     def set_members_mutate(self, set_name, ethertype, member_ips):
+        if self._transaction is not None:
+            self._transaction.record(set_name, ethertype,
+                                     self.ipset_sets.get(set_name))
+            self.ipset_sets[set_name] = copy.copy(member_ips)
+            return
         with lockutils.lock('neutron-ipset-%s' % self.namespace,
                             external=True):
             if not self.set_name_exists(set_name):
@@ -170,7 +263,8 @@ class IpsetManager:
             if ip in self.ipset_sets[set_name]:
                 self._del_member_from_set(set_name, ip)
 
-    def _get_ipset_set_type(self, ethertype):
+    @staticmethod
+    def _get_ipset_set_type(ethertype):
         return 'inet6' if ethertype == 'IPv6' else 'inet'
 
     def _restore_sets(self, process_input):
@@ -182,6 +276,8 @@ class IpsetManager:
         self._apply(cmd)
 
     def _destroy(self, set_name, forced=False):
+        if self._transaction is not None:
+            self._transaction.discard(set_name)
         if set_name in self.ipset_sets or forced:
             cmd = ['ipset', 'destroy', set_name]
             self._apply(cmd, fail_on_errors=False)
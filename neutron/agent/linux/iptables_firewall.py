@@ -80,6 +80,7 @@ class IptablesFirewallDriver(firewall.FirewallDriver):
             zone_per_port=self.CONNTRACK_ZONE_PER_PORT)
         self._add_fallback_chain_v4v6()
         self._defer_apply = False
+        self._pending_ipset_conntrack_deletes = []
         self._pre_defer_filtered_ports = None
         self._pre_defer_unfiltered_ports = None
         # List of security group rules for ports residing on this host
@@ -197,8 +198,22 @@ class IptablesFirewallDriver(firewall.FirewallDriver):
             if devices and del_ips:
                 # remove prefix from del_ips
                 ips = [str(netaddr.IPNetwork(del_ip).ip) for del_ip in del_ips]
-                self.ipconntrack.delete_conntrack_state_by_remote_ips(
-                    devices, ip_version, ips)
+                if self._defer_apply:
+                    # the addresses are still in the system ipset until the
+                    # deferred ipset changes are applied
+                    self._pending_ipset_conntrack_deletes.append(
+                        (devices, ip_version, ips))
+                else:
+                    self.ipconntrack.delete_conntrack_state_by_remote_ips(
+                        devices, ip_version, ips)
+
+    def _apply_deferred_ipset_changes(self):
+        pending_deletes = self._pending_ipset_conntrack_deletes
+        self._pending_ipset_conntrack_deletes = []
+        self.ipset.defer_apply_off()
+        for devices, ip_version, ips in pending_deletes:
+            self.ipconntrack.delete_conntrack_state_by_remote_ips(
+                devices, ip_version, ips)
 
     def _set_ports(self, port):
         if not firewall.port_sec_enabled(port):
@@ -876,6 +891,7 @@ class IptablesFirewallDriver(firewall.FirewallDriver):
     def filter_defer_apply_on(self):
         if not self._defer_apply:
             self.iptables.defer_apply_on()
+            self.ipset.defer_apply_on()
             self._pre_defer_filtered_ports = dict(self.filtered_ports)
             self._pre_defer_unfiltered_ports = dict(self.unfiltered_ports)
             self.pre_sg_members = dict(self.sg_members)
@@ -1040,7 +1056,11 @@ class IptablesFirewallDriver(firewall.FirewallDriver):
                                       self._pre_defer_unfiltered_ports)
             self._setup_chains_apply(self.filtered_ports,
                                      self.unfiltered_ports)
-            self.iptables.defer_apply_off()
+            try:
+                # the sets must exist before the rules referencing them
+                self._apply_deferred_ipset_changes()
+            finally:
+                self.iptables.defer_apply_off()
             self._remove_conntrack_entries_from_sg_updates()
             self._remove_unused_security_group_info()
             self._pre_defer_filtered_ports = None
@@ -24,6 +24,7 @@ import difflib
 import os
 import re
 import sys
+import time
 
 from neutron_lib import constants
 from neutron_lib import exceptions
@@ -312,6 +313,11 @@ class IptablesManager:
         self.iptables_apply_deferred = False
         self.wrap_name = binary_name[:16]
         self.external_lock = external_lock
+        # When delta apply is enabled, the managed chains as last applied,
+        # per command and table, and the time of the last full resync, per
+        # command.
+        self._applied_chains = {}
+        self._last_full_sync = {}
 
         self.ipv4 = {'filter': IptablesTable(binary_name=self.wrap_name)}
         self.ipv6 = {'filter': IptablesTable(binary_name=self.wrap_name)}
@@ -468,7 +474,9 @@ class IptablesManager:
             if not cfg.CONF.AGENT.debug_iptables_rules:
                 return first
             LOG.debug('List of IPTables Rules applied: %s', '\n'.join(first))
-            second = self._apply_synchronized()
+            # Always compare against iptables-save here, a delta apply would
+            # trivially converge.
+            second = self._apply_synchronized(force_full=True)
             if second:
                 msg = (_("IPTables Rules did not converge. Diff: %s") %
                        '\n'.join(second))
@@ -564,13 +572,17 @@ class IptablesManager:
                   "following set of iptables rules:\n%s",
                   '\n'.join(log_lines))
 
-    def _apply_synchronized(self):
+    def _apply_synchronized(self, force_full=False):
         """Apply the current in-memory set of iptables rules.
 
         This will create a diff between the rules from the previous runs
         and replace them with the current set of rules.
         This happens atomically, thanks to iptables-restore.
 
+        When delta apply is enabled, the diff is computed against the chains
+        applied by this manager the last time instead of the output of
+        iptables-save, unless a full resync is due or forced.
+
         Returns a list of the changes that were sent to iptables-save.
         """
         s = [('iptables', self.ipv4)]
@@ -578,61 +590,204 @@ class IptablesManager:
             s += [('ip6tables', self.ipv6)]
         all_commands = []  # variable to keep track all commands for return val
         for cmd, tables in s:
-            args = [f'{cmd}-save']
-            if self.namespace:
-                args = ['ip', 'netns', 'exec', self.namespace] + args
-            try:
-                save_output = linux_utils.execute(args, run_as_root=True,
-                                                  privsep_exec=True)
-            except RuntimeError:
-                # We could be racing with a cron job deleting namespaces.
-                # It is useless to try to apply iptables rules over and
-                # over again in a endless loop if the namespace does not
-                # exist.
-                with excutils.save_and_reraise_exception() as ctx:
-                    if (self.namespace and not
-                            ip_lib.network_namespace_exists(self.namespace)):
-                        ctx.reraise = False
-                        LOG.error("Namespace %s was deleted during IPTables "
-                                  "operations.", self.namespace)
-                        return []
-            all_lines = save_output.split('\n')
-            commands = []
-            # Traverse tables in sorted order for predictable dump output
-            for table_name in sorted(tables):
-                table = tables[table_name]
-                # isolate the lines of the table we are modifying
-                start, end = self._find_table(all_lines, table_name)
-                old_rules = all_lines[start:end]
-                # generate the new table state we want
-                new_rules = self._modify_rules(old_rules, table, table_name)
-                # generate the iptables commands to get between the old state
-                # and the new state
-                changes = _generate_path_between_rules(old_rules, new_rules)
-                if changes:
-                    # if there are changes to the table, we put on the header
-                    # and footer that iptables-save needs
-                    commands += (['# Generated by iptables_manager'] +
-                                 ['*%s' % table_name] + changes +
-                                 ['COMMIT', '# Completed by iptables_manager'])
-            if not commands:
-                continue
+            if not force_full and self._delta_apply_allowed(cmd):
+                commands = self._apply_delta(cmd, tables)
+                if commands is not None:
+                    all_commands += commands
+                    continue
+            commands = self._apply_full(cmd, tables)
+            if commands is None:
+                # the namespace was deleted
+                return []
             all_commands += commands
 
-            # always end with a new line
-            commands.append('')
+        LOG.debug("IPTablesManager.apply completed with success. %d iptables "
+                  "commands were issued", len(all_commands))
+        return all_commands
 
-            args = [f'{cmd}-restore', '-n']
-            if self.namespace:
-                args = ['ip', 'netns', 'exec', self.namespace] + args
+    def _restore_commands(self, cmd, commands):
+        # always end with a new line
+        commands.append('')
+
+        args = [f'{cmd}-restore', '-n']
+        if self.namespace:
+            args = ['ip', 'netns', 'exec', self.namespace] + args
+
+        return self._run_restore(args, commands)
 
-            err = self._run_restore(args, commands)
+    def _apply_full(self, cmd, tables):
+        """Apply the tables of a command using the output of iptables-save.
+
+        Returns the list of commands issued, or None if the namespace was
+        deleted in the meantime.
+        """
+        args = [f'{cmd}-save']
+        if self.namespace:
+            args = ['ip', 'netns', 'exec', self.namespace] + args
+        try:
+            save_output = linux_utils.execute(args, run_as_root=True,
+                                              privsep_exec=True)
+        except RuntimeError:
+            # We could be racing with a cron job deleting namespaces.
+            # It is useless to try to apply iptables rules over and
+            # over again in a endless loop if the namespace does not
+            # exist.
+            with excutils.save_and_reraise_exception() as ctx:
+                if (self.namespace and not
+                        ip_lib.network_namespace_exists(self.namespace)):
+                    ctx.reraise = False
+                    LOG.error("Namespace %s was deleted during IPTables "
+                              "operations.", self.namespace)
+                    return None
+        all_lines = save_output.split('\n')
+        commands = []
+        # Traverse tables in sorted order for predictable dump output
+        for table_name in sorted(tables):
+            table = tables[table_name]
+            # isolate the lines of the table we are modifying
+            start, end = self._find_table(all_lines, table_name)
+            old_rules = all_lines[start:end]
+            # generate the new table state we want
+            new_rules = self._modify_rules(old_rules, table, table_name)
+            # generate the iptables commands to get between the old state
+            # and the new state
+            changes = _generate_path_between_rules(old_rules, new_rules)
+            if changes:
+                # if there are changes to the table, we put on the header
+                # and footer that iptables-save needs
+                commands += (['# Generated by iptables_manager'] +
+                             ['*%s' % table_name] + changes +
+                             ['COMMIT', '# Completed by iptables_manager'])
+        # Forget the previously applied state until this apply succeeds.
+        self._applied_chains.pop(cmd, None)
+        if commands:
+            all_commands = commands[:]
+            err = self._restore_commands(cmd, commands)
             if err:
                 self._log_restore_err(err, commands)
                 raise err
+        else:
+            all_commands = []
+        if cfg.CONF.AGENT.iptables_delta_apply:
+            self._applied_chains[cmd] = {
+                table_name: self._get_managed_chains(table)
+                for table_name, table in tables.items()}
+            self._last_full_sync[cmd] = time.monotonic()
+        return all_commands
 
-        LOG.debug("IPTablesManager.apply completed with success. %d iptables "
-                  "commands were issued", len(all_commands))
+    def _delta_apply_allowed(self, cmd):
+        if (not cfg.CONF.AGENT.iptables_delta_apply or
+                cmd not in self._applied_chains):
+            return False
+        interval = cfg.CONF.AGENT.iptables_full_resync_interval
+        return not (interval and
+                    time.monotonic() - self._last_full_sync[cmd] >= interval)
+
+    def _get_managed_chains(self, table):
+        """Return the chains and rules this manager sets in a table.
+
+        Returns a tuple of the set of chains declared by this manager and of
+        a dict with the ordered list of rules in each chain, including the
+        built-in chains.
+        """
+        chains = {f'{self.wrap_name}-{name}' for name in table.chains}
+        chains |= table.unwrapped_chains
+        top_rules = []
+        bottom_rules = []
+        for rule in table.rules:
+            if rule.top:
+                top_rules.append(str(rule))
+            else:
+                bottom_rules.append(str(rule))
+        # Only keep the last occurrence of duplicated rules, as
+        # _modify_rules does.
+        seen_rules = set()
+        rules = []
+        for rule in reversed(top_rules + bottom_rules):
+            if rule not in seen_rules:
+                seen_rules.add(rule)
+                rules.append(rule)
+        rules.reverse()
+        rules_by_chain = _get_rules_by_chain(
+            [':%s' % chain for chain in chains] + rules)
+        return chains, dict(rules_by_chain)
+
+    def _is_owned_chain(self, chain):
+        return chain.startswith(f'{self.wrap_name}-')
+
+    def _get_delta_table_changes(self, old_chains, table):
+        """Generate the commands to apply the changes of a table.
+
+        Only the chains owned by this manager, that is wrapped with its
+        name, are diffed. These chains are not modified by anything else so
+        the rules applied last time are their current content. Returns None
+        if the changes touch a chain which may be shared with something else
+        (built-in and unwrapped chains), which requires a full resync.
+        """
+        old_declared, old_rules = old_chains
+        new_declared, new_rules = self._get_managed_chains(table)
+        if any(not self._is_owned_chain(chain)
+               for chain in old_declared ^ new_declared):
+            return None
+        statements = [':%s - [0:0]' % chain
+                      for chain in sorted(new_declared - old_declared)]
+        sg_chains = []
+        other_chains = []
+        for chain in sorted(set(old_rules) | set(new_rules)):
+            old_chain_rules = old_rules.get(chain, [])
+            new_chain_rules = new_rules.get(chain, [])
+            if old_chain_rules == new_chain_rules:
+                continue
+            if not self._is_owned_chain(chain):
+                return None
+            if '-sg-' in chain:
+                sg_chains.append(chain)
+            else:
+                other_chains.append(chain)
+        for chain in other_chains + sg_chains:
+            statements += _generate_chain_diff_iptables_commands(
+                chain, old_rules.get(chain, []), new_rules.get(chain, []))
+        statements += ['-X %s' % chain
+                       for chain in sorted(old_declared - new_declared)]
+        return statements, (new_declared, new_rules)
+
+    def _apply_delta(self, cmd, tables):
+        """Apply the tables of a command without running iptables-save.
+
+        Returns the list of commands issued, or None if a full resync is
+        needed instead.
+        """
+        applied_chains = self._applied_chains[cmd]
+        if set(applied_chains) != set(tables):
+            return None
+        commands = []
+        new_chains = {}
+        for table_name in sorted(tables):
+            result = self._get_delta_table_changes(
+                applied_chains[table_name], tables[table_name])
+            if result is None:
+                LOG.debug("Changes in shared chains of table %s, running a "
+                          "full iptables resync", table_name)
+                return None
+            changes, new_chains[table_name] = result
+            if changes:
+                commands += (['# Generated by iptables_manager'] +
+                             ['*%s' % table_name] + changes +
+                             ['COMMIT', '# Completed by iptables_manager'])
+        all_commands = commands[:]
+        if commands:
+            err = self._restore_commands(cmd, commands)
+            if err:
+                self._log_restore_err(err, commands)
+                LOG.warning("Failed to apply the iptables changes "
+                            "incrementally, running a full resync")
+                self._applied_chains.pop(cmd, None)
+                return None
+        for table in tables.values():
+            # rules and chains marked for removal are gone with the delta
+            table.remove_chains.clear()
+            table.remove_rules = []
+        self._applied_chains[cmd] = new_chains
         return all_commands
 
     def _find_table(self, lines, table_name):
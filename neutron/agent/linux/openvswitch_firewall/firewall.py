@@ -77,6 +77,16 @@ def create_reg_numbers(flow_params):
         agent_consts.REMOTE_GROUP_REG_NAME)
 
 
+def get_flow_match_key(flow):
+    """Return a hashable key identifying the match part of a flow.
+
+    Two flows with the same key (same table, priority and match fields) are
+    the same OpenFlow rule and an "add" of one of them replaces the other.
+    """
+    return frozenset((key, value) for key, value in flow.items()
+                     if key not in ('actions', 'cookie'))
+
+
 def get_segmentation_id_from_other_config(bridge, port_name):
     """Return segmentation_id stored in OVSDB other_config metadata.
 
@@ -182,6 +192,9 @@ class OFPort:
         self.allowed_pairs_v6 = self._get_allowed_pairs(port_dict, version=6)
         self.network_type = network_type
         self.physical_network = physical_network
+        # Flows installed for this port, indexed by flow match key. None
+        # means the installed flows are unknown and must be rebuilt.
+        self.flows = None
 
     @staticmethod
     def _get_allowed_pairs(port_dict, version):
@@ -371,6 +384,74 @@ class ConjIdMap:
         return result
 
 
+class ConjIPAddressIndex:
+    """Reference counted index of remote group addresses and conj_ids.
+
+    One index is kept per network, direction and ethertype. It stores the
+    addresses and conj_ids last applied for each remote group and, for each
+    IP prefix, the conj_ids and MAC addresses contributed by all the remote
+    groups. Updating a remote group only processes the addresses that
+    changed and returns the IP prefixes whose flows must be regenerated.
+    """
+
+    def __init__(self):
+        self._remotes = {}
+        self._prefix_conj_ids = collections.defaultdict(collections.Counter)
+        self._prefix_macs = collections.defaultdict(collections.Counter)
+
+    @property
+    def remote_ids(self):
+        return set(self._remotes)
+
+    def _count_addresses(self, addresses, conj_ids, count):
+        prefixes = set()
+        for addr, mac in addresses:
+            prefix = str(netaddr.IPNetwork(addr).cidr)
+            prefix_conj_ids = self._prefix_conj_ids[prefix]
+            for conj_id in conj_ids:
+                prefix_conj_ids[conj_id] += count
+            self._prefix_macs[prefix][mac] += count
+            prefixes.add(prefix)
+
+        for prefix in prefixes:
+            for counters in (self._prefix_conj_ids, self._prefix_macs):
+                # Unary plus drops the entries with a count of zero.
+                counters[prefix] = +counters[prefix]
+                if not counters[prefix]:
+                    del counters[prefix]
+        return prefixes
+
+    def update(self, remote_id, addresses, conj_ids):
+        """Set the addresses and conj_ids of a remote group.
+
+        :returns: set of IP prefixes whose conj_ids or MACs changed.
+        """
+        addresses = frozenset(addresses)
+        conj_ids = frozenset(conj_ids)
+        if not conj_ids:
+            addresses = frozenset()
+        old_addresses, old_conj_ids = self._remotes.pop(
+            remote_id, (frozenset(), frozenset()))
+        if addresses:
+            self._remotes[remote_id] = (addresses, conj_ids)
+
+        if conj_ids == old_conj_ids:
+            removed = old_addresses - addresses
+            added = addresses - old_addresses
+        else:
+            removed = old_addresses
+            added = addresses
+        changed = self._count_addresses(removed, old_conj_ids, -1)
+        changed |= self._count_addresses(added, conj_ids, 1)
+        return changed
+
+    def get_conj_ids(self, prefix):
+        return sorted(self._prefix_conj_ids.get(prefix, ()))
+
+    def get_macs(self, prefix):
+        return list(self._prefix_macs.get(prefix, ()))
+
+
 class ConjIPFlowManager:
     """Manage conj_id allocation and remote securitygroups derived
     conjunction flows.
@@ -393,6 +474,13 @@ class ConjIPFlowManager:
         self.conj_ids = collections.defaultdict(dict)
         self.flow_state = collections.defaultdict(
             lambda: collections.defaultdict(dict))
+        # The following two are only used with incremental flow updates and
+        # are indexed like self.x[vlan_tag][(direction, ethertype)]. The
+        # installed flows are stored per IP prefix and flow match key.
+        self.addr_index = collections.defaultdict(
+            lambda: collections.defaultdict(ConjIPAddressIndex))
+        self.installed_flows = collections.defaultdict(
+            lambda: collections.defaultdict(dict))
 
     def _build_addr_conj_id_map(self, ethertype, sg_ag_conj_id_map):
         """Build a map of addr -> list of conj_ids."""
@@ -459,13 +547,59 @@ class ConjIPFlowManager:
                     addr, mac, direction, ethertype, vlan_tag, conj_ids):
                 self.driver._add_flow(flow_group_id=ofport, **flow)
 
+    def _update_flows_for_vlan_delta(self, direction, ethertype, vlan_tag,
+                                     sg_ag_conj_id_map, ofport):
+        """Install only the flow changes for given direction and ethertype.
+
+        The address index of the network is updated with the current members
+        of the remote groups and only the flows of the IP prefixes whose
+        conj_ids changed are regenerated and compared with the installed
+        ones. Stale flows are deleted using strict matching, thus overlapping
+        addresses of other remote groups are never affected.
+        """
+        index = self.addr_index[vlan_tag][(direction, ethertype)]
+        changed_prefixes = set()
+        for remote_id in index.remote_ids - set(sg_ag_conj_id_map):
+            changed_prefixes |= index.update(remote_id, (), ())
+        for remote_id, conj_id_set in sg_ag_conj_id_map.items():
+            remote_group = self.driver.sg_port_map.get_sg(remote_id)
+            if remote_group:
+                addresses = remote_group.get_ethertype_filtered_addresses(
+                    ethertype)
+            else:
+                addresses = ()
+            changed_prefixes |= index.update(remote_id, addresses,
+                                             conj_id_set)
+
+        installed_flows = self.installed_flows[vlan_tag][
+            (direction, ethertype)]
+        for prefix in changed_prefixes:
+            conj_ids = index.get_conj_ids(prefix)
+            desired_flows = {}
+            for mac in index.get_macs(prefix):
+                for flow in rules.create_flows_for_ip_address_and_mac(
+                        prefix, mac, direction, ethertype, vlan_tag,
+                        conj_ids):
+                    create_reg_numbers(flow)
+                    desired_flows[get_flow_match_key(flow)] = flow
+            self.driver.install_flows_delta(
+                installed_flows.pop(prefix, {}), desired_flows,
+                flow_group_id=ofport)
+            if desired_flows:
+                installed_flows[prefix] = desired_flows
+
     def update_flows_for_vlan(self, vlan_tag, ofport, conj_id_to_remove=None):
         """Install action=conjunction(conj_id, 1/2) flows,
         which depend on IP addresses of remote_group_id or
         remote_address_group_id.
         """
+        incremental = cfg.CONF.SECURITYGROUP.incremental_flow_updates
         for (direction, ethertype), sg_ag_conj_id_map in (
                 self.conj_ids[vlan_tag].items()):
+            if incremental:
+                self._update_flows_for_vlan_delta(
+                    direction, ethertype, vlan_tag, sg_ag_conj_id_map, ofport)
+                continue
             # TODO(toshii): optimize when remote_groups have
             # no address overlaps.
             addr_to_conj = self._build_addr_conj_id_map(
@@ -557,6 +691,7 @@ class OVSFirewallDriver(firewall.FirewallDriver):
         self._initialize_sg()
         self._update_cookie = None
         self._deferred = False
+        self._recorded_flows = None
         self._ports_pending_invalid_ct_cleanup = []
         self.iptables_helper = iptables.Helper(self.int_br.br)
         self.iptables_helper.load_driver_if_needed()
@@ -620,12 +755,50 @@ class OVSFirewallDriver(firewall.FirewallDriver):
         create_reg_numbers(kwargs)
         if isinstance(dl_type, int):
             kwargs['dl_type'] = f"0x{dl_type:04x}"
+        if self._recorded_flows is not None:
+            self._recorded_flows[get_flow_match_key(kwargs)] = kwargs
+            return
         if self._update_cookie:
             kwargs['cookie'] = self._update_cookie
+        self._install_flow(flow_group_id, kwargs)
+
+    def _install_flow(self, flow_group_id, flow):
         if self._deferred:
-            self.int_br.add_flow(flow_group_id=flow_group_id, **kwargs)
+            self.int_br.add_flow(flow_group_id=flow_group_id, **flow)
         else:
-            self.int_br.br.add_flow(**kwargs)
+            self.int_br.br.add_flow(**flow)
+
+    @contextlib.contextmanager
+    def _record_flows(self):
+        """Collect the flows added in this context instead of installing them.
+
+        The collected flows are indexed by flow match key in the yielded
+        dictionary.
+        """
+        self._recorded_flows = {}
+        try:
+            yield self._recorded_flows
+        finally:
+            self._recorded_flows = None
+
+    def install_flows_delta(self, installed_flows, desired_flows,
+                            flow_group_id=None):
+        """Install the difference between two sets of flows.
+
+        Both arguments are dictionaries of flow match key to flow. The flows
+        that are missing or whose actions changed are added first (an
+        OpenFlow "add" replaces a flow with the same match); then the flows
+        not desired anymore are removed using a strict delete, so no other
+        flow sharing a less specific match is affected.
+        """
+        for key, flow in desired_flows.items():
+            if installed_flows.get(key) != flow:
+                self._install_flow(flow_group_id, dict(flow))
+        for key, flow in installed_flows.items():
+            if key not in desired_flows:
+                flow = dict(flow, strict=True, cookie=ovs_lib.COOKIE_ANY)
+                del flow['actions']
+                self._delete_flows(**flow)
 
     def _delete_flows(self, **kwargs):
         create_reg_numbers(kwargs)
@@ -837,10 +1010,35 @@ class OVSFirewallDriver(firewall.FirewallDriver):
                       'err': tag_not_found})
 
     def _set_port_filters(self, of_port):
+        if cfg.CONF.SECURITYGROUP.incremental_flow_updates:
+            self._set_port_filters_delta(of_port)
+            return
         self.initialize_port_flows(of_port)
         self.add_flows_from_rules(of_port)
 
+    def _set_port_filters_delta(self, of_port):
+        """Install only the changes to the flows of the port.
+
+        The flows the port should have are computed and compared with the
+        ones installed previously; all the changes are sent in the port flow
+        group, which is committed in a single bundle.
+        """
+        with self._record_flows() as desired_flows:
+            self.initialize_port_flows(of_port)
+            self._add_flows_from_port_rules(of_port)
+        self.install_flows_delta(of_port.flows or {}, desired_flows,
+                                 flow_group_id=of_port.ofport)
+        of_port.flows = desired_flows
+        self.conj_ip_manager.update_flows_for_vlan(of_port.vlan_tag,
+                                                   of_port.ofport)
+
     def _update_flows_for_port(self, of_port, old_of_port):
+        if cfg.CONF.SECURITYGROUP.incremental_flow_updates:
+            if old_of_port is not of_port:
+                # The ofport changed, none of the old flows is valid.
+                self.delete_all_port_flows(old_of_port)
+            self._set_port_filters_delta(of_port)
+            return
         with self.update_cookie_context():
             self._set_port_filters(of_port)
         self.delete_all_port_flows(old_of_port)
@@ -1623,6 +1821,11 @@ class OVSFirewallDriver(firewall.FirewallDriver):
                     self._add_flow(**flow)
 
     def add_flows_from_rules(self, port):
+        self._add_flows_from_port_rules(port)
+        self.conj_ip_manager.update_flows_for_vlan(port.vlan_tag,
+                                                   port.ofport)
+
+    def _add_flows_from_port_rules(self, port):
         self._initialize_tracked_ingress(port)
         self._initialize_tracked_egress(port)
         LOG.debug('Creating flow rules for port %s that is port %d in OVS',
@@ -1639,9 +1842,6 @@ class OVSFirewallDriver(firewall.FirewallDriver):
 
         self._add_non_ip_conj_flows(port)
 
-        self.conj_ip_manager.update_flows_for_vlan(port.vlan_tag,
-                                                   port.ofport)
-
     def _create_rules_generator_for_port(self, port):
         for sec_group in port.sec_groups:
             yield from sec_group.raw_rules
@@ -12,41 +12,373 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import contextlib
+import os
+import sys
+import tempfile
+
 from neutron_lib.callbacks import events
 from neutron_lib.callbacks import registry
 from neutron_lib import context as n_ctx
 from neutron_lib import rpc as n_rpc
 from oslo_log import log as logging
+import oslo_messaging
+from oslo_serialization import jsonutils
 
 from neutron._i18n import _
 from neutron.api.rpc.callbacks.consumer import registry as registry_rpc
 from neutron.api.rpc.callbacks import events as events_rpc
+from neutron.api.rpc.callbacks import resources
 from neutron.api.rpc.handlers import resources_rpc
 from neutron import objects
 
 LOG = logging.getLogger(__name__)
 objects.register_objects()
 
+# Fields indexed by default for each resource type, used by the lookups of
+# the security group and L2 agent code.
+DEFAULT_INDEXES = {
+    resources.PORT: ('network_id', 'security_group_ids'),
+    resources.SECURITYGROUPRULE: ('security_group_id', 'remote_group_id'),
+}
+
+
+# Resource types stored as CompactResource records in compact mode.
+COMPACT_RESOURCE_TYPES = (
+    resources.PORT,
+    resources.SECURITYGROUPRULE,
+    resources.NETWORK,
+)
+
+# Marker of the fields which are not set in a CompactResource.
+_UNSET = object()
+
+# Version of the format of the resource cache snapshot files.
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def _compact_value(value):
+    """Intern the strings of a field value.
+
+    IDs like the network, project or security group ones are repeated in
+    many cached resources, interning them keeps a single copy of each.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, set | frozenset | list | tuple) and all(
+            isinstance(v, str) for v in value):
+        return type(value)(sys.intern(v) for v in value)
+    return value
+
+
+class CompactLayout:
+    """Fields of an OVO class, shared by all its compact records."""
+
+    __slots__ = ('obj_cls', 'fields', 'positions')
+
+    def __init__(self, obj_cls):
+        self.obj_cls = obj_cls
+        self.fields = tuple(sorted(obj_cls.fields))
+        self.positions = {f: i for i, f in enumerate(self.fields)}
+
+
+class CompactResource:
+    """Read-only, tuple backed record of the fields of a cached OVO.
+
+    Only the fields can be read, as attributes like on the OVO. The field
+    values are stored as they are, so nested objects like the port bindings
+    or fixed IPs are still OVOs. The OVO itself is only rebuilt, by
+    materialize, when a consumer needs it, and changes must be made to that
+    OVO and recorded in the cache.
+    """
+
+    __slots__ = ('layout', 'values')
+
+    def __init__(self, layout, resource):
+        object.__setattr__(self, 'layout', layout)
+        object.__setattr__(self, 'values', tuple(
+            _compact_value(getattr(resource, field))
+            if resource.obj_attr_is_set(field) else _UNSET
+            for field in layout.fields))
+
+    def __getattr__(self, name):
+        # only called for the attributes which are not slots
+        try:
+            value = self.values[self.layout.positions[name]]
+        except KeyError:
+            raise AttributeError(
+                _("%(cls)s compact records only expose the object fields, "
+                  "not %(name)s") % {'cls': self.layout.obj_cls.__name__,
+                                     'name': name}) from None
+        if value is _UNSET:
+            raise AttributeError(name)
+        return value
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            _("%(cls)s compact records are read-only, cannot set "
+              "%(name)s") % {'cls': self.layout.obj_cls.__name__,
+                             'name': name})
+
+    def materialize(self):
+        """Return the OVO this record was built from."""
+        obj = self.layout.obj_cls()
+        for field, value in zip(self.layout.fields, self.values):
+            if value is not _UNSET:
+                setattr(obj, field, value)
+        obj.obj_reset_changes()
+        return obj
+
+
+def _deep_getsizeof(obj, seen):
+    """Approximate size in bytes of an object and of what it references."""
+    if id(obj) in seen or isinstance(obj, type | n_ctx.ContextBase):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, str | bytes | int | float | bool | None):
+        return size
+    if isinstance(obj, dict):
+        size += sum(_deep_getsizeof(k, seen) + _deep_getsizeof(v, seen)
+                    for k, v in obj.items())
+    elif isinstance(obj, list | tuple | set | frozenset):
+        size += sum(_deep_getsizeof(v, seen) for v in obj)
+    else:
+        obj_dict = getattr(obj, '__dict__', None)
+        if isinstance(obj_dict, dict):
+            size += _deep_getsizeof(obj_dict, seen)
+        for cls in type(obj).__mro__:
+            slots = cls.__dict__.get('__slots__', ())
+            for slot in (slots,) if isinstance(slots, str) else slots:
+                if slot != '__dict__' and hasattr(obj, slot):
+                    size += _deep_getsizeof(getattr(obj, slot), seen)
+    return size
+
+
+def _get_index_values(resource, field):
+    value = getattr(resource, field, None)
+    if isinstance(value, list | tuple | set | frozenset):
+        return set(value)
+    return {value}
+
+
+def _match_filters(obj, filters):
+    for key, values in filters.items():
+        for value in values:
+            attr = getattr(obj, key)
+            if isinstance(attr, list | tuple | set):
+                # attribute is a list so we check if value is in list
+                if value in attr:
+                    break
+            elif value == attr:
+                break
+        else:
+            # no match found for this key
+            return False
+    return True
+
 
 class RemoteResourceCache:
     """Retrieves and stashes logical resources in their OVO format.
 
     This is currently only compatible with OVO objects that have an ID.
+
+    Secondary indexes can be declared per resource type so that the lookups
+    by the indexed fields done by get_resources don't need to go through all
+    the cached resources. If the indexes are not given, DEFAULT_INDEXES is
+    used.
+
+    In compact mode, the resources of COMPACT_RESOURCE_TYPES are stored as
+    CompactResource records and turned back into OVOs when returned.
+
+    When a snapshot file is given, the cached resources can be saved to it
+    with save_snapshot. The snapshot found at start is used to warm up the
+    cache: the first queries only ask the server for the resources whose
+    revision number differs from the one in the snapshot.
     """
 
-    def __init__(self, resource_types):
+    def __init__(self, resource_types, indexes=None, compact=False,
+                 snapshot_file=None):
         self.resource_types = resource_types
+        self.compact = compact
+        self.snapshot_file = snapshot_file
+        self._compact_layouts = {}
         self._cache_by_type_and_id = {rt: {} for rt in self.resource_types}
         self._deleted_ids_by_type = {rt: set() for rt in self.resource_types}
+        # rtype -> field -> value -> resource IDs, kept in a dict used as an
+        # insertion ordered set so lookups return resources in a stable order
+        self._indexes = {rt: {} for rt in self.resource_types}
+        if indexes is None:
+            indexes = DEFAULT_INDEXES
+        for rtype, fields in indexes.items():
+            if rtype not in self.resource_types:
+                continue
+            for field in fields:
+                self.add_index(rtype, field)
         # track everything we've asked the server so we don't ask again
         self._satisfied_server_queries = set()
         self._puller = resources_rpc.ResourcesPullRpcApi()
+        # rtype -> resource ID -> resource, loaded from the snapshot file and
+        # not yet confirmed by the server
+        self._snapshot = {}
+        if snapshot_file:
+            self._snapshot = self._load_snapshot()
 
     def _type_cache(self, rtype):
         if rtype not in self.resource_types:
             raise RuntimeError(_("Resource cache not tracking %s") % rtype)
         return self._cache_by_type_and_id[rtype]
 
+    def _store(self, rtype, resource):
+        if not self.compact or rtype not in COMPACT_RESOURCE_TYPES:
+            return resource
+        obj_cls = type(resource)
+        layout = self._compact_layouts.get(obj_cls)
+        if layout is None:
+            layout = self._compact_layouts[obj_cls] = CompactLayout(obj_cls)
+        return CompactResource(layout, resource)
+
+    @staticmethod
+    def _materialize(cached_item):
+        if isinstance(cached_item, CompactResource):
+            return cached_item.materialize()
+        return cached_item
+
+    def get_memory_usage(self):
+        """Return the number and approximate size of the cached resources.
+
+        The result is a dict of {'count': ..., 'bytes': ...} dicts by
+        resource type. Walking the cached resources is expensive, this is
+        meant for occasional reporting only.
+        """
+        usage = {}
+        for rtype in self.resource_types:
+            type_cache = self._type_cache(rtype)
+            seen = set()
+            usage[rtype] = {
+                'count': len(type_cache),
+                'bytes': sum(_deep_getsizeof(r, seen)
+                             for r in type_cache.values())}
+        return usage
+
+    def log_memory_usage(self):
+        for rtype, usage in sorted(self.get_memory_usage().items()):
+            LOG.info("Resource cache for %(rtype)s: %(count)d resources, "
+                     "%(bytes)d bytes (compact: %(compact)s)",
+                     {'rtype': rtype, 'count': usage['count'],
+                      'bytes': usage['bytes'],
+                      'compact': (self.compact and
+                                  rtype in COMPACT_RESOURCE_TYPES)})
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_file, 'rb') as f:
+                data = jsonutils.load(f)
+            if data.get('version') != SNAPSHOT_FORMAT_VERSION:
+                LOG.info("Ignoring resource cache snapshot %(file)s with "
+                         "unsupported version %(version)s",
+                         {'file': self.snapshot_file,
+                          'version': data.get('version')})
+                return {}
+            snapshot = {}
+            for rtype, primitives in data['resources'].items():
+                if rtype not in self.resource_types:
+                    continue
+                resource_cls = resources.get_resource_cls(rtype)
+                snapshot[rtype] = {}
+                for primitive in primitives:
+                    resource = resource_cls.clean_obj_from_primitive(
+                        primitive)
+                    snapshot[rtype][resource.id] = resource
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            # the snapshot is only an optimization, never fail on it
+            LOG.warning("Unable to load resource cache snapshot %(file)s: "
+                        "%(err)s", {'file': self.snapshot_file, 'err': e})
+            return {}
+        LOG.info("Loaded resource cache snapshot %(file)s: %(counts)s",
+                 {'file': self.snapshot_file,
+                  'counts': {rtype: len(snapshot[rtype])
+                             for rtype in sorted(snapshot)}})
+        return snapshot
+
+    def get_snapshot_resources(self):
+        """Return the cached resources to save in a snapshot, by type.
+
+        Only the references are copied, which is cheap. The cached resources
+        are replaced, never modified, when they change, so the returned ones
+        can be serialized by write_snapshot in another thread.
+        """
+        return {rtype: list(self._type_cache(rtype).values())
+                for rtype in self.resource_types}
+
+    def save_snapshot(self):
+        """Atomically write the cached resources to the snapshot file."""
+        self.write_snapshot(self.get_snapshot_resources())
+
+    def write_snapshot(self, snapshot_resources):
+        """Atomically write resources to the snapshot file.
+
+        The resources, as returned by get_snapshot_resources, are saved as
+        versioned primitives, which hold their revision number. Once a new
+        snapshot is written, the one loaded at start is not used anymore.
+        Errors are logged and ignored.
+        """
+        if not self.snapshot_file:
+            return
+        data = {'version': SNAPSHOT_FORMAT_VERSION, 'resources': {}}
+        for rtype, cached_items in snapshot_resources.items():
+            data['resources'][rtype] = [
+                self._materialize(r).obj_to_primitive()
+                for r in cached_items]
+        tmp_name = None
+        try:
+            directory = os.path.dirname(os.path.abspath(self.snapshot_file))
+            with tempfile.NamedTemporaryFile(
+                    'wb', dir=directory, prefix='.resource-cache-',
+                    delete=False) as tmp_file:
+                tmp_name = tmp_file.name
+                tmp_file.write(jsonutils.dump_as_bytes(data))
+            os.replace(tmp_name, self.snapshot_file)
+        except OSError as e:
+            LOG.warning("Unable to write resource cache snapshot %(file)s: "
+                        "%(err)s", {'file': self.snapshot_file, 'err': e})
+            if tmp_name:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_name)
+            return
+        self._snapshot = {}
+        LOG.debug("Saved resource cache snapshot %s", self.snapshot_file)
+
+    def add_index(self, rtype, field):
+        """Declare a secondary index on a field of a resource type."""
+        type_indexes = self._indexes[rtype]
+        if field in type_indexes:
+            return
+        index = type_indexes[field] = collections.defaultdict(dict)
+        for resource in self._type_cache(rtype).values():
+            for value in _get_index_values(resource, field):
+                index[value][resource.id] = None
+
+    def _index_resource(self, rtype, old, new):
+        """Update the indexes of a resource type when a resource changes."""
+        for field, index in self._indexes[rtype].items():
+            old_values = _get_index_values(old, field) if old else set()
+            new_values = _get_index_values(new, field) if new else set()
+            if old and new and old_values == new_values:
+                continue
+            for value in old_values - new_values:
+                ids = index.get(value)
+                if ids is None:
+                    continue
+                ids.pop(old.id, None)
+                if not ids:
+                    del index[value]
+            for value in new_values:
+                index[value][new.id] = None
+
     def start_watcher(self):
         self._watcher = RemoteResourceWatcher(self)
 
@@ -59,11 +391,11 @@ class RemoteResourceCache:
             return None
         cached_item = self._type_cache(rtype).get(obj_id)
         if cached_item:
-            return cached_item
+            return self._materialize(cached_item)
         # try server in case object existed before agent start
         self._flood_cache_for_query(rtype, id=(obj_id, ),
                                     agent_restarted=agent_restarted)
-        return self._type_cache(rtype).get(obj_id)
+        return self._materialize(self._type_cache(rtype).get(obj_id))
 
     def _flood_cache_for_query(self, rtype, agent_restarted=False,
                                **filter_kwargs):
@@ -79,8 +411,7 @@ class RemoteResourceCache:
             # pushed to us
             return
         context = n_ctx.get_admin_context()
-        resources = self._puller.bulk_pull(context, rtype,
-                                           filter_kwargs=filter_kwargs)
+        resources = self._pull_resources(context, rtype, filter_kwargs)
         for resource in resources:
             if self._is_stale(rtype, resource):
                 # if the server was slow enough to respond the object may have
@@ -93,6 +424,45 @@ class RemoteResourceCache:
                   query_ids)
         self._satisfied_server_queries.update(query_ids)
 
+    def _pull_resources(self, context, rtype, filter_kwargs):
+        """Pull the resources matching filter_kwargs from the server.
+
+        The resources of the snapshot matching the filters are sent with
+        their revision number, so the server only returns the ones which
+        changed.
+        """
+        snapshot = self._snapshot.get(rtype)
+        known = {}
+        if snapshot:
+            known = {obj_id: resource.revision_number
+                     for obj_id, resource in list(snapshot.items())
+                     if _match_filters(resource, filter_kwargs)}
+        if not known:
+            return self._puller.bulk_pull(context, rtype,
+                                          filter_kwargs=filter_kwargs)
+        try:
+            changed, unchanged_ids = self._puller.bulk_pull_changed(
+                context, rtype, known, filter_kwargs=filter_kwargs)
+        except (oslo_messaging.UnsupportedVersion,
+                oslo_messaging.RemoteError) as e:
+            LOG.info("Unable to pull the changed %(rtype)s resources, "
+                     "discarding the resource cache snapshot: %(err)s",
+                     {'rtype': rtype, 'err': e})
+            self._snapshot = {}
+            return self._puller.bulk_pull(context, rtype,
+                                          filter_kwargs=filter_kwargs)
+        unchanged = [snapshot[obj_id] for obj_id in unchanged_ids
+                     if obj_id in snapshot]
+        # the server answered for all the known resources, the ones which
+        # were neither changed nor unchanged don't match the filters anymore
+        for obj_id in known:
+            snapshot.pop(obj_id, None)
+        LOG.debug("%(unchanged)s %(rtype)s resources reused from the "
+                  "snapshot, %(changed)s pulled",
+                  {'unchanged': len(unchanged), 'rtype': rtype,
+                   'changed': len(changed)})
+        return changed + unchanged
+
     def _get_query_ids(self, rtype, filters):
         """Turns filters for a given rypte into a set of query IDs.
 
@@ -126,28 +496,40 @@ class RemoteResourceCache:
         fashion.
         """
         self._flood_cache_for_query(rtype, **filters)
+        return self.match_resources_with_filters(rtype, filters)
+
+    def match_resources_with_filters(self, rtype, filters):
+        """Returns a list of the cached resources matching filters.
+
+        Filters are matched as in get_resources but only the resources
+        already in the cache are considered, the server is never queried.
+        When a filtered field is indexed, only the resources found in the
+        index are checked.
+        """
+        type_cache = self._type_cache(rtype)
+        candidate_ids = None
+        for key, values in filters.items():
+            index = self._indexes[rtype].get(key)
+            if index is None:
+                continue
+            ids = {}
+            for value in values:
+                ids.update(index.get(value, {}))
+            if candidate_ids is None or len(ids) < len(candidate_ids):
+                candidate_ids = ids
 
         def match(obj):
-            for key, values in filters.items():
-                for value in values:
-                    attr = getattr(obj, key)
-                    if isinstance(attr, list | tuple | set):
-                        # attribute is a list so we check if value is in
-                        # list
-                        if value in attr:
-                            break
-                    elif value == attr:
-                        break
-                else:
-                    # no match found for this key
-                    return False
-            return True
-        return self.match_resources_with_func(rtype, match)
+            return _match_filters(obj, filters)
+
+        if candidate_ids is None:
+            return self.match_resources_with_func(rtype, match)
+        return [self._materialize(type_cache[obj_id])
+                for obj_id in candidate_ids if match(type_cache[obj_id])]
 
     def match_resources_with_func(self, rtype, matcher):
         """Returns a list of all resources satisfying func matcher."""
-        # TODO(kevinbenton): this is O(N), offer better lookup functions
-        return [r for r in self._type_cache(rtype).values()
+        # NOTE: this is O(N), match_resources_with_filters uses the indexes
+        return [self._materialize(r) for r in self._type_cache(rtype).values()
                 if matcher(r)]
 
     def _is_stale(self, rtype, resource):
@@ -179,7 +561,9 @@ class RemoteResourceCache:
             LOG.debug("Ignoring stale update for %s: %s", rtype, resource)
             return
         existing = self._type_cache(rtype).get(resource.id)
-        self._type_cache(rtype)[resource.id] = resource
+        self._index_resource(rtype, existing, resource)
+        self._type_cache(rtype)[resource.id] = self._store(rtype, resource)
+        existing = self._materialize(existing)
         changed_fields = self._get_changed_fields(existing, resource)
         if not changed_fields:
             LOG.debug("Received resource %s update without any changes: %s",
@@ -212,7 +596,8 @@ class RemoteResourceCache:
                 continue
         LOG.debug("Remove resource cache for resource %s: %s",
                   rtype, resource_id)
-        self._type_cache(rtype).pop(resource_id, None)
+        existing = self._type_cache(rtype).pop(resource_id, None)
+        self._index_resource(rtype, existing, None)
 
     def record_resource_delete(self, context, rtype, resource_id):
         # deletions are final, record them so we never
@@ -225,6 +610,8 @@ class RemoteResourceCache:
             return
         self._deleted_ids_by_type[rtype].add(resource_id)
         existing = self._type_cache(rtype).pop(resource_id, None)
+        self._index_resource(rtype, existing, None)
+        existing = self._materialize(existing)
         # local notification for agent internals to subscribe to
         registry.publish(rtype, events.AFTER_DELETE, self,
                          payload=events.DBEventPayload(
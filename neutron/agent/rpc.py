@@ -231,10 +231,12 @@ class CacheBackedPluginApi(PluginApi):
                       resources.SUBNET,
                       resources.ADDRESSGROUP]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, compact_cache=False, cache_snapshot_file=None,
+                 **kwargs):
         super().__init__(*args, **kwargs)
         self.remote_resource_cache = None
-        self._create_cache_for_l2_agent()
+        self._create_cache_for_l2_agent(compact=compact_cache,
+                                        snapshot_file=cache_snapshot_file)
 
     def register_legacy_notification_callbacks(self, legacy_interface):
         """Emulates the server-side notifications from ml2 AgentNotifierApi.
@@ -402,10 +404,11 @@ class CacheBackedPluginApi(PluginApi):
         return [self.get_device_details(context, device, agent_id, host)
                 for device in devices]
 
-    def _create_cache_for_l2_agent(self):
+    def _create_cache_for_l2_agent(self, compact=False, snapshot_file=None):
         """Create a push-notifications cache for L2 agent related resources."""
         objects.register_objects()
-        rcache = resource_cache.RemoteResourceCache(self.RESOURCE_TYPES)
+        rcache = resource_cache.RemoteResourceCache(
+            self.RESOURCE_TYPES, compact=compact, snapshot_file=snapshot_file)
         rcache.start_watcher()
         self.remote_resource_cache = rcache
 
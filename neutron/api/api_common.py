@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import base64
+import binascii
 import functools
 import urllib
 
@@ -119,12 +121,57 @@ def is_empty_string_filtering_supported():
                                         get_instance().extensions)
 
 
+class PaginationCursor(str):
+    """The ID of the last item of a page, with the values of its sort keys.
+
+    A cursor is passed to the plugins as the pagination marker: the plugins
+    which don't know about cursors use it as a plain item ID, the others can
+    seek to the next page using the sort key values without fetching the
+    marker item first.
+    """
+
+    def __new__(cls, marker, sort_values):
+        cursor = super().__new__(cls, marker)
+        cursor.sort_values = sort_values
+        return cursor
+
+
+def encode_cursor(item, sort_keys, id_key):
+    """Return the opaque pagination cursor pointing after the item."""
+    values = {key: item[key] for key in list(sort_keys) + [id_key]
+              if key in item}
+    data = jsonutils.dump_as_bytes([item[id_key], values])
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor):
+    """Return the PaginationCursor encoded in a 'cursor' query parameter."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        marker, values = jsonutils.loads(data)
+        if not isinstance(marker, str) or not isinstance(values, dict):
+            raise ValueError()
+    except (TypeError, ValueError, binascii.Error):
+        msg = _("Invalid pagination cursor '%s'") % cursor
+        raise exceptions.BadRequest(resource='cursor', msg=msg)
+    return PaginationCursor(marker, values)
+
+
+def _set_page_position(request, params, item, id_key):
+    params.pop('marker', None)
+    params.pop('cursor', None)
+    if item is None:
+        return
+    if cfg.CONF.pagination_use_cursors or 'cursor' in request.GET:
+        params['cursor'] = encode_cursor(
+            item, list_args(request, 'sort_key'), id_key)
+    else:
+        params['marker'] = item[id_key]
+
+
 def get_previous_link(request, items, id_key):
     params = request.GET.copy()
-    params.pop('marker', None)
-    if items:
-        marker = items[0][id_key]
-        params['marker'] = marker
+    _set_page_position(request, params, items[0] if items else None, id_key)
     params['page_reverse'] = True
     return "{}?{}".format(prepare_url(get_path_url(request)),
                           urllib.parse.urlencode(params))
@@ -132,10 +179,7 @@ def get_previous_link(request, items, id_key):
 
 def get_next_link(request, items, id_key):
     params = request.GET.copy()
-    params.pop('marker', None)
-    if items:
-        marker = items[-1][id_key]
-        params['marker'] = marker
+    _set_page_position(request, params, items[-1] if items else None, id_key)
     params.pop('page_reverse', None)
     return "{}?{}".format(prepare_url(get_path_url(request)),
                           urllib.parse.urlencode(params))
@@ -175,7 +219,9 @@ def get_limit_and_marker(request):
                     GET variables. 'marker' is the id of the last element
                     the client has seen, and 'limit' is the maximum number
                     of items to return. If limit == 0, it means we needn't
-                    pagination, then return None.
+                    pagination, then return None. A 'cursor' GET variable,
+                    as found in the pagination links, takes precedence over
+                    'marker' and is returned as a PaginationCursor.
     """
     max_limit = _get_pagination_max_limit()
     limit = _get_limit_param(request)
@@ -183,6 +229,9 @@ def get_limit_and_marker(request):
         limit = min(max_limit, limit) or max_limit
     if not limit:
         return None, None
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return limit, decode_cursor(cursor)
     marker = request.GET.get('marker', None)
     return limit, marker
 
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+
 from neutron_lib.api.definitions import portbindings
 from neutron_lib.api import extensions
 from neutron_lib import constants
@@ -25,8 +27,11 @@ from neutron_lib.plugins import directory
 from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging
+from oslo_serialization import jsonutils
 from sqlalchemy import orm
 
+from neutron.common import _constants as n_const
+
 
 LOG = logging.getLogger(__name__)
 
@@ -49,7 +54,8 @@ class L3RpcCallback:
     # 1.11 Added get_host_ha_router_count
     # 1.12 Added get_networks
     # 1.13 Removed process_prefix_update
-    target = oslo_messaging.Target(version='1.13')
+    # 1.14 Added router_digests to sync_routers
+    target = oslo_messaging.Target(version='1.14')
 
     @property
     def plugin(self):
@@ -116,12 +122,15 @@ class L3RpcCallback:
         """Sync routers according to filters to a specific agent.
 
         @param context: contain user information
-        @param kwargs: host, router_ids
+        @param kwargs: host, router_ids, router_digests
         @return: a list of routers
                  with their interfaces and floating_ips
         """
         router_ids = kwargs.get('router_ids')
         host = kwargs.get('host')
+        # The digests of the routers already known by the agent, only sent
+        # by the agents supporting them (RPC version 1.14).
+        router_digests = kwargs.get('router_digests')
         context = neutron_context.get_admin_context()
         LOG.debug('Sync routers for ids %(router_ids)s in %(host)s',
                   {'router_ids': router_ids,
@@ -129,18 +138,59 @@ class L3RpcCallback:
         routers = self._routers_to_sync(context, router_ids, host)
         if extensions.is_extension_supported(
                 self.plugin, constants.PORT_BINDING_EXT_ALIAS):
-            self._ensure_host_set_on_ports(context, host, routers)
-            # refresh the data structure after ports are bound
-            routers = self._routers_to_sync(context, router_ids, host)
+            updated_router_ids = self._ensure_host_set_on_ports(
+                context, host, routers)
+            if updated_router_ids:
+                # refresh the data structure after ports are bound
+                routers = self._refresh_routers(
+                    context, routers, updated_router_ids, host)
         pf_plugin = directory.get_plugin(plugin_constants.PORTFORWARDING)
         if pf_plugin:
             pf_plugin.sync_port_forwarding_fip(context, routers)
+        if router_digests is not None:
+            routers = self._strip_unchanged_routers(routers, router_digests)
         LOG.debug('The sync data for ids %(router_ids)s in %(host)s is: '
                   '%(routers)s', {'router_ids': router_ids,
                                   'host': host,
                                   'routers': routers})
         return routers
 
+    def _refresh_routers(self, context, routers, router_ids, host):
+        """Fetch again the routers whose ports were just bound."""
+        refreshed = {router['id']: router for router in
+                     self._routers_to_sync(context, list(router_ids), host)}
+        result = []
+        for router in routers:
+            if router['id'] not in router_ids:
+                result.append(router)
+            elif router['id'] in refreshed:
+                result.append(refreshed.pop(router['id']))
+        # Routers related to the refreshed ones, if any
+        result.extend(router for router in refreshed.values()
+                      if router['id'] not in {r['id'] for r in result})
+        return result
+
+    @staticmethod
+    def _strip_unchanged_routers(routers, router_digests):
+        """Set the digest of the routers, strip the ones known by the agent.
+
+        The routers whose digest matches the one sent by the agent are
+        returned as their ID and digest only, so that the agent does not
+        process them again.
+        """
+        result = []
+        for router in routers:
+            digest = hashlib.sha256(jsonutils.dump_as_bytes(
+                router, sort_keys=True)).hexdigest()
+            if router_digests.get(router['id']) == digest:
+                result.append({'id': router['id'],
+                               n_const.ROUTER_SYNC_DIGEST_KEY: digest,
+                               n_const.ROUTER_UNCHANGED_KEY: True})
+            else:
+                router[n_const.ROUTER_SYNC_DIGEST_KEY] = digest
+                result.append(router)
+        return result
+
     def _routers_to_sync(self, context, router_ids, host=None):
         if extensions.is_extension_supported(
                 self.l3plugin, constants.L3_AGENT_SCHEDULER_EXT_ALIAS):
@@ -149,43 +199,58 @@ class L3RpcCallback:
         return self.l3plugin.get_sync_data(context, router_ids)
 
     def _ensure_host_set_on_ports(self, context, host, routers):
+        """Bind the router ports to the host of the router.
+
+        Return the IDs of the routers whose ports were updated.
+        """
+        updated_router_ids = set()
         for router in routers:
             LOG.debug("Checking router: %(id)s for host: %(host)s",
                       {'id': router['id'], 'host': host})
+            updated = []
             if router.get('gw_port') and router.get('distributed'):
                 # '' is used to effectively clear binding of a gw port if not
                 # bound (snat is not hosted on any l3 agent)
                 gw_port_host = router.get('gw_port_host') or ''
-                self._ensure_host_set_on_port(context,
-                                              gw_port_host,
-                                              router.get('gw_port'),
-                                              router['id'],
-                                              ha_router_port=router.get('ha'))
+                updated.append(self._ensure_host_set_on_port(
+                    context,
+                    gw_port_host,
+                    router.get('gw_port'),
+                    router['id'],
+                    ha_router_port=router.get('ha')))
                 for p in router.get(constants.SNAT_ROUTER_INTF_KEY, []):
-                    self._ensure_host_set_on_port(
+                    updated.append(self._ensure_host_set_on_port(
                         context, gw_port_host, p, router['id'],
-                        ha_router_port=router.get('ha'))
+                        ha_router_port=router.get('ha')))
 
             else:
-                self._ensure_host_set_on_port(
+                updated.append(self._ensure_host_set_on_port(
                     context, host,
                     router.get('gw_port'),
                     router['id'],
-                    ha_router_port=router.get('ha'))
+                    ha_router_port=router.get('ha')))
             for interface in router.get(constants.INTERFACE_KEY, []):
-                self._ensure_host_set_on_port(
+                updated.append(self._ensure_host_set_on_port(
                     context,
                     host,
                     interface,
                     router['id'],
-                    ha_router_port=router.get('ha'))
+                    ha_router_port=router.get('ha')))
             interface = router.get(constants.HA_INTERFACE_KEY)
             if interface:
-                self._ensure_host_set_on_port(context, host, interface,
-                                              router['id'])
+                updated.append(self._ensure_host_set_on_port(
+                    context, host, interface, router['id']))
+            if any(updated):
+                updated_router_ids.add(router['id'])
+        return updated_router_ids
 
     def _ensure_host_set_on_port(self, context, host, port, router_id=None,
                                  ha_router_port=False):
+        """Bind a router port to a host if needed.
+
+        Return True if the port was updated, or was found deleted while
+        updating it.
+        """
         not_bound = port and port.get(portbindings.VIF_TYPE) in (
             portbindings.VIF_TYPE_BINDING_FAILED,
             portbindings.VIF_TYPE_UNBOUND)
@@ -214,6 +279,7 @@ class L3RpcCallback:
                     LOG.debug("Port %(port)s not found while updating "
                               "agent binding for router %(router)s.",
                               {"port": port['id'], "router": router_id})
+                return True
             # Ports owned by HA routers should only be bound once, if
             # they are unbound. These ports are moved when an agent reports
             # that one of its routers moved to the active state.
@@ -227,7 +293,7 @@ class L3RpcCallback:
                                   "host. Port %(port)s will not be updated "
                                   "now.",
                                   {'router': router_id, 'port': port['id']})
-                        return
+                        return False
                     try:
                         LOG.debug("Updating router %(router)s port %(port)s "
                                   "binding host %(host)s",
@@ -241,6 +307,7 @@ class L3RpcCallback:
                         LOG.debug("Port %(port)s not found while updating "
                                   "agent binding for router %(router)s.",
                                   {"port": port['id'], "router": router_id})
+                    return True
         elif (port and
               port.get('device_owner') ==
               constants.DEVICE_OWNER_DVR_INTERFACE):
@@ -252,6 +319,8 @@ class L3RpcCallback:
                 context, port['id'],
                 {'port': {portbindings.HOST_ID: host,
                           'device_id': router_id}})
+            return True
+        return False
 
     def get_service_plugin_list(self, context, **kwargs):
         return directory.get_plugins().keys()
@@ -115,6 +115,30 @@ class ResourcesPullRpcApi:
         return [resource_type_cls.clean_obj_from_primitive(primitive)
                 for primitive in primitives]
 
+    @log_helpers.log_method_call
+    def bulk_pull_changed(self, context, resource_type, known_revisions,
+                          filter_kwargs=None):
+        """Pull the resources which changed since a known revision.
+
+        known_revisions is a dict of {resource ID: revision number}. The
+        server only sends back the resources matching the filters whose
+        revision number differs from the known one, or which are not known.
+
+        Returns a tuple of the list of the changed resources and of the list
+        of the IDs of the known resources which are unchanged. The known
+        resources in neither list don't match the filters anymore.
+        """
+        resource_type_cls = _resource_to_class(resource_type)
+        cctxt = self.client.prepare(version='1.2')
+        result = cctxt.call(
+            context, 'bulk_pull_changed',
+            resource_type=resource_type,
+            version=resource_type_cls.VERSION,
+            known_revisions=known_revisions, filter_kwargs=filter_kwargs)
+        return ([resource_type_cls.clean_obj_from_primitive(primitive)
+                 for primitive in result['resources']],
+                result['unchanged'])
+
 
 class ResourcesPullRpcCallback:
     """Plugin-side RPC (implementation) for agent-to-plugin interaction.
@@ -127,9 +151,10 @@ class ResourcesPullRpcCallback:
     # History
     #   1.0 Initial version
     #   1.1 Added bulk_pull
+    #   1.2 Added bulk_pull_changed
 
     target = oslo_messaging.Target(
-        version='1.1', namespace=constants.RPC_NAMESPACE_RESOURCES)
+        version='1.2', namespace=constants.RPC_NAMESPACE_RESOURCES)
 
     @oslo_messaging.expected_exceptions(rpc_exc.CallbackNotFound)
     def pull(self, context, resource_type, version, resource_id):
@@ -147,6 +172,21 @@ class ResourcesPullRpcCallback:
                 for obj in resource_type_cls.get_objects(context, _pager=None,
                                                          **filter_kwargs)]
 
+    @oslo_messaging.expected_exceptions(rpc_exc.CallbackNotFound)
+    def bulk_pull_changed(self, context, resource_type, version,
+                          known_revisions, filter_kwargs=None):
+        filter_kwargs = filter_kwargs or {}
+        resource_type_cls = _resource_to_class(resource_type)
+        changed = []
+        unchanged = []
+        for obj in resource_type_cls.get_objects(context, _pager=None,
+                                                 **filter_kwargs):
+            if known_revisions.get(obj.id) == obj.revision_number:
+                unchanged.append(obj.id)
+            else:
+                changed.append(obj.obj_to_primitive(target_version=version))
+        return {'resources': changed, 'unchanged': unchanged}
+
 
 class ResourcesPushToServersRpcApi:
     """Publisher-side RPC (stub) for plugin-to-plugin fanout interaction.
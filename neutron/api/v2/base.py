@@ -297,7 +297,7 @@ class Controller:
         filters = api_common.get_filters(
             request, self._attr_info,
             ['fields', 'sort_key', 'sort_dir',
-             'limit', 'marker', 'page_reverse'],
+             'limit', 'marker', 'cursor', 'page_reverse'],
             is_filter_validation_supported=self._filter_validation)
         kwargs = {'filters': filters,
                   'fields': original_fields}
@@ -91,3 +91,9 @@ LOWEST_AGENT_BINDING_INDEX = 1
 
 # TODO(ralonsoh): move this constant to neutron_lib.plugins.ml2.ovs_constants
 DEFAULT_BR_INT = 'br-int'
+
+# Keys of the routers returned by the L3 sync_routers RPC call when the agent
+# sends the digests of the routers it already has. An unchanged router is
+# only returned as its ID, digest and the unchanged flag.
+ROUTER_SYNC_DIGEST_KEY = 'sync_digest'
+ROUTER_UNCHANGED_KEY = 'unchanged'
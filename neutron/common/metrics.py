@@ -0,0 +1,171 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Lightweight in-process metrics.
+
+Counters and histograms are kept in memory and are cheap enough to be always
+enabled. They can be rendered in the Prometheus text exposition format and
+written to a file, for example to be collected by the node exporter textfile
+collector.
+"""
+
+import bisect
+import collections
+import contextlib
+import os
+import tempfile
+import threading
+
+from oslo_log import log as logging
+
+
+LOG = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the default histogram buckets.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative histogram of observed values."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # The last position counts the values over the highest bucket.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """Return a list of (upper bound, cumulative count) tuples."""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels)
+    if extra:
+        items.append(extra)
+    if not items:
+        return ''
+    values = []
+    for key, value in items:
+        value = (str(value).replace('\\', '\\\\').replace('"', '\\"').
+                 replace('\n', '\\n'))
+        values.append(f'{key}="{value}"')
+    return '{%s}' % ','.join(values)
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class MetricsRegistry:
+    """Thread safe store of named counters and histograms.
+
+    A metric is identified by its name and a set of labels, passed as keyword
+    arguments.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self._counters = collections.defaultdict(dict)
+        self._histograms = collections.defaultdict(dict)
+        self._descriptions = {}
+
+    def describe(self, name, description):
+        self._descriptions[name] = description
+
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counters = self._counters[name]
+            counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histograms = self._histograms[name]
+            if key not in histograms:
+                histograms[key] = Histogram(self._buckets)
+            histograms[key].observe(value)
+
+    def get_counter(self, name, **labels):
+        with self._lock:
+            return self._counters[name].get(
+                tuple(sorted(labels.items())), 0)
+
+    def get_histogram(self, name, **labels):
+        with self._lock:
+            return self._histograms[name].get(tuple(sorted(labels.items())))
+
+    def _render_header(self, lines, name, metric_type):
+        if name in self._descriptions:
+            lines.append(f'# HELP {name} {self._descriptions[name]}')
+        lines.append(f'# TYPE {name} {metric_type}')
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                self._render_header(lines, name, 'counter')
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+            for name in sorted(self._histograms):
+                self._render_header(lines, name, 'histogram')
+                for labels, histogram in sorted(
+                        self._histograms[name].items()):
+                    for bound, count in histogram.cumulative_counts():
+                        lines.append('%s_bucket%s %d' % (
+                            name,
+                            _format_labels(labels,
+                                           ('le', _format_bound(bound))),
+                            count))
+                    lines.append('%s_sum%s %r' % (
+                        name, _format_labels(labels), histogram.sum))
+                    lines.append('%s_count%s %d' % (
+                        name, _format_labels(labels), histogram.count))
+        return '\n'.join(lines) + '\n'
+
+    def write_file(self, path):
+        """Atomically write the rendered metrics to a file.
+
+        Errors are logged and ignored: exporting metrics must never break
+        the caller.
+        """
+        tmp_name = None
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            with tempfile.NamedTemporaryFile(
+                    'w', dir=directory, prefix='.metrics-',
+                    delete=False) as tmp_file:
+                tmp_name = tmp_file.name
+                tmp_file.write(self.render())
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, path)
+        except OSError as e:
+            LOG.warning('Unable to write metrics to %(path)s: %(err)s',
+                        {'path': path, 'err': e})
+            if tmp_name:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_name)
@@ -34,6 +34,7 @@ class HashRingManager:
     def __init__(self, group_name):
         self._hash_ring = None
         self._node_last_touch = {}
+        self._nodes_signature = None
         self._last_time_loaded = None
         self._check_hashring_startup = True
         self._group = group_name
@@ -86,29 +87,57 @@ class HashRingManager:
         cache_timeout = timeutils.utcnow() - datetime.timedelta(
             seconds=constants.HASH_RING_CACHE_TIMEOUT)
 
-        # Refresh the cache if:
+        # Reload the nodes if:
         # - Refreshed is forced (refresh=True)
-        # - Service just started (_wait_startup_before_caching)
         # - Hash Ring is not yet instantiated
         # - Cache has timed out
+        # - Service just started (_check_hashring_startup) and the nodes
+        #   changed since they were loaded
         if (refresh or
-                self._wait_startup_before_caching or
                 self._hash_ring is None or
                 not self._hash_ring.nodes or
                 cache_timeout >= self._last_time_loaded):
-            nodes = db_hash_ring.get_active_nodes(
-                self.admin_ctx,
-                constants.HASH_RING_NODES_TIMEOUT, self._group)
-            self._hash_ring = hashring.HashRing({node.node_uuid
-                                                 for node in nodes})
-            self._node_last_touch = {node.node_uuid: node.updated_at
-                                     for node in nodes}
-            self._last_time_loaded = timeutils.utcnow()
-            self._offline_node_count = db_hash_ring.count_offline_nodes(
-                self.admin_ctx, constants.HASH_RING_NODES_TIMEOUT,
-                self._group)
-            LOG.debug("Hash Ring loaded. %d active nodes. %d offline nodes",
-                      len(nodes), self._offline_node_count)
+            self._load_nodes()
+        elif self._check_hashring_startup and self._nodes_changed():
+            # While the service starts, the nodes signature is checked on
+            # each call instead, see _wait_startup_before_caching.
+            self._load_nodes()
+
+    def _nodes_changed(self):
+        signature = db_hash_ring.get_active_nodes_signature(
+            self.admin_ctx, constants.HASH_RING_NODES_TIMEOUT, self._group)
+        return signature != self._nodes_signature
+
+    def _load_nodes(self):
+        nodes = db_hash_ring.get_active_nodes(
+            self.admin_ctx, constants.HASH_RING_NODES_TIMEOUT, self._group)
+        node_uuids = {node.node_uuid for node in nodes}
+        if self._hash_ring is None:
+            self._hash_ring = hashring.HashRing(node_uuids)
+        else:
+            # Only update the ring with the nodes that changed, the
+            # partitions of the other nodes are kept.
+            for node_uuid in set(self._hash_ring.nodes) - node_uuids:
+                self._hash_ring.remove_node(node_uuid)
+            added = node_uuids - set(self._hash_ring.nodes)
+            if added:
+                self._hash_ring.add_nodes(added)
+        self._node_last_touch = {node.node_uuid: node.updated_at
+                                 for node in nodes}
+        self._last_time_loaded = timeutils.utcnow()
+        self._nodes_signature = (
+            len(nodes),
+            min((node.created_at for node in nodes), default=None),
+            max((node.created_at for node in nodes), default=None))
+        # Stop checking the nodes signature on each call once all the
+        # API workers of this host are in the ring.
+        if self._check_hashring_startup:
+            self._check_hashring_startup = self._wait_startup_before_caching
+        self._offline_node_count = db_hash_ring.count_offline_nodes(
+            self.admin_ctx, constants.HASH_RING_NODES_TIMEOUT,
+            self._group)
+        LOG.debug("Hash Ring loaded. %d active nodes. %d offline nodes",
+                  len(nodes), self._offline_node_count)
 
     def refresh(self):
         self._load_hash_ring(refresh=True)
@@ -93,6 +93,14 @@ AGENT_STATE_OPTS = [
                         'is half or less than agent_down_time.')),
     cfg.BoolOpt('log_agent_heartbeats', default=False,
                 help=_('Log agent heartbeats')),
+    cfg.StrOpt('metrics_file',
+               help=_('Path of a file where the agent periodically writes '
+                      'its internal processing metrics, like the duration '
+                      'of each phase of the processing loop, in the '
+                      'Prometheus text exposition format. The file can be '
+                      'collected, for example, by the node exporter '
+                      'textfile collector. Metrics are not exported if not '
+                      'set.')),
 ]
 
 INTERFACE_DRIVER_OPTS = [
@@ -117,6 +125,19 @@ IPTABLES_OPTS = [
     cfg.BoolOpt('use_random_fully',
                 default=True,
                 help=_("Use random-fully in SNAT masquerade rules.")),
+    cfg.BoolOpt('iptables_delta_apply', default=False,
+                help=_("Apply iptables changes incrementally. Only the "
+                       "chains owned by the agent which changed since the "
+                       "last apply are sent to iptables-restore, without "
+                       "running iptables-save. A full resync against the "
+                       "output of iptables-save is still done on the first "
+                       "apply, after an error, when shared or built-in "
+                       "chains change and every "
+                       "iptables_full_resync_interval seconds.")),
+    cfg.IntOpt('iptables_full_resync_interval', default=600, min=0,
+               help=_("Interval, in seconds, between two full iptables "
+                      "resyncs when iptables_delta_apply is enabled. Set "
+                      "to 0 to only resync on errors.")),
 ]
 
 PROCESS_MONITOR_OPTS = [
@@ -48,6 +48,13 @@ AGENT_OPTS = [
                        "enable_new_agents=False. In this case, a user's "
                        "resources will not be scheduled automatically to an "
                        "agent until an admin sets admin_state_up to True.")),
+    cfg.BoolOpt('agent_heartbeat_fast_path', default=True,
+                help=_("When an alive agent reports a state identical to "
+                       "the one stored in the database, only update its "
+                       "heartbeat timestamp and do not publish the agent "
+                       "AFTER_UPDATE callback event. Disable it if an out "
+                       "of tree callback needs to receive every agent "
+                       "report.")),
     cfg.IntOpt("rpc_resources_processing_step",
                default=_constants.RPC_RES_PROCESSING_STEP, min=1,
                help=_("Number of resources for neutron to divide "
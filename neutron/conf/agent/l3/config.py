@@ -111,6 +111,16 @@ OPTS = [
                        'set, neutron-keepalive-state-change will use that '
                        'path to write its logs, instead of loggin in '
                        '/var/log/neutron/ha_confs/<router-id>.')),
+    cfg.IntOpt('router_processing_min_workers', default=4, min=1,
+               help=_('Minimum number of threads processing the router '
+                      'updates. More threads are started, up to '
+                      'router_processing_max_workers, while updates are '
+                      'waiting in the queue, and stop after being idle '
+                      'for a minute.')),
+    cfg.IntOpt('router_processing_max_workers', default=32, min=1,
+               help=_('Maximum number of threads processing the router '
+                      'updates. The updates of a router are always '
+                      'processed by a single thread at a time.')),
 ]
 
 
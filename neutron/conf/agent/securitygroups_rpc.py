@@ -42,7 +42,15 @@ security_group_opts = [
         default=[],
         help=_('Comma-separated list of ethertypes to be permitted, in '
                'hexadecimal (starting with "0x"). For example, "0x4008" '
-               'to permit InfiniBand.'))
+               'to permit InfiniBand.')),
+    cfg.BoolOpt(
+        'incremental_flow_updates',
+        default=False,
+        help=_('Used only by the openvswitch firewall driver. When enabled, '
+               'the driver keeps the set of OpenFlow rules installed for '
+               'each port and, on a port or security group update, only '
+               'adds the missing flows and deletes the stale ones instead '
+               'of removing and recreating all the flows of the port.')),
 ]
 
 
@@ -48,6 +48,23 @@ core_opts = [
                help=_("The maximum number of items returned in a single "
                       "response, value of 'infinite' or negative integer "
                       "means no limit")),
+    cfg.BoolOpt('pagination_use_cursors', default=False,
+                help=_("Use opaque cursors, holding the sort key values of "
+                       "the last item of a page, instead of markers in the "
+                       "pagination links. The database then seeks straight "
+                       "to the next page instead of fetching the marker item "
+                       "first. Cursors are accepted in the 'cursor' query "
+                       "parameter regardless of this option.")),
+    cfg.BoolOpt('stream_list_responses', default=False,
+                help=_("Stream the responses of the list API calls which "
+                       "are neither paginated nor sorted, for the resources "
+                       "whose plugin supports it (ports). The "
+                       "items are loaded from the database, filtered by "
+                       "policy and serialized in chunks, which bounds the "
+                       "memory used by large listings.")),
+    cfg.IntOpt('stream_list_chunk_size', default=500, min=1,
+               help=_("Number of items loaded from the database at once "
+                      "when streaming a list API response.")),
     cfg.ListOpt('default_availability_zones', default=[],
                 help=_("Default value of availability zone hints. The "
                        "availability zone aware schedulers use this when "
@@ -131,6 +148,27 @@ core_opts = [
                help=_("Neutron IPAM (IP address management) driver to use. "
                       "By default, the reference implementation of the "
                       "Neutron IPAM driver is used.")),
+    cfg.IntOpt('ipam_allocation_shards', default=1, min=1,
+               help=_("Number of shards the allocation pools of a subnet "
+                      "are split into by the reference IPAM driver. Each "
+                      "API worker draws its random addresses from the shard "
+                      "selected by its process ID, and from the whole "
+                      "subnet once this shard is exhausted. The free IP "
+                      "address ranges are split at the shard boundaries, so "
+                      "that the workers update different rows. This reduces "
+                      "the duplicate allocations, and thus the DB retries, "
+                      "when many ports are concurrently created on the same "
+                      "subnet. Workers whose process IDs are equal modulo "
+                      "the number of shards share the same shard. The "
+                      "default value of 1 draws every address from the "
+                      "whole subnet.")),
+    cfg.StrOpt('ipam_metrics_file',
+               help=_("If set, the reference IPAM driver periodically "
+                      "writes its allocation metrics (latency, DB retries "
+                      "and stale candidate addresses) to this file, in the "
+                      "Prometheus text format. The process ID is appended "
+                      "to the file name so that each API worker writes its "
+                      "own file.")),
     cfg.BoolOpt('vlan_transparent', default=None,
                 deprecated_for_removal=True,
                 deprecated_reason=_(
@@ -87,6 +87,22 @@ ml2_opts = [
                       "Neutron server and the mechanism driver agents; it is "
                       "recommended not to change it once any resource "
                       "provider register has been created.")),
+    cfg.FloatOpt('resource_push_coalesce_interval',
+                 default=0, min=0,
+                 help=_("Time, in seconds, during which the changes of the "
+                        "ports, networks, subnets, security groups, "
+                        "security group rules and address groups are "
+                        "collected before pushing them to the agents. "
+                        "Several changes of the same resource in this "
+                        "interval are sent once, with its latest state, and "
+                        "the changed resources of the same type are sent "
+                        "together in batches. The value 0 pushes every "
+                        "change immediately.")),
+    cfg.IntOpt('resource_push_batch_size',
+               default=100, min=1,
+               help=_("Maximum number of resources sent in a single push "
+                      "message to the agents when "
+                      "resource_push_coalesce_interval is enabled.")),
 ]
 
 
@@ -121,6 +121,36 @@ ovn_opts = [
                          "OVS to OVN.")],
                help=_('The synchronization mode of OVN_Northbound OVSDB '
                       'with Neutron DB.')),
+    cfg.IntOpt('neutron_sync_shard_size',
+               default=0,
+               min=0,
+               help=_('Number of networks synchronized together, as one '
+                      'shard, when the networks, ports and DHCP options of '
+                      'the OVN_Northbound OVSDB are synchronized with the '
+                      'Neutron DB. Only the Neutron resources of one shard '
+                      'are loaded at a time. If this is zero, all the '
+                      'networks are synchronized in a single pass.')),
+    cfg.IntOpt('neutron_sync_workers',
+               default=1,
+               min=1,
+               help=_('Number of shards synchronized in parallel. This is '
+                      'only used if "neutron_sync_shard_size" is set.')),
+    cfg.StrOpt('neutron_sync_checkpoint_file',
+               help=_('File used to record the progress of the '
+                      'synchronization of the OVN_Northbound OVSDB with the '
+                      'Neutron DB. If a synchronization is interrupted, the '
+                      'next one with the same mode skips the steps and '
+                      'shards already completed. The file is removed once '
+                      'the synchronization completes.')),
+    cfg.IntOpt('neutron_sync_checkpoint_max_age',
+               default=3600,
+               min=1,
+               help=_('Maximum age, in seconds, of the synchronization '
+                      'recorded in the "neutron_sync_checkpoint_file" '
+                      'file for it to be resumed. An older checkpoint is '
+                      'ignored and the synchronization starts over, as the '
+                      'resources synchronized by the interrupted one may '
+                      'have changed since.')),
     cfg.StrOpt("ovn_l3_scheduler",
                default=ovn_const.OVN_L3_SCHEDULER_LEASTLOADED,
                choices=[(ovn_const.OVN_L3_SCHEDULER_LEASTLOADED,
@@ -150,6 +180,12 @@ ovn_opts = [
                default="INFO",
                choices=list(VLOG_LEVELS.keys()),
                help=_("The log level used for OVSDB")),
+    cfg.StrOpt('ovsdb_event_metrics_file',
+               help=_('If set, the time spent matching and running the OVN '
+                      'OVSDB row events is periodically written to this '
+                      'file, in the Prometheus text format. The process ID '
+                      'is appended to the file name so that each worker '
+                      'writes its own file.')),
     cfg.BoolOpt('ovn_metadata_enabled',
                 default=False,
                 help=_('Whether to use metadata service.')),
@@ -399,6 +435,26 @@ def get_ovn_neutron_sync_mode():
     return cfg.CONF.ovn.neutron_sync_mode
 
 
+def get_ovn_neutron_sync_shard_size():
+    return cfg.CONF.ovn.neutron_sync_shard_size
+
+
+def get_ovn_neutron_sync_workers():
+    return cfg.CONF.ovn.neutron_sync_workers
+
+
+def get_ovn_neutron_sync_checkpoint_file():
+    return cfg.CONF.ovn.neutron_sync_checkpoint_file
+
+
+def get_ovn_neutron_sync_checkpoint_max_age():
+    return cfg.CONF.ovn.neutron_sync_checkpoint_max_age
+
+
+def get_ovn_ovsdb_event_metrics_file():
+    return cfg.CONF.ovn.ovsdb_event_metrics_file
+
+
 def get_ovn_l3_scheduler():
     return cfg.CONF.ovn.ovn_l3_scheduler
 
@@ -249,6 +249,41 @@ agent_opts = [
                        "traffic. This will aslo change the pipleline for "
                        "ingress traffic to ports without security, the final "
                        "output action will be hit in table 94. ")),
+    cfg.IntOpt('port_processing_chunk_size', default=0, min=0,
+               help=_("Number of added or updated ports processed together "
+                      "in a chunk during an agent loop iteration. When set "
+                      "to a value greater than 0 and more ports need to be "
+                      "processed, the ports are split in chunks and the "
+                      "details of the next chunk are retrieved from the "
+                      "server while the ports of the current chunk are "
+                      "wired. This reduces the time needed to have all the "
+                      "ports ACTIVE after an agent restart. The value 0 "
+                      "disables this mode.")),
+    cfg.BoolOpt('compact_resource_cache', default=False,
+                help=_("Store the ports, networks and security group rules "
+                       "received from the server in a compact form in the "
+                       "agent resource cache, instead of as full versioned "
+                       "objects, which are rebuilt when needed. This "
+                       "reduces the agent memory usage with many ports at "
+                       "the cost of some CPU time on lookups.")),
+    cfg.BoolOpt('log_resource_cache_memory_usage', default=False,
+                help=_("Log the number of resources in the agent resource "
+                       "cache and their approximate memory usage, per "
+                       "resource type, after each full resync. Computing "
+                       "it walks all the cached resources.")),
+    cfg.StrOpt('resource_cache_snapshot_file',
+               help=_("File where the agent saves a snapshot of its "
+                      "resource cache. When the agent starts, the resources "
+                      "of the snapshot are only pulled again from the "
+                      "server if their revision number changed, which "
+                      "reduces the load on the server when many agents "
+                      "restart at once. Not set by default, which disables "
+                      "the snapshot.")),
+    cfg.IntOpt('resource_cache_snapshot_interval', default=300, min=0,
+               help=_("Interval, in seconds, between two saves of the "
+                      "resource cache snapshot. The snapshot is also saved "
+                      "when the agent stops. The value 0 only saves it "
+                      "when the agent stops.")),
 ]
 
 dhcp_opts = [
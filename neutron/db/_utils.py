@@ -18,6 +18,7 @@ NOTE: This module shall not be used by external projects. It will be moved
 import contextlib
 
 from neutron_lib.db import api as db_api
+from neutron_lib.db import utils as ndb_utils
 from oslo_log import log as logging
 from oslo_utils import excutils
 
@@ -37,6 +38,62 @@ def context_if_transaction(context, transaction, writer=True):
     return _noop_context_manager()
 
 
+class _CursorMarker:
+    """Stand-in for the marker item of a page, built from a cursor.
+
+    Only the sort keys requested are known; any other key, like the unique
+    keys added by model_query to make the order deterministic, is None and
+    is thus skipped by the pagination criteria, which is safe as long as the
+    primary key is one of the sort keys.
+    """
+
+    def __init__(self, sort_values):
+        self.__dict__.update(sort_values)
+
+    def __getattr__(self, name):
+        return None
+
+
+def get_marker_obj(plugin, context, resource, limit, marker, sorts=None):
+    """Retrieve a resource marker object.
+
+    Same as neutron_lib.db.utils.get_marker_obj, except that when the
+    marker is a pagination cursor holding the values of all the sort keys
+    (see neutron.api.api_common.PaginationCursor), the marker object is
+    built from them instead of being fetched from the database.
+    """
+    sort_values = getattr(marker, 'sort_values', None)
+    if limit and sort_values and sorts:
+        sort_keys = [key for key, _direction in sorts]
+        if 'id' in sort_keys and all(key in sort_values
+                                     for key in sort_keys):
+            return _CursorMarker({key: sort_values[key]
+                                  for key in sort_keys})
+    return ndb_utils.get_marker_obj(plugin, context, resource, limit, marker)
+
+
+def get_projected_collection(query, model, columns, sorts=None):
+    """Return the items of a collection query as dicts of columns.
+
+    Only the given columns of the model are selected, instead of loading the
+    ORM objects with their relationships, which is enough when all the
+    requested fields map to columns. As the ORM query would, the rows are
+    deduplicated, which is why the sort keys are selected as well: the
+    ordering columns must be part of a DISTINCT select list.
+
+    :param query: The collection query of the model.
+    :param model: The model queried.
+    :param columns: The names of the columns to select.
+    :param sorts: The sort keys of the query, if any.
+    :returns: A list of dicts, mapping the column names to their values.
+    """
+    columns = sorted(set(columns).union(key for key, _direction
+                                        in sorts or []))
+    query = query.with_entities(*[getattr(model, column)
+                                  for column in columns]).distinct()
+    return [dict(zip(columns, row)) for row in query]
+
+
 def safe_creation(context, create_fn, delete_fn, create_bindings,
                   transaction=True):
     '''This function wraps logic of object creation in safe atomic way.
@@ -368,6 +368,46 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
                       'delta': delta,
                       'agent_timestamp': agent_timestamp})
 
+    def _is_heartbeat_only(self, agent, agent_state):
+        """Check whether an agent report only refreshes its heartbeat.
+
+        That is the case when an alive agent, which was not restarted,
+        reports the state already stored in the database. The agent
+        AFTER_UPDATE callbacks have nothing to do with such a report, unless
+        the placement resources of the agent are not synced yet.
+        """
+        if (not cfg.CONF.agent_heartbeat_fast_path or
+                agent_state.get('start_flag') or not agent.is_active):
+            return False
+        configurations = agent_state.get('configurations', {})
+        if ('resource_provider_bandwidths' in configurations and
+                not agent.resources_synced):
+            return False
+        resource_versions = agent_state.get('resource_versions')
+        if resource_versions and resource_versions != agent.resource_versions:
+            return False
+        if ('availability_zone' in agent_state and
+                agent_state['availability_zone'] != agent.availability_zone):
+            return False
+        return (agent_state['binary'] == agent.binary and
+                agent_state['topic'] == agent.topic and
+                self._get_agent_load(agent_state) == agent.load and
+                configurations == agent.configurations)
+
+    def _get_agent_db_values(self, agent_state):
+        res_keys = ['agent_type', 'binary', 'host', 'topic']
+        res = {k: agent_state[k] for k in res_keys}
+        if 'availability_zone' in agent_state:
+            res['availability_zone'] = agent_state['availability_zone']
+        res['configurations'] = jsonutils.dumps(
+            agent_state.get('configurations', {}))
+        resource_versions_dict = agent_state.get('resource_versions')
+        if resource_versions_dict:
+            res['resource_versions'] = jsonutils.dumps(
+                resource_versions_dict)
+        res['load'] = self._get_agent_load(agent_state)
+        return res
+
     @db_api.retry_if_session_inactive()
     def create_or_update_agent(self, context, agent_state,
                                agent_timestamp=None):
@@ -378,22 +418,26 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
         It could be used by agent to do some sync with the server if needed.
         """
         status = agent_consts.AGENT_ALIVE
+        event_type = None
         with db_api.CONTEXT_WRITER.using(context):
-            res_keys = ['agent_type', 'binary', 'host', 'topic']
-            res = {k: agent_state[k] for k in res_keys}
-            if 'availability_zone' in agent_state:
-                res['availability_zone'] = agent_state['availability_zone']
             configurations_dict = agent_state.get('configurations', {})
-            res['configurations'] = jsonutils.dumps(configurations_dict)
-            resource_versions_dict = agent_state.get('resource_versions')
-            if resource_versions_dict:
-                res['resource_versions'] = jsonutils.dumps(
-                    resource_versions_dict)
-            res['load'] = self._get_agent_load(agent_state)
             current_time = timeutils.utcnow()
             try:
                 agent = self._get_agent_by_type_and_host(
                     context, agent_state['agent_type'], agent_state['host'])
+            except agent_exc.AgentNotFoundByTypeHost:
+                agent = None
+
+            if agent and self._is_heartbeat_only(agent, agent_state):
+                self._log_heartbeat(agent_state, agent, configurations_dict,
+                                    agent_timestamp)
+                # Only the heartbeat timestamp changed, do not rewrite the
+                # whole row.
+                agent_obj.Agent.update_objects(
+                    context, {'heartbeat_timestamp': current_time},
+                    id=agent.id)
+            elif agent:
+                res = self._get_agent_db_values(agent_state)
                 agent_state_orig = copy.deepcopy(agent_state)
                 agent_state_previous = copy.deepcopy(agent)
                 if not agent.is_active:
@@ -413,7 +457,8 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
                 agent.update_fields(res)
                 agent.update()
                 event_type = events.AFTER_UPDATE
-            except agent_exc.AgentNotFoundByTypeHost:
+            else:
+                res = self._get_agent_db_values(agent_state)
                 agent_state_orig = None
                 agent_state_previous = None
                 res['created_at'] = current_time
@@ -430,6 +475,9 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
         agent_state['agent_status'] = status
         agent_state['admin_state_up'] = agent.admin_state_up
         agent_state['id'] = agent.id
+        if event_type is None:
+            # Heartbeat only, the callbacks have nothing to do
+            return status, agent_state
         registry.publish(resources.AGENT, event_type, self,
                          payload=events.DBEventPayload(
                              context=context, metadata={
@@ -56,12 +56,14 @@ from neutron.common import experimental
 from neutron.common import ipv6_utils
 from neutron.common import utils
 from neutron.conf import experimental as c_exp
+from neutron.db import _utils as db_utils
 from neutron.db import db_base_plugin_common
 from neutron.db import ipam_pluggable_backend
 from neutron.db.models import segment as segment_db
 from neutron.db import models_v2
 from neutron.db import rbac_db_mixin as rbac_mixin
 from neutron.db import rbac_db_models
+from neutron.db import request_cache
 from neutron.db import standardattrdescription_db as stattr_db
 from neutron.extensions import subnetpool_prefix_ops
 from neutron import ipam
@@ -78,6 +80,21 @@ from neutron.objects import subnetpool as subnetpool_obj
 
 LOG = logging.getLogger(__name__)
 
+# The columns of the ports and networks tables whose values are returned
+# as is in the API dicts, see _make_port_dict and _make_network_dict. A list
+# request only asking for these fields (plus the 'shared' flag of the
+# networks) is served without loading the ORM objects.
+PORT_COLUMNS = ('id', 'name', 'network_id', 'project_id', 'mac_address',
+                'admin_state_up', 'status', 'device_id', 'device_owner')
+NETWORK_COLUMNS = ('id', 'name', 'project_id', 'admin_state_up', 'mtu',
+                   'status')
+
+
+def is_projectable(fields, columns, extra_fields=()):
+    """Return True if the fields are all served by the given columns."""
+    return bool(fields) and set(fields).issubset(
+        set(columns).union(extra_fields, ['tenant_id']))
+
 
 def _ensure_subnet_not_used(context, subnet_id):
     models_v2.Subnet.write_lock_register(
@@ -638,8 +655,8 @@ class NeutronDbPluginV2(db_base_plugin_common.DbBasePluginCommon,
     def _get_networks(self, context, filters=None, fields=None,
                       sorts=None, limit=None, marker=None,
                       page_reverse=False):
-        marker_obj = ndb_utils.get_marker_obj(self, context, 'network',
-                                              limit, marker)
+        marker_obj = db_utils.get_marker_obj(self, context, 'network',
+                                             limit, marker, sorts=sorts)
         return model_query.get_collection(
             context, models_v2.Network,
             # if caller needs postprocessing, it should implement it explicitly
@@ -650,10 +667,55 @@ class NeutronDbPluginV2(db_base_plugin_common.DbBasePluginCommon,
             marker_obj=marker_obj,
             page_reverse=page_reverse)
 
+    @db_api.CONTEXT_READER
+    def _get_projected_networks(self, context, filters=None, fields=None,
+                                sorts=None, limit=None, marker=None,
+                                page_reverse=False):
+        """Return the network dicts, only reading the columns needed.
+
+        The fields requested must satisfy is_projectable with
+        NETWORK_COLUMNS and the 'shared' flag, which is computed from the
+        RBAC entries of the networks found.
+        """
+        marker_obj = db_utils.get_marker_obj(self, context, 'network',
+                                             limit, marker, sorts=sorts)
+        query = model_query.get_collection_query(
+            context, models_v2.Network, filters=filters, sorts=sorts,
+            limit=limit, marker_obj=marker_obj, page_reverse=page_reverse)
+        networks = db_utils.get_projected_collection(
+            query, models_v2.Network, NETWORK_COLUMNS, sorts=sorts)
+        if 'shared' in fields and networks:
+            shared_ids = self._get_shared_network_ids(
+                context, [net['id'] for net in networks])
+            for net in networks:
+                net['shared'] = net['id'] in shared_ids
+        for net in networks:
+            net['tenant_id'] = net['project_id']
+        items = [ndb_utils.resource_fields(net, fields) for net in networks]
+        if limit and page_reverse:
+            items.reverse()
+        return items
+
+    @staticmethod
+    def _get_shared_network_ids(context, network_ids):
+        """Return the IDs of the networks shared to the context project."""
+        matches = ['*'] + ([context.project_id] if context.project_id
+                           else [])
+        rbac = rbac_db_models.NetworkRBAC
+        query = context.session.query(rbac.object_id).filter(
+            rbac.object_id.in_(network_ids),
+            rbac.action == rbac_db_models.ACCESS_SHARED,
+            rbac.target_project.in_(matches))
+        return {row.object_id for row in query}
+
     @db_api.retry_if_session_inactive()
     def get_networks(self, context, filters=None, fields=None,
                      sorts=None, limit=None, marker=None,
                      page_reverse=False):
+        if is_projectable(fields, NETWORK_COLUMNS, ['shared']):
+            return self._get_projected_networks(
+                context, filters=filters, fields=fields, sorts=sorts,
+                limit=limit, marker=marker, page_reverse=page_reverse)
         make_network_dict = functools.partial(self._make_network_dict,
                                               context=context)
         return [
@@ -1229,8 +1291,10 @@ class NeutronDbPluginV2(db_base_plugin_common.DbBasePluginCommon,
 
     @db_api.retry_if_session_inactive()
     def get_subnets_by_network(self, context, network_id):
-        return [self._make_subnet_dict(subnet_obj) for subnet_obj in
-                self._get_subnets_by_network(context, network_id)]
+        return request_cache.get_or_load(
+            context, request_cache.SUBNETS, network_id,
+            lambda: [self._make_subnet_dict(subnet_obj) for subnet_obj in
+                     self._get_subnets_by_network(context, network_id)])
 
     def _validate_address_scope_id(self, context, address_scope_id,
                                    subnetpool_id, sp_prefixes, ip_version):
@@ -1733,8 +1797,8 @@ class NeutronDbPluginV2(db_base_plugin_common.DbBasePluginCommon,
     def get_ports(self, context, filters=None, fields=None,
                   sorts=None, limit=None, marker=None,
                   page_reverse=False):
-        marker_obj = ndb_utils.get_marker_obj(self, context, 'port',
-                                              limit, marker)
+        marker_obj = db_utils.get_marker_obj(self, context, 'port',
+                                             limit, marker, sorts=sorts)
         lazy_fields = [models_v2.Port.port_forwardings,
                        models_v2.Port.distributed_port_binding]
         query = self._get_ports_query(context, filters=filters,
@@ -1742,12 +1806,51 @@ class NeutronDbPluginV2(db_base_plugin_common.DbBasePluginCommon,
                                       marker_obj=marker_obj,
                                       page_reverse=page_reverse,
                                       lazy_fields=lazy_fields)
-        items = [self._make_port_dict(c, fields, bulk=True) for c in query]
-        resource_extend.apply_funcs(port_def.COLLECTION_NAME_BULK, items, None)
+        if is_projectable(fields, PORT_COLUMNS):
+            # NOTE: no relationship is loaded and no extension is run, as
+            # nothing they provide is requested
+            items = [ndb_utils.resource_fields(port, fields) for port in
+                     db_utils.get_projected_collection(
+                         query, models_v2.Port, PORT_COLUMNS, sorts=sorts)]
+        else:
+            items = [self._make_port_dict(c, fields, bulk=True)
+                     for c in query]
+            resource_extend.apply_funcs(port_def.COLLECTION_NAME_BULK,
+                                        items, None)
         if limit and page_reverse:
             items.reverse()
         return items
 
+    def iter_ports(self, context, filters=None, fields=None, sorts=None,
+                   chunk_size=500):
+        """Yield the ports matching the filters, in lists of chunk_size.
+
+        The IDs of the ports are retrieved first, the ports are then loaded
+        and turned into dicts one chunk at a time, each in its own reader
+        transaction, so that the memory used doesn't depend on the number of
+        ports. A port deleted while iterating is skipped.
+        """
+        with db_api.CONTEXT_READER.using(context):
+            query = self._get_ports_query(context, filters=filters,
+                                          sorts=sorts)
+            port_ids = [port_id for port_id, in
+                        query.with_entities(models_v2.Port.id)]
+        lazy_fields = [models_v2.Port.port_forwardings,
+                       models_v2.Port.distributed_port_binding]
+        for i in range(0, len(port_ids), chunk_size):
+            chunk_ids = port_ids[i:i + chunk_size]
+            with db_api.CONTEXT_READER.using(context):
+                query = model_query.get_collection_query(
+                    context, models_v2.Port, filters={'id': chunk_ids},
+                    lazy_fields=lazy_fields)
+                ports = {port.id: port for port in query}
+                items = [self._make_port_dict(ports[port_id], fields,
+                                              bulk=True)
+                         for port_id in chunk_ids if port_id in ports]
+                resource_extend.apply_funcs(port_def.COLLECTION_NAME_BULK,
+                                            items, None)
+            yield items
+
     @db_api.retry_if_session_inactive()
     @db_api.CONTEXT_READER
     def get_ports_count(self, context, filters=None):
@@ -0,0 +1,35 @@
+# Copyright 2026 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from alembic import op
+
+
+"""add index to standardattributes.updated_at
+
+Revision ID: 3c7e1b9d5a24
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-18 09:12:40.517203
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3c7e1b9d5a24'
+down_revision = 'a1b2c3d4e5f6'
+
+
+def upgrade():
+    index_name = 'ix_standardattributes_updated_at'
+    op.create_index(index_name, 'standardattributes', ['updated_at'],
+                    unique=False)
@@ -0,0 +1,49 @@
+# Copyright 2026 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from alembic import op
+import sqlalchemy as sa
+
+
+"""add ipamfreeranges table
+
+Revision ID: 7f4b2c9e1d63
+Revises: 3c7e1b9d5a24
+Create Date: 2026-10-18 15:02:11.348761
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '7f4b2c9e1d63'
+down_revision = '3c7e1b9d5a24'
+
+
+def upgrade():
+    # The free ranges of the existing subnets are built by the IPAM driver
+    # the first time it allocates an address on them.
+    op.create_table(
+        'ipamfreeranges',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('ipam_subnet_id', sa.String(length=36), nullable=False),
+        sa.Column('first_ip', sa.String(length=33), nullable=False),
+        sa.Column('last_ip', sa.String(length=33), nullable=False),
+        sa.ForeignKeyConstraint(['ipam_subnet_id'], ['ipamsubnets.id'],
+                                ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.Index('ix_ipamfreeranges_ipam_subnet_id_first_ip',
+                 'ipam_subnet_id', 'first_ip'),
+        sa.Index('ix_ipamfreeranges_ipam_subnet_id_last_ip',
+                 'ipam_subnet_id', 'last_ip'),
+    )
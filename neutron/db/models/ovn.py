@@ -14,6 +14,7 @@
 #    under the License.
 
 from neutron_lib.db import model_base
+from neutron_lib.db import standard_attr
 from oslo_utils import timeutils
 import sqlalchemy as sa
 from sqlalchemy.dialects import sqlite
@@ -46,6 +47,12 @@ class OVNRevisionNumbers(model_base.BASEV2):
     )
 
 
+# Used by the OVN maintenance task to only look for inconsistencies in the
+# resources updated since its last check.
+sa.Index('ix_standardattributes_updated_at',
+         standard_attr.StandardAttribute.updated_at)
+
+
 class OVNHashRing(model_base.BASEV2):
     __tablename__ = 'ovn_hash_ring'
 
@@ -144,6 +144,21 @@ def get_active_nodes(context, interval, group_name, from_host=False):
     return query.all()
 
 
+@db_api.retry_if_session_inactive()
+@db_api.CONTEXT_READER
+def get_active_nodes_signature(context, interval, group_name):
+    """Get a signature of the active nodes, cheaper than reading them.
+
+    The signature changes when a node is added, removed or becomes
+    inactive. A node becoming inactive while another one, older than the
+    newest node, becomes active again is not detected.
+    """
+    query = _get_nodes_query(context, interval, group_name)
+    return tuple(query.with_entities(
+        func.count(), func.min(ovn_models.OVNHashRing.created_at),
+        func.max(ovn_models.OVNHashRing.created_at)).one())
+
+
 @db_api.retry_if_session_inactive()
 @db_api.CONTEXT_READER
 def count_offline_nodes(context, interval, group_name):
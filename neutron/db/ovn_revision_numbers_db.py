@@ -58,6 +58,11 @@ INITIAL_REV_NUM = -1
 # it an inconsistency
 INCONSISTENCIES_OLDER_THAN = 60
 
+# Time (in seconds) subtracted from the start of an inconsistencies check to
+# get the "dirty since" marker of the next one. It covers the entries skipped
+# for being too new and the transactions still in flight during the check.
+DIRTY_SINCE_MARGIN = 60
+
 
 # 1:2 mapping for OVN, neutron router ports are simple ports, but
 # for OVN we handle LSP & LRP objects
@@ -208,9 +213,91 @@ def bump_revision(context, resource, resource_type):
               'rev_num': revision_number})
 
 
-def get_inconsistent_resources(context):
+@db_api.retry_if_session_inactive()
+def bump_revisions(context, resources, resource_type):
+    """Bump the revision number of several resources of the same type.
+
+    This is the bulk version of ``bump_revision``, the standard attribute
+    IDs and the revision rows of all the resources are read with one query
+    each instead of one per resource.
+    """
+    if not resources:
+        return
+
+    resource_ids = [resource['id'] for resource in resources]
+    model = STD_ATTR_MAP[resource_type]
+    bumped = []
+    with db_api.CONTEXT_WRITER.using(context):
+        std_attr_ids = dict(context.session.query(
+            model.id, model.standard_attr_id).filter(
+            model.id.in_(resource_ids)))
+        for resource_id in resource_ids:
+            if resource_id not in std_attr_ids:
+                raise StandardAttributeIDNotFound(resource_uuid=resource_id)
+
+        rows = {row.resource_uuid: row for row in
+                context.session.query(ovn_models.OVNRevisionNumbers).filter(
+                    ovn_models.OVNRevisionNumbers.resource_uuid.in_(
+                        resource_ids),
+                    ovn_models.OVNRevisionNumbers.resource_type ==
+                    resource_type)}
+        for resource in resources:
+            revision_number = ovn_utils.get_revision_number(
+                resource, resource_type)
+            std_attr_id = std_attr_ids[resource['id']]
+            row = rows.get(resource['id'])
+            if row is None:
+                LOG.warning(
+                    'No revision row found for %(res_uuid)s (type: '
+                    '%(res_type)s) when bumping the revision number. '
+                    'Creating one.', {'res_uuid': resource['id'],
+                                      'res_type': resource_type})
+                row = ovn_models.OVNRevisionNumbers(
+                    resource_uuid=resource['id'],
+                    resource_type=resource_type,
+                    standard_attr_id=std_attr_id,
+                    revision_number=revision_number)
+                context.session.add(row)
+                rows[resource['id']] = row
+                bumped.append(resource['id'])
+                continue
+
+            row.standard_attr_id = std_attr_id
+            if revision_number < row.revision_number:
+                LOG.debug(
+                    'Skip bumping the revision number for %(res_uuid)s '
+                    '(type: %(res_type)s) to %(rev_num)d. A higher version '
+                    'is already registered in the database (%(new_rev)d)',
+                    {'res_type': resource_type, 'res_uuid': resource['id'],
+                     'rev_num': revision_number,
+                     'new_rev': row.revision_number})
+                continue
+            if revision_number == row.revision_number:  # do nothing
+                continue
+            row.revision_number = revision_number
+            bumped.append(resource['id'])
+    if bumped:
+        LOG.info('Successfully bumped revision number for resources '
+                 '%(res_uuids)s (type: %(res_type)s)',
+                 {'res_uuids': ', '.join(bumped), 'res_type': resource_type})
+
+
+def get_dirty_since_marker():
+    """Get the "dirty since" marker for the next inconsistencies check.
+
+    It must be taken before the current check starts. Only the resources
+    updated after it can become inconsistent after the current check.
+    """
+    return timeutils.utcnow() - datetime.timedelta(
+        seconds=INCONSISTENCIES_OLDER_THAN + DIRTY_SINCE_MARGIN)
+
+
+def get_inconsistent_resources(context, dirty_since=None):
     """Get a list of inconsistent resources.
 
+    :param dirty_since: if given, only the resources updated since then
+                        are checked, using the index on the
+                        standardattributes updated_at column.
     :returns: A list of objects which the revision number from the
               ovn_revision_number and standardattributes tables differs.
     """
@@ -225,6 +312,12 @@ def get_inconsistent_resources(context):
         # Filter out new entries
         query = query.filter(
             standard_attr.StandardAttribute.created_at < time_)
+        if dirty_since is not None:
+            # The update time is not set if the timestamp service plugin is
+            # not loaded.
+            query = query.filter(sa.or_(
+                standard_attr.StandardAttribute.updated_at >= dirty_since,
+                standard_attr.StandardAttribute.updated_at.is_(None)))
         # Filter for resources which revision_number differs
         query = query.filter(
             ovn_models.OVNRevisionNumbers.revision_number !=
@@ -0,0 +1,122 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Request scoped cache of the networks, segments and subnets.
+
+A single port create or update reads the same network, network segments
+and subnets several times (ML2 plugin, type manager, mechanism drivers,
+extensions). The cache is attached to the Neutron context only for the
+duration of the decorated API call, so that it is dropped at the end of
+the request and on every DB retry. Any write to a cached resource done
+with the same context invalidates the cached copy.
+"""
+
+import contextlib
+import copy
+import functools
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+NETWORK = 'network'
+SEGMENTS = 'segments'
+SUBNETS = 'subnets'
+
+_CONTEXT_ATTR = '_request_cache'
+
+
+class RequestCache:
+
+    def __init__(self):
+        self._objects = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(context, kind, key):
+        # The DB queries are scoped by the context project unless the context
+        # is admin, keep the results of elevated and non elevated contexts
+        # apart.
+        return kind, key, context.is_admin, context.project_id
+
+    def get_or_load(self, context, kind, key, loader):
+        cache_key = self._key(context, kind, key)
+        try:
+            value = self._objects[cache_key]
+        except KeyError:
+            self.misses += 1
+            value = self._objects[cache_key] = loader()
+        else:
+            self.hits += 1
+        # The callers are free to modify the returned objects.
+        return copy.deepcopy(value)
+
+    def invalidate(self, kind, key=None):
+        for cache_key in list(self._objects):
+            if cache_key[0] == kind and key in (None, cache_key[1]):
+                del self._objects[cache_key]
+
+
+def get_request_cache(context):
+    """Return the request cache of the context, None if not enabled."""
+    return getattr(context, _CONTEXT_ATTR, None)
+
+
+@contextlib.contextmanager
+def enabled(context, name):
+    """Enable the request cache on a context for the enclosed code.
+
+    Nested calls reuse the cache of the outermost one, which logs the hit
+    and miss counts when the request ends.
+    """
+    if get_request_cache(context) is not None:
+        yield
+        return
+
+    cache = RequestCache()
+    setattr(context, _CONTEXT_ATTR, cache)
+    try:
+        yield
+    finally:
+        setattr(context, _CONTEXT_ATTR, None)
+        LOG.debug("Request cache of %(name)s: %(hits)s hits, %(misses)s "
+                  "misses", {'name': name, 'hits': cache.hits,
+                             'misses': cache.misses})
+
+
+def scoped(f):
+    """Enable the request cache during a plugin method call.
+
+    The decorated method must take the Neutron context as its first
+    argument after self.
+    """
+    @functools.wraps(f)
+    def wrapper(self, context, *args, **kwargs):
+        with enabled(context, f.__name__):
+            return f(self, context, *args, **kwargs)
+    return wrapper
+
+
+def get_or_load(context, kind, key, loader):
+    """Return the cached object, calling loader to get it on a miss."""
+    cache = get_request_cache(context)
+    if cache is None:
+        return loader()
+    return cache.get_or_load(context, kind, key, loader)
+
+
+def invalidate(context, kind, key=None):
+    """Drop the cached objects of a kind, all of them if key is None."""
+    cache = get_request_cache(context)
+    if cache is not None:
+        cache.invalidate(kind, key)
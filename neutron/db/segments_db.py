@@ -19,6 +19,7 @@ from neutron_lib.plugins.ml2 import api as ml2_api
 from oslo_log import log as logging
 from oslo_utils import uuidutils
 
+from neutron.db import request_cache
 from neutron.objects import base as base_obj
 from neutron.objects import network as network_obj
 from neutron.services.segments import exceptions as segments_exceptions
@@ -57,6 +58,7 @@ def add_network_segment(context, network_id, segment, segment_index=0,
                              context, resource_id=netseg_obj.id,
                              states=(netseg_obj,)))
         segment['id'] = netseg_obj.id
+        _invalidate_request_cache(context)
     LOG.info("Added segment %(id)s of type %(network_type)s for network "
              "%(network_id)s",
              {'id': netseg_obj.id,
@@ -72,6 +74,7 @@ def update_network_segment(context, segment_id, segmentation_id):
             raise segments_exceptions.SegmentNotFound(segment_id=segment_id)
         netseg_obj[ml2_api.SEGMENTATION_ID] = segmentation_id
         netseg_obj.update()
+        _invalidate_request_cache(context)
 
     LOG.info("Updated segment %(id)s, segmentation_id: %(segmentation_id)s)",
              {'id': segment_id, 'segmentation_id': segmentation_id})
@@ -88,8 +91,16 @@ def get_network_segments(context, network_id, filter_dynamic=False):
                           - None: return all segments (both static and dynamic)
     :returns: list of segment dictionaries
     """
-    return get_networks_segments(
-        context, [network_id], filter_dynamic)[network_id]
+    return request_cache.get_or_load(
+        context, request_cache.SEGMENTS, (network_id, filter_dynamic),
+        lambda: get_networks_segments(
+            context, [network_id], filter_dynamic)[network_id])
+
+
+def _invalidate_request_cache(context):
+    # The segments are also part of the network provider attributes.
+    request_cache.invalidate(context, request_cache.SEGMENTS)
+    request_cache.invalidate(context, request_cache.NETWORK)
 
 
 def get_networks_segments(context, network_ids, filter_dynamic=False):
@@ -161,6 +172,7 @@ def delete_network_segment(context, segment_id):
     """Release a dynamic segment for the params provided if one exists."""
     with db_api.CONTEXT_WRITER.using(context):
         network_obj.NetworkSegment.delete_objects(context, id=segment_id)
+        _invalidate_request_cache(context)
 
 
 def network_segments_exist_in_range(context, network_type, physical_network,
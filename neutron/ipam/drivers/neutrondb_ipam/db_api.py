@@ -13,9 +13,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
+
+import netaddr
 from neutron_lib import constants as const
+from oslo_db import exception as db_exc
 from oslo_utils import uuidutils
 
+from neutron.ipam import exceptions as ipam_exc
 from neutron.objects import ipam as ipam_objs
 
 # Database operations for Neutron's DB-backed IPAM driver
@@ -138,3 +143,163 @@ class IpamSubnetManager:
             context,
             ipam_subnet_id=self._ipam_subnet_id,
             ip_address=ip_address)
+
+    def list_allocations_by_ips(self, context, ip_addresses):
+        """Return the allocations of the subnet among a list of addresses.
+
+        :param context: neutron api request context
+        :param ip_addresses: list of IP addresses to look for
+        :returns: a list of IpamAllocation OVO objects
+        """
+        return ipam_objs.IpamAllocation.get_objects(
+            context, ipam_subnet_id=self._ipam_subnet_id,
+            ip_address=ip_addresses)
+
+    def list_free_ranges(self, context, limit, first_ip=None, last_ip=None):
+        """Return the lowest free IP address ranges of the subnet.
+
+        :param context: neutron api request context
+        :param limit: maximum number of ranges to return
+        :param first_ip: if set, only the ranges ending at or after this IP
+                         address are returned
+        :param last_ip: if set, only the ranges starting at or before this IP
+                        address are returned
+        :returns: a list of IpamFreeRange OVO objects sorted by first_ip
+        """
+        return ipam_objs.IpamFreeRange.get_first_ranges(
+            context, self._ipam_subnet_id, limit, first_ip=first_ip,
+            last_ip=last_ip)
+
+    def create_free_range(self, context, first_ip, last_ip):
+        """Add a range of free IP addresses to the subnet index.
+
+        :param context: neutron api request context
+        :param first_ip: first IP address of the range
+        :param last_ip: last IP address of the range
+        """
+        ipam_objs.IpamFreeRange(
+            context, ipam_subnet_id=self._ipam_subnet_id,
+            first_ip=netaddr.IPAddress(first_ip),
+            last_ip=netaddr.IPAddress(last_ip)).create()
+
+    def delete_free_ranges(self, context):
+        """Remove all the free IP address ranges of the subnet.
+
+        :param context: neutron api request context
+        """
+        ipam_objs.IpamFreeRange.delete_objects(
+            context, ipam_subnet_id=self._ipam_subnet_id)
+
+    def _get_free_range(self, context, for_update, **kwargs):
+        return ipam_objs.IpamFreeRange.get_range(
+            context, self._ipam_subnet_id, for_update=for_update, **kwargs)
+
+    def _changed(self):
+        # The free ranges were changed by another transaction and the change
+        # could not be applied again, the whole transaction is retried.
+        return db_exc.RetryRequest(ipam_exc.IpamFreeRangesChanged(
+            subnet_id=self._ipam_subnet_id))
+
+    def _change_free_ranges(self, change):
+        """Apply a change to the free ranges of the subnet.
+
+        The change is applied to the free ranges it reads, only if they were
+        not modified since they were read. It returns False if one of them
+        was modified, for instance by a concurrent allocation of another IP
+        address of the same range. The ranges are then read again with a
+        locking read, which returns their last committed state, and the
+        change is applied again. A RetryRequest is only raised if this fails
+        too.
+
+        :param change: function applying the change, called with the
+                       for_update argument to use when reading the ranges
+        """
+        if not change(for_update=False) and not change(for_update=True):
+            raise self._changed()
+
+    def remove_free_ip(self, context, ip_address):
+        """Remove an IP address from the free ranges of the subnet.
+
+        The ranges holding the address are shrunk or split around it, see
+        _change_free_ranges about their concurrent modifications.
+
+        :param context: neutron api request context
+        :param ip_address: the IP address that is no longer free
+        """
+        ip_address = netaddr.IPAddress(ip_address)
+
+        def remove(for_update):
+            # The ranges already changed do not hold the address anymore,
+            # they are not read again if the change is applied again.
+            for free_range in ipam_objs.IpamFreeRange.get_ranges_with_ip(
+                    context, self._ipam_subnet_id, ip_address,
+                    for_update=for_update):
+                first_ip, last_ip = free_range.first_ip, free_range.last_ip
+                if first_ip == last_ip:
+                    if not ipam_objs.IpamFreeRange.delete_range(context,
+                                                                free_range):
+                        return False
+                elif ip_address == first_ip:
+                    if not ipam_objs.IpamFreeRange.update_range(
+                            context, free_range, ip_address + 1, last_ip):
+                        return False
+                else:
+                    if not ipam_objs.IpamFreeRange.update_range(
+                            context, free_range, first_ip, ip_address - 1):
+                        return False
+                    if ip_address != last_ip:
+                        self.create_free_range(context, ip_address + 1,
+                                               last_ip)
+            return True
+
+        self._change_free_ranges(remove)
+
+    def add_free_ip(self, context, ip_address, split_before=()):
+        """Add an IP address to the free ranges of the subnet.
+
+        The address is merged with the adjacent free ranges, if any, see
+        _change_free_ranges about their concurrent modifications.
+
+        :param context: neutron api request context
+        :param ip_address: the IP address that is free again
+        :param split_before: IP addresses (as integers) which must remain
+                             the first address of a free range, the ranges
+                             are not merged across them
+        """
+        ip_address = netaddr.IPAddress(ip_address)
+
+        def add(for_update):
+            previous_range = next_range = None
+            # netaddr raises IndexError past the lowest and highest
+            # addresses.
+            if int(ip_address) not in split_before:
+                with contextlib.suppress(IndexError):
+                    previous_range = self._get_free_range(
+                        context, for_update, last_ip=ip_address - 1)
+            if int(ip_address) + 1 not in split_before:
+                with contextlib.suppress(IndexError):
+                    next_range = self._get_free_range(
+                        context, for_update, first_ip=ip_address + 1)
+
+            if previous_range and next_range:
+                if not ipam_objs.IpamFreeRange.update_range(
+                        context, previous_range, previous_range.first_ip,
+                        next_range.last_ip):
+                    return False
+                # The merge cannot be applied again once the previous range
+                # was extended.
+                if not ipam_objs.IpamFreeRange.delete_range(context,
+                                                            next_range):
+                    raise self._changed()
+                return True
+            if previous_range:
+                return ipam_objs.IpamFreeRange.update_range(
+                    context, previous_range, previous_range.first_ip,
+                    ip_address)
+            if next_range:
+                return ipam_objs.IpamFreeRange.update_range(
+                    context, next_range, ip_address, next_range.last_ip)
+            self.create_free_range(context, ip_address, ip_address)
+            return True
+
+        self._change_free_ranges(add)
@@ -69,3 +69,30 @@ class IpamAllocation(model_base.BASEV2):
                                              ondelete="CASCADE"),
                                primary_key=True,
                                nullable=False)
+
+
+class IpamFreeRange(model_base.BASEV2, model_base.HasId):
+    """Range of IP addresses of an IPAM subnet that are not allocated.
+
+    The free ranges are an index over the allocation pools and the IP
+    allocations of a subnet, so that addresses can be picked without
+    loading every allocation of the subnet. The boundaries are stored as
+    sortable keys (see neutron.objects.ipam.ip_to_key) to let the database
+    order the ranges and look up the range holding an IP address.
+    """
+
+    __tablename__ = 'ipamfreeranges'
+    __table_args__ = (
+        sa.Index('ix_ipamfreeranges_ipam_subnet_id_first_ip',
+                 'ipam_subnet_id', 'first_ip'),
+        sa.Index('ix_ipamfreeranges_ipam_subnet_id_last_ip',
+                 'ipam_subnet_id', 'last_ip'),
+        model_base.BASEV2.__table_args__,
+    )
+
+    ipam_subnet_id = sa.Column(sa.String(36),
+                               sa.ForeignKey('ipamsubnets.id',
+                                             ondelete="CASCADE"),
+                               nullable=False)
+    first_ip = sa.Column(sa.String(33), nullable=False)
+    last_ip = sa.Column(sa.String(33), nullable=False)
@@ -13,18 +13,24 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
+import functools
 import itertools
+import os
 import random
+import time
 
 import netaddr
 from neutron_lib.db import api as db_api
 from neutron_lib import exceptions as n_exc
 from neutron_lib.plugins import directory
+from oslo_config import cfg
 from oslo_db import exception as db_exc
 from oslo_log import log
 from oslo_utils import uuidutils
 
 from neutron._i18n import _
+from neutron.common import metrics
 from neutron.ipam import driver as ipam_base
 from neutron.ipam.drivers.neutrondb_ipam import db_api as ipam_db_api
 from neutron.ipam import exceptions as ipam_exc
@@ -38,6 +44,117 @@ MAX_WIN = 1000
 MULTIPLIER = 100
 MAX_WIN_MULTI = MAX_WIN * MULTIPLIER
 
+ALLOCATION_METRIC = 'neutron_ipam_allocation_seconds'
+RETRY_METRIC = 'neutron_ipam_allocation_retries_total'
+STALE_CANDIDATE_METRIC = 'neutron_ipam_stale_candidates_total'
+# Minimum number of seconds between two writes of the metrics file.
+METRICS_WRITE_INTERVAL = 10
+
+METRICS = metrics.MetricsRegistry()
+METRICS.describe(ALLOCATION_METRIC,
+                 'Time spent allocating IP addresses, per request type.')
+METRICS.describe(RETRY_METRIC,
+                 'Port operations failed with a retriable DB error.')
+METRICS.describe(STALE_CANDIDATE_METRIC,
+                 'Candidate IP addresses found already allocated.')
+_metrics_written_at = 0
+
+
+def _write_metrics():
+    global _metrics_written_at
+    if not cfg.CONF.ipam_metrics_file:
+        return
+    now = time.monotonic()
+    if now - _metrics_written_at < METRICS_WRITE_INTERVAL:
+        return
+    _metrics_written_at = now
+    METRICS.write_file('%s.%d' % (cfg.CONF.ipam_metrics_file, os.getpid()))
+
+
+@contextlib.contextmanager
+def _allocation_metrics(request_type):
+    """Measure the time spent by the successful allocations."""
+    start = time.monotonic()
+    try:
+        yield
+        METRICS.observe(ALLOCATION_METRIC, time.monotonic() - start,
+                        type=request_type)
+    finally:
+        _write_metrics()
+
+
+def count_retries(f):
+    """Count the retriable DB errors raised by a port operation.
+
+    The duplicate allocations of an IP address are mostly detected when the
+    transaction of the port operation is flushed or committed, after the
+    IPAM driver returned. This decorator must be applied under
+    retry_if_session_inactive, so that each failed attempt is counted.
+    """
+    @functools.wraps(f)
+    def wrapped(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except Exception as e:
+            if db_api.is_retriable(e):
+                METRICS.inc(RETRY_METRIC, operation=f.__name__,
+                            error=type(e).__name__)
+                _write_metrics()
+            raise
+    return wrapped
+
+
+def _get_shards(pools):
+    """Return the first and last addresses of the shards of the pools.
+
+    The span of the allocation pools, from their lowest to their highest
+    address, is split in ``ipam_allocation_shards`` contiguous shards. An
+    empty list is returned if the subnet is not sharded.
+    """
+    shards = cfg.CONF.ipam_allocation_shards
+    if shards == 1 or not pools:
+        return []
+    first_ip = min(pool.first for pool in pools)
+    last_ip = max(pool.last for pool in pools)
+    shard_size = (last_ip - first_ip + 1) // shards
+    if not shard_size:
+        return []
+    starts = [first_ip + shard * shard_size for shard in range(shards)]
+    return list(zip(starts, [start - 1 for start in starts[1:]] + [last_ip]))
+
+
+def _get_shard_starts(pools):
+    """Return the addresses where the free ranges of the pools are split."""
+    return [first_ip for first_ip, _last_ip in _get_shards(pools)[1:]]
+
+
+def _split_ranges(ip_ranges, starts):
+    """Split IP address ranges before each of the given addresses."""
+    for ip_range in ip_ranges:
+        first_ip = ip_range.first
+        for start in starts:
+            if first_ip < start <= ip_range.last:
+                yield first_ip, start - 1
+                first_ip = start
+        yield first_ip, ip_range.last
+
+
+def _iter_free_ips(free_ranges):
+    """Yield once each address of free ranges sorted by their first address.
+
+    The free ranges of a subnet may overlap if the index was not maintained
+    consistently, the addresses they share are only yielded once.
+    """
+    highest_ip = None
+    for free_range in free_ranges:
+        first_ip = free_range.first_ip
+        if highest_ip is not None:
+            if free_range.last_ip <= highest_ip:
+                continue
+            first_ip = max(first_ip, highest_ip + 1)
+        yield from netaddr.iter_iprange(first_ip, free_range.last_ip)
+        highest_ip = free_range.last_ip
+
 
 class NeutronDbSubnet(ipam_base.Subnet):
     """Manage IP addresses for Neutron DB IPAM driver.
@@ -58,6 +175,19 @@ class NeutronDbSubnet(ipam_base.Subnet):
                 netaddr.IPAddress(pool.first, ip_version).format(),
                 netaddr.IPAddress(pool.last, ip_version).format())
 
+    @classmethod
+    def create_free_ranges(cls, subnet_manager, context, ip_set, cidr,
+                           pools):
+        # The free ranges are split at the shard boundaries, so that the
+        # workers allocating from different shards update different rows.
+        starts = _get_shard_starts(pools)
+        for first_ip, last_ip in _split_ranges(ip_set, starts):
+            # See create_allocation_pools about the IP version
+            subnet_manager.create_free_range(
+                context,
+                netaddr.IPAddress(first_ip, cidr.version),
+                netaddr.IPAddress(last_ip, cidr.version))
+
     @classmethod
     def create_from_subnet_request(cls, subnet_request, ctx):
         ipam_subnet_id = uuidutils.generate_uuid()
@@ -76,6 +206,9 @@ class NeutronDbSubnet(ipam_base.Subnet):
         # Create IPAM allocation pools
         cls.create_allocation_pools(subnet_manager, ctx, pools,
                                     subnet_request.subnet_cidr)
+        # Nothing is allocated yet, all the pools are free
+        cls.create_free_ranges(subnet_manager, ctx, pools,
+                               subnet_request.subnet_cidr, pools)
 
         return cls(ipam_subnet_id,
                    ctx,
@@ -159,76 +292,108 @@ class NeutronDbSubnet(ipam_base.Subnet):
         return self._generate_ips(context, prefer_next)[0]
 
     def _generate_ips(self, context, prefer_next=False, num_addresses=1):
-        """Generate a set of IPs from the set of available addresses."""
-        allocated_ips = []
-        requested_num_addresses = num_addresses
+        """Generate a set of IPs from the set of available addresses.
+
+        The candidate addresses are read from the free ranges index of the
+        subnet, so that only the lowest free ranges are loaded instead of
+        every allocation of the subnet. As the index may lag behind the
+        allocations (for instance if they were changed by a server not
+        maintaining it), the candidates are checked against the allocations
+        and the index is rebuilt when it cannot satisfy the request.
+
+        Random addresses are drawn from the shard of this worker when the
+        ``ipam_allocation_shards`` option is set, see ``_get_shard``, or from
+        the whole subnet when the shard does not have enough free addresses.
+        """
+        # NOTE(gryf): If there is more than one address, make the window
+        # bigger, so that are chances to fulfill demanded amount of IPs.
+        if num_addresses > 1:
+            window = min(num_addresses * MULTIPLIER, MAX_WIN_MULTI)
+        else:
+            window = MAX_WIN
+        shard = None if prefer_next else self._get_shard()
+
+        rebuilt = False
+        while True:
+            # Each free range holds at least one address.
+            free_ranges = self.subnet_manager.list_free_ranges(
+                context, window, *(shard or ()))
+            av_ips = list(itertools.islice(_iter_free_ips(free_ranges),
+                                           window))
+            if len(av_ips) < num_addresses:
+                if shard:
+                    shard = None
+                    continue
+                if rebuilt:
+                    raise ipam_exc.IpAddressGenerationFailure(
+                        subnet_id=self.subnet_manager.neutron_id)
+                self._rebuild_free_ranges(context)
+                rebuilt = True
+                continue
 
-        allocations = self.subnet_manager.list_allocations(context)
+            if prefer_next:
+                candidates = av_ips[:num_addresses]
+            else:
+                # Maximize randomness by using the random module's built in
+                # sampling function
+                candidates = random.sample(av_ips, num_addresses)
+            candidates = [str(ip) for ip in candidates]
+
+            allocations = self.subnet_manager.list_allocations_by_ips(
+                context, candidates)
+            if not allocations:
+                return candidates
+            # The index is stale, fix it before looking for new candidates.
+            METRICS.inc(STALE_CANDIDATE_METRIC, len(allocations))
+            for allocation in allocations:
+                self.subnet_manager.remove_free_ip(context,
+                                                   allocation.ip_address)
+
+    def _get_shard(self):
+        """Return the first and last addresses of the shard of this worker.
+
+        The shard only depends on the process ID, so that the API workers
+        mostly allocate their addresses from different shards and update
+        different free ranges. Workers whose process IDs are equal modulo
+        the number of shards share the same shard.
+        """
+        shards = _get_shards(self._pools)
+        if not shards:
+            return None
+        ip_version = netaddr.IPNetwork(self._cidr).version
+        return tuple(netaddr.IPAddress(ip, ip_version)
+                     for ip in shards[os.getpid() % len(shards)])
+
+    def _rebuild_free_ranges(self, context):
+        """Rebuild the free ranges index from the pools and allocations."""
+        LOG.debug("Rebuilding the free IP address ranges of subnet %s",
+                  self.subnet_manager.neutron_id)
         # It is better not to use 'netaddr.IPSet.add',
         # because _compact_single_network in 'IPSet.add'
         # is quite time consuming.
         ip_allocations = netaddr.IPSet(
             [netaddr.IPAddress(allocation.ip_address)
-             for allocation in allocations])
-
-        for ip_pool in self.subnet_manager.list_pools(context):
-            ip_set = netaddr.IPSet()
-            ip_set.add(netaddr.IPRange(ip_pool.first_ip, ip_pool.last_ip))
-            av_set = ip_set.difference(ip_allocations)
-            if av_set.size == 0:
-                continue
-
-            if av_set.size < requested_num_addresses:
-                # All addresses of the address pool are allocated
-                # for the first time and the remaining addresses
-                # will be allocated in the next address pools.
-                allocated_num_addresses = av_set.size
-            else:
-                # All expected addresses can be assigned in this loop.
-                allocated_num_addresses = requested_num_addresses
-
-            if prefer_next:
-                allocated_ip_pool = list(itertools.islice(
-                    av_set, allocated_num_addresses))
-                allocated_ips.extend([str(allocated_ip)
-                                      for allocated_ip in allocated_ip_pool])
-
-                requested_num_addresses -= allocated_num_addresses
-                if requested_num_addresses:
-                    # More addresses need to be allocated in the next loop.
-                    continue
-                return allocated_ips
-
-            window = min(av_set.size, MAX_WIN)
-
-            # NOTE(gryf): If there is more than one address, make the window
-            # bigger, so that are chances to fulfill demanded amount of IPs.
-            if allocated_num_addresses > 1:
-                window = min(av_set.size,
-                             allocated_num_addresses * MULTIPLIER,
-                             MAX_WIN_MULTI)
-
-            if window < allocated_num_addresses:
-                continue
-            # Maximize randomness by using the random module's built in
-            # sampling function
-            av_ips = list(itertools.islice(av_set, 0, window))
-            allocated_ip_pool = random.sample(av_ips,
-                                              allocated_num_addresses)
-            allocated_ips.extend([str(allocated_ip)
-                                  for allocated_ip in allocated_ip_pool])
-
-            requested_num_addresses -= allocated_num_addresses
-            if requested_num_addresses:
-                # More addresses need to be allocated in the next loop.
-                continue
-
-            return allocated_ips
-
-        raise ipam_exc.IpAddressGenerationFailure(
-            subnet_id=self.subnet_manager.neutron_id)
+             for allocation in self.subnet_manager.list_allocations(context)])
+        av_set = netaddr.IPSet(
+            netaddr.IPRange(ip_pool.first_ip, ip_pool.last_ip)
+            for ip_pool in self.subnet_manager.list_pools(context))
+        av_set = av_set.difference(ip_allocations)
+        self.subnet_manager.delete_free_ranges(context)
+        self.create_free_ranges(self.subnet_manager, context,
+                                av_set.iter_ipranges(),
+                                netaddr.IPNetwork(self._cidr), self._pools)
 
     def allocate(self, address_request):
+        if isinstance(address_request, ipam_req.SpecificAddressRequest):
+            request_type = 'specific'
+        elif isinstance(address_request, ipam_req.PreferNextAddressRequest):
+            request_type = 'prefer_next'
+        else:
+            request_type = 'any'
+        with _allocation_metrics(request_type):
+            return self._allocate(address_request)
+
+    def _allocate(self, address_request):
         # NOTE(pbondar): Ipam driver is always called in context of already
         # running transaction, which is started on create_port or upper level.
         # To be able to do rollback/retry actions correctly ipam driver
@@ -253,6 +418,7 @@ class NeutronDbSubnet(ipam_base.Subnet):
             with db_api.CONTEXT_WRITER.using(self._context):
                 self.subnet_manager.create_allocation(self._context,
                                                       ip_address)
+                self.subnet_manager.remove_free_ip(self._context, ip_address)
         except db_exc.DBReferenceError:
             raise n_exc.SubnetNotFound(
                 subnet_id=self.subnet_manager.neutron_id)
@@ -263,7 +429,10 @@ class NeutronDbSubnet(ipam_base.Subnet):
         # returns a list of addresses, as opposed to a single address.
         if not isinstance(address_request, ipam_req.BulkAddressRequest):
             return [self.allocate(address_request)]
-        num_addrs = address_request.num_addresses
+        with _allocation_metrics('bulk'):
+            return self._bulk_allocate(address_request.num_addresses)
+
+    def _bulk_allocate(self, num_addrs):
         allocated_ip_pool = self._generate_ips(self._context,
                                                False,
                                                num_addrs)
@@ -273,6 +442,8 @@ class NeutronDbSubnet(ipam_base.Subnet):
                 for ip_address in allocated_ip_pool:
                     self.subnet_manager.create_allocation(self._context,
                                                           ip_address)
+                    self.subnet_manager.remove_free_ip(self._context,
+                                                       ip_address)
         except db_exc.DBReferenceError:
             raise n_exc.SubnetNotFound(
                 subnet_id=self.subnet_manager.neutron_id)
@@ -282,7 +453,11 @@ class NeutronDbSubnet(ipam_base.Subnet):
         # This is almost a no-op because the Neutron DB IPAM driver does not
         # delete IPAllocation objects at every deallocation. The only
         # operation it performs is to delete an IPAMAllocation entry.
-        self.subnet_manager.delete_allocation(self._context, address)
+        count = self.subnet_manager.delete_allocation(self._context, address)
+        if count and any(netaddr.IPAddress(address) in pool
+                         for pool in self._pools or []):
+            self.subnet_manager.add_free_ip(
+                self._context, address, _get_shard_starts(self._pools))
 
     def _no_pool_changes(self, context, pools):
         """Check if pool updates in db are required."""
@@ -301,6 +476,7 @@ class NeutronDbSubnet(ipam_base.Subnet):
         self.create_allocation_pools(self.subnet_manager, self._context, pools,
                                      cidr)
         self._pools = pools
+        self._rebuild_free_ranges(self._context)
 
     def get_details(self):
         """Return subnet data as a SpecificSubnetRequest"""
@@ -67,6 +67,11 @@ class IpAddressGenerationFailureNoMatchingSubnet(IpAddressGenerationFailure):
                 "network %(network_id)s, service type %(service_type)s.")
 
 
+class IpamFreeRangesChanged(exceptions.Conflict):
+    message = _("The free IP address ranges of IPAM subnet %(subnet_id)s "
+                "were modified concurrently.")
+
+
 class IpamValueInvalid(exceptions.Conflict):
     def __init__(self, message=None):
         self.message = message
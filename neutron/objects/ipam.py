@@ -21,6 +21,22 @@ from neutron.ipam.drivers.neutrondb_ipam import db_models
 from neutron.objects import base
 
 
+def ip_to_key(ip_address):
+    """Return a string key that sorts like the IP address itself.
+
+    The key is the IP version followed by the zero padded hexadecimal value
+    of the address, so that keys of the same IP version compare like the
+    addresses they represent.
+    """
+    ip_address = netaddr.IPAddress(ip_address)
+    return '%d%032x' % (ip_address.version, int(ip_address))
+
+
+def key_to_ip(key):
+    """Return the IP address represented by a key built by ip_to_key."""
+    return netaddr.IPAddress(int(key[1:], 16), int(key[0]))
+
+
 @base.NeutronObjectRegistry.register
 class IpamAllocationPool(base.NeutronDbObject):
     # Version 1.0: Initial version
@@ -103,3 +119,135 @@ class IpamSubnet(base.NeutronDbObject):
     }
 
     synthetic_fields = ['allocation_pools']
+
+
+@base.NeutronObjectRegistry.register
+class IpamFreeRange(base.NeutronDbObject):
+    # Version 1.0: Initial version
+    VERSION = '1.0'
+
+    db_model = db_models.IpamFreeRange
+
+    foreign_keys = {'IpamSubnet': {'ipam_subnet_id': 'id'}}
+
+    fields = {
+        'id': common_types.UUIDField(),
+        'ipam_subnet_id': common_types.UUIDField(),
+        'first_ip': obj_fields.IPAddressField(),
+        'last_ip': obj_fields.IPAddressField(),
+    }
+
+    fields_no_update = ['ipam_subnet_id']
+
+    @classmethod
+    def modify_fields_from_db(cls, db_obj):
+        result = super().modify_fields_from_db(db_obj)
+        if 'first_ip' in result:
+            result['first_ip'] = key_to_ip(result['first_ip'])
+        if 'last_ip' in result:
+            result['last_ip'] = key_to_ip(result['last_ip'])
+        return result
+
+    @classmethod
+    def modify_fields_to_db(cls, fields):
+        result = super().modify_fields_to_db(fields)
+        for field in ('first_ip', 'last_ip'):
+            if field not in result:
+                continue
+            if isinstance(result[field], list):
+                result[field] = [ip_to_key(ip) for ip in result[field]]
+            else:
+                result[field] = ip_to_key(result[field])
+        return result
+
+    @classmethod
+    def get_first_ranges(cls, context, ipam_subnet_id, limit, first_ip=None,
+                         last_ip=None):
+        """Return the lowest free ranges of an IPAM subnet, in order.
+
+        If first_ip or last_ip are set, only the ranges overlapping the
+        addresses from first_ip to last_ip are returned.
+        """
+        with cls.db_context_reader(context):
+            query = context.session.query(cls.db_model).filter(
+                cls.db_model.ipam_subnet_id == ipam_subnet_id)
+            if first_ip is not None:
+                query = query.filter(
+                    cls.db_model.last_ip >= ip_to_key(first_ip))
+            if last_ip is not None:
+                query = query.filter(
+                    cls.db_model.first_ip <= ip_to_key(last_ip))
+            query = query.order_by(cls.db_model.first_ip).limit(limit)
+            return [cls._load_object(context, db_obj) for db_obj in query]
+
+    @classmethod
+    def update_range(cls, context, free_range, first_ip, last_ip):
+        """Change the boundaries of a free range if they are unchanged.
+
+        The range is only updated if it still has the boundaries it was read
+        with, to detect the concurrent changes of the free ranges.
+
+        :returns: True if the range was updated, False otherwise
+        """
+        with cls.db_context_writer(context):
+            query = context.session.query(cls.db_model).filter_by(
+                id=free_range.id,
+                first_ip=ip_to_key(free_range.first_ip),
+                last_ip=ip_to_key(free_range.last_ip))
+            count = query.update({'first_ip': ip_to_key(first_ip),
+                                  'last_ip': ip_to_key(last_ip)})
+        return bool(count)
+
+    @classmethod
+    def delete_range(cls, context, free_range):
+        """Delete a free range if its boundaries are unchanged.
+
+        :returns: True if the range was deleted, False otherwise
+        """
+        with cls.db_context_writer(context):
+            query = context.session.query(cls.db_model).filter_by(
+                id=free_range.id,
+                first_ip=ip_to_key(free_range.first_ip),
+                last_ip=ip_to_key(free_range.last_ip))
+            count = query.delete()
+        return bool(count)
+
+    @classmethod
+    def get_ranges_with_ip(cls, context, ipam_subnet_id, ip_address,
+                           for_update=False):
+        """Return the free ranges of an IPAM subnet holding an IP address.
+
+        If for_update is True, the ranges are read with a locking read.
+        """
+        key = ip_to_key(ip_address)
+        with cls.db_context_reader(context):
+            query = context.session.query(cls.db_model).filter(
+                cls.db_model.ipam_subnet_id == ipam_subnet_id,
+                cls.db_model.first_ip <= key,
+                cls.db_model.last_ip >= key)
+            if for_update:
+                # The rows already loaded in the session are refreshed
+                query = query.with_for_update().populate_existing()
+            return [cls._load_object(context, db_obj) for db_obj in query]
+
+    @classmethod
+    def get_range(cls, context, ipam_subnet_id, first_ip=None, last_ip=None,
+                  for_update=False):
+        """Return the free range of an IPAM subnet with the given bounds.
+
+        If for_update is True, the range is read with a locking read.
+        """
+        with cls.db_context_reader(context):
+            query = context.session.query(cls.db_model).filter(
+                cls.db_model.ipam_subnet_id == ipam_subnet_id)
+            if first_ip is not None:
+                query = query.filter(
+                    cls.db_model.first_ip == ip_to_key(first_ip))
+            if last_ip is not None:
+                query = query.filter(
+                    cls.db_model.last_ip == ip_to_key(last_ip))
+            if for_update:
+                # The rows already loaded in the session are refreshed
+                query = query.with_for_update().populate_existing()
+            db_obj = query.first()
+            return cls._load_object(context, db_obj) if db_obj else None
@@ -12,7 +12,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
+
+from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 import pecan
 from pecan import request
 import webob
@@ -138,12 +142,71 @@ class CollectionsController(utils.NeutronPecanController):
         # NOTE(blogan): these are set in the FieldsAndFiltersHoook
         query_params = request.context['query_params']
         neutron_context = request.context['neutron_context']
+        if self._can_stream(query_params):
+            return self._stream(neutron_context, query_params)
         lister_args = [neutron_context]
         if 'parent_id' in request.context:
             lister_args.append(request.context['parent_id'])
         return {self.collection: self.plugin_lister(*lister_args,
                                                     **query_params)}
 
+    def _can_stream(self, query_params):
+        if not cfg.CONF.stream_list_responses or not self.plugin_iterator:
+            return False
+        if 'parent_id' in request.context:
+            return False
+        # NOTE: only the default order, by primary key, is supported and the
+        # pagination needs all the items
+        pagination_helper = request.context.get('pagination_helper')
+        return not (getattr(pagination_helper, 'limit', None) or
+                    query_params.get('marker') or
+                    query_params.get('page_reverse') or
+                    'sort_key' in request.params)
+
+    def _stream(self, neutron_context, query_params):
+        """Return a response streaming the items as a JSON document.
+
+        The chunks of items yielded by the plugin are stored in the request
+        context, where the hooks processing the response items can wrap them
+        with their own processing, as the response is only serialized once
+        all the hooks ran.
+
+        The first chunk is fetched before the response is returned, so that
+        the errors raised by the plugin for the request, like invalid filters,
+        are still returned with their status code. Once the response started,
+        an error can only truncate the list of items.
+        """
+        iterator_kwargs = {k: v for k, v in query_params.items()
+                           if k in ('filters', 'fields', 'sorts')}
+        chunks = self.plugin_iterator(
+            neutron_context, chunk_size=cfg.CONF.stream_list_chunk_size,
+            **iterator_kwargs)
+        first_chunk = next(chunks, [])
+        request_context = request.context
+        request_context['stream_chunks'] = itertools.chain([first_chunk],
+                                                           chunks)
+
+        def _serialize():
+            yield b'{%s: [' % jsonutils.dump_as_bytes(self.collection)
+            separator = b''
+            try:
+                for chunk in request_context['stream_chunks']:
+                    if not chunk:
+                        continue
+                    yield separator + b', '.join(
+                        jsonutils.dump_as_bytes(item) for item in chunk)
+                    separator = b', '
+            except Exception:
+                LOG.exception('Aborted streaming the %s list response, '
+                              'the list of items is truncated',
+                              self.collection)
+            yield b']}'
+
+        pecan.response.status = 200
+        pecan.response.content_type = 'application/json'
+        pecan.response.app_iter = _serialize()
+        return pecan.response
+
     @utils.when(index, method='HEAD')
     @utils.when(index, method='PATCH')
     @utils.when(index, method='PUT')
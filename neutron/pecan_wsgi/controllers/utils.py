@@ -113,6 +113,7 @@ def _set_del_code(f):
 class NeutronPecanController:
 
     LIST = 'list'
+    ITER = 'iter'
     SHOW = 'show'
     CREATE = 'create'
     UPDATE = 'update'
@@ -166,6 +167,7 @@ class NeutronPecanController:
                                 if self.parent else None)
         self._plugin_handlers = {
             self.LIST: f'get{parent_resource}_{self.collection}',
+            self.ITER: f'iter{parent_resource}_{self.collection}',
             self.SHOW: f'get{parent_resource}_{self.resource}'
         }
         for action in [self.CREATE, self.UPDATE, self.DELETE]:
@@ -221,6 +223,11 @@ class NeutronPecanController:
     def plugin_lister(self):
         return getattr(self.plugin, self._plugin_handlers[self.LIST])
 
+    @property
+    def plugin_iterator(self):
+        """The plugin method yielding the items in chunks, if any."""
+        return getattr(self.plugin, self._plugin_handlers[self.ITER], None)
+
     @property
     def plugin_shower(self):
         return getattr(self.plugin, self._plugin_handlers[self.SHOW])
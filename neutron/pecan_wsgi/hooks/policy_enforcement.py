@@ -156,6 +156,10 @@ class PolicyHook(hooks.PecanHook):
         # NOTE(kevinbenton): extension listing isn't controlled by policy
         if resource == 'extension':
             return
+        if utils.is_streaming(state):
+            self._filter_stream(state, neutron_context, controller, resource,
+                                collection)
+            return
         try:
             data = state.response.json
         except ValueError:
@@ -172,9 +176,6 @@ class PolicyHook(hooks.PecanHook):
             action = controller.plugin_handlers[action_type]
         key = resource if is_single else collection
         to_process = [data[resource]] if is_single else data[collection]
-        # in the single case, we enforce which raises on violation
-        # in the plural case, we just check so violating items are hidden
-        policy_method = policy.enforce if is_single else policy.check
         try:
             # Retrieve once only the fields to be stripped from the items, that
             # are all the same type, instead of calculating this list every
@@ -186,12 +187,22 @@ class PolicyHook(hooks.PecanHook):
             else:
                 fields_to_strip = []
 
+            # in the single case, we enforce which raises on violation
+            # in the plural case, we just check so violating items are hidden
+            if state.request.method != 'GET':
+                allowed = [True] * len(to_process)
+            elif is_single:
+                allowed = [policy.enforce(neutron_context, action,
+                                          to_process[0],
+                                          pluralized=collection)]
+            else:
+                allowed = policy.check_batch(neutron_context, action,
+                                             to_process,
+                                             pluralized=collection)
             resp = [self._filter_attributes(state.request, item,
                                             fields_to_strip)
-                    for item in to_process
-                    if (state.request.method != 'GET' or
-                        policy_method(neutron_context, action, item,
-                                      pluralized=collection))]
+                    for item, item_allowed in zip(to_process, allowed)
+                    if item_allowed]
         except (oslo_policy.PolicyNotAuthorized, oslo_policy.InvalidScope):
             # This exception must be explicitly caught as the exception
             # translation hook won't be called if an error occurs in the
@@ -213,6 +224,30 @@ class PolicyHook(hooks.PecanHook):
             resp = resp[0]
         state.response.json = {key: resp}
 
+    def _filter_stream(self, state, neutron_context, controller, resource,
+                       collection):
+        action = controller.plugin_handlers[controller.SHOW]
+        # all the items have the same type, the fields to strip are retrieved
+        # from the first one only
+        fields_to_strip = None
+
+        def _filter_chunk(chunk):
+            nonlocal fields_to_strip
+            if not chunk:
+                return chunk
+            if fields_to_strip is None:
+                fields_to_strip = self._exclude_attributes_by_policy(
+                    neutron_context, controller, resource, collection,
+                    chunk[0])
+            allowed = policy.check_batch(neutron_context, action, chunk,
+                                         pluralized=collection)
+            return [self._filter_attributes(state.request, item,
+                                            fields_to_strip)
+                    for item, item_allowed in zip(chunk, allowed)
+                    if item_allowed]
+
+        utils.wrap_stream(state, _filter_chunk)
+
     def _filter_attributes(self, request, data, fields_to_strip):
         # This routine will remove the fields that were requested to the
         # plugin for policy evaluation but were not specified in the
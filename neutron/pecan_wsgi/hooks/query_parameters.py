@@ -77,7 +77,7 @@ def _set_filters(state, controller):
         {k: _listify(v) for k, v in params.items()},
         controller.resource_info,
         skips=['fields', 'sort_key', 'sort_dir',
-               'limit', 'marker', 'page_reverse'],
+               'limit', 'marker', 'cursor', 'page_reverse'],
         is_filter_validation_supported=controller.filter_validation)
     return filters
 
@@ -129,6 +129,9 @@ class QueryParametersHook(hooks.PecanHook):
         if (not resource or resource == 'extension' or
                 state.request.method != 'GET'):
             return
+        # NOTE: streamed responses are neither paginated nor sorted in memory
+        if utils.is_streaming(state):
+            return
         try:
             data = state.response.json
         except ValueError:
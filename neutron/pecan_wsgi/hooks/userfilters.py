@@ -14,6 +14,8 @@
 
 from pecan import hooks
 
+from neutron.pecan_wsgi.hooks import utils
+
 
 class UserFilterHook(hooks.PecanHook):
 
@@ -25,6 +27,10 @@ class UserFilterHook(hooks.PecanHook):
         user_fields = state.request.params.getall('fields')
         if not user_fields:
             return
+        if utils.is_streaming(state):
+            utils.wrap_stream(state, lambda chunk: [
+                self._filter_item(i, user_fields) for i in chunk])
+            return
         try:
             data = state.response.json
         except ValueError:
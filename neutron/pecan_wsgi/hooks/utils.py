@@ -28,3 +28,14 @@ def get_controller(state):
 def is_member_action(controller):
     return isinstance(controller,
                       resource.MemberActionController)
+
+
+def is_streaming(state):
+    """Whether the response items are streamed by the controller."""
+    return 'stream_chunks' in state.request.context
+
+
+def wrap_stream(state, func):
+    """Apply func to each chunk of the streamed response items."""
+    chunks = state.request.context['stream_chunks']
+    state.request.context['stream_chunks'] = (func(chunk) for chunk in chunks)
@@ -15,6 +15,7 @@
 
 import base64
 import collections
+import contextlib
 import functools
 import hashlib
 import signal
@@ -22,6 +23,7 @@ import sys
 import threading
 import time
 
+import futurist
 import netaddr
 from neutron_lib.agent import constants as agent_consts
 from neutron_lib.agent import topics
@@ -60,6 +62,7 @@ from neutron.api.rpc.callbacks import resources
 from neutron.api.rpc.handlers import dvr_rpc
 from neutron.api.rpc.handlers import securitygroups_rpc as sg_rpc
 from neutron.common import config
+from neutron.common import metrics
 from neutron.common import utils as n_utils
 from neutron.conf.agent import common as agent_config
 from neutron.conf.plugins.ml2 import config as ml2_config
@@ -87,6 +90,9 @@ PORT_HINTS_TX_STEERING = 'tx-steering'
 PORT_HINTS_TX_STEERING_HASH = 'hash'
 PORT_HINTS_TX_STEERING_THREAD = 'thread'
 
+LOOP_PHASE_METRIC = 'neutron_ovs_agent_loop_phase_seconds'
+LOOP_ITERATION_METRIC = 'neutron_ovs_agent_loop_iteration_seconds'
+
 
 class _mac_mydialect(netaddr.mac_unix):
     word_fmt = '%.2x'
@@ -425,6 +431,21 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         # Initialize iteration counter
         self.iter_num = 0
         self.run_daemon_loop = True
+        self._last_cache_snapshot = time.monotonic()
+        self._cache_snapshot_thread = None
+
+        # Time spent in each phase of the current rpc_loop iteration
+        self._loop_phases = collections.defaultdict(float)
+        # The phases may end in the port processing thread while the
+        # iteration is recorded
+        self._loop_phases_lock = threading.Lock()
+        self._loop_phase_local = threading.local()
+        self.loop_metrics = metrics.MetricsRegistry()
+        self.loop_metrics.describe(
+            LOOP_PHASE_METRIC,
+            'Time spent in each phase of an rpc_loop iteration.')
+        self.loop_metrics.describe(
+            LOOP_ITERATION_METRIC, 'Duration of an rpc_loop iteration.')
 
         self.catch_sigterm = False
         self.catch_sighup = False
@@ -575,7 +596,10 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
             segmentation_id=network[provider_net.SEGMENTATION_ID])
 
     def setup_rpc(self):
-        self.plugin_rpc = OVSPluginApi(topics.PLUGIN)
+        self.plugin_rpc = OVSPluginApi(
+            topics.PLUGIN,
+            compact_cache=self.conf.AGENT.compact_resource_cache,
+            cache_snapshot_file=self.conf.AGENT.resource_cache_snapshot_file)
         # allow us to receive port_update/delete callbacks from the cache
         self.plugin_rpc.register_legacy_notification_callbacks(self)
         self.sg_plugin_rpc = sg_rpc.SecurityGroupServerAPIShim(
@@ -1281,6 +1305,8 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         devices_down = []
         failed_devices = []
         tunnels_missing = False
+        # Port tags to set, (port, current tag, new tag) tuples.
+        port_tags = []
         port_names = [p['vif_port'].port_name for p in need_binding_ports]
         port_info = self.int_br.get_ports_attributes(
             "Port", columns=["name", "tag"], ports=port_names, if_exists=True)
@@ -1327,19 +1353,7 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                 )
 
             if cur_tag != lvm.vlan:
-                ovsdb = self.int_br.ovsdb
-                with ovsdb.transaction() as txn:
-                    txn.add(ovsdb.db_set(
-                        'Port', port.port_name, ('tag', lvm.vlan)))
-                    # When changing the port's tag from DEAD_VLAN_TAG to
-                    # something else, also clear port's vlan_mode and trunks,
-                    # which were set to make sure all packets are dropped.
-                    if (cur_tag == ovs_const.DEAD_VLAN_TAG and
-                            port.ofport != ovs_lib.INVALID_OFPORT):
-                        txn.add(ovsdb.db_clear(
-                            'Port', port.port_name, 'vlan_mode'))
-                        txn.add(ovsdb.db_clear(
-                            'Port', port.port_name, 'trunks'))
+                port_tags.append((port, cur_tag, lvm.vlan))
 
             # update plugin about port status
             # FIXME(salv-orlando): Failures while updating device status
@@ -1356,6 +1370,21 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
             else:
                 LOG.debug("Setting status for %s to DOWN", device)
                 devices_down.append(device)
+        if port_tags:
+            # All the port tags are written in a single OVSDB transaction.
+            ovsdb = self.int_br.ovsdb
+            with ovsdb.transaction() as txn:
+                for port, cur_tag, tag in port_tags:
+                    txn.add(ovsdb.db_set('Port', port.port_name, ('tag', tag)))
+                    # When changing the port's tag from DEAD_VLAN_TAG to
+                    # something else, also clear port's vlan_mode and trunks,
+                    # which were set to make sure all packets are dropped.
+                    if (cur_tag == ovs_const.DEAD_VLAN_TAG and
+                            port.ofport != ovs_lib.INVALID_OFPORT):
+                        txn.add(ovsdb.db_clear(
+                            'Port', port.port_name, 'vlan_mode'))
+                        txn.add(ovsdb.db_clear(
+                            'Port', port.port_name, 'trunks'))
         if devices_up or devices_down:
             # When the iter_num == 0, that indicate the ovs-agent is doing
             # the initialization work. L2 pop needs this precise knowledge
@@ -1365,9 +1394,10 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
             # has not received a notification and is missing tunnels.
             refresh_tunnels = ((self.iter_num == 0) or tunnels_missing or
                                self.ovs_restarted)
-            devices_set = self.plugin_rpc.update_device_list(
-                self.context, devices_up, devices_down, self.agent_id,
-                self.conf.host, refresh_tunnels=refresh_tunnels)
+            with self._loop_phase('rpc_update_device_list'):
+                devices_set = self.plugin_rpc.update_device_list(
+                    self.context, devices_up, devices_down, self.agent_id,
+                    self.conf.host, refresh_tunnels=refresh_tunnels)
             failed_devices = (devices_set.get('failed_devices_up') +
                               devices_set.get('failed_devices_down'))
             if failed_devices:
@@ -2078,20 +2108,25 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                 self.tun_br_ofports[tunnel_type].pop(
                     remote_ip, None)
 
+    def _get_devices_details_list(self, devices):
+        agent_restarted = self.iter_num == 0
+        with self._loop_phase('rpc_devices_details'):
+            return (
+                self.plugin_rpc.get_devices_details_list_and_failed_devices(
+                    self.context,
+                    devices,
+                    self.agent_id,
+                    self.conf.host,
+                    agent_restarted))
+
     def treat_devices_added_or_updated(self, devices, provisioning_needed,
-                                       re_added):
+                                       re_added, devices_details_list=None):
         skipped_devices = []
         need_binding_devices = []
         binding_no_activated_devices = set()
         migrating_devices = set()
-        agent_restarted = self.iter_num == 0
-        devices_details_list = (
-            self.plugin_rpc.get_devices_details_list_and_failed_devices(
-                self.context,
-                devices,
-                self.agent_id,
-                self.conf.host,
-                agent_restarted))
+        if devices_details_list is None:
+            devices_details_list = self._get_devices_details_list(devices)
         failed_devices = set(devices_details_list.get('failed_devices'))
 
         devices = devices_details_list.get('devices')
@@ -2240,6 +2275,103 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         if failed_devices:
             LOG.debug("Port down failed for %s", failed_devices)
 
+    def _process_added_updated_ports(self, port_info, devices,
+                                     provisioning_needed, re_added, start,
+                                     devices_details_list=None):
+        failed_devices = set()
+        need_binding_devices = []
+        skipped_devices = set()
+        binding_no_activated_devices = set()
+        devices_not_in_datapath = set()
+        migrating_devices = set()
+        if devices:
+            with self._loop_phase('wire_ports'):
+                (skipped_devices, binding_no_activated_devices,
+                 need_binding_devices, failed_devices,
+                 devices_not_in_datapath, migrating_devices) = (
+                     self.treat_devices_added_or_updated(
+                         devices, provisioning_needed, re_added,
+                         devices_details_list=devices_details_list))
+            LOG.info("process_network_ports - iteration:%(iter_num)d - "
+                     "treat_devices_added_or_updated completed. "
+                     "Skipped %(num_skipped)d and no activated binding "
+                     "devices %(num_no_active_binding)d of %(num_current)d "
+                     "devices currently available. "
+                     "Time elapsed: %(elapsed).3f",
+                     {'iter_num': self.iter_num,
+                      'num_skipped': len(skipped_devices),
+                      'num_no_active_binding':
+                          len(binding_no_activated_devices),
+                      'num_current': len(port_info['current']),
+                      'elapsed': time.time() - start})
+            # Update the list of current ports storing only those which
+            # have been actually processed.
+            skipped_devices = set(skipped_devices)
+            port_info['current'] = port_info['current'] - skipped_devices
+
+        # TODO(salv-orlando): Optimize avoiding applying filters
+        # unnecessarily, (eg: when there are no IP address changes)
+        added_ports = ((port_info.get('added', set()) & devices) -
+                       skipped_devices - binding_no_activated_devices -
+                       migrating_devices)
+        updated_ports = port_info.get('updated', set()) & devices
+        with self._loop_phase('egress_flows'):
+            self.process_install_ports_egress_flows(need_binding_devices)
+        added_to_datapath = added_ports - devices_not_in_datapath
+        with self._loop_phase('security_groups'):
+            self.sg_agent.setup_port_filters(
+                added_to_datapath,
+                updated_ports - binding_no_activated_devices)
+
+        LOG.info("process_network_ports - iteration:%(iter_num)d - "
+                 "agent port security group processed in %(elapsed).3f",
+                 {'iter_num': self.iter_num,
+                  'elapsed': time.time() - start})
+        failed_devices = set(failed_devices)
+        with self._loop_phase('bind_ports'):
+            failed_devices |= self._bind_devices(need_binding_devices)
+        return failed_devices, skipped_devices
+
+    def _process_added_updated_ports_pipelined(self, port_info, devices,
+                                               provisioning_needed, re_added,
+                                               chunk_size):
+        """Process the added and updated ports in chunks.
+
+        The details of the devices of the next chunk are retrieved from the
+        server in a background thread while the ports of the current chunk
+        are wired (OVSDB, OpenFlow and security groups).
+        """
+        failed_devices = set()
+        skipped_devices = set()
+        devices = sorted(devices)
+        chunks = [set(devices[i:i + chunk_size])
+                  for i in range(0, len(devices), chunk_size)]
+        with futurist.ThreadPoolExecutor(max_workers=1) as executor:
+            next_details = executor.submit(self._get_devices_details_list,
+                                           chunks[0])
+            for index, chunk in enumerate(chunks):
+                start = time.time()
+                devices_details_list = next_details.result()
+                if index + 1 < len(chunks):
+                    next_details = executor.submit(
+                        self._get_devices_details_list, chunks[index + 1])
+                chunk_failed, chunk_skipped = (
+                    self._process_added_updated_ports(
+                        port_info, chunk, provisioning_needed, re_added,
+                        start, devices_details_list=devices_details_list))
+                failed_devices |= chunk_failed
+                skipped_devices |= chunk_skipped
+                LOG.info("process_network_ports - iteration:%(iter_num)d - "
+                         "chunk %(chunk)d of %(num_chunks)d with "
+                         "%(num_devices)d devices processed in "
+                         "%(elapsed).3f",
+                         {'iter_num': self.iter_num,
+                          'chunk': index + 1,
+                          'num_chunks': len(chunks),
+                          'num_devices': len(chunk),
+                          'elapsed': time.time() - start})
+        return failed_devices, skipped_devices
+
     def process_network_ports(self, port_info, provisioning_needed):
         failed_devices = {'added': set(), 'removed': set()}
         # TODO(salv-orlando): consider a solution for ensuring notifications
@@ -2256,11 +2388,6 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         devices_added_updated = (port_info.get('added', set()) |
                                  port_info.get('updated', set()))
         re_added = port_info.get('re_added', set())
-        need_binding_devices = []
-        skipped_devices = set()
-        binding_no_activated_devices = set()
-        devices_not_in_datapath = set()
-        migrating_devices = set()
         start = time.time()
         if re_added:
             # NOTE(slaweq): to make sure that devices which were deleted and
@@ -2286,49 +2413,23 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                      {'iter_num': self.iter_num,
                       're_added': len(re_added),
                       'elapsed': time.time() - start})
-        if devices_added_updated:
-            (skipped_devices, binding_no_activated_devices,
-             need_binding_devices, failed_devices['added'],
-             devices_not_in_datapath, migrating_devices) = (
-                 self.treat_devices_added_or_updated(
-                     devices_added_updated, provisioning_needed, re_added))
-            LOG.info("process_network_ports - iteration:%(iter_num)d - "
-                     "treat_devices_added_or_updated completed. "
-                     "Skipped %(num_skipped)d and no activated binding "
-                     "devices %(num_no_active_binding)d of %(num_current)d "
-                     "devices currently available. "
-                     "Time elapsed: %(elapsed).3f",
-                     {'iter_num': self.iter_num,
-                      'num_skipped': len(skipped_devices),
-                      'num_no_active_binding':
-                          len(binding_no_activated_devices),
-                      'num_current': len(port_info['current']),
-                      'elapsed': time.time() - start})
-            # Update the list of current ports storing only those which
-            # have been actually processed.
-            skipped_devices = set(skipped_devices)
-            port_info['current'] = port_info['current'] - skipped_devices
-
-        # TODO(salv-orlando): Optimize avoiding applying filters
-        # unnecessarily, (eg: when there are no IP address changes)
-        added_ports = (port_info.get('added', set()) - skipped_devices -
-                       binding_no_activated_devices - migrating_devices)
-        self.process_install_ports_egress_flows(need_binding_devices)
-        added_to_datapath = added_ports - devices_not_in_datapath
-        self.sg_agent.setup_port_filters(
-            added_to_datapath,
-            port_info.get('updated', set()) - binding_no_activated_devices)
-
-        LOG.info("process_network_ports - iteration:%(iter_num)d - "
-                 "agent port security group processed in %(elapsed).3f",
-                 {'iter_num': self.iter_num,
-                  'elapsed': time.time() - start})
-        failed_devices['added'] |= self._bind_devices(need_binding_devices)
+        chunk_size = self.conf.AGENT.port_processing_chunk_size
+        if chunk_size and len(devices_added_updated) > chunk_size:
+            failed_devices['added'], skipped_devices = (
+                self._process_added_updated_ports_pipelined(
+                    port_info, devices_added_updated, provisioning_needed,
+                    re_added, chunk_size))
+        else:
+            failed_devices['added'], skipped_devices = (
+                self._process_added_updated_ports(
+                    port_info, devices_added_updated, provisioning_needed,
+                    re_added, start))
 
         if 'removed' in port_info and port_info['removed']:
             start = time.time()
-            failed_devices['removed'] |= self.treat_devices_removed(
-                port_info['removed'])
+            with self._loop_phase('remove_ports'):
+                failed_devices['removed'] |= self.treat_devices_removed(
+                    port_info['removed'])
             LOG.info("process_network_ports - iteration:%(iter_num)d - "
                      "treat_devices_removed completed in %(elapsed).3f",
                      {'iter_num': self.iter_num,
@@ -2588,15 +2689,87 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                         "and checking OVS status periodically.")
         return status
 
+    @contextlib.contextmanager
+    def _loop_phase(self, phase):
+        """Account the time spent in a phase of the rpc_loop iteration.
+
+        The time spent in nested phases is only accounted to the innermost
+        one. Phases running in other threads (like the device details
+        retrieval of the next port chunk) can overlap the current ones, they
+        are accounted to the iteration during which they end.
+        """
+        stack = getattr(self._loop_phase_local, 'stack', None)
+        if stack is None:
+            stack = self._loop_phase_local.stack = []
+        # Each item holds the time spent in the phases nested in it.
+        stack.append(0.0)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._loop_phases_lock:
+                self._loop_phases[phase] += elapsed - stack.pop()
+            if stack:
+                stack[-1] += elapsed
+
+    def _record_loop_metrics(self, elapsed):
+        with self._loop_phases_lock:
+            loop_phases = self._loop_phases
+            self._loop_phases = collections.defaultdict(float)
+        for phase, phase_elapsed in loop_phases.items():
+            self.loop_metrics.observe(LOOP_PHASE_METRIC, phase_elapsed,
+                                      phase=phase)
+        self.loop_metrics.observe(LOOP_ITERATION_METRIC, elapsed)
+        if self.conf.AGENT.metrics_file:
+            self.loop_metrics.write_file(self.conf.AGENT.metrics_file)
+        return {phase: round(phase_elapsed, 3)
+                for phase, phase_elapsed in loop_phases.items()}
+
+    def _save_resource_cache_snapshot(self, force=False):
+        if not self.conf.AGENT.resource_cache_snapshot_file:
+            return
+        interval = self.conf.AGENT.resource_cache_snapshot_interval
+        now = time.monotonic()
+        if not force and (not interval or
+                          now - self._last_cache_snapshot < interval):
+            return
+        self._last_cache_snapshot = now
+        if self._cache_snapshot_thread:
+            if self._cache_snapshot_thread.is_alive() and not force:
+                LOG.debug("The previous resource cache snapshot is still "
+                          "being written, skipping this one")
+                return
+            self._cache_snapshot_thread.join()
+        rcache = self.plugin_rpc.remote_resource_cache
+        with self._loop_phase('resource_cache_snapshot'):
+            snapshot_resources = rcache.get_snapshot_resources()
+        if force:
+            self._write_resource_cache_snapshot(snapshot_resources)
+            return
+        # serializing a large cache takes time, don't stall the rpc_loop
+        self._cache_snapshot_thread = threading.Thread(
+            target=self._write_resource_cache_snapshot,
+            args=(snapshot_resources,), daemon=True)
+        self._cache_snapshot_thread.start()
+
+    def _write_resource_cache_snapshot(self, snapshot_resources):
+        with self._loop_phase('resource_cache_snapshot_write'):
+            self.plugin_rpc.remote_resource_cache.write_snapshot(
+                snapshot_resources)
+
     def loop_count_and_wait(self, start_time, port_stats):
         # sleep till end of polling interval
         elapsed = time.time() - start_time
+        loop_phases = self._record_loop_metrics(elapsed)
         LOG.info("Agent rpc_loop - iteration:%(iter_num)d "
                  "completed. Processed ports statistics: "
-                 "%(port_stats)s. Elapsed:%(elapsed).3f",
+                 "%(port_stats)s. Elapsed:%(elapsed).3f. "
+                 "Phases: %(phases)s",
                  {'iter_num': self.iter_num,
                   'port_stats': port_stats,
-                  'elapsed': elapsed})
+                  'elapsed': elapsed,
+                  'phases': loop_phases})
         if elapsed < self.polling_interval:
             time.sleep(self.polling_interval - elapsed)
         else:
@@ -2812,7 +2985,8 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
             start = time.time()
             LOG.info("Agent rpc_loop - iteration:%d started",
                      self.iter_num)
-            self.ovs_status = self.check_ovs_status()
+            with self._loop_phase('ovs_status'):
+                self.ovs_status = self.check_ovs_status()
             bridges_recreated = False
             if self.ovs_status == ovs_const.OVS_RESTARTED:
                 self._handle_ovs_restart(polling_manager)
@@ -2838,7 +3012,8 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
             # Notify the plugin of tunnel IP
             if self.enable_tunneling and tunnel_sync:
                 try:
-                    tunnel_sync = self.tunnel_sync()
+                    with self._loop_phase('tunnel_sync'):
+                        tunnel_sync = self.tunnel_sync()
                 except Exception:
                     LOG.exception("Error while configuring tunnel endpoints")
                     tunnel_sync = True
@@ -2846,8 +3021,9 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
             devices_need_retry = (any(failed_devices.values()) or
                                   any(failed_ancillary_devices.values()) or
                                   ports_not_ready_yet)
-            if (self._agent_has_updates(polling_manager) or sync or
-                    devices_need_retry):
+            with self._loop_phase('polling'):
+                has_updates = self._agent_has_updates(polling_manager)
+            if has_updates or sync or devices_need_retry:
                 try:
                     LOG.info("Agent rpc_loop - iteration:%(iter_num)d - "
                              "starting polling. Elapsed:%(elapsed).3f",
@@ -2871,12 +3047,14 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                     self.updated_ports = set()
                     activated_bindings_copy = self.activated_bindings
                     self.activated_bindings = set()
-                    (port_info, ancillary_port_info, consecutive_resyncs,
-                     ports_not_ready_yet) = (self.process_port_info(
-                         start, polling_manager, sync,
-                         ports, ancillary_ports, updated_ports_copy,
-                         consecutive_resyncs, ports_not_ready_yet,
-                         failed_devices, failed_ancillary_devices))
+                    with self._loop_phase('scan_ports'):
+                        (port_info, ancillary_port_info, consecutive_resyncs,
+                         ports_not_ready_yet) = (self.process_port_info(
+                             start, polling_manager, sync,
+                             ports, ancillary_ports, updated_ports_copy,
+                             consecutive_resyncs, ports_not_ready_yet,
+                             failed_devices, failed_ancillary_devices))
+                    resynced = sync
                     sync = False
                     self.process_deleted_ports(port_info)
                     self.process_deactivated_bindings(port_info)
@@ -2908,19 +3086,26 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                                   'elapsed': time.time() - start})
 
                     if need_clean_stale_flow:
-                        self.cleanup_stale_flows()
+                        with self._loop_phase('cleanup_stale_flows'):
+                            self.cleanup_stale_flows()
                         need_clean_stale_flow = False
                         LOG.info("Agent rpc_loop - iteration:%(iter_num)d - "
                                  "cleanup stale flows. Elapsed:%(elapsed).3f",
                                  {'iter_num': self.iter_num,
                                   'elapsed': time.time() - start})
 
+                    if (resynced and
+                            self.conf.AGENT.log_resource_cache_memory_usage):
+                        resource_cache = self.plugin_rpc.remote_resource_cache
+                        resource_cache.log_memory_usage()
+
                     ports = port_info['current']
 
                     if self.ancillary_brs:
-                        failed_ancillary_devices = (
-                            self.process_ancillary_network_ports(
-                                ancillary_port_info))
+                        with self._loop_phase('ancillary_ports'):
+                            failed_ancillary_devices = (
+                                self.process_ancillary_network_ports(
+                                    ancillary_port_info))
                         LOG.info("Agent rpc_loop - iteration: "
                                  "%(iter_num)d - ancillary ports "
                                  "processed. Elapsed:%(elapsed).3f",
@@ -2953,6 +3138,7 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                     self.activated_bindings |= activated_bindings_copy
                     sync = True
             self.ovs_restarted = False
+            self._save_resource_cache_snapshot()
             port_stats = self.get_port_stats(port_info, ancillary_port_info)
             self.loop_count_and_wait(start, port_stats)
 
@@ -2975,6 +3161,7 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                 ovs=self.ovs) as pm:
             self.rpc_loop(polling_manager=pm)
         if self.plugin_rpc:
+            self._save_resource_cache_snapshot(force=True)
             self.plugin_rpc.stop()
 
     def _handle_sigterm(self):
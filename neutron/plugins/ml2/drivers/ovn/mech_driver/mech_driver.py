@@ -970,6 +970,28 @@ class OVNMechanismDriver(api.MechanismDriver):
         self._ovn_client.create_port(context.plugin_context, port)
         self._notify_dhcp_updated(context.plugin_context, port['id'])
 
+    def create_port_bulk_postcommit(self, contexts):
+        """Create several ports.
+
+        :param contexts: list of PortContext instances describing the
+        ports, all of them sharing the same plugin context.
+
+        Same as create_port_postcommit, but all the ports are created
+        in a single OVN NB transaction and their revision numbers are
+        bumped with a single DB operation.
+        """
+        if not contexts:
+            return
+        plugin_context = contexts[0].plugin_context
+        ports = []
+        for context in contexts:
+            port = copy.deepcopy(context.current)
+            port['network'] = context.network.current
+            ports.append(port)
+        self._ovn_client.create_ports(plugin_context, ports)
+        for port in ports:
+            self._notify_dhcp_updated(plugin_context, port['id'])
+
     def update_port_precommit(self, context):
         """Update resources of a port.
 
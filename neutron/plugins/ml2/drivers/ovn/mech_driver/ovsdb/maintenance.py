@@ -53,6 +53,9 @@ LOG = log.getLogger(__name__)
 
 INCONSISTENCY_TYPE_CREATE_UPDATE = 'create/update'
 INCONSISTENCY_TYPE_DELETE = 'delete'
+# Number of consecutive check_for_inconsistencies runs only checking the
+# resources updated since the previous run, before a full check is done.
+INCONSISTENCIES_FULL_CHECK_RUNS = 12
 
 
 def has_lock_periodic(*args, periodic_run_limit=0, **kwargs):
@@ -230,6 +233,10 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
         self._sb_idl = self._ovn_client._sb_idl
         self._idl = self._nb_idl.idl
         super().__init__(ovn_client)
+        # "Dirty since" marker of the last successful inconsistencies check
+        # and number of checks done since the last full one.
+        self._inconsistencies_dirty_since = None
+        self._inconsistencies_checks = 0
 
         self._resources_func_map = {
             ovn_const.TYPE_NETWORKS: {
@@ -428,12 +435,21 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
         start_message='Checking Neutron and OVN revision consistency.')
     def check_for_inconsistencies(self):
         admin_context = n_context.get_admin_context()
+        next_dirty_since = revision_numbers_db.get_dirty_since_marker()
+        dirty_since = self._inconsistencies_dirty_since
+        if self._inconsistencies_checks >= INCONSISTENCIES_FULL_CHECK_RUNS:
+            dirty_since = None
+        if dirty_since is None:
+            self._inconsistencies_checks = 0
+        self._inconsistencies_checks += 1
         create_update_inconsistencies = (
-            revision_numbers_db.get_inconsistent_resources(admin_context))
+            revision_numbers_db.get_inconsistent_resources(
+                admin_context, dirty_since=dirty_since))
         delete_inconsistencies = (
             revision_numbers_db.get_deleted_resources(admin_context))
         if not any([create_update_inconsistencies, delete_inconsistencies]):
             LOG.debug('Maintenance task: No inconsistencies found. Skipping')
+            self._inconsistencies_dirty_since = next_dirty_since
             return
 
         LOG.debug('Maintenance task: Synchronizing Neutron '
@@ -443,6 +459,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
 
         dbg_log_msg = ('Maintenance task: Fixing resource %(res_uuid)s '
                        '(type: %(res_type)s) at %(type_)s')
+        failed = False
         # Fix the create/update resources inconsistencies
         for row in create_update_inconsistencies:
             LOG.debug(dbg_log_msg, {'res_uuid': row.resource_uuid,
@@ -460,6 +477,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
                 else:
                     self._fix_create_update(admin_context, row)
             except Exception:
+                failed = True
                 LOG.exception('Maintenance task: Failed to fix resource '
                               '%(res_uuid)s (type: %(res_type)s)',
                               {'res_uuid': row.resource_uuid,
@@ -480,11 +498,17 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
                 else:
                     self._fix_delete(admin_context, row)
             except Exception:
+                failed = True
                 LOG.exception('Maintenance task: Failed to fix deleted '
                               'resource %(res_uuid)s (type: %(res_type)s)',
                               {'res_uuid': row.resource_uuid,
                                'res_type': row.resource_type})
 
+        # The resources that failed to be fixed won't be updated again, the
+        # marker is kept so they are checked again in the next run.
+        if not failed:
+            self._inconsistencies_dirty_since = next_dirty_since
+
     def _create_lrouter_port(self, context, port):
         router_id = port['device_id']
         iface_info = self._ovn_client._l3_plugin._add_neutron_router_interface(
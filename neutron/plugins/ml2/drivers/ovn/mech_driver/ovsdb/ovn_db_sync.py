@@ -10,7 +10,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+from concurrent import futures
 from datetime import datetime
+import functools
+import itertools
+import json
+import os
+import time
 
 from neutron_lib.api.definitions import portbindings
 from neutron_lib.api.definitions import segment as segment_def
@@ -44,6 +51,81 @@ from neutron.services.segments import db as segments_db
 LOG = log.getLogger(__name__)
 
 
+class SyncCheckpoint:
+    """Progress of an OVN NB DB sync, persisted to resume it.
+
+    The checkpoint records the sync steps completed and, for the sharded
+    networks sync, the networks already synchronized. It is only kept if
+    a file is given and it is ignored if it was written by a sync running
+    in a different mode, or if the sync it belongs to started more than
+    max_age seconds ago, as the steps it completed may be outdated.
+    """
+
+    def __init__(self, path, mode, max_age=None):
+        self._path = path
+        self._mode = mode
+        self._max_age = max_age
+        self.created_at = time.time()
+        self.steps = set()
+        self.networks = set()
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self._path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            LOG.warning('Ignoring the OVN NB sync checkpoint %s, it can not '
+                        'be read: %s', self._path, e)
+            return
+        if data.get('mode') != self._mode:
+            LOG.info('Ignoring the OVN NB sync checkpoint %s, it was '
+                     'written in %s mode', self._path, data.get('mode'))
+            return
+        created_at = data.get('created_at', 0)
+        if self._max_age and self.created_at - created_at > self._max_age:
+            LOG.info('Ignoring the OVN NB sync checkpoint %s, it was '
+                     'created more than %d seconds ago', self._path,
+                     self._max_age)
+            return
+        self.created_at = created_at
+        self.steps = set(data.get('steps', []))
+        self.networks = set(data.get('networks', []))
+        LOG.info('Resuming the OVN NB sync from the checkpoint %s, '
+                 '%d steps and %d networks already synchronized',
+                 self._path, len(self.steps), len(self.networks))
+
+    def save(self):
+        """Write the checkpoint, a failure only prevents resuming the sync."""
+        if not self._path:
+            return
+        data = {'mode': self._mode,
+                'created_at': self.created_at,
+                'steps': sorted(self.steps),
+                'networks': sorted(self.networks)}
+        tmp_path = self._path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            LOG.warning('Unable to write the OVN NB sync checkpoint %s: %s',
+                        self._path, e)
+
+    def clear(self):
+        self.steps = set()
+        self.networks = set()
+        if not self._path:
+            return
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+
 class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
     """Synchronizer class for NB."""
 
@@ -101,15 +183,44 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                   str(datetime.now()))
 
         ctx = context.get_admin_context()
-        self.sync_port_groups(ctx)
-        self.sync_networks_ports_and_dhcp_opts(ctx)
-        self.sync_port_dns_records(ctx)
-        self.sync_acls(ctx)
-        self.sync_routers_and_rports(ctx)
-        self.sync_port_qos_policies(ctx)
-        self.sync_fip_qos_policies(ctx)
-        self.sync_fip_dnat_rules()
-        self.sync_fip_distributed_nat(ctx)
+        checkpoint = SyncCheckpoint(
+            ovn_conf.get_ovn_neutron_sync_checkpoint_file(), self.mode,
+            max_age=ovn_conf.get_ovn_neutron_sync_checkpoint_max_age())
+        if ovn_conf.get_ovn_neutron_sync_shard_size():
+            sync_networks = functools.partial(
+                self.sync_networks_ports_and_dhcp_opts_sharded,
+                ctx, checkpoint)
+        else:
+            sync_networks = functools.partial(
+                self.sync_networks_ports_and_dhcp_opts, ctx)
+        steps = [
+            ('port_groups', functools.partial(self.sync_port_groups, ctx)),
+            ('networks_ports_and_dhcp_opts', sync_networks),
+            ('port_dns_records',
+             functools.partial(self.sync_port_dns_records, ctx)),
+            ('acls', functools.partial(self.sync_acls, ctx)),
+            ('routers_and_rports',
+             functools.partial(self.sync_routers_and_rports, ctx)),
+            ('port_qos_policies',
+             functools.partial(self.sync_port_qos_policies, ctx)),
+            ('fip_qos_policies',
+             functools.partial(self.sync_fip_qos_policies, ctx)),
+            ('fip_dnat_rules', self.sync_fip_dnat_rules),
+            ('fip_distributed_nat',
+             functools.partial(self.sync_fip_distributed_nat, ctx)),
+        ]
+        for index, (name, sync_step) in enumerate(steps, 1):
+            if name in checkpoint.steps:
+                LOG.info('OVN-NB Sync step %s skipped, already completed '
+                         'according to the checkpoint', name)
+                continue
+            sync_step()
+            checkpoint.steps.add(name)
+            checkpoint.save()
+            LOG.info('OVN-NB Sync step %(name)s completed (%(index)d/'
+                     '%(total)d)',
+                     {'name': name, 'index': index, 'total': len(steps)})
+        checkpoint.clear()
 
         LOG.debug("OVN-Northbound DB sync process completed @ %s",
                   str(datetime.now()))
@@ -947,11 +1058,13 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                   str(datetime.now()))
 
     def _sync_subnet_dhcp_options(self, ctx, db_networks,
-                                  ovn_subnet_dhcp_options):
+                                  ovn_subnet_dhcp_options, network_ids=None):
         LOG.debug('OVN-NB Sync DHCP options for Neutron subnets started')
 
         db_subnets = {}
         filters = {'enable_dhcp': [True]}
+        if network_ids is not None:
+            filters['network_id'] = network_ids
         for subnet in self.core_plugin.get_subnets(ctx, filters=filters):
             if (subnet['ip_version'] == constants.IP_VERSION_6 and
                     subnet.get('ipv6_address_mode') == constants.IPV6_SLAAC):
@@ -1088,16 +1201,19 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
         LOG.debug('OVN-NB Sync DHCP options for Neutron ports with extra '
                   'dhcp options assigned completed')
 
-    def _sync_metadata_ports(self, ctx, db_ports):
+    def _sync_metadata_ports(self, ctx, db_ports, network_ids=None):
         """Ensure metadata ports in all Neutron networks.
 
-        This method will ensure that all networks have one and only one
-        metadata port.
+        This method will ensure that all networks, or only the ones in
+        network_ids if given, have one and only one metadata port.
         """
         if not ovn_conf.is_ovn_metadata_enabled():
             return
         LOG.debug('OVN-NB Sync metadata ports started')
-        for net in self.core_plugin.get_networks(ctx):
+        kwargs = {}
+        if network_ids is not None:
+            kwargs['filters'] = {'id': network_ids}
+        for net in self.core_plugin.get_networks(ctx, **kwargs):
             metadata_ports = self.core_plugin.get_ports(
                 ctx, filters=dict(
                     network_id=[net['id']],
@@ -1164,10 +1280,163 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                     utils.is_lsp_ignored(port)}
 
         ovn_all_dhcp_options = self.ovn_nb_api.get_all_dhcp_options()
+        lswitches = self.ovn_nb_api.get_all_logical_switches_with_ports()
+        self._sync_networks_ports_and_dhcp_opts(
+            ctx, db_networks, db_ports, lswitches, ovn_all_dhcp_options)
+        LOG.debug('OVN-NB Sync networks, ports and DHCP options completed @ '
+                  '%s', str(datetime.now()))
+
+    def sync_networks_ports_and_dhcp_opts_sharded(self, ctx, checkpoint):
+        """Sync networks, ports and DHCP options one shard at a time.
+
+        The Neutron networks are split in shards of
+        ovn.neutron_sync_shard_size networks, which are synchronized in
+        parallel by ovn.neutron_sync_workers threads. Only the ports of the
+        shards being synchronized are loaded. The networks of each shard
+        completed are recorded in the checkpoint, so an interrupted sync can
+        be resumed. The OVN resources that do not belong to any Neutron
+        network are synchronized once all the shards are done.
+        """
+        LOG.debug('OVN-NB Sharded sync of networks, ports and DHCP options '
+                  'started @ %s', str(datetime.now()))
+        shard_size = ovn_conf.get_ovn_neutron_sync_shard_size()
+        network_ids = sorted(net['id'] for net in
+                             self.core_plugin.get_networks(ctx, fields=['id']))
+        pending = [net_id for net_id in network_ids
+                   if net_id not in checkpoint.networks]
+        shards = [pending[i:i + shard_size]
+                  for i in range(0, len(pending), shard_size)]
+
+        ovn_lswitches = {
+            lswitch['name']: lswitch for lswitch in
+            self.ovn_nb_api.get_all_logical_switches_with_ports()}
+        ovn_all_dhcp_options = self.ovn_nb_api.get_all_dhcp_options()
+        network_subnets = collections.defaultdict(list)
+        for subnet in self.core_plugin.get_subnets(
+                ctx, fields=['id', 'network_id']):
+            network_subnets[subnet['network_id']].append(subnet['id'])
+
+        claimed_ports = set()
+        workers = ovn_conf.get_ovn_neutron_sync_workers()
+        with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            jobs = {executor.submit(self._sync_network_shard, shard,
+                                    ovn_lswitches, ovn_all_dhcp_options,
+                                    network_subnets): shard
+                    for shard in shards}
+            for done, job in enumerate(futures.as_completed(jobs), 1):
+                claimed_ports |= job.result()
+                checkpoint.networks.update(jobs[job])
+                checkpoint.save()
+                LOG.info('OVN-NB Sync of networks shard completed (%(done)d/'
+                         '%(total)d shards, %(synced)d/%(networks)d '
+                         'networks)',
+                         {'done': done, 'total': len(shards),
+                          'synced': len(checkpoint.networks),
+                          'networks': len(network_ids)})
+
+        self._sync_orphan_networks(ctx, network_ids, ovn_lswitches,
+                                   ovn_all_dhcp_options, network_subnets,
+                                   claimed_ports)
+        LOG.debug('OVN-NB Sharded sync of networks, ports and DHCP options '
+                  'completed @ %s', str(datetime.now()))
+
+    def _sync_network_shard(self, network_ids, ovn_lswitches,
+                            ovn_all_dhcp_options, network_subnets):
+        """Sync the networks, ports and DHCP options of one shard.
+
+        :returns: the IDs of the ports of the shard with DHCP options in OVN.
+        """
+        ctx = context.get_admin_context()
+        db_networks = {
+            utils.ovn_name(net['id']): net for net in
+            self.core_plugin.get_networks(ctx, filters={'id': network_ids})}
+        db_ports = {port['id']: port for port in
+                    self.core_plugin.get_ports(
+                        ctx, filters={'network_id': network_ids})
+                    if not utils.is_lsp_ignored(port)}
+        # The logical switches of the networks deleted since the shards were
+        # computed are included, they will be deleted.
+        lswitches = [ovn_lswitches[utils.ovn_name(net_id)]
+                     for net_id in network_ids
+                     if utils.ovn_name(net_id) in ovn_lswitches]
+        subnet_ids = itertools.chain.from_iterable(
+            network_subnets[net_id] for net_id in network_ids)
+        dhcp_options = {
+            'subnets': {
+                subnet_id: ovn_all_dhcp_options['subnets'][subnet_id]
+                for subnet_id in subnet_ids
+                if subnet_id in ovn_all_dhcp_options['subnets']}}
+        claimed_ports = set()
+        for key in ('ports_v4', 'ports_v6'):
+            dhcp_options[key] = {
+                port_id: ovn_all_dhcp_options[key][port_id]
+                for port_id in db_ports
+                if port_id in ovn_all_dhcp_options[key]}
+            claimed_ports.update(dhcp_options[key])
+        self._sync_networks_ports_and_dhcp_opts(
+            ctx, db_networks, db_ports, lswitches, dhcp_options,
+            network_ids=network_ids)
+        return claimed_ports
+
+    def _sync_orphan_networks(self, ctx, network_ids, ovn_lswitches,
+                              ovn_all_dhcp_options, network_subnets,
+                              claimed_ports):
+        """Sync the OVN resources not belonging to any synced shard.
+
+        These are the logical switches and DHCP options of the networks,
+        subnets and ports not found in Neutron. The ones created in Neutron
+        while the shards were synchronized are left untouched.
+        """
+        known_lswitches = {utils.ovn_name(net_id) for net_id in network_ids}
+        orphan_lswitches = {name: lswitch
+                            for name, lswitch in ovn_lswitches.items()
+                            if name not in known_lswitches}
+        if orphan_lswitches:
+            for net in self.core_plugin.get_networks(
+                    ctx, filters={'id': [utils.get_neutron_name(name)
+                                         for name in orphan_lswitches]},
+                    fields=['id']):
+                orphan_lswitches.pop(utils.ovn_name(net['id']), None)
+
+        known_subnets = set(itertools.chain.from_iterable(
+            network_subnets.values()))
+        orphan_subnets = {
+            subnet_id: dhcp_opts for subnet_id, dhcp_opts in
+            ovn_all_dhcp_options['subnets'].items()
+            if subnet_id not in known_subnets}
+        if orphan_subnets:
+            for subnet in self.core_plugin.get_subnets(
+                    ctx, filters={'id': list(orphan_subnets)},
+                    fields=['id']):
+                orphan_subnets.pop(subnet['id'], None)
+
+        dhcp_options = {'subnets': orphan_subnets}
+        orphan_ports = set()
+        for key in ('ports_v4', 'ports_v6'):
+            dhcp_options[key] = {
+                port_id: dhcp_opts for port_id, dhcp_opts in
+                ovn_all_dhcp_options[key].items()
+                if port_id not in claimed_ports}
+            orphan_ports.update(dhcp_options[key])
+        if orphan_ports:
+            for port in self.core_plugin.get_ports(
+                    ctx, filters={'id': list(orphan_ports)},
+                    fields=['id', 'device_owner']):
+                if utils.is_lsp_ignored(port):
+                    continue
+                dhcp_options['ports_v4'].pop(port['id'], None)
+                dhcp_options['ports_v6'].pop(port['id'], None)
+
+        self._sync_networks_ports_and_dhcp_opts(
+            ctx, {}, {}, list(orphan_lswitches.values()), dhcp_options,
+            network_ids=[])
+
+    def _sync_networks_ports_and_dhcp_opts(self, ctx, db_networks, db_ports,
+                                           lswitches, ovn_all_dhcp_options,
+                                           network_ids=None):
         db_network_cache = dict(db_networks)
 
         ports_need_sync_dhcp_opts = []
-        lswitches = self.ovn_nb_api.get_all_logical_switches_with_ports()
         del_lswitchs_list = []
         del_lports_list = []
         add_provnet_ports_list = []
@@ -1228,10 +1497,11 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                                 "implicit port creation while creating "
                                 "network %s", network['id'])
 
-        self._sync_metadata_ports(ctx, db_ports)
+        self._sync_metadata_ports(ctx, db_ports, network_ids=network_ids)
 
         self._sync_subnet_dhcp_options(
-            ctx, db_network_cache, ovn_all_dhcp_options['subnets'])
+            ctx, db_network_cache, ovn_all_dhcp_options['subnets'],
+            network_ids=network_ids)
 
         for port_id, port in db_ports.items():
             LOG.warning("Port found in Neutron but not in OVN NB "
@@ -1320,8 +1590,6 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
         self._sync_port_dhcp_options(ports_need_sync_dhcp_opts,
                                      ovn_all_dhcp_options['ports_v4'],
                                      ovn_all_dhcp_options['ports_v6'])
-        LOG.debug('OVN-NB Sync networks, ports and DHCP options completed @ '
-                  '%s', str(datetime.now()))
 
     def sync_port_dns_records(self, ctx):
         if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
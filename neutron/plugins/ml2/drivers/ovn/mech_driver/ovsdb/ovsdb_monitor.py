@@ -14,6 +14,9 @@
 
 import abc
 import datetime
+import os
+import threading
+import time
 
 from neutron_lib import constants as n_const
 from neutron_lib import context as neutron_context
@@ -30,6 +33,7 @@ from ovsdbapp.backend.ovs_idl import connection
 from ovsdbapp.backend.ovs_idl import event as row_event
 from ovsdbapp.backend.ovs_idl import idlutils
 
+from neutron.common import metrics
 from neutron.common.ovn import constants as ovn_const
 from neutron.common.ovn import exceptions
 from neutron.common.ovn import hash_ring_manager
@@ -45,6 +49,39 @@ from neutron.plugins.ml2.drivers.ovn.mech_driver.ovsdb.extensions import \
 CONF = cfg.CONF
 LOG = log.getLogger(__name__)
 
+EVENT_MATCH_METRIC = 'neutron_ovn_event_match_seconds'
+EVENT_RUN_METRIC = 'neutron_ovn_event_run_seconds'
+# Runs of an event longer than this, in seconds, are logged.
+SLOW_EVENT_RUN_THRESHOLD = 5
+# Minimum interval, in seconds, between two writes of the metrics file.
+EVENT_METRICS_WRITE_INTERVAL = 60
+
+# The event metrics of all the notify handlers of the process.
+EVENT_METRICS = metrics.MetricsRegistry()
+EVENT_METRICS.describe(EVENT_MATCH_METRIC,
+                       'Time spent matching the row updates, in seconds, '
+                       'by event.')
+EVENT_METRICS.describe(EVENT_RUN_METRIC,
+                       'Time spent running the matched row updates, in '
+                       'seconds, by event.')
+_event_metrics_written_at = 0
+
+
+def _write_event_metrics():
+    global _event_metrics_written_at
+    metrics_file = ovn_conf.get_ovn_ovsdb_event_metrics_file()
+    if not metrics_file:
+        return
+    now = time.monotonic()
+    if now - _event_metrics_written_at < EVENT_METRICS_WRITE_INTERVAL:
+        return
+    _event_metrics_written_at = now
+    EVENT_METRICS.write_file('%s.%d' % (metrics_file, os.getpid()))
+
+
+def _event_name(event):
+    return type(event).__name__
+
 
 class ChassisEvent(row_event.RowEvent):
     """Chassis create update delete event."""
@@ -970,28 +1007,139 @@ class HAChassisGroupRouterEvent(row_event.RowEvent):
                 check_error=True)
 
 
+class _TimedEventRun:
+    """Matched event queued in place of the event to time its run."""
+
+    def __init__(self, event, handler):
+        self.event = event
+        self._handler = handler
+
+    @property
+    def ONETIME(self):
+        return self.event.ONETIME
+
+    def run(self, event, row, updates):
+        start = time.perf_counter()
+        try:
+            return self.event.run(event, row, updates)
+        finally:
+            self._handler.observe_run(self.event, time.perf_counter() - start)
+
+
 class OvnDbNotifyHandler(row_event.RowEventHandler):
+    """Row event handler dispatching the row updates to the watched events.
+
+    The watched events are indexed by table and event type, so only the
+    events which can match a row update are evaluated. Events which don't
+    rely on the default RowEvent matching are evaluated for every update.
+    The time spent matching and running each event is recorded in
+    ``metrics``, and written to the ``[ovn] ovsdb_event_metrics_file`` file.
+    """
+
     def __init__(self, driver):
         self.driver = driver
+        self.metrics = EVENT_METRICS
+        # The watched events are also tracked here, ordered by priority
+        # when the index is built, as the storage of the parent class is
+        # private.
+        self._events = {}
+        self._events_lock = threading.Lock()
+        self._event_index = None
         super().__init__()
-        try:
-            self._lock = self._RowEventHandler__lock
-            self._watched_events = self._RowEventHandler__watched_events
-        except AttributeError:
-            pass
+
+    def watch_event(self, event):
+        super().watch_event(event)
+        with self._events_lock:
+            self._events[event] = None
+            self._event_index = None
+
+    def watch_events(self, events):
+        super().watch_events(events)
+        with self._events_lock:
+            for event in events:
+                self._events[event] = None
+            self._event_index = None
+
+    def unwatch_event(self, event):
+        # NOTE: the notify loop unwatches the ONETIME events it ran
+        if isinstance(event, _TimedEventRun):
+            event = event.event
+        super().unwatch_event(event)
+        with self._events_lock:
+            self._events.pop(event, None)
+            self._event_index = None
+
+    def unwatch_events(self, events):
+        super().unwatch_events(events)
+        with self._events_lock:
+            for event in events:
+                self._events.pop(event, None)
+            self._event_index = None
+
+    @staticmethod
+    def _is_indexable(event):
+        return (isinstance(event, row_event.RowEvent) and
+                type(event).matches is row_event.RowEvent.matches)
+
+    def _build_event_index(self):
+        """Return the watched events by (global, table, event type).
+
+        The events not indexable are stored under the None key and are
+        added to every index entry, keeping the priority order of the
+        watched events. Must be called with the events lock held.
+        """
+        keys = set()
+        watched = sorted(self._events,
+                         key=lambda event: -getattr(event, 'priority', 0))
+        for watched_event in watched:
+            if self._is_indexable(watched_event):
+                keys.update((getattr(watched_event, 'GLOBAL', False),
+                             watched_event.table, event_type)
+                            for event_type in watched_event.events)
+        index = {None: tuple(t for t in watched
+                             if not self._is_indexable(t))}
+        for key in keys:
+            global_, table, event_type = key
+            index[key] = tuple(
+                t for t in watched
+                if not self._is_indexable(t) or (
+                    getattr(t, 'GLOBAL', False) == global_ and
+                    t.table == table and event_type in t.events))
+        return index
 
     def notify(self, event, row, updates=None, global_=False):
         matching = self.matching_events(event, row, updates, global_)
         if matching:
             row = idlutils.frozen_row(row)
         for match in matching:
-            self.notifications.put((match, event, row, updates))
+            self.notifications.put((_TimedEventRun(match, self), event, row,
+                                    updates))
 
     def matching_events(self, event, row, updates, global_=False):
-        with self._lock:
-            return tuple(t for t in self._watched_events
-                         if getattr(t, 'GLOBAL', False) == global_ and
-                         self.match(t, event, row, updates))
+        with self._events_lock:
+            if self._event_index is None:
+                self._event_index = self._build_event_index()
+            candidates = self._event_index.get(
+                (global_, row._table.name, event), self._event_index[None])
+            matching = []
+            for candidate in candidates:
+                if getattr(candidate, 'GLOBAL', False) != global_:
+                    continue
+                start = time.perf_counter()
+                if self.match(candidate, event, row, updates):
+                    matching.append(candidate)
+                self.metrics.observe(EVENT_MATCH_METRIC,
+                                     time.perf_counter() - start,
+                                     event=_event_name(candidate))
+            return tuple(matching)
+
+    def observe_run(self, event, elapsed):
+        self.metrics.observe(EVENT_RUN_METRIC, elapsed,
+                             event=_event_name(event))
+        if elapsed > SLOW_EVENT_RUN_THRESHOLD:
+            LOG.warning('Running %(event)s took %(elapsed).3f seconds',
+                        {'event': event, 'elapsed': elapsed})
+        _write_event_metrics()
 
 
 class Ml2OvnIdlBase(connection.OvsdbIdl):
@@ -783,6 +783,41 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         """
         self._call_on_drivers("create_port_postcommit", context)
 
+    def create_port_bulk_postcommit(self, contexts):
+        """Notify all mechanism drivers of a bulk port creation.
+
+        :raises: neutron.plugins.ml2.common.MechanismDriverError
+        if any mechanism driver create_port_postcommit or
+        create_port_bulk_postcommit call fails.
+
+        Called after the database transaction. Mechanism drivers
+        implementing create_port_bulk_postcommit are called once with
+        the whole list of port contexts, so they can create all the
+        ports in their backend in one go; any other mechanism driver
+        is called with create_port_postcommit for each port. Errors
+        are handled as in create_port_postcommit.
+        """
+        for driver in self.ordered_mech_drivers:
+            bulk_method = getattr(driver.obj, 'create_port_bulk_postcommit',
+                                  None)
+            method_name = ('create_port_bulk_postcommit' if bulk_method
+                           else 'create_port_postcommit')
+            try:
+                if bulk_method:
+                    bulk_method(contexts)
+                else:
+                    for context in contexts:
+                        driver.obj.create_port_postcommit(context)
+            except Exception as e:
+                LOG.exception(
+                    "Mechanism driver '%(name)s' failed in %(method)s",
+                    {'name': driver.name, 'method': method_name}
+                )
+                raise ml2_exc.MechanismDriverError(
+                    method=method_name,
+                    errors=[e]
+                )
+
     def update_port_precommit(self, context):
         """Notify all mechanism drivers during port update.
 
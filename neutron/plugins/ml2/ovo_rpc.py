@@ -11,6 +11,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import atexit
+import threading
 import traceback
 
 from neutron_lib.callbacks import events
@@ -18,10 +20,13 @@ from neutron_lib.callbacks import registry
 from neutron_lib.callbacks import resources
 from neutron_lib import context as n_ctx
 from neutron_lib.db import api as db_api
+from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_service import backend as oslo_service_backend
 
 from neutron.api.rpc.callbacks import events as rpc_events
 from neutron.api.rpc.handlers import resources_rpc
+from neutron.conf.plugins.ml2 import config as ml2_config
 from neutron.objects import address_group
 from neutron.objects import network
 from neutron.objects import ports
@@ -29,6 +34,7 @@ from neutron.objects import securitygroup
 from neutron.objects import subnet
 
 LOG = logging.getLogger(__name__)
+ml2_config.register_ml2_plugin_opts()
 
 
 # TODO(ralonsoh): in [1], the ``_ObjectChangeHandler`` was changed to send the
@@ -36,13 +42,32 @@ LOG = logging.getLogger(__name__)
 # deprecated, it could be possible to revert to the previous architecture using
 # preemptive threads.
 # [1] https://review.opendev.org/c/openstack/neutron/+/926922
+# NOTE: the changes are still pushed in the API call thread by default. Only
+# the opt-in ``resource_push_coalesce_interval`` pushes them from a timer
+# thread, and it is disabled when the ``eventlet`` backend is selected. The
+# pending changes are pushed when the worker stops or is reset and when the
+# process exits.
 class _ObjectChangeHandler:
+    """Pushes the changes of a resource type to the agents.
 
-    def __init__(self, resource, object_class, resource_push_api):
+    With a coalescing interval, the IDs of the changed resources are
+    collected during that interval and their latest state is then pushed
+    in batches, so several changes of a resource are sent only once.
+    """
+
+    def __init__(self, resource, object_class, resource_push_api,
+                 coalesce_interval=0, batch_size=None):
         self._resource = resource
         self._obj_class = object_class
         self._resource_push_api = resource_push_api
         self._semantic_warned = False
+        self._coalesce_interval = coalesce_interval
+        self._batch_size = batch_size
+        # resource ID -> context dict of its last change, in the order of
+        # the last changes
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
         for event in (events.AFTER_CREATE, events.AFTER_UPDATE,
                       events.AFTER_DELETE):
             registry.subscribe(self.handle_event, resource, event)
@@ -79,7 +104,76 @@ class _ObjectChangeHandler:
         resource_id = payload.resource_id
         # we preserve the context so we can trace a receive on the agent back
         # to the server-side event that triggered it
-        self.dispatch_event(resource_id, payload.context.to_dict())
+        if self._coalesce_interval:
+            self._enqueue_event(resource_id, payload.context.to_dict())
+        else:
+            self.dispatch_event(resource_id, payload.context.to_dict())
+
+    def _enqueue_event(self, resource_id, context_dict):
+        with self._pending_lock:
+            self._pending.pop(resource_id, None)
+            self._pending[resource_id] = context_dict
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self._coalesce_interval,
+                                                    self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Push the resources changed since the last flush."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            timer, self._flush_timer = self._flush_timer, None
+        if timer:
+            timer.cancel()
+        if pending:
+            self.dispatch_events(pending)
+
+    def _batches(self, items):
+        if not items:
+            return
+        batch_size = self._batch_size or len(items)
+        for i in range(0, len(items), batch_size):
+            yield items[i:i + batch_size]
+
+    def dispatch_events(self, pending):
+        """Push the latest state of several resources to the agents.
+
+        :param pending: dict of the context dicts of the last change of each
+                        resource, by resource ID.
+        """
+        try:
+            # the context of the last change is used to push the whole batch
+            context = n_ctx.Context.from_dict(list(pending.values())[-1])
+            # the changes may come from several projects, the resources are
+            # fetched with an admin context so that none is missing from the
+            # batch and pushed as deleted
+            admin_context = n_ctx.get_admin_context()
+            resource_ids = list(pending)
+            updated = []
+            for ids in self._batches(resource_ids):
+                with db_api.get_context_manager().independent.reader.using(
+                        admin_context):
+                    updated += self._obj_class.get_objects(admin_context,
+                                                           id=ids)
+            found_ids = {obj.id for obj in updated}
+            # construct fake objects with the right ID so we can have a
+            # payload for the delete messages.
+            deleted = [self._obj_class(id=resource_id)
+                       for resource_id in resource_ids
+                       if resource_id not in found_ids]
+            LOG.debug("Pushing %(updated)d updated and %(deleted)d deleted "
+                      "%(res)s resources for %(changes)d changes",
+                      {'updated': len(updated), 'deleted': len(deleted),
+                       'res': self._resource, 'changes': len(pending)})
+            for rpc_event, objs in ((rpc_events.UPDATED, updated),
+                                    (rpc_events.DELETED, deleted)):
+                for batch in self._batches(objs):
+                    self._resource_push_api.push(context, batch, rpc_event)
+        except Exception as e:
+            LOG.exception(
+                "Exception while dispatching %(res)s events: %(e)s",
+                {'res': self._resource, 'e': e})
 
     def dispatch_event(self, resource_id, context_dict):
         try:
@@ -114,8 +208,28 @@ class OVOServerRpcInterface:
     def __init__(self):
         self._rpc_pusher = resources_rpc.ResourcesPushRpcApi()
         self._setup_change_handlers()
+        if self._coalesce_interval:
+            # push the pending changes of the API workers on exit
+            atexit.register(self.flush)
         LOG.debug("ML2 OVO RPC backend initialized.")
 
+    @staticmethod
+    def _get_coalesce_interval():
+        coalesce_interval = cfg.CONF.ml2.resource_push_coalesce_interval
+        if (coalesce_interval and
+                oslo_service_backend.get_backend_type() ==
+                oslo_service_backend.BackendType.EVENTLET):
+            LOG.warning("resource_push_coalesce_interval is not supported "
+                        "with the eventlet backend, the resource changes "
+                        "are pushed immediately.")
+            return 0
+        return coalesce_interval
+
+    def flush(self):
+        """Push the resource changes waiting to be coalesced."""
+        for handler in self._resource_handlers.values():
+            handler.flush()
+
     def _setup_change_handlers(self):
         """Setup all of the local callback listeners for resource changes."""
         resource_objclass_map = {
@@ -126,7 +240,11 @@ class OVOServerRpcInterface:
             resources.SECURITY_GROUP_RULE: securitygroup.SecurityGroupRule,
             resources.ADDRESS_GROUP: address_group.AddressGroup,
         }
+        self._coalesce_interval = self._get_coalesce_interval()
         self._resource_handlers = {
-            res: _ObjectChangeHandler(res, obj_class, self._rpc_pusher)
+            res: _ObjectChangeHandler(
+                res, obj_class, self._rpc_pusher,
+                coalesce_interval=self._coalesce_interval,
+                batch_size=cfg.CONF.ml2.resource_push_batch_size)
             for res, obj_class in resource_objclass_map.items()
         }
@@ -137,6 +137,7 @@ from neutron.db.models import securitygroup as sg_models
 from neutron.db import models_v2
 from neutron.db import provisioning_blocks
 from neutron.db import qinq_db
+from neutron.db import request_cache
 from neutron.db import securitygroups_rpc_base as sg_db_rpc
 from neutron.db import segments_db
 from neutron.db import subnet_service_type_mixin
@@ -147,6 +148,7 @@ from neutron.extensions import qinq
 from neutron.extensions import security_groups_default_rules as \
         sg_default_rules_ext
 from neutron.extensions import vlantransparent
+from neutron.ipam.drivers.neutrondb_ipam import driver as neutrondb_ipam
 from neutron.ipam import exceptions as ipam_exc
 from neutron.objects import base as base_obj
 from neutron.objects import ports as ports_obj
@@ -448,6 +450,12 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
         if 'ovn' not in self.mechanism_manager.mech_drivers:
             self.register_sg_notifier()
 
+    def flush_rpc_notifiers(self):
+        """Push the resource changes waiting to be sent to the agents."""
+        ovo_notifier = getattr(self, '_ovo_notifier', None)
+        if ovo_notifier:
+            ovo_notifier.flush()
+
     @log_helpers.log_method_call
     def start_rpc_listeners(self):
         """Start the RPC loop to let the plugin communicate with agents."""
@@ -1334,6 +1342,7 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
 
             updated_network = super().update_network(
                 context, id, network, db_network=db_network)
+            request_cache.invalidate(context, request_cache.NETWORK, id)
             self.extension_manager.process_update_network(context, net_data,
                                                           updated_network)
             self._process_l3_update(context, updated_network, net_data)
@@ -1382,16 +1391,31 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
 
     @db_api.retry_if_session_inactive()
     def get_network(self, context, id, fields=None, net_db=None):
+        if net_db is None:
+            net_data = request_cache.get_or_load(
+                context, request_cache.NETWORK, id,
+                lambda: self._get_network_dict(context, id))
+        else:
+            net_data = self._get_network_dict(context, id, net_db=net_db)
+
+        return db_utils.resource_fields(net_data, fields)
+
+    def _get_network_dict(self, context, id, net_db=None):
         with db_api.CONTEXT_READER.using(context):
             net_db = net_db or self._get_network(context, id)
             net_data = self._make_network_dict(net_db, context=context)
             self.type_manager.extend_network_dict_provider(context, net_data)
-
-        return db_utils.resource_fields(net_data, fields)
+        return net_data
 
     @db_api.retry_if_session_inactive()
     def get_networks(self, context, filters=None, fields=None,
                      sorts=None, limit=None, marker=None, page_reverse=False):
+        if db_base_plugin_v2.is_projectable(
+                fields, db_base_plugin_v2.NETWORK_COLUMNS, ['shared']):
+            # NOTE: the provider attributes are not requested
+            return self._get_projected_networks(
+                context, filters=filters, fields=fields, sorts=sorts,
+                limit=limit, marker=marker, page_reverse=page_reverse)
         with db_api.CONTEXT_READER.using(context):
             nets_db = super()._get_networks(
                 context, filters, None, sorts, limit, marker, page_reverse)
@@ -1424,6 +1448,8 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
     def delete_network(self, context, id):
         # the only purpose of this override is to protect this from being
         # called inside of a transaction.
+        request_cache.invalidate(context, request_cache.NETWORK, id)
+        request_cache.invalidate(context, request_cache.SUBNETS, id)
         return super().delete_network(context, id)
 
     # NOTE(mgoddard): Use a priority of zero to ensure this handler runs before
@@ -1475,6 +1501,10 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
         with db_api.CONTEXT_WRITER.using(context):
             result, net_db, ipam_sub = self._create_subnet_precommit(
                 context, subnet)
+            request_cache.invalidate(context, request_cache.NETWORK,
+                                     result['network_id'])
+            request_cache.invalidate(context, request_cache.SUBNETS,
+                                     result['network_id'])
 
             self.extension_manager.process_create_subnet(
                 context, subnet[subnet_def.RESOURCE_NAME], result)
@@ -1527,6 +1557,8 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
         with db_api.CONTEXT_WRITER.using(context):
             updated_subnet, original_subnet = self._update_subnet_precommit(
                 context, id, subnet)
+            request_cache.invalidate(context, request_cache.SUBNETS,
+                                     updated_subnet['network_id'])
             self.extension_manager.process_update_subnet(
                 context, subnet[subnet_def.RESOURCE_NAME], updated_subnet)
             updated_subnet = self.get_subnet(context, id)
@@ -1548,6 +1580,8 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
     def delete_subnet(self, context, id):
         # the only purpose of this override is to protect this from being
         # called inside of a transaction.
+        request_cache.invalidate(context, request_cache.NETWORK)
+        request_cache.invalidate(context, request_cache.SUBNETS)
         return super().delete_subnet(context, id)
 
     # NOTE(mgoddard): Use a priority of zero to ensure this handler runs before
@@ -1672,6 +1706,8 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
 
     @utils.transaction_guard
     @db_api.retry_if_session_inactive()
+    @neutrondb_ipam.count_retries
+    @request_cache.scoped
     def create_port(self, context, port):
         self._before_create_port(context, port)
         result, mech_context = self._create_port_db(context, port)
@@ -1703,6 +1739,46 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
 
         return bound_context.current
 
+    def _after_create_ports(self, context, results, mech_contexts):
+        # Same as _after_create_port, but the mechanism drivers are
+        # notified of all the ports at once so they can batch the calls
+        # to their backend.
+        for result, mech_context in zip(results, mech_contexts):
+            result['network'] = mech_context.network.current
+            registry.publish(resources.PORT, events.AFTER_CREATE, self,
+                             payload=events.DBEventPayload(
+                                 context, states=(result,),
+                                 resource_id=result['id']))
+
+        try:
+            self.mechanism_manager.create_port_bulk_postcommit(mech_contexts)
+        except ml2_exc.MechanismDriverError:
+            with excutils.save_and_reraise_exception():
+                port_ids = [result['id'] for result in results]
+                LOG.error("mechanism_manager.create_port_bulk_postcommit "
+                          "failed, deleting ports %s", port_ids)
+                for port_id in port_ids:
+                    try:
+                        self.delete_port(context, port_id,
+                                         l3_port_check=False)
+                    except Exception:
+                        # the other ports must still be deleted
+                        LOG.exception("Failed to delete port %s after the "
+                                      "bulk postcommit failure", port_id)
+
+        completed_ports = []
+        for result, mech_context in zip(results, mech_contexts):
+            try:
+                bound_context = self._bind_port_if_needed(mech_context)
+            except ml2_exc.MechanismDriverError:
+                with excutils.save_and_reraise_exception():
+                    LOG.error("_bind_port_if_needed "
+                              "failed, deleting port '%s'", result['id'])
+                    self.delete_port(context, result['id'],
+                                     l3_port_check=False)
+            completed_ports.append(bound_context.current)
+        return completed_ports
+
     def allocate_macs_and_ips_for_ports(self, context, ports):
         macs = self._generate_macs(len(ports))
         network_cache = dict()
@@ -1763,6 +1839,8 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                         context, port, port.get('ipams'))
 
     @db_api.retry_if_session_inactive()
+    @neutrondb_ipam.count_retries
+    @request_cache.scoped
     def _create_port_bulk(self, context, port_list, network_cache):
         # TODO(njohnston): Break this up into smaller functions.
         port_data = []
@@ -1886,16 +1964,14 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                     })
 
         # Perform actions after the transaction is committed
-        completed_ports = []
         for port in port_data:
             resource_extend.apply_funcs('ports',
                                         port['port_dict'],
                                         port['port_obj'].db_obj)
-            completed_ports.append(
-                self._after_create_port(context,
-                                        port['port_dict'],
-                                        port['mech_context']))
-        return completed_ports
+        return self._after_create_ports(
+            context,
+            [port['port_dict'] for port in port_data],
+            [port['mech_context'] for port in port_data])
 
     # TODO(yalei) - will be simplified after security group and address pair be
     # converted to ext driver too.
@@ -1963,6 +2039,8 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
 
     @utils.transaction_guard
     @db_api.retry_if_session_inactive()
+    @neutrondb_ipam.count_retries
+    @request_cache.scoped
     def update_port(self, context, id, port):
         attrs = port[port_def.RESOURCE_NAME]
         need_port_update_notify = False
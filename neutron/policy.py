@@ -50,6 +50,9 @@ _RESOURCE_FOREIGN_KEYS = {
     'security_groups': 'security_group_id'
 }
 
+# Marker of the attributes missing from a target in the check_batch cache keys
+_MISSING = object()
+
 
 def reset():
     global _ENFORCER
@@ -514,6 +517,101 @@ def check(context, action, target, might_not_exist=False, pluralized=None):
                              pluralized=pluralized)
 
 
+def _get_rule_target_keys(rule, seen_rules=()):
+    """Return the target attributes a policy rule depends on.
+
+    Returns None if they can't be known, like for the checks sending the
+    whole target to an external service.
+    """
+    if isinstance(rule, OwnerCheck):
+        keys = {rule.target_field}
+        keys.update(_RESOURCE_FOREIGN_KEYS.values())
+        keys.update('{}_{}_id'.format(constants.EXT_PARENT_PREFIX, resource)
+                    for resource in service_const.EXT_PARENT_RESOURCE_MAPPING)
+        return keys
+    if isinstance(rule, FieldCheck):
+        keys = {rule.field}
+        if rule.resource == 'networks' and rule.field == constants.SHARED:
+            keys.update(('network_id', 'project_id'))
+        return keys
+    if isinstance(rule, policy.RuleCheck):
+        sub_rule = _ENFORCER.rules.get(rule.match)
+        if sub_rule is None or rule.match in seen_rules:
+            return set()
+        return _get_rule_target_keys(sub_rule, seen_rules + (rule.match,))
+    if isinstance(rule, policy.NotCheck):
+        return _get_rule_target_keys(rule.rule, seen_rules)
+    if isinstance(rule, policy.AndCheck | policy.OrCheck):
+        keys = set()
+        for sub_rule in rule.rules:
+            sub_keys = _get_rule_target_keys(sub_rule, seen_rules)
+            if sub_keys is None:
+                return None
+            keys |= sub_keys
+        return keys
+    if isinstance(rule, policy.Check):
+        if rule.kind in ('http', 'https'):
+            return None
+        # role and generic checks only read the target attributes
+        # interpolated in their match
+        return set(re.findall(r'%\(([^)]+)\)s', str(rule.match)))
+    if str(rule) in ('@', '!'):
+        return set()
+    return None
+
+
+def check_batch(context, action, targets, pluralized=None):
+    """Verifies that the action is valid on each target in this context.
+
+    This is equivalent to calling check on each target, but the policy rule
+    is only enforced once per distinct value of the target attributes it
+    references.
+
+    :param context: neutron context
+    :param action: string representing the action to be checked
+    :param targets: list of dictionaries representing the objects of the
+        action
+    :param pluralized: pluralized case of resource
+
+    :return: Returns a list of booleans, True for the targets on which
+        access is permitted.
+    """
+    if not targets:
+        return []
+    if not cfg.CONF.oslo_policy.enforce_new_defaults and context.is_admin:
+        return [True] * len(targets)
+    init()
+    _resource, enforce_attr_based_check = get_resource_and_action(
+        action, pluralized)
+    if enforce_attr_based_check:
+        # the rule to match depends on the attributes set in each target
+        return [check(context, action, target, pluralized=pluralized)
+                for target in targets]
+
+    match_rule = _build_match_rule(action, {}, pluralized)
+    keys = _get_rule_target_keys(match_rule)
+    if keys is not None:
+        keys = sorted(keys)
+    results = {}
+    mask = []
+    for target in targets:
+        key = allowed = None
+        if keys is not None:
+            try:
+                key = tuple(target.get(k, _MISSING) for k in keys)
+                allowed = results.get(key)
+            except TypeError:
+                # unhashable attribute value, like a list
+                key = None
+        if allowed is None:
+            allowed = _ENFORCER.enforce(match_rule, target, context,
+                                        pluralized=pluralized)
+            if key is not None:
+                results[key] = allowed
+        mask.append(allowed)
+    return mask
+
+
 def enforce(context, action, target, pluralized=None):
     """Verifies that the action is valid on the target in this context.
 
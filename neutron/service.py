@@ -98,11 +98,19 @@ class RpcWorker(neutron_worker.NeutronBaseWorker):
             if isinstance(server, rpc_server.MessageHandlingServer):
                 LOG.debug('calling stop on %s', server)
                 server.stop()
+        self._flush_rpc_notifiers()
 
     @common_utils.log_worker_lifecycle(lambda self: self.desc)
     def reset(self):
+        self._flush_rpc_notifiers()
         config.reset_service()
 
+    def _flush_rpc_notifiers(self):
+        # the changes coalesced by the plugins would be lost otherwise
+        for plugin in self._plugins:
+            if hasattr(plugin, 'flush_rpc_notifiers'):
+                plugin.flush_rpc_notifiers()
+
 
 class RpcReportsWorker(RpcWorker):
     start_listeners_method = 'start_rpc_state_reports_listener'
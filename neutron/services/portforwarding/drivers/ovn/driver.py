@@ -295,8 +295,9 @@ class OVNPortForwarding:
         if not all(check_rev_cmd.result == ovn_const.TXN_COMMITTED
                    for check_rev_cmd, _fip_obj in check_rev_tuples):
             return
-        for _check_rev_cmd, fip_obj in check_rev_tuples:
-            db_rev.bump_revision(context, fip_obj, ovn_const.TYPE_FLOATINGIPS)
+        db_rev.bump_revisions(
+            context, [fip_obj for _check_rev_cmd, fip_obj in check_rev_tuples],
+            ovn_const.TYPE_FLOATINGIPS)
 
     def _handle_notification(self, _resource, event_type, _pf_plugin, payload):
         if not payload:
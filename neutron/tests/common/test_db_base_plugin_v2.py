@@ -30,6 +30,7 @@ from neutron_lib import constants
 from neutron_lib import context
 from neutron_lib.db import api as db_api
 from neutron_lib.db import standard_attr
+from neutron_lib.db import utils as ndb_utils
 from neutron_lib import exceptions as lib_exc
 from neutron_lib import fixture
 from neutron_lib.plugins import directory
@@ -1436,6 +1437,22 @@ class TestPortsV2(NeutronDbPluginV2TestCase):
             ports = (v1, v2, v3)
             self._test_list_resources('port', ports)
 
+    def test_list_ports_with_column_fields(self):
+        with self.port(name='port1', device_id='dev1') as port1,\
+                self.port(name='port2', device_id='dev2') as port2:
+            plugin = directory.get_plugin()
+            ctx = context.get_admin_context()
+            fields = ['id', 'device_id', 'project_id', 'tenant_id',
+                      'mac_address']
+            with mock.patch.object(plugin, '_make_port_dict') as make_dict:
+                ports = plugin.get_ports(ctx, fields=fields,
+                                         sorts=[('name', False)])
+            # the ports are built from the columns only
+            make_dict.assert_not_called()
+            expected = [{field: port['port'][field] for field in fields}
+                        for port in (port2, port1)]
+            self.assertEqual(expected, ports)
+
     def _test_list_ports_filtered_by_fixed_ip(self, **kwargs):
 
         with self.port() as port1, self.port():
@@ -1535,6 +1552,22 @@ fixed_ips=ip_address%%3D%s&fixed_ips=ip_address%%3D%s&fixed_ips=subnet_id%%3D%s
                                             (port1, port2, port3),
                                             ('mac_address', 'asc'), 2, 2)
 
+    def test_list_ports_with_pagination_native_cursors(self):
+        if self._skip_native_pagination:
+            self.skipTest("Skip test for not implemented pagination feature")
+        cfg.CONF.set_override('pagination_use_cursors', True)
+        with self.port(mac_address='00:00:00:00:00:01') as port1,\
+                self.port(mac_address='00:00:00:00:00:02') as port2,\
+                self.port(mac_address='00:00:00:00:00:03') as port3,\
+                mock.patch.object(ndb_utils, 'get_marker_obj',
+                                  wraps=ndb_utils.get_marker_obj) as get_obj:
+            self._test_list_with_pagination('port',
+                                            (port1, port2, port3),
+                                            ('mac_address', 'asc'), 2, 2)
+        # the next pages are found from the cursors, without marker lookup
+        self.assertEqual([None] * get_obj.call_count,
+                         [call[0][4] for call in get_obj.call_args_list])
+
     def test_list_ports_with_pagination_emulated(self):
         helper_patcher = mock.patch(
             'neutron.api.v2.base.Controller._get_pagination_helper',
@@ -3232,6 +3265,21 @@ class TestNetworksV2(NeutronDbPluginV2TestCase):
                                             (net1, net2, net3),
                                             ('name', 'asc'), 2, 2)
 
+    def test_list_networks_with_pagination_native_cursors(self):
+        if self._skip_native_pagination:
+            self.skipTest("Skip test for not implemented pagination feature")
+        cfg.CONF.set_override('pagination_use_cursors', True)
+        with self.network(name='net1') as net1,\
+                self.network(name='net2') as net2,\
+                self.network(name='net3') as net3,\
+                mock.patch.object(ndb_utils, 'get_marker_obj',
+                                  wraps=ndb_utils.get_marker_obj) as get_obj:
+            self._test_list_with_pagination('network',
+                                            (net3, net2, net1),
+                                            ('name', 'desc'), 2, 2)
+        self.assertEqual([None] * get_obj.call_count,
+                         [call[0][4] for call in get_obj.call_args_list])
+
     def test_list_networks_with_pagination_emulated(self):
         helper_patcher = mock.patch(
             'neutron.api.v2.base.Controller._get_pagination_helper',
@@ -3314,6 +3362,23 @@ class TestNetworksV2(NeutronDbPluginV2TestCase):
             self.assertNotIn('tenant_id', net)
             self.assertNotIn('project_id', net)
 
+    def test_list_networks_with_column_fields(self):
+        with self.network(name='net1', shared=True, as_admin=True) as net1,\
+                self.network(name='net2') as net2:
+            plugin = directory.get_plugin()
+            ctx = context.Context(project_id=net2['network']['project_id'])
+            fields = ['id', 'name', 'shared', 'tenant_id', 'status']
+            with mock.patch.object(plugin, '_make_network_dict') as make_dict:
+                networks = plugin.get_networks(ctx, fields=fields,
+                                               sorts=[('name', True)])
+            make_dict.assert_not_called()
+            expected = [{field: net['network'][field] for field in
+                         fields + ['project_id']}
+                        for net in (net1, net2)]
+            self.assertEqual(expected, networks)
+            self.assertTrue(networks[0]['shared'])
+            self.assertFalse(networks[1]['shared'])
+
     def test_list_networks_with_parameters_invalid_values(self):
         with self.network(name='net1', admin_state_up=False),\
                 self.network(name='net2'):
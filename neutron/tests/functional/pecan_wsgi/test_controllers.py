@@ -15,6 +15,7 @@ from unittest import mock
 
 from neutron_lib import constants as n_const
 from neutron_lib import context
+from neutron_lib import exceptions as n_exc
 from neutron_lib.plugins import constants as plugin_constants
 from neutron_lib.plugins import directory
 from oslo_config import cfg
@@ -29,6 +30,7 @@ import webob.exc
 from neutron.api import extensions
 from neutron.conf import quota as qconf
 from neutron import manager
+from neutron.pecan_wsgi.controllers import resource as res_ctrl
 from neutron.pecan_wsgi.controllers import root as controllers
 from neutron.pecan_wsgi.controllers import utils as controller_utils
 from neutron import policy
@@ -591,6 +593,103 @@ class TestResourceController(TestRootController):
         self.assertEqual(1, len(json_body['ports']))
 
 
+class TestStreamedCollection(test_functional.PecanFunctionalTest):
+
+    def setUp(self):
+        super().setUp()
+        policy.init()
+        self.addCleanup(policy.reset)
+        self.plugin = directory.get_plugin()
+        self.ctx = context.get_admin_context()
+        self.ports = {'projid': [], 'other': []}
+        for project_id in ('projid', 'other'):
+            network_id = self.plugin.create_network(self.ctx, {'network': {
+                'name': 'pecannet', 'project_id': project_id,
+                'shared': False, 'admin_state_up': True,
+                'status': 'ACTIVE'}})['id']
+            for index in range(3):
+                self.ports[project_id].append(self.plugin.create_port(
+                    self.ctx, {'port': {
+                        'project_id': project_id, 'network_id': network_id,
+                        'fixed_ips': n_const.ATTR_NOT_SPECIFIED,
+                        'mac_address': n_const.ATTR_NOT_SPECIFIED,
+                        'admin_state_up': True, 'device_id': 'FF',
+                        'device_owner': 'pecan',
+                        'name': 'pecan-%d' % index}}))
+        cfg.CONF.set_override('stream_list_chunk_size', 2)
+
+    def _get_ports(self, url='/v2.0/ports.json', stream=True, streamed=None):
+        cfg.CONF.set_override('stream_list_responses', stream)
+        with mock.patch.object(self.plugin, 'iter_ports',
+                               wraps=self.plugin.iter_ports) as iter_ports:
+            response = self.app.get(url, headers={'X-Project-Id': 'projid'})
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(stream if streamed is None else streamed,
+                         iter_ports.called)
+        return response.json['ports']
+
+    def test_get_collection(self):
+        ports = self._get_ports()
+        self.assertEqual(sorted(p['id'] for p in self.ports['projid']),
+                         [p['id'] for p in ports])
+        self.assertEqual(self._get_ports(stream=False), ports)
+
+    def test_get_collection_with_fields_selector(self):
+        url = '/v2.0/ports.json?fields=id&fields=name'
+        ports = self._get_ports(url)
+        self.assertEqual(3, len(ports))
+        for port in ports:
+            self.assertEqual({'id', 'name'}, set(port))
+        self.assertEqual(self._get_ports(url, stream=False), ports)
+
+    def test_get_collection_with_filters(self):
+        port = self.ports['projid'][1]
+        ports = self._get_ports('/v2.0/ports.json?name=%s' % port['name'])
+        self.assertEqual([port['id']], [p['id'] for p in ports])
+
+    def test_get_collection_not_streamed_with_pagination(self):
+        ports = self._get_ports('/v2.0/ports.json?limit=2', streamed=False)
+        self.assertEqual(2, len(ports))
+
+    def test_get_collection_not_streamed_with_sorting(self):
+        ports = self._get_ports(
+            '/v2.0/ports.json?sort_key=name&sort_dir=desc', streamed=False)
+        self.assertEqual(['pecan-2', 'pecan-1', 'pecan-0'],
+                         [p['name'] for p in ports])
+
+    def test_get_collection_first_chunk_error(self):
+        cfg.CONF.set_override('stream_list_responses', True)
+
+        def iter_ports(*args, **kwargs):
+            # the error is only raised when the first chunk is fetched
+            raise n_exc.NetworkNotFound(net_id='netid')
+            yield []
+
+        with mock.patch.object(self.plugin, 'iter_ports',
+                               side_effect=iter_ports):
+            response = self.app.get('/v2.0/ports.json',
+                                    headers={'X-Project-Id': 'projid'},
+                                    expect_errors=True)
+        self.assertEqual(404, response.status_int)
+
+    def test_get_collection_truncated_on_error(self):
+        cfg.CONF.set_override('stream_list_responses', True)
+
+        def iter_ports(*args, **kwargs):
+            yield self.ports['projid'][:1]
+            raise RuntimeError()
+
+        with mock.patch.object(self.plugin, 'iter_ports',
+                               side_effect=iter_ports), \
+                mock.patch.object(res_ctrl.LOG, 'exception') as log:
+            response = self.app.get('/v2.0/ports.json',
+                                    headers={'X-Project-Id': 'projid'})
+        self.assertEqual(200, response.status_int)
+        self.assertEqual([self.ports['projid'][0]['id']],
+                         [p['id'] for p in response.json['ports']])
+        log.assert_called_once()
+
+
 class TestPaginationAndSorting(test_functional.PecanFunctionalTest):
 
     RESOURCE_COUNT = 6
@@ -715,6 +814,22 @@ class TestPaginationAndSorting(test_functional.PecanFunctionalTest):
                                                   sort_key='name',
                                                   sort_dir='asc')
 
+    def test_get_collection_with_pagination_cursors(self):
+        cfg.CONF.set_override('pagination_use_cursors', True)
+        nets = sorted(self.networks, key=lambda net: net['name'],
+                      reverse=True)
+        url = '/v2.0/networks.json?limit=4&sort_key=name&sort_dir=desc'
+        list_ids = []
+        while url:
+            list_resp = self.app.get(
+                url, headers={'X-Project-Id': self._project_id}).json
+            list_ids += [net['id'] for net in list_resp['networks']]
+            links = {link['rel']: link['href']
+                     for link in list_resp.get('networks_links', [])}
+            self.assertNotIn('marker=', links['previous'])
+            url = links.get('next')
+        self.assertEqual([net['id'] for net in nets], list_ids)
+
 
 class TestRequestProcessing(TestRootController):
 
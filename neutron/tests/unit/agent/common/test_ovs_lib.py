@@ -446,11 +446,26 @@ class OVS_Lib_Test(base.BaseTestCase):
                           in_port=5, priority=1)
 
     def test_mod_delete_flows_mixed_strict(self):
+        self.assertRaises(exceptions.InvalidInput,
+                          self.br.do_action_flows, 'del',
+                          [{'in_port': 5},
+                           {'in_port': 5, 'priority': 1, 'strict': True}])
+
+    def test_deferred_delete_flows_mixed_strict(self):
         deferred_br = self.br.deferred()
         deferred_br.delete_flows(in_port=5)
         deferred_br.delete_flows(in_port=5, priority=1, strict=True)
-        self.assertRaises(exceptions.InvalidInput,
-                          deferred_br.apply_flows)
+        deferred_br.apply_flows()
+        cookie_spec = "cookie=%s/-1" % self.br._default_cookie
+        expected_calls = [
+            self._ofctl_mock("del-flows", self.BR_NAME, '-',
+                             process_input=StringSetMatcher(
+                                 "%s,in_port=5" % cookie_spec)),
+            self._ofctl_mock("del-flows", self.BR_NAME, '--strict', '-',
+                             process_input=StringSetMatcher(
+                                 "%s,in_port=5,priority=1" % cookie_spec)),
+        ]
+        self.execute.assert_has_calls(expected_calls)
 
     def test_dump_flows(self):
         table = 23
@@ -818,6 +833,21 @@ class TestDeferredOVSBridge(base.BaseTestCase):
             deferred_br.mod_flow(**self.mod_flow_dict2)
         self._verify_mock_call(expected_calls)
 
+    def test_apply_strict_and_non_strict_deletes_split(self):
+        strict_del_flow_dict = dict(in_port=33, priority=10, strict=True)
+        expected_calls = [
+            mock.call('del', {None: [self.del_flow_dict1]}, False),
+            mock.call('del', {None: [strict_del_flow_dict]}, False),
+            mock.call('del', {None: [self.del_flow_dict2]}, False),
+        ]
+
+        with ovs_lib.DeferredOVSBridge(self.br,
+                                       full_ordered=True) as deferred_br:
+            deferred_br.delete_flows(**self.del_flow_dict1)
+            deferred_br.delete_flows(**strict_del_flow_dict)
+            deferred_br.delete_flows(**self.del_flow_dict2)
+        self._verify_mock_call(expected_calls)
+
     def test_getattr_unallowed_attr(self):
         with ovs_lib.DeferredOVSBridge(self.br) as deferred_br:
             self.assertEqual(self.br.add_port, deferred_br.add_port)
@@ -143,3 +143,34 @@ class TestExclusiveResourceProcessor(base.BaseTestCase):
         for idx in reversed(range(5)):
             rpqueue._queue.get()
             self.assertEqual(idx, rpqueue.qsize)
+
+    def test_pending_resources(self):
+        rpqueue = queue.ResourceProcessingQueue()
+        self.assertEqual(0, rpqueue.pending_resources)
+        for resource_id in (FAKE_ID, FAKE_ID, FAKE_ID_2):
+            rpqueue.add(queue.ResourceUpdate(resource_id, PRIORITY_RPC))
+        self.assertEqual(2, rpqueue.pending_resources)
+        # The updates of a resource being processed are not pending
+        with queue.ExclusiveResourceProcessor(FAKE_ID):
+            self.assertEqual(1, rpqueue.pending_resources)
+        self.assertEqual(2, rpqueue.pending_resources)
+
+    def test_wait_for_updates(self):
+        rpqueue = queue.ResourceProcessingQueue()
+        self.assertFalse(rpqueue.wait_for_updates(timeout=0.01))
+        rpqueue.add(queue.ResourceUpdate(FAKE_ID, PRIORITY_RPC))
+        self.assertTrue(rpqueue.wait_for_updates(timeout=0.01))
+        self.assertFalse(rpqueue.wait_for_updates(timeout=0.01))
+
+    def test_each_update_to_next_resource_timeout(self):
+        rpqueue = queue.ResourceProcessingQueue()
+        self.assertEqual(
+            [], list(rpqueue.each_update_to_next_resource(timeout=0.01)))
+
+    def test_each_update_to_next_resource(self):
+        rpqueue = queue.ResourceProcessingQueue()
+        update = queue.ResourceUpdate(FAKE_ID, PRIORITY_RPC)
+        rpqueue.add(update)
+        updates = list(rpqueue.each_update_to_next_resource(timeout=0.01))
+        self.assertEqual(1, len(updates))
+        self.assertIs(update, updates[0][1])
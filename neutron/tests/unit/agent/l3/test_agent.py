@@ -59,6 +59,7 @@ from neutron.agent.linux import utils as linux_utils
 from neutron.agent.metadata import driver as metadata_driver
 from neutron.agent.metadata import driver_base as metadata_driver_base
 from neutron.agent import rpc as agent_rpc
+from neutron.common import _constants as n_const
 from neutron.conf.agent import common as agent_config
 from neutron.conf.agent.l3 import config as l3_config
 from neutron.conf.agent.l3 import ha as ha_conf
@@ -241,8 +242,9 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
         self._mock_ka_not_server = mock.patch.object(
             ha.AgentMixin, '_start_keepalived_notifications_server')
         self.mock_ka_not_server = self._mock_ka_not_server.start()
-        self.mock_p_router_loop = mock.patch.object(
-            l3_agent.L3NATAgent, '_process_routers_loop').start()
+        self._p_router_loop = mock.patch.object(
+            l3_agent.L3NATAgent, '_process_routers_loop')
+        self.mock_p_router_loop = self._p_router_loop.start()
 
     def test_request_id_changes(self):
         a = l3_agent.L3NATAgent(HOSTNAME, self.conf)
@@ -518,6 +520,58 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
             agent.periodic_sync_routers_task(agent.context)
             ensure_snat_cleanup.assert_called_once_with(dvr_router['id'])
 
+    def test_periodic_sync_routers_task_skips_unchanged_routers(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        agent._queue = mock.Mock()
+        known_router = {'id': _uuid(),
+                        'external_gateway_info': {'network_id': _uuid()},
+                        'distributed': True}
+        ri = mock.Mock(router=known_router)
+        agent.router_info[known_router['id']] = ri
+        agent._router_digests[known_router['id']] = 'digest'
+        new_router = {'id': _uuid(), 'external_gateway_info': {},
+                      n_const.ROUTER_SYNC_DIGEST_KEY: 'new-digest'}
+        self.plugin_api.get_router_ids.return_value = [
+            known_router['id'], new_router['id']]
+        self.plugin_api.get_routers.return_value = [
+            {'id': known_router['id'],
+             n_const.ROUTER_SYNC_DIGEST_KEY: 'digest',
+             n_const.ROUTER_UNCHANGED_KEY: True},
+            new_router]
+        with mock.patch.object(namespace_manager.NamespaceManager,
+                               'keep_ext_net') as keep_ext_net:
+            agent.periodic_sync_routers_task(agent.context)
+            keep_ext_net.assert_called_once_with(
+                known_router['external_gateway_info']['network_id'])
+
+        self.plugin_api.get_routers.assert_called_once_with(
+            mock.ANY, [known_router['id'], new_router['id']],
+            router_digests={known_router['id']: 'digest'})
+        agent._queue.add.assert_called_once_with(mock.ANY)
+        update = agent._queue.add.call_args[0][0]
+        self.assertEqual(new_router['id'], update.id)
+        self.assertEqual(new_router, update.resource)
+        self.assertFalse(agent.fullsync)
+
+    def test_process_routers_update_stores_router_digest(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        agent._process_router_if_compatible = mock.Mock()
+        router = {'id': _uuid(), n_const.ROUTER_SYNC_DIGEST_KEY: 'digest'}
+        update = resource_processing_queue.ResourceUpdate(
+            router['id'], l3_agent.PRIORITY_SYNC_ROUTERS_TASK,
+            resource=router)
+        self.assertTrue(agent._process_routers_if_compatible([router],
+                                                             update))
+        self.assertEqual({router['id']: 'digest'}, agent._router_digests)
+
+        # A failed or digest-less update forgets the digest
+        agent._process_router_if_compatible.side_effect = RuntimeError()
+        self.assertFalse(agent._process_routers_if_compatible([router],
+                                                              update))
+        self.assertEqual({}, agent._router_digests)
+
     def test_periodic_sync_routers_task_call_clean_stale_meta_proxies(self):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         agent.init_host()
@@ -2920,7 +2974,8 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
                 oslo_messaging.MessagingTimeout)
         agent._queue = mock.Mock()
         agent._resync_router = mock.Mock()
-        update = mock.Mock()
+        update = mock.Mock(time_elapsed_since_create=0,
+                           time_elapsed_since_start=0)
         update.id = router_id
         update.resource = None
         agent._queue.each_update_to_next_resource.side_effect = [
@@ -2936,6 +2991,165 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
             oslo_messaging.MessagingTimeout)
         self._test_process_routers_update_rpc_timeout()
 
+    def test__process_update_records_metrics(self):
+        metrics_file = '/tmp/l3-agent.prom'
+        self.conf.set_override('metrics_file', metrics_file, group='AGENT')
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        agent._process_router_update = mock.Mock()
+        agent._queue = mock.Mock()
+        update = mock.Mock(priority=l3_agent.PRIORITY_RPC,
+                           action=l3_agent.ADD_UPDATE_ROUTER,
+                           time_elapsed_since_create=0.5,
+                           time_elapsed_since_start=0.2)
+        agent._queue.each_update_to_next_resource.side_effect = [
+            [(None, update)]]
+        with mock.patch.object(agent.update_metrics,
+                               'write_file') as write_file:
+            self.assertTrue(agent._process_update(timeout=1))
+        agent._queue.each_update_to_next_resource.assert_called_once_with(
+            timeout=1)
+        write_file.assert_called_once_with(metrics_file)
+        histogram = agent.update_metrics.get_histogram(
+            l3_agent.UPDATE_WAIT_METRIC, priority='rpc')
+        self.assertEqual(1, histogram.count)
+        self.assertEqual(0.5, histogram.sum)
+        histogram = agent.update_metrics.get_histogram(
+            l3_agent.UPDATE_PROCESSING_METRIC, priority='rpc')
+        self.assertEqual(1, histogram.count)
+        self.assertEqual(0.2, histogram.sum)
+
+    def test__process_update_no_update(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        agent._queue = mock.Mock()
+        agent._queue.each_update_to_next_resource.side_effect = [[]]
+        self.assertFalse(agent._process_update(timeout=1))
+
+    def test__get_router_workers_to_start(self):
+        self.conf.set_override('router_processing_min_workers', 2)
+        self.conf.set_override('router_processing_max_workers', 5)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        # The minimum number of workers is started first
+        self.assertEqual(2, agent._get_router_workers_to_start())
+        self.assertEqual(0, agent._get_router_workers_to_start())
+        # The idle workers, even if not running yet, take the first updates
+        router_ids = [_uuid() for _i in range(5)]
+        for router_id in router_ids[:2]:
+            agent._queue.add(resource_processing_queue.ResourceUpdate(
+                router_id, l3_agent.PRIORITY_RPC))
+        self.assertEqual(0, agent._get_router_workers_to_start())
+        # Then one worker per router waiting, up to the maximum
+        agent._idle_workers = 0
+        self.assertEqual(2, agent._get_router_workers_to_start())
+        agent._idle_workers = 0
+        for router_id in router_ids[2:]:
+            agent._queue.add(resource_processing_queue.ResourceUpdate(
+                router_id, l3_agent.PRIORITY_RPC))
+        self.assertEqual(1, agent._get_router_workers_to_start())
+        self.assertEqual(0, agent._get_router_workers_to_start())
+        self.assertEqual(5, agent._workers)
+
+    def test__get_router_workers_to_start_router_processed(self):
+        self.conf.set_override('router_processing_min_workers', 1)
+        self.conf.set_override('router_processing_max_workers', 5)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        self.assertEqual(1, agent._get_router_workers_to_start())
+        agent._idle_workers = 0
+        router_id = _uuid()
+        for _i in range(3):
+            agent._queue.add(resource_processing_queue.ResourceUpdate(
+                router_id, l3_agent.PRIORITY_RPC))
+        # The updates of a router being processed are handed over to the
+        # worker processing it
+        with resource_processing_queue.ExclusiveResourceProcessor(router_id):
+            self.assertEqual(0, agent._get_router_workers_to_start())
+        self.assertEqual(1, agent._get_router_workers_to_start())
+
+    def test__process_update_idle_workers(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        agent._idle_workers = 1
+        update = mock.Mock(time_elapsed_since_create=0,
+                           time_elapsed_since_start=0)
+        idle_workers = []
+
+        def process_router_update(rp, update):
+            idle_workers.append(agent._idle_workers)
+            raise RuntimeError()
+
+        agent._process_router_update = mock.Mock(
+            side_effect=process_router_update)
+        agent._queue = mock.Mock()
+        agent._queue.each_update_to_next_resource.side_effect = [
+            [(None, update)]]
+        self.assertRaises(RuntimeError, agent._process_update)
+        self.assertEqual([0], idle_workers)
+        self.assertEqual(1, agent._idle_workers)
+
+    def test__process_routers_loop(self):
+        self._p_router_loop.stop()
+        self.conf.set_override('router_processing_min_workers', 2)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        agent._pool = mock.Mock()
+        agent._queue = mock.Mock(pending_resources=0)
+
+        def wait_for_updates(timeout):
+            agent._exiting = True
+
+        agent._queue.wait_for_updates.side_effect = wait_for_updates
+        agent._process_routers_loop()
+        self.assertEqual(2, agent._pool.submit.call_count)
+        agent._queue.wait_for_updates.assert_called_once_with(
+            timeout=l3_agent.ROUTER_WORKERS_CHECK_INTERVAL)
+
+    def test__process_routers_worker_exits_when_idle(self):
+        self.conf.set_override('router_processing_min_workers', 1)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        agent._workers = 2
+        agent._process_update = mock.Mock(side_effect=[True, False])
+        agent._process_routers_worker()
+        agent._process_update.assert_called_with(
+            timeout=l3_agent.ROUTER_WORKER_IDLE_TIMEOUT)
+        self.assertEqual(1, agent._workers)
+
+    def test__process_routers_worker_keeps_minimum(self):
+        self.conf.set_override('router_processing_min_workers', 1)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        agent._workers = 1
+
+        def process_update(timeout):
+            if agent._process_update.call_count == 3:
+                agent._exiting = True
+            return False
+
+        agent._process_update = mock.Mock(side_effect=process_update)
+        agent._process_routers_worker()
+        self.assertEqual(3, agent._process_update.call_count)
+        self.assertEqual(0, agent._workers)
+
+    def test__process_routers_worker_survives_errors(self):
+        self.conf.set_override('router_processing_min_workers', 1)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        agent._workers = 2
+        agent._process_update = mock.Mock(side_effect=[RuntimeError(),
+                                                       False])
+        agent._process_routers_worker()
+        self.assertEqual(2, agent._process_update.call_count)
+        self.assertEqual(1, agent._workers)
+
+    def test_router_processing_workers_check_config(self):
+        self.conf.set_override('router_processing_min_workers', 8)
+        self.conf.set_override('router_processing_max_workers', 4)
+        self.assertRaises(SystemExit, l3_agent.L3NATAgent,
+                          HOSTNAME, self.conf)
+
     def test_process_routers_update_resyncs_failed_router(self):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         agent.init_host()
@@ -2970,7 +3184,8 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         agent.init_host()
         agent._queue = mock.Mock()
-        update = mock.Mock()
+        update = mock.Mock(time_elapsed_since_create=0,
+                           time_elapsed_since_start=0)
         update.resource = None
         update.action = l3_agent.ADD_UPDATE_ROUTER
         router_info = mock.MagicMock()
@@ -2996,7 +3211,8 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         agent.init_host()
         agent._queue = mock.Mock()
-        update = mock.Mock()
+        update = mock.Mock(time_elapsed_since_create=0,
+                           time_elapsed_since_start=0)
         update.resource = None
         update.action = l3_agent.DELETE_ROUTER
         router_info = mock.MagicMock()
@@ -413,6 +413,7 @@ class TestConjIdMap(base.BaseTestCase):
 class TestConjIPFlowManager(base.BaseTestCase):
     def setUp(self):
         super().setUp()
+        securitygroups_rpc.register_securitygroups_opts()
         self.driver = mock.Mock()
         self.driver.int_br.br.dump_flows.return_value = INIT_OF_RULES
         self.manager = ovsfw.ConjIPFlowManager(self.driver)
@@ -513,6 +514,106 @@ class TestConjIPFlowManager(base.BaseTestCase):
             '10.22.3.4', 'ff:ee:dd:cc:bb:aa', 'ingress', 'IPv4', 100,
             {self.conj_id})
 
+    def test_update_flows_for_vlan_incremental(self):
+        cfg.CONF.set_override('incremental_flow_updates', True,
+                              group='SECURITYGROUP')
+        remote_group = self.driver.sg_port_map.get_sg.return_value
+        remote_group.get_ethertype_filtered_addresses.return_value = [
+            ('10.22.3.4', 'fa:16:3e:aa:bb:cc'), ]
+        with mock.patch.object(self.manager.conj_id_map,
+                               'get_conj_id') as get_conj_id_mock:
+            get_conj_id_mock.return_value = self.conj_id
+            self.manager.add(self.vlan_tag, 'sg', 'remote_id',
+                             constants.INGRESS_DIRECTION, constants.IPv4, 0)
+            self.manager.update_flows_for_vlan(self.vlan_tag, 'ofport1')
+            installed_flows = self.manager.installed_flows[self.vlan_tag][
+                (constants.INGRESS_DIRECTION, constants.IPv4)]['10.22.3.4/32']
+            self.driver.install_flows_delta.assert_called_once_with(
+                {}, installed_flows, flow_group_id='ofport1')
+            self.assertEqual(
+                ['conjunction(16,1/2)', 'conjunction(17,1/2)'],
+                sorted(flow['actions'] for flow in installed_flows.values()))
+
+            self.driver.install_flows_delta.reset_mock()
+            remote_group.get_ethertype_filtered_addresses.return_value = []
+            self.manager.update_flows_for_vlan(self.vlan_tag, 'ofport1')
+        self.driver.install_flows_delta.assert_called_once_with(
+            installed_flows, {}, flow_group_id='ofport1')
+        self.driver._add_flow.assert_not_called()
+        self.driver.delete_flows_for_flow_state.assert_not_called()
+
+    def test_update_flows_for_vlan_incremental_only_changed_addresses(self):
+        cfg.CONF.set_override('incremental_flow_updates', True,
+                              group='SECURITYGROUP')
+        remote_group = self.driver.sg_port_map.get_sg.return_value
+        remote_group.get_ethertype_filtered_addresses.return_value = [
+            ('10.22.3.4', 'fa:16:3e:aa:bb:cc'),
+            ('10.22.3.5', 'fa:16:3e:aa:bb:dd')]
+        with mock.patch.object(self.manager.conj_id_map,
+                               'get_conj_id') as get_conj_id_mock:
+            get_conj_id_mock.return_value = self.conj_id
+            self.manager.add(self.vlan_tag, 'sg', 'remote_id',
+                             constants.INGRESS_DIRECTION, constants.IPv4, 0)
+            self.manager.update_flows_for_vlan(self.vlan_tag, 'ofport1')
+            self.assertEqual(2, self.driver.install_flows_delta.call_count)
+
+            # Unchanged members, no flow is regenerated.
+            self.driver.install_flows_delta.reset_mock()
+            self.manager.update_flows_for_vlan(self.vlan_tag, 'ofport1')
+            self.driver.install_flows_delta.assert_not_called()
+
+            remote_group.get_ethertype_filtered_addresses.return_value = [
+                ('10.22.3.4', 'fa:16:3e:aa:bb:cc'),
+                ('10.22.3.6', 'fa:16:3e:aa:bb:ee')]
+            self.manager.update_flows_for_vlan(self.vlan_tag, 'ofport1')
+        installed_flows = self.manager.installed_flows[self.vlan_tag][
+            (constants.INGRESS_DIRECTION, constants.IPv4)]
+        self.assertEqual({'10.22.3.4/32', '10.22.3.6/32'},
+                         set(installed_flows))
+        self.assertEqual(2, self.driver.install_flows_delta.call_count)
+        self.driver.install_flows_delta.assert_has_calls([
+            mock.call(mock.ANY, {}, flow_group_id='ofport1'),
+            mock.call({}, installed_flows['10.22.3.6/32'],
+                      flow_group_id='ofport1')], any_order=True)
+
+
+class TestConjIPAddressIndex(base.BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = ovsfw.ConjIPAddressIndex()
+
+    def test_update(self):
+        changed = self.index.update(
+            'remote_1', [('10.0.0.1', 'mac_1'), ('10.0.0.2', 'mac_2')], {8})
+        self.assertEqual({'10.0.0.1/32', '10.0.0.2/32'}, changed)
+        self.assertEqual({'remote_1'}, self.index.remote_ids)
+        self.assertEqual([8], self.index.get_conj_ids('10.0.0.1/32'))
+        self.assertEqual(['mac_1'], self.index.get_macs('10.0.0.1/32'))
+
+        changed = self.index.update(
+            'remote_1', [('10.0.0.1', 'mac_1'), ('10.0.0.3', 'mac_3')], {8})
+        self.assertEqual({'10.0.0.2/32', '10.0.0.3/32'}, changed)
+        self.assertEqual([], self.index.get_conj_ids('10.0.0.2/32'))
+        self.assertEqual([], self.index.get_macs('10.0.0.2/32'))
+
+    def test_update_conj_ids_changed(self):
+        self.index.update('remote_1', [('10.0.0.1', 'mac_1')], {8})
+        changed = self.index.update(
+            'remote_1', [('10.0.0.1', 'mac_1')], {8, 14})
+        self.assertEqual({'10.0.0.1/32'}, changed)
+        self.assertEqual([8, 14], self.index.get_conj_ids('10.0.0.1/32'))
+
+    def test_update_overlapping_remotes(self):
+        self.index.update('remote_1', [('10.0.0.1', 'mac_1')], {8})
+        self.index.update('remote_2', [('10.0.0.1/32', None)], {16})
+        self.assertEqual([8, 16], self.index.get_conj_ids('10.0.0.1/32'))
+
+        changed = self.index.update('remote_1', [], {8})
+        self.assertEqual({'10.0.0.1/32'}, changed)
+        self.assertEqual({'remote_2'}, self.index.remote_ids)
+        self.assertEqual([16], self.index.get_conj_ids('10.0.0.1/32'))
+        self.assertEqual([None], self.index.get_macs('10.0.0.1/32'))
+
 
 class FakeOVSPort:
     def __init__(self, name, port, mac):
@@ -1001,6 +1102,57 @@ class TestOVSFirewallDriver(base.BaseTestCase):
             filter_rules, any_order=True)
         self._assert_invalid_conntrack_entries_deleted(port_dict)
 
+    def test_update_port_filter_incremental(self):
+        cfg.CONF.set_override('incremental_flow_updates', True,
+                              group='SECURITYGROUP')
+        port_dict = {'device': 'port-id',
+                     'security_groups': [1]}
+        self._prepare_security_group()
+        self.firewall.prepare_port_filter(port_dict)
+        self.assertTrue(self.mock_bridge.br.add_flow.called)
+        self.assertFalse(self.mock_bridge.br.delete_flows.called)
+        of_port = self.firewall.get_ofport(port_dict)
+        old_flows = of_port.flows
+
+        # Nothing changed, no flow is installed nor removed.
+        self.mock_bridge.reset_mock()
+        self.firewall.update_port_filter(port_dict)
+        self.assertFalse(self.mock_bridge.br.add_flow.called)
+        self.assertFalse(self.mock_bridge.br.delete_flows.called)
+
+        port_dict['security_groups'] = [2]
+        self.mock_bridge.reset_mock()
+        self.firewall.update_port_filter(port_dict)
+        new_flows = of_port.flows
+        self.assertEqual(len(set(new_flows) - set(old_flows)),
+                         self.mock_bridge.br.add_flow.call_count)
+        self.assertEqual(len(set(old_flows) - set(new_flows)),
+                         self.mock_bridge.br.delete_flows.call_count)
+        for call in self.mock_bridge.br.delete_flows.call_args_list:
+            self.assertTrue(call.kwargs['strict'])
+            self.assertIn('priority', call.kwargs)
+            self.assertEqual(ovs_lib.COOKIE_ANY, call.kwargs['cookie'])
+            self.assertNotIn('actions', call.kwargs)
+
+    def test_install_flows_delta(self):
+        flow_1 = {'table': 1, 'priority': 10, 'in_port': 1,
+                  'actions': 'drop'}
+        flow_2 = {'table': 1, 'priority': 10, 'in_port': 2,
+                  'actions': 'drop'}
+        flow_2_mod = dict(flow_2, actions='normal')
+        flow_3 = {'table': 1, 'priority': 10, 'in_port': 3,
+                  'actions': 'drop'}
+        installed = {ovsfw.get_flow_match_key(f): f for f in (flow_1, flow_2)}
+        desired = {ovsfw.get_flow_match_key(f): f
+                   for f in (flow_2_mod, flow_3)}
+        self.firewall.install_flows_delta(installed, desired)
+        self.mock_bridge.br.add_flow.assert_has_calls(
+            [mock.call(**flow_2_mod), mock.call(**flow_3)])
+        self.assertEqual(2, self.mock_bridge.br.add_flow.call_count)
+        self.mock_bridge.br.delete_flows.assert_called_once_with(
+            table=1, priority=10, in_port=1, strict=True,
+            cookie=ovs_lib.COOKIE_ANY)
+
     def test_update_port_filter_create_new_port_if_not_present(self):
         port_dict = {'device': 'port-id',
                      'security_groups': [1]}
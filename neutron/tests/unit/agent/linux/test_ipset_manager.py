@@ -14,6 +14,7 @@
 from unittest import mock
 
 from neutron_lib import constants as n_const
+import testtools
 
 from neutron.agent.linux import ipset_manager
 from neutron.tests import base
@@ -164,3 +165,67 @@ class IpsetManagerTestCase(BaseIpsetManagerTest):
         self.expect_destroy()
         self.ipset.destroy(TEST_SET_ID, ETHERTYPE)
         self.verify_mock_calls()
+
+
+class IpsetManagerDeferApplyTestCase(BaseIpsetManagerTest):
+
+    def _expect_restore(self, process_input):
+        self.expected_calls.append(
+            mock.call(['ipset', 'restore', '-exist'],
+                      process_input='\n'.join(process_input),
+                      run_as_root=True, check_exit_code=True,
+                      privsep_exec=True))
+
+    def _refresh_input(self, set_name, addresses):
+        new_set_name = set_name + ipset_manager.SWAP_SUFFIX
+        return ([f'create {set_name} hash:net family inet',
+                 f'create {new_set_name} hash:net family inet',
+                 f'flush {new_set_name}'] +
+                [f'add {new_set_name} {ip}'
+                 for ip in self.ipset._sanitize_addresses(addresses)] +
+                [f'swap {new_set_name} {set_name}',
+                 f'destroy {new_set_name}'])
+
+    def test_defer_apply_single_restore(self):
+        other_set_name = self.ipset.get_name('other_sgid', ETHERTYPE)
+        self.expected_calls = []
+        self._expect_restore(
+            self._refresh_input(TEST_SET_NAME, FAKE_IPS[0:2]) +
+            self._refresh_input(other_set_name, FAKE_IPS[2:3]))
+        with self.ipset.defer_apply():
+            self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS[0:1])
+            self.ipset.set_members('other_sgid', ETHERTYPE, FAKE_IPS[2:3])
+            self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS[0:2])
+            self.assertTrue(self.ipset.set_name_exists(TEST_SET_NAME))
+            self.execute.assert_not_called()
+        self.assertEqual(self.expected_calls, self.execute.call_args_list)
+
+    def test_defer_apply_delta(self):
+        self.add_all_ips()
+        self.execute.reset_mock()
+        self.expected_calls = []
+        self._expect_restore(['add %s 10.0.0.7/32' % TEST_SET_NAME,
+                              'del %s 10.0.0.1/32' % TEST_SET_NAME,
+                              'del %s 10.0.0.2/32' % TEST_SET_NAME])
+        with self.ipset.defer_apply():
+            add_ips, del_ips = self.ipset.set_members(
+                TEST_SET_ID, ETHERTYPE,
+                FAKE_IPS[2:] + [('10.0.0.7', 'fa:16:3e:aa:bb:c7')])
+        self.assertEqual(['10.0.0.7/32'], add_ips)
+        self.assertEqual(['10.0.0.1/32', '10.0.0.2/32'], del_ips)
+        self.assertEqual(self.expected_calls, self.execute.call_args_list)
+
+    def test_defer_apply_destroy_discards_changes(self):
+        with self.ipset.defer_apply():
+            self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS[0:1])
+            self.ipset.destroy(TEST_SET_ID, ETHERTYPE)
+        self.execute.assert_called_once_with(
+            ['ipset', 'destroy', TEST_SET_NAME], process_input=None,
+            run_as_root=True, check_exit_code=False, privsep_exec=True)
+
+    def test_defer_apply_failure_forgets_sets(self):
+        self.execute.side_effect = RuntimeError
+        with testtools.ExpectedException(RuntimeError):
+            with self.ipset.defer_apply():
+                self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS)
+        self.assertFalse(self.ipset.set_name_exists(TEST_SET_NAME))
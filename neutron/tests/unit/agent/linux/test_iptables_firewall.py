@@ -2279,6 +2279,26 @@ class IptablesFirewallEnhancedIpsetTestCase(BaseIptablesFirewallTestCase):
         ]
         self.firewall.ipset.assert_has_calls(calls, any_order=True)
 
+    def test_update_security_group_members_deferred(self):
+        self.firewall.ipset.set_members.return_value = ([], ['10.0.0.2/32'])
+        self.firewall.ipconntrack = mock.Mock()
+        self.firewall.devices_with_updated_sg_members['fake_sgid'] = [
+            'tapfake_dev']
+        manager = mock.Mock()
+        manager.attach_mock(self.firewall.ipset, 'ipset')
+        manager.attach_mock(self.firewall.iptables, 'iptables')
+        manager.attach_mock(self.firewall.ipconntrack, 'ipconntrack')
+        with self.firewall.defer_apply():
+            self.firewall.update_security_group_members(
+                'fake_sgid', {'IPv4': ['10.0.0.1']})
+            self.firewall.ipconntrack.\
+                delete_conntrack_state_by_remote_ips.assert_not_called()
+        manager.assert_has_calls([
+            mock.call.ipset.defer_apply_off(),
+            mock.call.ipconntrack.delete_conntrack_state_by_remote_ips(
+                ['tapfake_dev'], 'IPv4', ['10.0.0.2']),
+            mock.call.iptables.defer_apply_off()])
+
     def _setup_fake_firewall_members_and_rules(self, firewall):
         firewall.sg_rules = self._fake_sg_rules()
         firewall.pre_sg_rules = self._fake_sg_rules()
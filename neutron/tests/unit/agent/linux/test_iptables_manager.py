@@ -1349,6 +1349,101 @@ class IptablesManagerStateFulTestCaseEmptyCustomBinaryNameIPv6(
     use_ipv6 = True
 
 
+class IptablesManagerDeltaApplyTestCase(IptablesManagerBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cfg.CONF.set_override('iptables_delta_apply', True, 'AGENT')
+        self.iptables = iptables_manager.IptablesManager(state_less=True)
+        self.wrap_name = self.iptables.wrap_name
+        self.execute.return_value = ''
+        # the first apply always does a full resync
+        self.iptables.apply()
+        self.execute.reset_mock()
+
+    def _get_commands(self):
+        return [c[0][0][0] for c in self.execute.call_args_list]
+
+    def _restore_input(self, *changes):
+        return '\n'.join(['# Generated by iptables_manager', '*filter'] +
+                         list(changes) +
+                         ['COMMIT', '# Completed by iptables_manager', ''])
+
+    def test_apply_only_changed_chains(self):
+        self.iptables.ipv4['filter'].add_chain('test')
+        self.iptables.ipv4['filter'].add_rule('test', '-j DROP')
+        self.iptables.ipv4['filter'].add_rule('INPUT', '-j $test')
+        self.iptables.apply()
+
+        self.execute.assert_called_once_with(
+            ['iptables-restore', '-n'],
+            process_input=self._restore_input(
+                ':%s-test - [0:0]' % self.wrap_name,
+                '-I %s-INPUT 1 -j %s-test' % (self.wrap_name, self.wrap_name),
+                '-I %s-test 1 -j DROP' % self.wrap_name),
+            run_as_root=True, privsep_exec=True, log_fail_as_error=False)
+
+        self.execute.reset_mock()
+        self.iptables.ipv4['filter'].remove_chain('test')
+        self.iptables.apply()
+
+        self.execute.assert_called_once_with(
+            ['iptables-restore', '-n'],
+            process_input=self._restore_input(
+                '-D %s-INPUT 1' % self.wrap_name,
+                '-D %s-test 1' % self.wrap_name,
+                '-X %s-test' % self.wrap_name),
+            run_as_root=True, privsep_exec=True, log_fail_as_error=False)
+
+    def test_apply_without_changes(self):
+        self.assertEqual([], self.iptables._apply_synchronized())
+        self.execute.assert_not_called()
+
+    def test_shared_chain_change_full_resync(self):
+        self.iptables.ipv4['filter'].add_rule('FORWARD', '-j DROP',
+                                              wrap=False)
+        self.iptables.apply()
+
+        self.assertEqual(['iptables-save', 'iptables-restore'],
+                         self._get_commands())
+
+    def test_restore_error_full_resync(self):
+        self.execute.side_effect = [RuntimeError(), '', None]
+        self.iptables.ipv4['filter'].add_chain('test')
+        with mock.patch.object(self.iptables, '_log_restore_err'):
+            self.iptables.apply()
+
+        self.assertEqual(
+            ['iptables-restore', 'iptables-save', 'iptables-restore'],
+            self._get_commands())
+        self.assertIn('iptables', self.iptables._applied_chains)
+
+    def test_periodic_full_resync(self):
+        cfg.CONF.set_override('iptables_full_resync_interval', 60, 'AGENT')
+        self.iptables.ipv4['filter'].add_chain('test')
+        last_sync = self.iptables._last_full_sync['iptables']
+        with mock.patch.object(iptables_manager.time, 'monotonic',
+                               return_value=last_sync + 30):
+            self.iptables.apply()
+        self.assertEqual(['iptables-restore'], self._get_commands())
+
+        self.execute.reset_mock()
+        self.iptables.ipv4['filter'].add_rule('test', '-j DROP')
+        with mock.patch.object(iptables_manager.time, 'monotonic',
+                               return_value=last_sync + 60):
+            self.iptables.apply()
+        self.assertEqual(['iptables-save', 'iptables-restore'],
+                         self._get_commands())
+
+    def test_delta_apply_disabled(self):
+        cfg.CONF.set_override('iptables_delta_apply', False, 'AGENT')
+        self.iptables.ipv4['filter'].add_chain('test')
+        self.iptables.apply()
+
+        self.assertEqual(['iptables-save', 'iptables-restore'],
+                         self._get_commands())
+
+
 class IptablesManagerStateLessTestCase(base.BaseTestCase):
 
     def setUp(self):
@@ -17,9 +17,13 @@ from unittest import mock
 from neutron_lib.callbacks import events
 from neutron_lib.callbacks import registry
 from neutron_lib import context
+import oslo_messaging
+from oslo_utils import uuidutils
 
 from neutron.agent import resource_cache
 from neutron.api.rpc.callbacks import events as events_rpc
+from neutron.objects import network as network_obj
+from neutron.objects import securitygroup as sg_obj
 from neutron.tests import base
 
 
@@ -113,6 +117,61 @@ class RemoteResourceCacheTestCase(base.BaseTestCase):
         self.assertCountEqual([geese[3]],
                               self.rcache.get_resources('goose', is_small))
 
+    def test_get_resources_indexed(self):
+        self.rcache.add_index('goose', 'size')
+        self.rcache.add_index('goose', 'tags')
+        geese = [OVOLikeThing(3, size='large', tags=['a', 'b']),
+                 OVOLikeThing(5, size='medium', tags=['b']),
+                 OVOLikeThing(4, size='large', tags=[]),
+                 OVOLikeThing(6, size='small', tags=['a'])]
+        for goose in geese:
+            self.rcache.record_resource_update(self.ctx, 'goose', goose)
+        with mock.patch.object(self.rcache,
+                               'match_resources_with_func') as scan:
+            self.assertCountEqual(
+                [geese[0], geese[2], geese[3]],
+                self.rcache.get_resources('goose',
+                                          {'size': ('large', 'small')}))
+            self.assertCountEqual(
+                [geese[0]],
+                self.rcache.get_resources('goose', {'size': ('large', ),
+                                                    'tags': ('a', )}))
+            self.assertEqual(
+                [], self.rcache.get_resources('goose', {'size': ('xl', )}))
+            scan.assert_not_called()
+
+    def test_indexes_follow_updates_and_deletes(self):
+        self.rcache.add_index('goose', 'size')
+        self.rcache.record_resource_update(
+            self.ctx, 'goose', OVOLikeThing(3, size='large'))
+        self.rcache.record_resource_update(
+            self.ctx, 'goose', OVOLikeThing(4, size='large'))
+        updated = OVOLikeThing(3, revision_number=11, size='small')
+        self.rcache.record_resource_update(self.ctx, 'goose', updated)
+        self.assertEqual(
+            [updated],
+            self.rcache.match_resources_with_filters(
+                'goose', {'size': ('small', )}))
+        self.rcache.record_resource_delete(self.ctx, 'goose', 3)
+        self.rcache.record_resource_remove('goose', 4)
+        self.assertEqual({}, self.rcache._indexes['goose']['size'])
+
+    def test_add_index_existing_resources(self):
+        goose = OVOLikeThing(3, size='large')
+        self.rcache.record_resource_update(self.ctx, 'goose', goose)
+        self.rcache.add_index('goose', 'size')
+        self.assertEqual({'large': {3: None}},
+                         self.rcache._indexes['goose']['size'])
+
+    def test_default_indexes(self):
+        rcache = resource_cache.RemoteResourceCache(
+            ['Port', 'SecurityGroupRule', 'Network'])
+        self.assertEqual({'network_id', 'security_group_ids'},
+                         set(rcache._indexes['Port']))
+        self.assertEqual({'security_group_id', 'remote_group_id'},
+                         set(rcache._indexes['SecurityGroupRule']))
+        self.assertEqual({}, rcache._indexes['Network'])
+
     def test_match_resources_with_func(self):
         geese = [OVOLikeThing(3, size='large'), OVOLikeThing(5, size='medium'),
                  OVOLikeThing(4, size='xlarge'), OVOLikeThing(6, size='small')]
@@ -210,3 +269,219 @@ class RemoteResourceCacheTestCase(base.BaseTestCase):
         for goose in geese:
             self.assertIsNone(
                 self.rcache.get_resource_by_id('goose', goose.id))
+
+
+class CompactRemoteResourceCacheTestCase(base.BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ctx = context.get_admin_context()
+        self.rcache = resource_cache.RemoteResourceCache(
+            ['SecurityGroupRule', 'Network', 'goose'], compact=True)
+        mock.patch.object(self.rcache, '_puller').start()
+        self.sg_id = uuidutils.generate_uuid()
+        self.project_id = uuidutils.generate_uuid()
+
+    def _make_rule(self, **kwargs):
+        fields = {'id': uuidutils.generate_uuid(),
+                  'security_group_id': self.sg_id,
+                  'project_id': self.project_id,
+                  'direction': 'ingress', 'ethertype': 'IPv4',
+                  'revision_number': 1}
+        fields.update(kwargs)
+        return sg_obj.SecurityGroupRule(**fields)
+
+    def test_compact_storage(self):
+        rule = self._make_rule()
+        net = network_obj.Network(id=uuidutils.generate_uuid(), name='net',
+                                  mtu=1500, revision_number=2)
+        goose = OVOLikeThing(1)
+        self.rcache.record_resource_update(self.ctx, 'SecurityGroupRule',
+                                           rule)
+        self.rcache.record_resource_update(self.ctx, 'Network', net)
+        self.rcache.record_resource_update(self.ctx, 'goose', goose)
+        self.assertIsInstance(
+            self.rcache._type_cache('SecurityGroupRule')[rule.id],
+            resource_cache.CompactResource)
+        self.assertIsInstance(self.rcache._type_cache('Network')[net.id],
+                              resource_cache.CompactResource)
+        # types which are not compacted are stored as they are
+        self.assertIs(goose, self.rcache._type_cache('goose')[1])
+
+        cached_rule = self.rcache.get_resource_by_id('SecurityGroupRule',
+                                                     rule.id)
+        self.assertIsInstance(cached_rule, sg_obj.SecurityGroupRule)
+        self.assertEqual(rule.to_dict(), cached_rule.to_dict())
+        self.assertFalse(cached_rule.obj_what_changed())
+        self.assertEqual(
+            net.to_dict(),
+            self.rcache.get_resource_by_id('Network', net.id).to_dict())
+
+    def test_compact_record_is_read_only(self):
+        rule = self._make_rule()
+        self.rcache.record_resource_update(self.ctx, 'SecurityGroupRule',
+                                           rule)
+        record = self.rcache._type_cache('SecurityGroupRule')[rule.id]
+        self.assertEqual(self.sg_id, record.security_group_id)
+        # the OVO methods are not reachable through the record
+        self.assertRaises(AttributeError, getattr, record, 'to_dict')
+        self.assertRaises(AttributeError, setattr, record,
+                          'security_group_id', 'other')
+        self.assertRaises(AttributeError, setattr, record, 'values', ())
+        self.assertEqual(self.sg_id, record.security_group_id)
+
+    def test_compact_lookups_and_events(self):
+        received = []
+
+        def receiver(r, e, t, payload):
+            received.append(payload)
+        registry.subscribe(receiver, 'SecurityGroupRule', events.AFTER_UPDATE)
+        registry.subscribe(receiver, 'SecurityGroupRule', events.AFTER_DELETE)
+        rule = self._make_rule(port_range_min=22, protocol='tcp')
+        self.rcache.record_resource_update(self.ctx, 'SecurityGroupRule',
+                                           rule)
+        updated = self._make_rule(id=rule.id, port_range_min=80,
+                                  protocol='tcp', revision_number=2)
+        self.rcache.record_resource_update(self.ctx, 'SecurityGroupRule',
+                                           updated)
+        self.assertEqual({'port_range_min'},
+                         received[-1].metadata['changed_fields'])
+        self.assertIsInstance(received[-1].states[0],
+                              sg_obj.SecurityGroupRule)
+
+        found = self.rcache.match_resources_with_filters(
+            'SecurityGroupRule', {'security_group_id': (self.sg_id, )})
+        self.assertEqual([updated.to_dict()], [r.to_dict() for r in found])
+        found = self.rcache.match_resources_with_func(
+            'SecurityGroupRule', lambda r: r.port_range_min == 80)
+        self.assertEqual([updated.to_dict()], [r.to_dict() for r in found])
+
+        self.rcache.record_resource_delete(self.ctx, 'SecurityGroupRule',
+                                           rule.id)
+        self.assertEqual(updated.to_dict(), received[-1].states[0].to_dict())
+
+    def test_get_memory_usage(self):
+        for _ in range(20):
+            self.rcache.record_resource_update(
+                self.ctx, 'SecurityGroupRule', self._make_rule())
+        compact_usage = self.rcache.get_memory_usage()
+        self.assertEqual(20, compact_usage['SecurityGroupRule']['count'])
+        self.assertEqual({'count': 0, 'bytes': 0}, compact_usage['Network'])
+
+        rcache = resource_cache.RemoteResourceCache(['SecurityGroupRule'])
+        for rule in self.rcache.match_resources_with_func(
+                'SecurityGroupRule', lambda r: True):
+            rcache.record_resource_update(self.ctx, 'SecurityGroupRule', rule)
+        usage = rcache.get_memory_usage()
+        self.assertEqual(20, usage['SecurityGroupRule']['count'])
+        self.assertLess(compact_usage['SecurityGroupRule']['bytes'],
+                        usage['SecurityGroupRule']['bytes'])
+
+
+class SnapshotRemoteResourceCacheTestCase(base.BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ctx = context.get_admin_context()
+        self.snapshot_file = self.get_temp_file_path('resource_cache.json')
+        self.sg_id = uuidutils.generate_uuid()
+        self.rules = [self._make_rule() for _ in range(3)]
+        rcache = self._make_cache()
+        for rule in self.rules:
+            rcache.record_resource_update(self.ctx, 'SecurityGroupRule', rule)
+        rcache.save_snapshot()
+
+    def _make_cache(self):
+        rcache = resource_cache.RemoteResourceCache(
+            ['SecurityGroupRule'], snapshot_file=self.snapshot_file)
+        self._pullmock = mock.patch.object(rcache, '_puller').start()
+        return rcache
+
+    def _make_rule(self, **kwargs):
+        fields = {'id': uuidutils.generate_uuid(),
+                  'security_group_id': self.sg_id,
+                  'direction': 'ingress', 'ethertype': 'IPv4',
+                  'revision_number': 1}
+        fields.update(kwargs)
+        return sg_obj.SecurityGroupRule(**fields)
+
+    def test_write_snapshot_resources_taken_before(self):
+        rcache = self._make_cache()
+        for rule in self.rules:
+            rcache.record_resource_update(self.ctx, 'SecurityGroupRule', rule)
+        snapshot_resources = rcache.get_snapshot_resources()
+        # the changes made after the resources were taken are not written
+        rcache.record_resource_update(self.ctx, 'SecurityGroupRule',
+                                      self._make_rule())
+        rcache.record_resource_delete(self.ctx, 'SecurityGroupRule',
+                                      self.rules[0].id)
+        rcache.write_snapshot(snapshot_resources)
+
+        rcache = self._make_cache()
+        self.assertEqual(
+            {rule.id for rule in self.rules},
+            set(rcache._snapshot['SecurityGroupRule']))
+
+    def test_pull_changed_since_snapshot(self):
+        rcache = self._make_cache()
+        updated = self._make_rule(id=self.rules[1].id, revision_number=2,
+                                  direction='egress')
+        new = self._make_rule()
+        self._pullmock.bulk_pull_changed.return_value = (
+            [updated, new], [self.rules[0].id])
+
+        found = rcache.get_resources('SecurityGroupRule',
+                                     {'security_group_id': (self.sg_id, )})
+
+        self._pullmock.bulk_pull_changed.assert_called_once_with(
+            mock.ANY, 'SecurityGroupRule',
+            {rule.id: 1 for rule in self.rules},
+            filter_kwargs={'security_group_id': (self.sg_id, )})
+        self._pullmock.bulk_pull.assert_not_called()
+        # the third rule is gone from the server
+        self.assertCountEqual(
+            [self.rules[0].id, updated.id, new.id], [r.id for r in found])
+        self.assertEqual('egress', rcache.get_resource_by_id(
+            'SecurityGroupRule', updated.id).direction)
+        # the snapshot resources are only used once
+        self.assertIsNone(rcache.get_resource_by_id(
+            'SecurityGroupRule', self.rules[2].id))
+        self._pullmock.bulk_pull.assert_called_once_with(
+            mock.ANY, 'SecurityGroupRule',
+            filter_kwargs={'id': (self.rules[2].id, )})
+
+    def test_pull_without_matching_snapshot_resources(self):
+        rcache = self._make_cache()
+        self._pullmock.bulk_pull.return_value = []
+        rcache.get_resources('SecurityGroupRule',
+                             {'security_group_id': ('other', )})
+        self._pullmock.bulk_pull_changed.assert_not_called()
+        self._pullmock.bulk_pull.assert_called_once_with(
+            mock.ANY, 'SecurityGroupRule',
+            filter_kwargs={'security_group_id': ('other', )})
+
+    def test_pull_changed_unsupported_by_server(self):
+        rcache = self._make_cache()
+        self._pullmock.bulk_pull_changed.side_effect = (
+            oslo_messaging.RemoteError('UnsupportedVersion'))
+        self._pullmock.bulk_pull.return_value = self.rules[:1]
+        found = rcache.get_resources('SecurityGroupRule',
+                                     {'security_group_id': (self.sg_id, )})
+        self.assertEqual([self.rules[0].id], [r.id for r in found])
+        # the snapshot is discarded
+        rcache.get_resource_by_id('SecurityGroupRule', self.rules[1].id)
+        self.assertEqual(1, self._pullmock.bulk_pull_changed.call_count)
+
+    def test_invalid_snapshot_ignored(self):
+        with open(self.snapshot_file, 'w') as f:
+            f.write('not json')
+        rcache = self._make_cache()
+        self._pullmock.bulk_pull.return_value = []
+        rcache.get_resources('SecurityGroupRule',
+                             {'security_group_id': (self.sg_id, )})
+        self._pullmock.bulk_pull_changed.assert_not_called()
+
+    def test_save_snapshot_without_file(self):
+        rcache = resource_cache.RemoteResourceCache(['SecurityGroupRule'])
+        with mock.patch.object(resource_cache.tempfile,
+                               'NamedTemporaryFile') as tmp_file:
+            rcache.save_snapshot()
+        tmp_file.assert_not_called()
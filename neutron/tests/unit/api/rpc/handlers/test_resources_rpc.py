@@ -132,6 +132,7 @@ class ResourcesPullRpcApiTestCase(ResourcesRpcBaseTestCase):
     def setUp(self):
         super().setUp()
         self.rpc = resources_rpc.ResourcesPullRpcApi()
+        self.target = self.rpc.client.target
         mock.patch.object(self.rpc, 'client').start()
         self.cctxt_mock = self.rpc.client.prepare.return_value
 
@@ -169,6 +170,35 @@ class ResourcesPullRpcApiTestCase(ResourcesRpcBaseTestCase):
             version=TEST_VERSION, filter_kwargs=filter_kwargs)
         self.assertEqual(expected_objs, result)
 
+    def test_bulk_pull_version(self):
+        # bulk_pull is the fallback of bulk_pull_changed for the servers
+        # only supporting the version 1.1
+        self.obj_registry.register(FakeResource)
+        self.cctxt_mock.call.return_value = []
+        self.rpc.bulk_pull(self.context, FakeResource.obj_name())
+        self.assertEqual('1.1', self.target.version)
+        self.rpc.client.prepare.assert_called_once_with()
+
+    def test_bulk_pull_changed(self):
+        self.obj_registry.register(FakeResource)
+        expected_obj = _create_test_resource(self.context)
+        self.cctxt_mock.call.return_value = {
+            'resources': [expected_obj.obj_to_primitive()],
+            'unchanged': ['id1']}
+
+        known_revisions = {'id1': 3, expected_obj.id: 1}
+        filter_kwargs = {'a': 'b'}
+        result = self.rpc.bulk_pull_changed(
+            self.context, FakeResource.obj_name(), known_revisions,
+            filter_kwargs=filter_kwargs)
+
+        self.rpc.client.prepare.assert_called_once_with(version='1.2')
+        self.cctxt_mock.call.assert_called_once_with(
+            self.context, 'bulk_pull_changed', resource_type='FakeResource',
+            version=TEST_VERSION, known_revisions=known_revisions,
+            filter_kwargs=filter_kwargs)
+        self.assertEqual(([expected_obj], ['id1']), result)
+
     def test_pull_resource_not_found(self):
         resource_dict = _create_test_dict()
         resource_id = resource_dict['id']
@@ -239,6 +269,28 @@ class ResourcesPullRpcCallbackTestCase(ResourcesRpcBaseTestCase):
                 version=TEST_VERSION, filter_kwargs={'id': r1.id})
             self.assertEqual([r1.obj_to_primitive()], objs)
 
+    def test_bulk_pull_changed(self):
+        r1 = self.resource_obj
+        r2 = _create_test_resource(self.context)
+        r3 = _create_test_resource(self.context)
+        r1.revision_number = 2
+        r2.revision_number = 5
+        r3.revision_number = 1
+
+        with mock.patch.object(FakeResource, 'get_objects',
+                               return_value=[r1, r2, r3]) as get_objs:
+            result = self.callbacks.bulk_pull_changed(
+                self.context, resource_type=FakeResource.obj_name(),
+                version=TEST_VERSION,
+                known_revisions={r1.id: 2, r2.id: 4, 'gone': 7},
+                filter_kwargs={'field': 'foo'})
+        get_objs.assert_called_once_with(self.context, _pager=None,
+                                         field='foo')
+        # r1 is unchanged, r2 has a new revision and r3 is not known
+        self.assertEqual([r1.id], result['unchanged'])
+        self.assertEqual([r2.obj_to_primitive(), r3.obj_to_primitive()],
+                         result['resources'])
+
     @mock.patch.object(FakeResource, 'obj_to_primitive')
     def test_pull_backports_to_older_version(self, to_prim_mock):
         with mock.patch.object(resources_rpc.prod_registry, 'pull',
@@ -12,6 +12,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import urllib
+
+from neutron_lib import exceptions as n_exc
 from oslo_config import cfg
 import webob
 
@@ -69,3 +72,63 @@ class GetPathUrlTestCase(base.BaseTestCase):
         path_url = api_common.get_path_url(request)
         # should replace https:// with http://
         self.assertTrue(path_url.startswith("http://"))
+
+
+class PaginationCursorTestCase(base.BaseTestCase):
+
+    def _get_request(self, query):
+        return webob.Request.blank(
+            '/v2.0/ports?' + query, base_url='http://neutron.example')
+
+    def test_encode_decode_cursor(self):
+        item = {'id': 'port-id', 'name': 'port', 'admin_state_up': True,
+                'device_id': 'dev'}
+        cursor = api_common.decode_cursor(api_common.encode_cursor(
+            item, ['name', 'admin_state_up'], 'id'))
+        self.assertIsInstance(cursor, api_common.PaginationCursor)
+        self.assertEqual('port-id', cursor)
+        self.assertEqual({'id': 'port-id', 'name': 'port',
+                          'admin_state_up': True}, cursor.sort_values)
+
+    def test_decode_invalid_cursor(self):
+        for cursor in ('not-a-cursor', 'bm90IGpzb24', 'WyJpZCJd'):
+            self.assertRaises(n_exc.BadRequest,
+                              api_common.decode_cursor, cursor)
+
+    def test_get_limit_and_marker_cursor(self):
+        cursor = api_common.encode_cursor({'id': 'port-id'}, [], 'id')
+        request = self._get_request('limit=2&marker=other&cursor=' + cursor)
+        limit, marker = api_common.get_limit_and_marker(request)
+        self.assertEqual(2, limit)
+        self.assertEqual('port-id', marker)
+        self.assertEqual({'id': 'port-id'}, marker.sort_values)
+
+    def test_get_links_marker(self):
+        request = self._get_request('limit=2&sort_key=name&sort_dir=asc')
+        items = [{'id': 'id1', 'name': 'a'}, {'id': 'id2', 'name': 'b'}]
+        links = api_common.get_pagination_links(request, items, 2, None,
+                                                False)
+        params = urllib.parse.parse_qs(
+            urllib.parse.urlparse(links[0]['href']).query)
+        self.assertEqual(['id2'], params['marker'])
+        self.assertNotIn('cursor', params)
+
+    def test_get_links_cursor(self):
+        cfg.CONF.set_override('pagination_use_cursors', True)
+        request = self._get_request('limit=2&sort_key=name&sort_dir=asc'
+                                    '&marker=id0')
+        items = [{'id': 'id1', 'name': 'a'}, {'id': 'id2', 'name': 'b'}]
+        links = api_common.get_pagination_links(request, items, 2, 'id0',
+                                                False)
+        self.assertEqual(['next', 'previous'],
+                         [link['rel'] for link in links])
+        next_params, previous_params = [
+            urllib.parse.parse_qs(urllib.parse.urlparse(link['href']).query)
+            for link in links]
+        self.assertNotIn('marker', next_params)
+        cursor = api_common.decode_cursor(next_params['cursor'][0])
+        self.assertEqual('id2', cursor)
+        self.assertEqual({'id': 'id2', 'name': 'b'}, cursor.sort_values)
+        cursor = api_common.decode_cursor(previous_params['cursor'][0])
+        self.assertEqual('id1', cursor)
+        self.assertEqual(['True'], previous_params['page_reverse'])
@@ -128,6 +128,34 @@ class TestHashRingManager(testlib_api.SqlTestCaseLight):
                             'fake-uuid-ABCDE': node_other}
         self._verify_hashes(hash_dict_before)
 
+    def test_get_node_startup_reload_on_change(self):
+        db_hash_ring.add_node(self.admin_ctx, HASH_RING_TEST_GROUP, 'node-1')
+        self.hash_ring_manager.get_node('fake-uuid')
+        hash_ring = self.hash_ring_manager._hash_ring
+        self.assertTrue(self.hash_ring_manager._check_hashring_startup)
+
+        # The nodes are not reloaded while they don't change
+        with mock.patch.object(hash_ring_manager.db_hash_ring,
+                               'get_active_nodes',
+                               wraps=db_hash_ring.get_active_nodes) as gan:
+            self.hash_ring_manager.get_node('fake-uuid')
+            gan.assert_not_called()
+
+            db_hash_ring.add_node(self.admin_ctx, HASH_RING_TEST_GROUP,
+                                  'node-2')
+            self.hash_ring_manager.get_node('fake-uuid')
+            self.assertTrue(gan.called)
+
+        # The ring was updated, not rebuilt, and caching is now allowed
+        self.assertIs(hash_ring, self.hash_ring_manager._hash_ring)
+        self.assertEqual({'node-1', 'node-2'},
+                         set(self.hash_ring_manager._hash_ring.nodes))
+        self.assertFalse(self.hash_ring_manager._check_hashring_startup)
+        with mock.patch.object(hash_ring_manager.db_hash_ring,
+                               'get_active_nodes_signature') as signature:
+            self.hash_ring_manager.get_node('fake-uuid')
+            signature.assert_not_called()
+
     @mock.patch.object(hash_ring_manager.LOG, 'debug')
     def test__wait_startup_before_caching(self, mock_log):
         db_hash_ring.add_node(self.admin_ctx, HASH_RING_TEST_GROUP, 'node-1')
@@ -0,0 +1,78 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+from unittest import mock
+
+from neutron.common import metrics
+from neutron.tests import base
+
+
+class TestHistogram(base.BaseTestCase):
+
+    def test_observe(self):
+        histogram = metrics.Histogram(buckets=(1, 0.1))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+        self.assertEqual(4, histogram.count)
+        self.assertAlmostEqual(2.65, histogram.sum)
+        self.assertEqual([(0.1, 2), (1, 3), (float('inf'), 4)],
+                         histogram.cumulative_counts())
+
+
+class TestMetricsRegistry(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.registry = metrics.MetricsRegistry(buckets=(0.1, 1))
+
+    def test_counters(self):
+        self.registry.inc('hits_total', kind='network')
+        self.registry.inc('hits_total', 2, kind='network')
+        self.registry.inc('hits_total', kind='subnet')
+        self.assertEqual(3, self.registry.get_counter('hits_total',
+                                                      kind='network'))
+        self.assertEqual(1, self.registry.get_counter('hits_total',
+                                                      kind='subnet'))
+        self.assertEqual(0, self.registry.get_counter('hits_total',
+                                                      kind='port'))
+
+    def test_render(self):
+        self.registry.describe('phase_seconds', 'Phase duration.')
+        self.registry.observe('phase_seconds', 0.5, phase='rpc')
+        self.registry.inc('events_total', table='Port"1')
+        expected = (
+            '# TYPE events_total counter\n'
+            'events_total{table="Port\\"1"} 1\n'
+            '# HELP phase_seconds Phase duration.\n'
+            '# TYPE phase_seconds histogram\n'
+            'phase_seconds_bucket{phase="rpc",le="0.1"} 0\n'
+            'phase_seconds_bucket{phase="rpc",le="1.0"} 1\n'
+            'phase_seconds_bucket{phase="rpc",le="+Inf"} 1\n'
+            'phase_seconds_sum{phase="rpc"} 0.5\n'
+            'phase_seconds_count{phase="rpc"} 1\n')
+        self.assertEqual(expected, self.registry.render())
+
+    def test_write_file(self):
+        path = os.path.join(self.get_default_temp_dir().path, 'agent.prom')
+        self.registry.inc('events_total')
+        self.registry.write_file(path)
+        with open(path) as metrics_file:
+            self.assertEqual(self.registry.render(), metrics_file.read())
+
+    def test_write_file_error(self):
+        path = os.path.join(self.get_default_temp_dir().path, 'agent.prom')
+        with mock.patch.object(os, 'replace', side_effect=OSError), \
+                mock.patch.object(metrics.LOG, 'warning') as mock_warning:
+            self.registry.write_file(path)
+        mock_warning.assert_called_once()
+        self.assertEqual([], os.listdir(self.get_default_temp_dir().path))
@@ -17,6 +17,7 @@ from unittest import mock
 
 from neutron_lib import context
 
+from neutron.api import api_common
 from neutron.db import _utils as db_utils
 from neutron.tests.unit import testlib_api
 
@@ -44,3 +45,36 @@ class TestCommonHelpFunctions(testlib_api.SqlTestCase):
                           self.admin_ctx, create_fn, delete_fn,
                           create_bindings)
         delete_fn.assert_called_once_with(1234)
+
+    @mock.patch('neutron_lib.db.utils.get_marker_obj')
+    def test_get_marker_obj_cursor(self, mock_get_marker):
+        cursor = api_common.PaginationCursor(
+            'port-id', {'id': 'port-id', 'name': 'port'})
+        marker = db_utils.get_marker_obj(
+            mock.ANY, self.admin_ctx, 'port', 2, cursor,
+            sorts=[('name', True), ('id', True)])
+        mock_get_marker.assert_not_called()
+        self.assertEqual('port', marker.name)
+        self.assertEqual('port-id', marker.id)
+        self.assertIsNone(marker.mac_address)
+
+    @mock.patch('neutron_lib.db.utils.get_marker_obj')
+    def test_get_marker_obj_cursor_missing_sort_key(self, mock_get_marker):
+        plugin = mock.Mock()
+        cursor = api_common.PaginationCursor('port-id', {'id': 'port-id'})
+        marker = db_utils.get_marker_obj(
+            plugin, self.admin_ctx, 'port', 2, cursor,
+            sorts=[('name', True), ('id', True)])
+        mock_get_marker.assert_called_once_with(
+            plugin, self.admin_ctx, 'port', 2, cursor)
+        self.assertEqual(mock_get_marker.return_value, marker)
+
+    @mock.patch('neutron_lib.db.utils.get_marker_obj')
+    def test_get_marker_obj_marker(self, mock_get_marker):
+        plugin = mock.Mock()
+        marker = db_utils.get_marker_obj(
+            plugin, self.admin_ctx, 'port', 2, 'port-id',
+            sorts=[('id', True)])
+        mock_get_marker.assert_called_once_with(
+            plugin, self.admin_ctx, 'port', 2, 'port-id')
+        self.assertEqual(mock_get_marker.return_value, marker)
@@ -18,6 +18,7 @@ import copy
 import datetime
 from unittest import mock
 
+from neutron_lib.agent import constants as agent_consts
 from neutron_lib import constants
 from neutron_lib import context
 from neutron_lib.db import api as db_api
@@ -191,6 +192,63 @@ class TestAgentsDbMixin(TestAgentsDbBase):
         agent = self.plugin.get_agents(self.context)[0]
         self.assertFalse(agent['admin_state_up'])
 
+    def _test_create_or_update_agent_report(self, heartbeat_only=True,
+                                            **changes):
+        self.agent_status['configurations'] = {'foo': ['bar']}
+        self.plugin.create_or_update_agent(self.context,
+                                           copy.deepcopy(self.agent_status))
+        agent = self.plugin.get_agents(self.context)[0]
+        agent_state = copy.deepcopy(self.agent_status)
+        agent_state.update(changes)
+        with mock.patch.object(agents_db.registry, 'publish') as publish, \
+                mock.patch.object(agent_obj.Agent, 'update') as update, \
+                mock.patch.object(timeutils, 'utcnow',
+                                  return_value=agent['heartbeat_timestamp'] +
+                                  datetime.timedelta(seconds=30)):
+            status, state = self.plugin.create_or_update_agent(
+                self.context, agent_state)
+            new_agent = self.plugin.get_agents(self.context)[0]
+        self.assertEqual(agent_consts.AGENT_ALIVE, status)
+        self.assertEqual(agent['id'], state['id'])
+        if heartbeat_only:
+            publish.assert_not_called()
+            update.assert_not_called()
+            self.assertEqual(
+                agent['heartbeat_timestamp'] + datetime.timedelta(seconds=30),
+                new_agent['heartbeat_timestamp'])
+        else:
+            publish.assert_called_once()
+            update.assert_called_once()
+
+    def test_create_or_update_agent_heartbeat_only(self):
+        self._test_create_or_update_agent_report()
+
+    def test_create_or_update_agent_configurations_changed(self):
+        self._test_create_or_update_agent_report(
+            heartbeat_only=False, configurations={'foo': ['baz']})
+
+    def test_create_or_update_agent_resource_versions_changed(self):
+        self._test_create_or_update_agent_report(
+            heartbeat_only=False, resource_versions={'A': '1.1'})
+
+    def test_create_or_update_agent_start_flag(self):
+        self._test_create_or_update_agent_report(heartbeat_only=False,
+                                                 start_flag=True)
+
+    def test_create_or_update_agent_placement_not_synced(self):
+        self.agent_status['configurations'] = {
+            'resource_provider_bandwidths': {}}
+        agent_state = copy.deepcopy(self.agent_status)
+        self.plugin.create_or_update_agent(self.context, agent_state)
+        with mock.patch.object(agents_db.registry, 'publish') as publish:
+            self.plugin.create_or_update_agent(
+                self.context, copy.deepcopy(self.agent_status))
+        publish.assert_called_once()
+
+    def test_create_or_update_agent_heartbeat_fast_path_disabled(self):
+        cfg.CONF.set_override('agent_heartbeat_fast_path', False)
+        self._test_create_or_update_agent_report(heartbeat_only=False)
+
     def test_agent_health_check(self):
         agents = [{'agent_type': "DHCP Agent",
                    'heartbeat_timestamp': '2015-05-06 22:40:40.432295',
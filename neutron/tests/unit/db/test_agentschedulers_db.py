@@ -41,6 +41,7 @@ from neutron.api.rpc.agentnotifiers import l3_rpc_agent_api
 from neutron.api.rpc.handlers import dhcp_rpc
 from neutron.api.rpc.handlers import l3_rpc
 from neutron.api import wsgi
+from neutron.common import _constants as n_const
 from neutron.db import agents_db
 from neutron.db import agentschedulers_db
 from neutron.db import l3_agentschedulers_db
@@ -1043,6 +1044,45 @@ class OvsAgentSchedulerTestCase(OvsAgentSchedulerTestCaseBase):
             self.assertIn(router_ids[0], [r['id'] for r in ret_a])
             self.assertIn(router_ids[2], [r['id'] for r in ret_a])
 
+    def test_rpc_sync_routers_with_digests(self):
+        l3_rpc_cb = l3_rpc.L3RpcCallback()
+        self._register_agent_states()
+
+        with self.router() as v1, self.router() as v2:
+            router_ids = [v1['router']['id'], v2['router']['id']]
+            l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTA)
+
+            # Without digests the routers are returned unchanged
+            ret_a = l3_rpc_cb.sync_routers(self.adminContext, host=L3_HOSTA)
+            for router in ret_a:
+                self.assertNotIn(n_const.ROUTER_SYNC_DIGEST_KEY, router)
+
+            ret_a = l3_rpc_cb.sync_routers(self.adminContext, host=L3_HOSTA,
+                                           router_ids=router_ids,
+                                           router_digests={})
+            digests = {r['id']: r[n_const.ROUTER_SYNC_DIGEST_KEY]
+                       for r in ret_a}
+            self.assertEqual(set(router_ids), set(digests))
+
+            # Only the routers changed since the digests are returned
+            self._update('routers', router_ids[1],
+                         {'router': {'name': 'new-name'}})
+            ret_a = l3_rpc_cb.sync_routers(self.adminContext, host=L3_HOSTA,
+                                           router_ids=router_ids,
+                                           router_digests=digests)
+            ret_a = {r['id']: r for r in ret_a}
+            self.assertEqual(
+                {'id': router_ids[0],
+                 n_const.ROUTER_SYNC_DIGEST_KEY: digests[router_ids[0]],
+                 n_const.ROUTER_UNCHANGED_KEY: True},
+                ret_a[router_ids[0]])
+            self.assertEqual('new-name', ret_a[router_ids[1]]['name'])
+            self.assertNotIn(n_const.ROUTER_UNCHANGED_KEY,
+                             ret_a[router_ids[1]])
+            self.assertNotEqual(
+                digests[router_ids[1]],
+                ret_a[router_ids[1]][n_const.ROUTER_SYNC_DIGEST_KEY])
+
     def test_sync_router(self):
         l3_rpc_cb = l3_rpc.L3RpcCallback()
         self._register_agent_states()
@@ -272,6 +272,37 @@ class TestHashRing(testlib_api.SqlTestCaseLight):
         self.assertEqual(0, ovn_hash_ring_db.count_offline_nodes(
             self.admin_ctx, interval=60, group_name=HASH_RING_TEST_GROUP))
 
+    def test_get_active_nodes_signature(self):
+        self.assertEqual((0, None, None),
+                         ovn_hash_ring_db.get_active_nodes_signature(
+                             self.admin_ctx, interval=60,
+                             group_name=HASH_RING_TEST_GROUP))
+        node_uuids = self._add_nodes_and_assert_exists(count=2)
+        signature = ovn_hash_ring_db.get_active_nodes_signature(
+            self.admin_ctx, interval=60, group_name=HASH_RING_TEST_GROUP)
+        nodes = ovn_hash_ring_db.get_active_nodes(
+            self.admin_ctx, interval=60, group_name=HASH_RING_TEST_GROUP)
+        self.assertEqual(
+            (2, min(node.created_at for node in nodes),
+             max(node.created_at for node in nodes)), signature)
+
+        # Touching the nodes doesn't change the signature
+        for node_uuid in node_uuids:
+            ovn_hash_ring_db.touch_node(self.admin_ctx, node_uuid)
+        self.assertEqual(signature,
+                         ovn_hash_ring_db.get_active_nodes_signature(
+                             self.admin_ctx, interval=60,
+                             group_name=HASH_RING_TEST_GROUP))
+
+        # A node becoming offline changes it
+        fake_utcnow = timeutils.utcnow() - datetime.timedelta(seconds=60)
+        with mock.patch.object(timeutils, 'utcnow') as mock_utcnow:
+            mock_utcnow.return_value = fake_utcnow
+            ovn_hash_ring_db.touch_node(self.admin_ctx, node_uuids[0])
+        self.assertEqual(1, ovn_hash_ring_db.get_active_nodes_signature(
+            self.admin_ctx, interval=60,
+            group_name=HASH_RING_TEST_GROUP)[0])
+
     def test_remove_node_by_uuid(self):
         self._add_nodes_and_assert_exists(count=3)
 
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
 from unittest import mock
 
 from neutron_lib.api.definitions import security_groups_remote_address_group \
@@ -20,7 +21,9 @@ from neutron_lib.api.definitions import security_groups_remote_address_group \
 from neutron_lib import constants as n_const
 from neutron_lib import context
 from neutron_lib.db import api as db_api
+from neutron_lib.db import standard_attr
 from oslo_db import exception as db_exc
+from oslo_utils import timeutils
 
 from neutron.api import extensions
 from neutron.common import config
@@ -94,6 +97,42 @@ class TestRevisionNumber(test_db_base_plugin_v2.NeutronDbPluginV2TestCase):
             self.assertIn('No revision row found for',
                           mock_log.call_args[0][0])
 
+    @mock.patch.object(ovn_rn_db.LOG, 'warning')
+    def test_bump_revisions(self, mock_log):
+        res = self._create_network(fmt=self.fmt, name='net2',
+                                   admin_state_up=True)
+        net2 = self.deserialize(self.fmt, res)['network']
+        res = self._create_network(fmt=self.fmt, name='net3',
+                                   admin_state_up=True)
+        net3 = self.deserialize(self.fmt, res)['network']
+        with db_api.CONTEXT_WRITER.using(self.ctx):
+            self._create_initial_revision(self.net['id'],
+                                          ovn_const.TYPE_NETWORKS)
+            self._create_initial_revision(net2['id'],
+                                          ovn_const.TYPE_NETWORKS,
+                                          revision_number=124)
+        self.net['revision_number'] = 123
+        net2['revision_number'] = 1
+        net3['revision_number'] = 5
+        ovn_rn_db.bump_revisions(self.ctx, [self.net, net2, net3],
+                                 ovn_const.TYPE_NETWORKS)
+
+        for net, revision_number in ((self.net, 123), (net2, 124),
+                                     (net3, 5)):
+            row = ovn_rn_db.get_revision_row(self.ctx, net['id'])
+            self.assertEqual(revision_number, row.revision_number)
+        # Only the missing revision row of net3 was created
+        mock_log.assert_called_once()
+        self.assertEqual(net3['id'], mock_log.call_args[0][1]['res_uuid'])
+
+    def test_bump_revisions_not_found(self):
+        self.assertRaises(ovn_rn_db.StandardAttributeIDNotFound,
+                          ovn_rn_db.bump_revisions, self.ctx,
+                          [self.net, {'id': 'fake', 'revision_number': 1}],
+                          ovn_const.TYPE_NETWORKS)
+        self.assertIsNone(ovn_rn_db.get_revision_row(self.ctx,
+                                                     self.net['id']))
+
     def test_delete_revision(self):
         with db_api.CONTEXT_WRITER.using(self.ctx):
             self._create_initial_revision(self.net['id'],
@@ -234,6 +273,27 @@ class TestRevisionNumberMaintenance(test_securitygroup.SecurityGroupsTestCase,
         self.assertEqual(1, len(res))
         self.assertEqual(self.net['id'], res[0].resource_uuid)
 
+    def test_get_inconsistent_resources_dirty_since(self):
+        self._create_initial_revision(
+            self.net['id'], ovn_const.TYPE_NETWORKS, revision_number=-1)
+        # The timestamp service plugin, setting the update time, is not
+        # loaded.
+        with db_api.CONTEXT_WRITER.using(self.ctx):
+            row = ovn_rn_db.get_revision_row(self.ctx, self.net['id'])
+            self.ctx.session.query(standard_attr.StandardAttribute).filter_by(
+                id=row.standard_attr_id).update(
+                {'updated_at': timeutils.utcnow()})
+        dirty_since = ovn_rn_db.get_dirty_since_marker()
+        res = ovn_rn_db.get_inconsistent_resources(
+            self.ctx, dirty_since=dirty_since)
+        self.assertEqual([self.net['id']], [r.resource_uuid for r in res])
+
+        # The network was not updated since the marker was taken
+        dirty_since = timeutils.utcnow() + datetime.timedelta(seconds=60)
+        res = ovn_rn_db.get_inconsistent_resources(
+            self.ctx, dirty_since=dirty_since)
+        self.assertEqual([], res)
+
     def test_get_inconsistent_resources_consistent(self):
         # Set the initial revision to 0 which is the initial revision_number
         # for recently created resources
@@ -0,0 +1,92 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from neutron_lib import context
+
+from neutron.db import request_cache
+from neutron.tests import base
+
+
+class TestRequestCache(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ctx = context.Context(user_id='fake-user',
+                                   project_id='fake-project')
+        self.loader = mock.Mock(side_effect=lambda: {'id': 'net-1'})
+
+    def _get(self, ctx=None, key='net-1'):
+        return request_cache.get_or_load(ctx or self.ctx,
+                                         request_cache.NETWORK, key,
+                                         self.loader)
+
+    def test_get_or_load_not_enabled(self):
+        self._get()
+        self._get()
+        self.assertEqual(2, self.loader.call_count)
+        self.assertIsNone(request_cache.get_request_cache(self.ctx))
+
+    def test_get_or_load(self):
+        with request_cache.enabled(self.ctx, 'test'):
+            net = self._get()
+            net['name'] = 'changed'
+            self.assertEqual({'id': 'net-1'}, self._get())
+            self._get(key='net-2')
+            cache = request_cache.get_request_cache(self.ctx)
+            self.assertEqual(1, cache.hits)
+            self.assertEqual(2, cache.misses)
+        self.assertEqual(2, self.loader.call_count)
+        self.assertIsNone(request_cache.get_request_cache(self.ctx))
+
+    def test_get_or_load_elevated(self):
+        with request_cache.enabled(self.ctx, 'test'):
+            self._get()
+            self._get(ctx=self.ctx.elevated())
+        self.assertEqual(2, self.loader.call_count)
+
+    def test_invalidate(self):
+        with request_cache.enabled(self.ctx, 'test'):
+            self._get()
+            self._get(key='net-2')
+            request_cache.invalidate(self.ctx, request_cache.NETWORK, 'net-1')
+            self._get()
+            self._get(key='net-2')
+            self.assertEqual(3, self.loader.call_count)
+            request_cache.invalidate(self.ctx, request_cache.NETWORK)
+            self._get()
+            self._get(key='net-2')
+            self.assertEqual(5, self.loader.call_count)
+
+    def test_enabled_nested(self):
+        with request_cache.enabled(self.ctx, 'outer'):
+            cache = request_cache.get_request_cache(self.ctx)
+            with request_cache.enabled(self.ctx, 'inner'):
+                self.assertIs(cache,
+                              request_cache.get_request_cache(self.ctx))
+            self.assertIs(cache, request_cache.get_request_cache(self.ctx))
+
+    @mock.patch.object(request_cache, 'LOG')
+    def test_scoped(self, mock_log):
+        class Plugin:
+            @request_cache.scoped
+            def get_port(plugin, ctx, port_id):
+                self.assertIsNotNone(request_cache.get_request_cache(ctx))
+                self._get(ctx=ctx)
+                self._get(ctx=ctx)
+                return port_id
+
+        self.assertEqual('port-1', Plugin().get_port(self.ctx, 'port-1'))
+        self.assertIsNone(request_cache.get_request_cache(self.ctx))
+        mock_log.debug.assert_called_once_with(
+            mock.ANY, {'name': 'get_port', 'hits': 1, 'misses': 1})
@@ -13,7 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from unittest import mock
+
+import netaddr
 from neutron_lib import context
+from oslo_db import exception as db_exc
 from oslo_utils import uuidutils
 
 from neutron.ipam.drivers.neutrondb_ipam import db_api
@@ -112,3 +116,127 @@ class TestIpamSubnetManager(testlib_api.SqlTestCase):
         alloc_exists = ipam_obj.IpamAllocation.objects_exist(
             self.ctx, ipam_subnet_id=self.ipam_subnet_id)
         self.assertFalse(alloc_exists)
+
+    def _get_free_ranges(self):
+        return [(str(r.first_ip), str(r.last_ip)) for r in
+                self.subnet_manager.list_free_ranges(self.ctx, 100)]
+
+    def test_list_allocations_by_ips(self):
+        for ip in ('1.2.3.4', '1.2.3.6'):
+            self.subnet_manager.create_allocation(self.ctx, ip)
+        allocs = self.subnet_manager.list_allocations_by_ips(
+            self.ctx, ['1.2.3.4', '1.2.3.5'])
+        self.assertEqual(['1.2.3.4'],
+                         [str(alloc.ip_address) for alloc in allocs])
+
+    def test_create_free_range(self):
+        self.subnet_manager.create_free_range(self.ctx, *self.single_pool)
+        self.assertEqual([self.single_pool], self._get_free_ranges())
+
+    def test_delete_free_ranges(self):
+        for pool in self.multi_pool:
+            self.subnet_manager.create_free_range(self.ctx, *pool)
+        self.subnet_manager.delete_free_ranges(self.ctx)
+        self.assertEqual([], self._get_free_ranges())
+
+    def test_remove_free_ip(self):
+        self.subnet_manager.create_free_range(self.ctx, *self.single_pool)
+        # Middle, first, last and out of range addresses
+        self.subnet_manager.remove_free_ip(self.ctx, '1.2.3.6')
+        self.assertEqual([('1.2.3.4', '1.2.3.5'), ('1.2.3.7', '1.2.3.10')],
+                         self._get_free_ranges())
+        self.subnet_manager.remove_free_ip(self.ctx, '1.2.3.4')
+        self.subnet_manager.remove_free_ip(self.ctx, '1.2.3.10')
+        self.subnet_manager.remove_free_ip(self.ctx, '1.2.3.20')
+        self.assertEqual([('1.2.3.5', '1.2.3.5'), ('1.2.3.7', '1.2.3.9')],
+                         self._get_free_ranges())
+        self.subnet_manager.remove_free_ip(self.ctx, '1.2.3.5')
+        self.assertEqual([('1.2.3.7', '1.2.3.9')], self._get_free_ranges())
+
+    def test_remove_free_ip_concurrent_update(self):
+        self.subnet_manager.create_free_range(self.ctx, *self.single_pool)
+        with mock.patch.object(ipam_obj.IpamFreeRange, 'update_range',
+                               return_value=False):
+            self.assertRaises(db_exc.RetryRequest,
+                              self.subnet_manager.remove_free_ip,
+                              self.ctx, '1.2.3.4')
+        self.subnet_manager.remove_free_ip(self.ctx, '1.2.3.5')
+        with mock.patch.object(ipam_obj.IpamFreeRange, 'delete_range',
+                               return_value=False):
+            self.assertRaises(db_exc.RetryRequest,
+                              self.subnet_manager.remove_free_ip,
+                              self.ctx, '1.2.3.4')
+
+    def test_remove_free_ip_interleaved(self):
+        self.subnet_manager.create_free_range(self.ctx, *self.single_pool)
+        stale = ipam_obj.IpamFreeRange.get_ranges_with_ip(
+            self.ctx, self.subnet_manager._ipam_subnet_id,
+            netaddr.IPAddress('1.2.3.8'))
+        self.subnet_manager.remove_free_ip(self.ctx, '1.2.3.6')
+        get_ranges_with_ip = ipam_obj.IpamFreeRange.get_ranges_with_ip
+
+        def get_ranges(*args, for_update=False):
+            if for_update:
+                return get_ranges_with_ip(*args, for_update=True)
+            return stale
+
+        with mock.patch.object(ipam_obj.IpamFreeRange,
+                               'get_ranges_with_ip',
+                               side_effect=get_ranges) as get_mock:
+            # The change is applied again to the ranges read with a lock,
+            # no RetryRequest is raised
+            self.subnet_manager.remove_free_ip(self.ctx, '1.2.3.8')
+        self.assertEqual(2, get_mock.call_count)
+        self.assertEqual([('1.2.3.4', '1.2.3.5'), ('1.2.3.7', '1.2.3.7'),
+                          ('1.2.3.9', '1.2.3.10')], self._get_free_ranges())
+
+    def test_add_free_ip_interleaved(self):
+        self.subnet_manager.create_free_range(self.ctx, '1.2.3.4', '1.2.3.5')
+        stale = ipam_obj.IpamFreeRange.get_range(
+            self.ctx, self.subnet_manager._ipam_subnet_id,
+            last_ip=netaddr.IPAddress('1.2.3.5'))
+        self.subnet_manager.remove_free_ip(self.ctx, '1.2.3.4')
+        get_range = ipam_obj.IpamFreeRange.get_range
+
+        def get_ranges(*args, for_update=False, **kwargs):
+            if for_update or 'last_ip' not in kwargs:
+                return get_range(*args, for_update=for_update, **kwargs)
+            return stale
+
+        with mock.patch.object(ipam_obj.IpamFreeRange, 'get_range',
+                               side_effect=get_ranges):
+            self.subnet_manager.add_free_ip(self.ctx, '1.2.3.6')
+        self.assertEqual([('1.2.3.5', '1.2.3.6')], self._get_free_ranges())
+
+    def test_add_free_ip_concurrent_update(self):
+        self.subnet_manager.create_free_range(self.ctx, '1.2.3.4', '1.2.3.5')
+        with mock.patch.object(ipam_obj.IpamFreeRange, 'update_range',
+                               return_value=False):
+            self.assertRaises(db_exc.RetryRequest,
+                              self.subnet_manager.add_free_ip,
+                              self.ctx, '1.2.3.6')
+        self.assertEqual([('1.2.3.4', '1.2.3.5')], self._get_free_ranges())
+
+    def test_add_free_ip(self):
+        self.subnet_manager.create_free_range(self.ctx, '1.2.3.4', '1.2.3.5')
+        self.subnet_manager.create_free_range(self.ctx, '1.2.3.8', '1.2.3.10')
+        # Isolated address, then merged with the previous, the next and
+        # both adjacent ranges
+        self.subnet_manager.add_free_ip(self.ctx, '1.2.3.20')
+        self.subnet_manager.add_free_ip(self.ctx, '1.2.3.6')
+        self.subnet_manager.add_free_ip(self.ctx, '1.2.3.19')
+        self.assertEqual([('1.2.3.4', '1.2.3.6'), ('1.2.3.8', '1.2.3.10'),
+                          ('1.2.3.19', '1.2.3.20')], self._get_free_ranges())
+        self.subnet_manager.add_free_ip(self.ctx, '1.2.3.7')
+        self.assertEqual([('1.2.3.4', '1.2.3.10'), ('1.2.3.19', '1.2.3.20')],
+                         self._get_free_ranges())
+
+    def test_add_free_ip_split_before(self):
+        self.subnet_manager.create_free_range(self.ctx, '1.2.3.4', '1.2.3.5')
+        self.subnet_manager.create_free_range(self.ctx, '1.2.3.8', '1.2.3.10')
+        split_before = [int(netaddr.IPAddress('1.2.3.7')),
+                        int(netaddr.IPAddress('1.2.3.8'))]
+        self.subnet_manager.add_free_ip(self.ctx, '1.2.3.6', split_before)
+        self.subnet_manager.add_free_ip(self.ctx, '1.2.3.7', split_before)
+        self.assertEqual([('1.2.3.4', '1.2.3.6'), ('1.2.3.7', '1.2.3.7'),
+                          ('1.2.3.8', '1.2.3.10')], self._get_free_ranges())
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
 from unittest import mock
 
 import netaddr
@@ -20,6 +21,7 @@ from neutron_lib import constants
 from neutron_lib import context
 from neutron_lib import exceptions as n_exc
 from neutron_lib.plugins import directory
+from oslo_db import exception as db_exc
 from oslo_utils import uuidutils
 
 from neutron.ipam.drivers.neutrondb_ipam import driver
@@ -423,6 +425,210 @@ class TestNeutronDbIpamSubnet(testlib_api.SqlTestCase,
         # future proofing in case v6-specific logic will be added.
         self._test_deallocate_address('fde3:abcd:4321:1::/64', 6)
 
+    def _get_free_ranges(self, ipam_subnet):
+        return [(str(r.first_ip), str(r.last_ip)) for r in
+                ipam_subnet.subnet_manager.list_free_ranges(self.ctx, 100)]
+
+    def test_allocate_deallocate_updates_free_ranges(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/28', ip_version=constants.IP_VERSION_4)[0]
+        self.assertEqual([('192.168.0.2', '192.168.0.14')],
+                         self._get_free_ranges(ipam_subnet))
+        ipam_subnet.allocate(ipam_req.SpecificAddressRequest('192.168.0.5'))
+        self.assertEqual([('192.168.0.2', '192.168.0.4'),
+                          ('192.168.0.6', '192.168.0.14')],
+                         self._get_free_ranges(ipam_subnet))
+        ipam_subnet.deallocate('192.168.0.5')
+        self.assertEqual([('192.168.0.2', '192.168.0.14')],
+                         self._get_free_ranges(ipam_subnet))
+
+    def test_deallocate_address_out_of_pools(self):
+        allocation_pools = [{'start': '192.168.0.5', 'end': '192.168.0.9'}]
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/24', allocation_pools=allocation_pools,
+            ip_version=constants.IP_VERSION_4)[0]
+        ipam_subnet.allocate(ipam_req.SpecificAddressRequest('192.168.0.1'))
+        ipam_subnet.deallocate('192.168.0.1')
+        self.assertEqual([('192.168.0.5', '192.168.0.9')],
+                         self._get_free_ranges(ipam_subnet))
+
+    def test_allocate_any_address_builds_free_ranges(self):
+        # Subnets created before the free ranges index existed have none
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/29', ip_version=constants.IP_VERSION_4)[0]
+        manager = ipam_subnet.subnet_manager
+        manager.delete_free_ranges(self.ctx)
+        for ip_address in ('192.168.0.2', '192.168.0.3', '192.168.0.5'):
+            manager.create_allocation(self.ctx, ip_address)
+
+        ip_address = ipam_subnet.allocate(ipam_req.PreferNextAddressRequest())
+        self.assertEqual('192.168.0.4', ip_address)
+        self.assertEqual([('192.168.0.6', '192.168.0.6')],
+                         self._get_free_ranges(ipam_subnet))
+
+    def test_allocate_any_address_stale_free_ranges(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/29', ip_version=constants.IP_VERSION_4)[0]
+        # Allocations not reflected in the free ranges index
+        manager = ipam_subnet.subnet_manager
+        for ip_address in ('192.168.0.2', '192.168.0.3', '192.168.0.4',
+                           '192.168.0.6'):
+            manager.create_allocation(self.ctx, ip_address)
+
+        ip_address = ipam_subnet.allocate(ipam_req.AnyAddressRequest)
+        self.assertEqual('192.168.0.5', ip_address)
+        self.assertRaises(ipam_exc.IpAddressGenerationFailure,
+                          ipam_subnet.allocate,
+                          ipam_req.AnyAddressRequest)
+        self.assertEqual([], self._get_free_ranges(ipam_subnet))
+
+    def test_update_allocation_pools_rebuilds_free_ranges(self):
+        cidr = '192.168.0.0/24'
+        ipam_subnet = self._create_and_allocate_ipam_subnet(cidr)[0]
+        ipam_subnet.allocate(ipam_req.SpecificAddressRequest('192.168.0.5'))
+        ipam_subnet.update_allocation_pools(
+            [netaddr.IPRange('192.168.0.2', '192.168.0.9')],
+            netaddr.IPNetwork(cidr))
+        self.assertEqual([('192.168.0.2', '192.168.0.4'),
+                          ('192.168.0.6', '192.168.0.9')],
+                         self._get_free_ranges(ipam_subnet))
+
+    def test__iter_free_ips_overlapping_ranges(self):
+        free_ranges = [
+            mock.Mock(first_ip=netaddr.IPAddress(first_ip),
+                      last_ip=netaddr.IPAddress(last_ip))
+            for first_ip, last_ip in (('10.0.0.1', '10.0.0.3'),
+                                      ('10.0.0.2', '10.0.0.4'),
+                                      ('10.0.0.3', '10.0.0.3'),
+                                      ('10.0.0.6', '10.0.0.6'))]
+        self.assertEqual(
+            ['10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.4', '10.0.0.6'],
+            [str(ip) for ip in driver._iter_free_ips(free_ranges)])
+
+    def test__get_shards(self):
+        self.config(ipam_allocation_shards=3)
+        pools = [netaddr.IPRange('10.0.0.1', '10.0.0.4'),
+                 netaddr.IPRange('10.0.0.8', '10.0.0.10')]
+        first = int(netaddr.IPAddress('10.0.0.1'))
+        self.assertEqual([(first, first + 2), (first + 3, first + 5),
+                          (first + 6, first + 9)], driver._get_shards(pools))
+        self.assertEqual([first + 3, first + 6],
+                         driver._get_shard_starts(pools))
+        self.assertEqual(
+            [], driver._get_shards([netaddr.IPRange('10.0.0.1',
+                                                    '10.0.0.2')]))
+        self.config(ipam_allocation_shards=1)
+        self.assertEqual([], driver._get_shards(pools))
+
+    def test__split_ranges(self):
+        ip_ranges = [netaddr.IPRange('10.0.0.1', '10.0.0.4'),
+                     netaddr.IPRange('10.0.0.8', '10.0.0.10')]
+        starts = [int(netaddr.IPAddress(ip))
+                  for ip in ('10.0.0.4', '10.0.0.7', '10.0.0.9')]
+        self.assertEqual(
+            [('10.0.0.1', '10.0.0.3'), ('10.0.0.4', '10.0.0.4'),
+             ('10.0.0.8', '10.0.0.8'), ('10.0.0.9', '10.0.0.10')],
+            [(str(netaddr.IPAddress(first_ip)),
+              str(netaddr.IPAddress(last_ip)))
+             for first_ip, last_ip in driver._split_ranges(ip_ranges,
+                                                           starts)])
+
+    def test_allocate_any_address_sharded(self):
+        self.config(ipam_allocation_shards=4)
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/24', ip_version=constants.IP_VERSION_4)[0]
+        # The 253 pool addresses are split in 4 shards of 63 addresses, the
+        # last one holding the remaining address, and so are the free ranges
+        self.assertEqual([('192.168.0.2', '192.168.0.64'),
+                          ('192.168.0.65', '192.168.0.127'),
+                          ('192.168.0.128', '192.168.0.190'),
+                          ('192.168.0.191', '192.168.0.254')],
+                         self._get_free_ranges(ipam_subnet))
+        # The shard of a worker is stable
+        shard = [netaddr.IPRange('192.168.0.2', '192.168.0.64'),
+                 netaddr.IPRange('192.168.0.65', '192.168.0.127'),
+                 netaddr.IPRange('192.168.0.128', '192.168.0.190'),
+                 netaddr.IPRange('192.168.0.191', '192.168.0.254')][
+            os.getpid() % 4]
+        for _ in range(3):
+            ip_address = ipam_subnet.allocate(ipam_req.AnyAddressRequest())
+            self.assertIn(netaddr.IPAddress(ip_address), shard)
+
+    def test_allocate_any_address_shard_exhausted(self):
+        self.config(ipam_allocation_shards=2)
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/29', ip_version=constants.IP_VERSION_4)[0]
+        shards = [{'192.168.0.2', '192.168.0.3'},
+                  {'192.168.0.4', '192.168.0.5', '192.168.0.6'}]
+        shard = shards[os.getpid() % 2]
+        other_shard = shards[(os.getpid() + 1) % 2]
+        ip_addresses = {ipam_subnet.allocate(ipam_req.AnyAddressRequest())
+                        for _ in range(len(shard))}
+        self.assertEqual(shard, ip_addresses)
+        # Once its shard is exhausted, the worker uses the whole subnet
+        ip_address = ipam_subnet.allocate(ipam_req.AnyAddressRequest())
+        self.assertIn(ip_address, other_shard)
+
+    def test_deallocate_keeps_shard_free_ranges(self):
+        self.config(ipam_allocation_shards=2)
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/29', ip_version=constants.IP_VERSION_4)[0]
+        ipam_subnet.allocate(ipam_req.SpecificAddressRequest('192.168.0.4'))
+        ipam_subnet.deallocate('192.168.0.4')
+        ipam_subnet.allocate(ipam_req.SpecificAddressRequest('192.168.0.3'))
+        ipam_subnet.deallocate('192.168.0.3')
+        self.assertEqual([('192.168.0.2', '192.168.0.3'),
+                          ('192.168.0.4', '192.168.0.6')],
+                         self._get_free_ranges(ipam_subnet))
+
+    def test_allocate_metrics(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/24', ip_version=constants.IP_VERSION_4)[0]
+        histogram = driver.METRICS.get_histogram(driver.ALLOCATION_METRIC,
+                                                 type='specific')
+        count = histogram.count if histogram else 0
+        ipam_subnet.allocate(ipam_req.SpecificAddressRequest('192.168.0.5'))
+        self.assertEqual(count + 1, driver.METRICS.get_histogram(
+            driver.ALLOCATION_METRIC, type='specific').count)
+
+    def test_count_retries(self):
+        @driver.count_retries
+        def create_port(error):
+            raise error
+
+        retries = driver.METRICS.get_counter(
+            driver.RETRY_METRIC, operation='create_port',
+            error='DBDuplicateEntry')
+        self.assertRaises(db_exc.DBDuplicateEntry, create_port,
+                          db_exc.DBDuplicateEntry())
+        self.assertRaises(ValueError, create_port, ValueError())
+        self.assertEqual(retries + 1, driver.METRICS.get_counter(
+            driver.RETRY_METRIC, operation='create_port',
+            error='DBDuplicateEntry'))
+        self.assertEqual(0, driver.METRICS.get_counter(
+            driver.RETRY_METRIC, operation='create_port', error='ValueError'))
+
+    def test_allocate_stale_candidate_metrics(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/29', ip_version=constants.IP_VERSION_4)[0]
+        ipam_subnet.subnet_manager.create_allocation(self.ctx, '192.168.0.2')
+        stale = driver.METRICS.get_counter(driver.STALE_CANDIDATE_METRIC)
+        ip_address = ipam_subnet.allocate(ipam_req.PreferNextAddressRequest())
+        self.assertEqual('192.168.0.3', ip_address)
+        self.assertEqual(stale + 1, driver.METRICS.get_counter(
+            driver.STALE_CANDIDATE_METRIC))
+
+    @mock.patch.object(driver, '_metrics_written_at', 0)
+    def test_allocate_writes_metrics_file(self):
+        metrics_file = os.path.join(self.get_default_temp_dir().path,
+                                    'ipam.prom')
+        self.config(ipam_metrics_file=metrics_file)
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/24', ip_version=constants.IP_VERSION_4)[0]
+        ipam_subnet.allocate(ipam_req.AnyAddressRequest())
+        with open('%s.%d' % (metrics_file, os.getpid())) as f:
+            self.assertIn(driver.ALLOCATION_METRIC, f.read())
+
     def test_allocate_all_pool_addresses_triggers_range_recalculation(self):
         # This test instead might be made to pass, but for the wrong reasons!
         pass
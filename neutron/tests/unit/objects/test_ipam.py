@@ -10,7 +10,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import netaddr
+
 from neutron.objects import ipam
+from neutron.tests import base
 from neutron.tests.unit.objects import test_base as obj_test_base
 from neutron.tests.unit import testlib_api
 
@@ -71,3 +74,118 @@ class IpamAllocationDbObjectTestCase(obj_test_base.BaseDbObjectTestCase,
         attrs = self.get_random_object_fields(obj_cls=ipam.IpamSubnet)
         self._ipam_subnet = ipam.IpamSubnet(self.context, **attrs)
         self._ipam_subnet.create()
+
+
+class IpamFreeRangeObjectIfaceTestCase(obj_test_base.BaseObjectIfaceTestCase):
+
+    _test_class = ipam.IpamFreeRange
+
+
+class IpamFreeRangeDbObjectTestCase(obj_test_base.BaseDbObjectTestCase,
+                                    testlib_api.SqlTestCase):
+
+    _test_class = ipam.IpamFreeRange
+
+    def setUp(self):
+        super().setUp()
+        self._create_test_ipam_subnet()
+        self.update_obj_fields({'ipam_subnet_id': self._ipam_subnet['id']})
+
+    def _create_test_ipam_subnet(self):
+        attrs = self.get_random_object_fields(obj_cls=ipam.IpamSubnet)
+        self._ipam_subnet = ipam.IpamSubnet(self.context, **attrs)
+        self._ipam_subnet.create()
+
+    def _create_range(self, first_ip, last_ip):
+        free_range = ipam.IpamFreeRange(
+            self.context, ipam_subnet_id=self._ipam_subnet['id'],
+            first_ip=netaddr.IPAddress(first_ip),
+            last_ip=netaddr.IPAddress(last_ip))
+        free_range.create()
+        return free_range
+
+    def test_get_first_ranges(self):
+        # The ranges are sorted numerically, not as strings
+        self._create_range('10.0.0.100', '10.0.0.200')
+        self._create_range('10.0.0.9', '10.0.0.20')
+        self._create_range('10.0.0.30', '10.0.0.40')
+        free_ranges = ipam.IpamFreeRange.get_first_ranges(
+            self.context, self._ipam_subnet['id'], 2)
+        self.assertEqual(
+            [('10.0.0.9', '10.0.0.20'), ('10.0.0.30', '10.0.0.40')],
+            [(str(r.first_ip), str(r.last_ip)) for r in free_ranges])
+
+    def test_get_first_ranges_between_ips(self):
+        self._create_range('10.0.0.9', '10.0.0.20')
+        self._create_range('10.0.0.30', '10.0.0.40')
+        self._create_range('10.0.0.100', '10.0.0.200')
+        free_ranges = ipam.IpamFreeRange.get_first_ranges(
+            self.context, self._ipam_subnet['id'], 10,
+            first_ip=netaddr.IPAddress('10.0.0.25'),
+            last_ip=netaddr.IPAddress('10.0.0.100'))
+        self.assertEqual(
+            [('10.0.0.30', '10.0.0.40'), ('10.0.0.100', '10.0.0.200')],
+            [(str(r.first_ip), str(r.last_ip)) for r in free_ranges])
+
+    def test_get_range(self):
+        free_range = self._create_range('10.0.0.9', '10.0.0.20')
+        self._create_range('10.0.0.30', '10.0.0.40')
+        for kwargs in ({'first_ip': netaddr.IPAddress('10.0.0.9')},
+                       {'last_ip': netaddr.IPAddress('10.0.0.20')},
+                       {'last_ip': netaddr.IPAddress('10.0.0.20'),
+                        'for_update': True}):
+            self.assertEqual(free_range.id, ipam.IpamFreeRange.get_range(
+                self.context, self._ipam_subnet['id'], **kwargs).id)
+        self.assertIsNone(ipam.IpamFreeRange.get_range(
+            self.context, self._ipam_subnet['id'],
+            first_ip=netaddr.IPAddress('10.0.0.10')))
+
+    def test_get_ranges_with_ip(self):
+        self._create_range('10.0.0.9', '10.0.0.20')
+        free_range = self._create_range('10.0.0.30', '10.0.0.40')
+        for ip_address in ('10.0.0.30', '10.0.0.35', '10.0.0.40'):
+            free_ranges = ipam.IpamFreeRange.get_ranges_with_ip(
+                self.context, self._ipam_subnet['id'],
+                netaddr.IPAddress(ip_address))
+            self.assertEqual([free_range.id], [r.id for r in free_ranges])
+        self.assertEqual([], ipam.IpamFreeRange.get_ranges_with_ip(
+            self.context, self._ipam_subnet['id'],
+            netaddr.IPAddress('10.0.0.25')))
+
+    def test_update_range(self):
+        free_range = self._create_range('10.0.0.9', '10.0.0.20')
+        self.assertTrue(ipam.IpamFreeRange.update_range(
+            self.context, free_range, netaddr.IPAddress('10.0.0.10'),
+            netaddr.IPAddress('10.0.0.20')))
+        # The range read before the update is outdated
+        self.assertFalse(ipam.IpamFreeRange.update_range(
+            self.context, free_range, netaddr.IPAddress('10.0.0.11'),
+            netaddr.IPAddress('10.0.0.20')))
+        self.assertFalse(ipam.IpamFreeRange.delete_range(
+            self.context, free_range))
+        free_range = ipam.IpamFreeRange.get_object(self.context,
+                                                   id=free_range.id)
+        self.assertEqual(netaddr.IPAddress('10.0.0.10'), free_range.first_ip)
+        self.assertTrue(ipam.IpamFreeRange.delete_range(
+            self.context, free_range))
+        self.assertIsNone(ipam.IpamFreeRange.get_object(self.context,
+                                                        id=free_range.id))
+
+
+class IpToKeyTestCase(base.BaseTestCase):
+
+    def test_ip_to_key(self):
+        for ip_address in ('0.0.0.0', '10.0.0.1', '255.255.255.255', '::',
+                           '::1', '2001:db8::1',
+                           'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff'):
+            ip_address = netaddr.IPAddress(ip_address)
+            key = ipam.ip_to_key(ip_address)
+            self.assertEqual(ip_address, ipam.key_to_ip(key))
+            self.assertEqual(ip_address.version,
+                             ipam.key_to_ip(key).version)
+
+    def test_ip_to_key_order(self):
+        ips = [netaddr.IPAddress('10.0.0.%d' % i) for i in range(256)]
+        self.assertEqual(sorted(ips),
+                         [ipam.key_to_ip(key) for key in
+                          sorted(ipam.ip_to_key(ip) for ip in ips)])
@@ -16,6 +16,7 @@ import contextlib
 import copy
 import signal
 import sys
+import threading
 import time
 import unittest
 from unittest import mock
@@ -826,6 +827,36 @@ class TestOvsNeutronAgent:
                                                    mock.ANY, mock.ANY,
                                                    refresh_tunnels=True)
 
+    def test_bind_devices_tags_set_in_one_transaction(self):
+        lvm = mock.Mock(vlan=10)
+        self.agent.vlan_manager.mapping['net1']['seg1'] = lvm
+        ovs_db_list = [{'name': 'tap1', 'tag': []},
+                       {'name': 'tap2', 'tag': ovs_constants.DEAD_VLAN_TAG}]
+        port_details = []
+        for name in ('tap1', 'tap2'):
+            vif_port = mock.Mock(ofport=1)
+            vif_port.port_name = name
+            port_details.append({'network_id': 'net1',
+                                 'vif_port': vif_port,
+                                 'segmentation_id': 'seg1',
+                                 'device': name,
+                                 'device_owner': 'network:dhcp',
+                                 'admin_state_up': True})
+        with mock.patch.object(self.agent.plugin_rpc, 'update_device_list'), \
+                mock.patch.object(self.agent, 'int_br') as mock_int_br:
+            mock_int_br.get_ports_attributes.return_value = ovs_db_list
+            ovsdb = mock_int_br.ovsdb
+            self.agent._bind_devices(port_details)
+        ovsdb.transaction.assert_called_once_with()
+        txn = ovsdb.transaction.return_value.__enter__.return_value
+        self.assertEqual(4, txn.add.call_count)
+        ovsdb.db_set.assert_has_calls([
+            mock.call('Port', 'tap1', ('tag', 10)),
+            mock.call('Port', 'tap2', ('tag', 10))])
+        ovsdb.db_clear.assert_has_calls([
+            mock.call('Port', 'tap2', 'vlan_mode'),
+            mock.call('Port', 'tap2', 'trunks')])
+
     def test_bind_devices_hints_valid_hints(self):
         self.agent.vlan_manager.mapping['net1']['seg1'] = mock.Mock()
         ovs_db_list = [{'name': 'tap1', 'tag': []}]
@@ -1323,7 +1354,8 @@ class TestOvsNeutronAgent:
                                      port_info.get('updated', set()))
             if devices_added_updated:
                 device_added_updated.assert_called_once_with(
-                    devices_added_updated, False, re_added_devices)
+                    devices_added_updated, False, re_added_devices,
+                    devices_details_list=None)
             if port_info.get('removed', set()):
                 device_removed.assert_called_once_with(port_info['removed'])
             if skipped_devices:
@@ -1368,6 +1400,48 @@ class TestOvsNeutronAgent:
     def test_process_network_port_with_empty_port(self):
         self._test_process_network_ports({})
 
+    def test_process_network_ports_pipelined(self):
+        cfg.CONF.set_override('port_processing_chunk_size', 2,
+                              group='AGENT')
+        port_info = {'current': {'tap1', 'tap2', 'tap3', 'tap4', 'tap5'},
+                     'added': {'tap1', 'tap2', 'tap3'},
+                     'updated': {'tap4', 'tap5'}}
+        details = [{'devices': [], 'failed_devices': []},
+                   {'devices': [], 'failed_devices': ['tap3']},
+                   {'devices': [], 'failed_devices': []}]
+        with mock.patch.object(self.agent.sg_agent,
+                               'setup_port_filters') as setup_port_filters,\
+                mock.patch.object(
+                    self.agent, '_get_devices_details_list',
+                    side_effect=details) as get_details,\
+                mock.patch.object(
+                    self.agent, 'treat_devices_added_or_updated',
+                    wraps=self.agent.treat_devices_added_or_updated) as \
+                treat_devices,\
+                mock.patch.object(self.agent, '_bind_devices',
+                                  return_value=set()),\
+                mock.patch.object(self.agent.int_br, 'get_vifs_by_ids',
+                                  return_value={}):
+            failed_devices = self.agent.process_network_ports(
+                port_info, False)
+        self.assertEqual({'added': {'tap3'}, 'removed': set()},
+                         failed_devices)
+        get_details.assert_has_calls([
+            mock.call({'tap1', 'tap2'}),
+            mock.call({'tap3', 'tap4'}),
+            mock.call({'tap5'})])
+        treat_devices.assert_has_calls([
+            mock.call({'tap1', 'tap2'}, False, set(),
+                      devices_details_list=details[0]),
+            mock.call({'tap3', 'tap4'}, False, set(),
+                      devices_details_list=details[1]),
+            mock.call({'tap5'}, False, set(),
+                      devices_details_list=details[2])])
+        setup_port_filters.assert_has_calls([
+            mock.call({'tap1', 'tap2'}, set()),
+            mock.call({'tap3'}, {'tap4'}),
+            mock.call(set(), {'tap5'})])
+
     def test_process_network_ports_with_re_added_ports(self):
         self._test_process_network_ports(
             {'current': {'tap0'},
@@ -2737,6 +2811,85 @@ class TestOvsNeutronAgent:
         self.assertEqual(expected,
                          self.agent._get_ofport_moves(current, previous))
 
+    def test_loop_phase_nested(self):
+        with mock.patch.object(time, 'monotonic',
+                               side_effect=[0, 1, 3, 6]):
+            with self.agent._loop_phase('outer'):
+                with self.agent._loop_phase('inner'):
+                    pass
+        self.assertEqual({'outer': 4, 'inner': 2}, self.agent._loop_phases)
+
+    def test_loop_count_and_wait_records_metrics(self):
+        metrics_file = '/tmp/ovs-agent.prom'
+        cfg.CONF.set_override('metrics_file', metrics_file, group='AGENT')
+        self.agent._loop_phases['scan_ports'] = 0.2
+        with mock.patch.object(time, 'sleep'), \
+                mock.patch.object(self.agent.loop_metrics,
+                                  'write_file') as write_file:
+            self.agent.loop_count_and_wait(time.time(), {})
+        write_file.assert_called_once_with(metrics_file)
+        histogram = self.agent.loop_metrics.get_histogram(
+            ovs_agent.LOOP_PHASE_METRIC, phase='scan_ports')
+        self.assertEqual(1, histogram.count)
+        self.assertEqual(0.2, histogram.sum)
+        self.assertEqual(1, self.agent.loop_metrics.get_histogram(
+            ovs_agent.LOOP_ITERATION_METRIC).count)
+        self.assertEqual({}, self.agent._loop_phases)
+
+    def _mock_resource_cache_snapshot(self):
+        rcache = self.agent.plugin_rpc.remote_resource_cache
+        get = mock.patch.object(rcache, 'get_snapshot_resources',
+                                return_value={'Port': []}).start()
+        write = mock.patch.object(rcache, 'write_snapshot').start()
+        return get, write
+
+    def test_save_resource_cache_snapshot(self):
+        cfg.CONF.set_override('resource_cache_snapshot_file',
+                              '/tmp/ovs-agent-cache.json', group='AGENT')
+        cfg.CONF.set_override('resource_cache_snapshot_interval', 60,
+                              group='AGENT')
+        get, write = self._mock_resource_cache_snapshot()
+        self.agent._last_cache_snapshot = time.monotonic() - 30
+        self.agent._save_resource_cache_snapshot()
+        get.assert_not_called()
+        self.agent._last_cache_snapshot = time.monotonic() - 70
+        self.agent._save_resource_cache_snapshot()
+        # the snapshot is written by another thread
+        self.agent._cache_snapshot_thread.join()
+        get.assert_called_once_with()
+        write.assert_called_once_with({'Port': []})
+        self.assertIn('resource_cache_snapshot', self.agent._loop_phases)
+        self.assertIn('resource_cache_snapshot_write',
+                      self.agent._loop_phases)
+
+    def test_save_resource_cache_snapshot_previous_running(self):
+        cfg.CONF.set_override('resource_cache_snapshot_file',
+                              '/tmp/ovs-agent-cache.json', group='AGENT')
+        get, write = self._mock_resource_cache_snapshot()
+        self.agent._cache_snapshot_thread = mock.Mock()
+        self.agent._cache_snapshot_thread.is_alive.return_value = True
+        self.agent._last_cache_snapshot = time.monotonic() - 3600
+        self.agent._save_resource_cache_snapshot()
+        get.assert_not_called()
+        # a forced snapshot waits for the previous one
+        self.agent._save_resource_cache_snapshot(force=True)
+        self.agent._cache_snapshot_thread.join.assert_called_once_with()
+        write.assert_called_once_with({'Port': []})
+
+    def test_save_resource_cache_snapshot_forced(self):
+        cfg.CONF.set_override('resource_cache_snapshot_file',
+                              '/tmp/ovs-agent-cache.json', group='AGENT')
+        cfg.CONF.set_override('resource_cache_snapshot_interval', 0,
+                              group='AGENT')
+        get, write = self._mock_resource_cache_snapshot()
+        self.agent._save_resource_cache_snapshot()
+        get.assert_not_called()
+        with mock.patch.object(threading, 'Thread') as thread:
+            self.agent._save_resource_cache_snapshot(force=True)
+        # the snapshot is written synchronously on shutdown
+        thread.assert_not_called()
+        write.assert_called_once_with({'Port': []})
+
     def test_update_stale_ofport_rules_clears_old(self):
         self.agent.prevent_arp_spoofing = True
         self.agent.vifname_to_ofport_map = {'port1': 1, 'port2': 2}
@@ -211,6 +211,42 @@ class TestDBInconsistenciesPeriodics(testlib_api.SqlTestCaseLight,
         self.periodic.check_for_inconsistencies()
         mock_fix_net.assert_called_once_with(mock.ANY, fake_row)
 
+    @mock.patch.object(maintenance.DBInconsistenciesPeriodics,
+                       '_fix_create_update')
+    @mock.patch.object(ovn_revision_numbers_db, 'get_dirty_since_marker')
+    @mock.patch.object(ovn_revision_numbers_db, 'get_inconsistent_resources')
+    def test_check_for_inconsistencies_dirty_since(
+            self, mock_get_incon_res, mock_marker, mock_fix):
+        fake_row = mock.Mock(resource_type=constants.TYPE_NETWORKS)
+        mock_get_incon_res.return_value = [fake_row]
+        mock_marker.side_effect = ['marker1', 'marker2', 'marker3']
+        mock_fix.side_effect = [Exception, None]
+
+        def _assert_dirty_since(dirty_since):
+            self.periodic.check_for_inconsistencies()
+            mock_get_incon_res.assert_called_with(
+                mock.ANY, dirty_since=dirty_since)
+
+        # The first check is a full one and fails, so does the next one
+        _assert_dirty_since(None)
+        _assert_dirty_since(None)
+        # Only the resources updated since the last successful check are
+        # checked next
+        _assert_dirty_since('marker2')
+
+    @mock.patch.object(ovn_revision_numbers_db, 'get_inconsistent_resources',
+                       return_value=[])
+    def test_check_for_inconsistencies_full_check(self, mock_get_incon_res):
+        for _ in range(maintenance.INCONSISTENCIES_FULL_CHECK_RUNS + 1):
+            self.periodic.check_for_inconsistencies()
+        dirty_since = [c[1]['dirty_since'] for c in
+                       mock_get_incon_res.call_args_list]
+        self.assertIsNone(dirty_since[0])
+        self.assertNotIn(
+            None,
+            dirty_since[1:maintenance.INCONSISTENCIES_FULL_CHECK_RUNS])
+        self.assertIsNone(dirty_since[-1])
+
     def _test_fix_create_update_network(self, ovn_rev, neutron_rev):
         with db_api.CONTEXT_WRITER.using(self.ctx):
             self.net['revision_number'] = neutron_rev
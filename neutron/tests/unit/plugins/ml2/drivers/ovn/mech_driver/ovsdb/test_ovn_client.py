@@ -104,6 +104,68 @@ class TestOVNClient(TestOVNClientBase):
         self.ovn_client._wait_for_active_port_bindings_host.retry.wait = (
             wait_none())
 
+    @mock.patch.object(ovn_client.db_rev, 'bump_revisions')
+    @mock.patch.object(ovn_client.OVNClient, '_create_port')
+    def test_create_ports(self, mock_create_port, mock_bump_revisions):
+        ctx = mock.Mock()
+        ports = [
+            {'id': 'port-1', 'device_owner': 'compute:nova'},
+            {'id': 'port-2', 'device_owner': const.DEVICE_OWNER_FLOATINGIP},
+            {'id': 'port-3', 'device_owner': ''}]
+        self.ovn_client.create_ports(ctx, ports)
+
+        # All the ports are created in the same NB transaction and the
+        # floating IP port is ignored.
+        self.nb_idl.transaction.assert_called_once_with(check_error=True)
+        txn = self.nb_idl.transaction.return_value.__enter__.return_value
+        mock_create_port.assert_has_calls([
+            mock.call(ctx, ports[0], txn, sync_dns_records=False),
+            mock.call(ctx, ports[2], txn, sync_dns_records=False)])
+        self.assertEqual(2, mock_create_port.call_count)
+        mock_bump_revisions.assert_called_once_with(
+            ctx, [ports[0], ports[2]], constants.TYPE_PORTS)
+
+    @mock.patch.object(ovn_client.db_rev, 'bump_revisions')
+    @mock.patch.object(ovn_client.OVNClient, '_create_port')
+    def test_create_ports_dns_records(self, mock_create_port,
+                                      mock_bump_revisions):
+        ports = [
+            {'id': 'port-%d' % i, 'device_owner': 'compute:nova',
+             'device_id': 'vm-%d' % i, 'network_id': 'net-1',
+             'dns_name': 'vm%d' % i,
+             'dns_assignment': [{'hostname': 'vm%d' % i,
+                                 'fqdn': 'vm%d.example.org.' % i,
+                                 'ip_address': '10.0.0.%d' % i}]}
+            for i in (1, 2)]
+        ls = mock.Mock()
+        ls.name = 'neutron-net-1'
+        # The logical switch has no DNS row yet
+        self.nb_idl.get_ls_and_dns_record.return_value = (ls, None)
+        self.ovn_client.create_ports(mock.Mock(), ports)
+
+        # A single DNS row is created with the records of both ports
+        self.nb_idl.dns_add.assert_called_once_with(
+            external_ids={'ls_name': 'neutron-net-1'},
+            records={'vm1': '10.0.0.1', 'vm1.example.org': '10.0.0.1',
+                     '1.0.0.10.in-addr.arpa': 'vm1.example.org',
+                     'vm2': '10.0.0.2', 'vm2.example.org': '10.0.0.2',
+                     '2.0.0.10.in-addr.arpa': 'vm2.example.org'})
+        txn = self.nb_idl.transaction.return_value.__enter__.return_value
+        self.nb_idl.ls_set_dns_records.assert_called_once_with(
+            ls.uuid, txn.add.return_value)
+
+    @mock.patch.object(ovn_client.db_rev, 'bump_revisions')
+    @mock.patch.object(ovn_client.OVNClient, '_create_port')
+    def test_create_ports_all_ignored(self, mock_create_port,
+                                      mock_bump_revisions):
+        ports = [{'id': 'port-1',
+                  'device_owner': const.DEVICE_OWNER_FLOATINGIP}]
+        self.ovn_client.create_ports(mock.Mock(), ports)
+
+        self.nb_idl.transaction.assert_not_called()
+        mock_create_port.assert_not_called()
+        mock_bump_revisions.assert_not_called()
+
     def test__add_router_ext_gw_default_route(self):
         plugin = mock.MagicMock()
         self.get_plugin.return_value = plugin
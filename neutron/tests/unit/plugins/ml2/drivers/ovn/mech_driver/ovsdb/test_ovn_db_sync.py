@@ -13,6 +13,7 @@
 #    under the License.
 
 import collections
+import os
 from unittest import mock
 
 from neutron_lib.api.definitions import portbindings
@@ -20,6 +21,7 @@ from neutron_lib import constants as const
 from neutron_lib import exceptions as n_exc
 from neutron_lib.ovn import constants as n_lib_ovn_const
 from neutron_lib.services.logapi import constants as log_const
+from oslo_config import cfg
 from oslo_utils import uuidutils
 
 from neutron.common.ovn import acl
@@ -467,10 +469,20 @@ class TestOvnNbSyncML2(test_mech_driver.OVNMechanismDriverTestCase):
         pf_plugin = ovn_nb_synchronizer.pf_plugin
         segments_plugin = ovn_nb_synchronizer.segments_plugin
 
+        def get_filtered(resources):
+            def wrapper(*args, **kwargs):
+                # Only the filters used by the sharded sync are honoured.
+                filters = kwargs.get('filters') or {}
+                return [res for res in resources if
+                        all(res[k] in v for k, v in filters.items()
+                            if k in ('id', 'network_id'))]
+
+            return wrapper
+
         core_plugin.get_networks = mock.Mock()
-        core_plugin.get_networks.return_value = self.networks
+        core_plugin.get_networks.side_effect = get_filtered(self.networks)
         core_plugin.get_subnets = mock.Mock()
-        core_plugin.get_subnets.return_value = self.subnets
+        core_plugin.get_subnets.side_effect = get_filtered(self.subnets)
 
         def get_segments(self, filters):
             segs = []
@@ -1069,6 +1081,117 @@ class TestOvnNbSyncML2(test_mech_driver.OVNMechanismDriverTestCase):
     def test_ovn_nb_sync_mode_repair_logs_created(self):
         self._test_ovn_nb_sync_mode_repair(test_logging=True)
 
+    def test_ovn_nb_sync_mode_repair_sharded(self):
+        cfg.CONF.set_override('neutron_sync_shard_size', 1, group='ovn')
+        cfg.CONF.set_override('neutron_sync_workers', 2, group='ovn')
+        self._test_ovn_nb_sync_mode_repair()
+
+    def test_ovn_nb_sync_checkpoint(self):
+        checkpoint_file = self.get_temp_file_path('sync-checkpoint')
+        cfg.CONF.set_override('neutron_sync_checkpoint_file',
+                              checkpoint_file, group='ovn')
+        checkpoint = ovn_db_sync.SyncCheckpoint(
+            checkpoint_file, n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR)
+        checkpoint.steps.update(['port_groups', 'acls'])
+        checkpoint.save()
+        ovn_nb_synchronizer = ovn_db_sync.OvnNbSynchronizer(
+            self.plugin, self.mech_driver,
+            n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR)
+        steps = {}
+        for step in ('sync_port_groups', 'sync_acls',
+                     'sync_routers_and_rports',
+                     'sync_networks_ports_and_dhcp_opts',
+                     'sync_port_dns_records', 'sync_port_qos_policies',
+                     'sync_fip_qos_policies', 'sync_fip_dnat_rules',
+                     'sync_fip_distributed_nat'):
+            steps[step] = mock.patch.object(ovn_nb_synchronizer, step).start()
+        steps['sync_routers_and_rports'].side_effect = RuntimeError
+
+        self.assertRaises(RuntimeError, ovn_nb_synchronizer.do_sync)
+        steps['sync_port_groups'].assert_not_called()
+        steps['sync_acls'].assert_not_called()
+        steps['sync_networks_ports_and_dhcp_opts'].assert_called_once_with(
+            mock.ANY)
+        steps['sync_port_qos_policies'].assert_not_called()
+        checkpoint = ovn_db_sync.SyncCheckpoint(
+            checkpoint_file, n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR)
+        self.assertEqual({'port_groups', 'networks_ports_and_dhcp_opts',
+                          'port_dns_records', 'acls'}, checkpoint.steps)
+
+        # The sync resumes from the failed step and clears the checkpoint.
+        steps['sync_routers_and_rports'].side_effect = None
+        ovn_nb_synchronizer.do_sync()
+        steps['sync_networks_ports_and_dhcp_opts'].assert_called_once_with(
+            mock.ANY)
+        steps['sync_port_qos_policies'].assert_called_once_with(mock.ANY)
+        self.assertFalse(os.path.exists(checkpoint_file))
+
+    def test_ovn_nb_sync_checkpoint_other_mode(self):
+        checkpoint_file = self.get_temp_file_path('sync-checkpoint')
+        checkpoint = ovn_db_sync.SyncCheckpoint(
+            checkpoint_file, n_lib_ovn_const.OVN_DB_SYNC_MODE_LOG)
+        checkpoint.steps.add('port_groups')
+        checkpoint.networks.add('n1')
+        checkpoint.save()
+
+        checkpoint = ovn_db_sync.SyncCheckpoint(
+            checkpoint_file, n_lib_ovn_const.OVN_DB_SYNC_MODE_LOG)
+        self.assertEqual({'port_groups'}, checkpoint.steps)
+        self.assertEqual({'n1'}, checkpoint.networks)
+        checkpoint = ovn_db_sync.SyncCheckpoint(
+            checkpoint_file, n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR)
+        self.assertEqual(set(), checkpoint.steps)
+        self.assertEqual(set(), checkpoint.networks)
+
+    def test_ovn_nb_sync_checkpoint_expired(self):
+        checkpoint_file = self.get_temp_file_path('sync-checkpoint')
+        mode = n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR
+        with mock.patch.object(ovn_db_sync.time, 'time', return_value=1000):
+            checkpoint = ovn_db_sync.SyncCheckpoint(checkpoint_file, mode)
+            checkpoint.steps.add('port_groups')
+            checkpoint.save()
+        with mock.patch.object(ovn_db_sync.time, 'time', return_value=1500):
+            checkpoint = ovn_db_sync.SyncCheckpoint(checkpoint_file, mode,
+                                                    max_age=600)
+            self.assertEqual({'port_groups'}, checkpoint.steps)
+            # the age of a resumed sync is counted from its first start
+            self.assertEqual(1000, checkpoint.created_at)
+        with mock.patch.object(ovn_db_sync.time, 'time', return_value=1700):
+            checkpoint = ovn_db_sync.SyncCheckpoint(checkpoint_file, mode,
+                                                    max_age=600)
+        self.assertEqual(set(), checkpoint.steps)
+        self.assertEqual(1700, checkpoint.created_at)
+
+    def test_ovn_nb_sync_checkpoint_save_error(self):
+        checkpoint_file = os.path.join(
+            self.get_temp_file_path('missing-dir'), 'sync-checkpoint')
+        checkpoint = ovn_db_sync.SyncCheckpoint(
+            checkpoint_file, n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR)
+        checkpoint.steps.add('port_groups')
+        with mock.patch.object(ovn_db_sync.LOG, 'warning') as mock_warning:
+            checkpoint.save()
+        mock_warning.assert_called_once()
+        self.assertFalse(os.path.exists(checkpoint_file))
+
+    def test_ovn_nb_sync_sharded_resume(self):
+        cfg.CONF.set_override('neutron_sync_shard_size', 2, group='ovn')
+        ovn_nb_synchronizer = ovn_db_sync.OvnNbSynchronizer(
+            self.plugin, self.mech_driver,
+            n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR)
+        self._test_mocks_helper(ovn_nb_synchronizer)
+        checkpoint = ovn_db_sync.SyncCheckpoint(
+            None, n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR)
+        checkpoint.networks.add('n1')
+        with mock.patch.object(ovn_nb_synchronizer,
+                               '_sync_network_shard',
+                               return_value=set()) as sync_shard:
+            ovn_nb_synchronizer.sync_networks_ports_and_dhcp_opts_sharded(
+                mock.Mock(), checkpoint)
+
+        sync_shard.assert_called_once_with(
+            ['n2', 'n4'], mock.ANY, mock.ANY, mock.ANY)
+        self.assertEqual({'n1', 'n2', 'n4'}, checkpoint.networks)
+
     def test_ovn_nb_sync_mode_log(self):
         create_network_list = []
         create_port_list = []
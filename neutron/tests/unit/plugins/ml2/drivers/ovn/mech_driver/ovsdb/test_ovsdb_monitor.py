@@ -18,6 +18,7 @@ import os
 from unittest import mock
 import uuid
 
+import fixtures
 from neutron_lib.plugins import constants as n_const
 from neutron_lib.plugins import directory
 from oslo_utils import timeutils
@@ -28,6 +29,7 @@ from ovs.stream import Stream
 from ovsdbapp.backend.ovs_idl import connection
 from ovsdbapp.backend.ovs_idl import idlutils
 
+from neutron.common import metrics
 from neutron.common.ovn import constants as ovn_const
 from neutron.common.ovn import hash_ring_manager
 from neutron.common.ovn import utils
@@ -108,6 +110,8 @@ class TestOvnDbNotifyHandler(base.BaseTestCase):
 
     def setUp(self):
         super().setUp()
+        mock.patch.object(ovsdb_monitor, 'EVENT_METRICS',
+                          metrics.MetricsRegistry()).start()
         self.handler = ovsdb_monitor.OvnDbNotifyHandler(mock.ANY)
 
     def test_watch_and_unwatch_events(self):
@@ -136,6 +140,136 @@ class TestOvnDbNotifyHandler(base.BaseTestCase):
     def test_shutdown(self):
         self.handler.shutdown()
 
+    def _get_row(self, table):
+        row = mock.Mock()
+        row._table.name = table
+        return row
+
+    def test_matching_events_indexed(self):
+        pb_update = _FakeRowEvent((ROW_UPDATE,), 'Port_Binding')
+        pb_create = _FakeRowEvent((ROW_CREATE,), 'Port_Binding')
+        chassis_update = _FakeRowEvent((ROW_UPDATE,), 'Chassis')
+        global_pb_update = _FakeRowEvent((ROW_UPDATE,), 'Port_Binding',
+                                         (('type', '=', 'virtual'),))
+        global_pb_update.GLOBAL = True
+        self.handler.watch_events([pb_update, pb_create, chassis_update,
+                                   global_pb_update])
+        with mock.patch.object(self.handler, 'match',
+                               return_value=True) as mock_match:
+            matching = self.handler.matching_events(
+                ROW_UPDATE, self._get_row('Port_Binding'), None)
+            self.assertEqual((pb_update,), matching)
+            # Only the candidate event was evaluated
+            self.assertEqual(1, mock_match.call_count)
+
+            matching = self.handler.matching_events(
+                ROW_UPDATE, self._get_row('Port_Binding'), None,
+                global_=True)
+            self.assertEqual((global_pb_update,), matching)
+
+            mock_match.reset_mock()
+            matching = self.handler.matching_events(
+                ROW_CREATE, self._get_row('Chassis'), None)
+            self.assertEqual((), matching)
+            mock_match.assert_not_called()
+
+    def test_matching_events_not_indexable(self):
+        pb_update = _FakeRowEvent((ROW_UPDATE,), 'Port_Binding')
+        custom_event = mock.Mock(priority=1, GLOBAL=False)
+        self.handler.watch_events([pb_update, custom_event])
+        with mock.patch.object(self.handler, 'match',
+                               return_value=True):
+            self.assertCountEqual(
+                (pb_update, custom_event),
+                self.handler.matching_events(
+                    ROW_UPDATE, self._get_row('Port_Binding'), None))
+            self.assertEqual(
+                (custom_event,),
+                self.handler.matching_events(
+                    ROW_UPDATE, self._get_row('Chassis'), None))
+
+    def test_matching_events_index_updated(self):
+        pb_update = _FakeRowEvent((ROW_UPDATE,), 'Port_Binding')
+        row = self._get_row('Port_Binding')
+        with mock.patch.object(self.handler, 'match', return_value=True):
+            self.assertEqual(
+                (), self.handler.matching_events(ROW_UPDATE, row, None))
+            self.handler.watch_event(pb_update)
+            self.assertEqual(
+                (pb_update,),
+                self.handler.matching_events(ROW_UPDATE, row, None))
+            self.handler.unwatch_event(pb_update)
+            self.assertEqual(
+                (), self.handler.matching_events(ROW_UPDATE, row, None))
+
+    def test_event_metrics(self):
+        pb_update = _FakeRowEvent((ROW_UPDATE,), 'Port_Binding')
+        pb_update.ONETIME = True
+        self.handler.watch_event(pb_update)
+        row = self._get_row('Port_Binding')
+        with mock.patch.object(self.handler, 'match', return_value=True), \
+                mock.patch.object(ovsdb_monitor.idlutils, 'frozen_row',
+                                  side_effect=lambda r: r), \
+                mock.patch.object(self.handler.notifications,
+                                  'put') as mock_put:
+            self.handler.notify(ROW_UPDATE, row)
+        match_histogram = self.handler.metrics.get_histogram(
+            ovsdb_monitor.EVENT_MATCH_METRIC, event='_FakeRowEvent')
+        self.assertEqual(1, match_histogram.count)
+
+        timed_run, event, _row, updates = mock_put.call_args[0][0]
+        self.assertTrue(timed_run.ONETIME)
+        timed_run.run(event, _row, updates)
+        pb_update.run_mock.assert_called_once_with(ROW_UPDATE, _row, None)
+        run_histogram = self.handler.metrics.get_histogram(
+            ovsdb_monitor.EVENT_RUN_METRIC, event='_FakeRowEvent')
+        self.assertEqual(1, run_histogram.count)
+
+        # The notify loop unwatches the ONETIME events it was given
+        self.handler.unwatch_event(timed_run)
+        self.assertEqual([], list(self.handler._watched_events))
+
+    def test_matching_events_priority_order(self):
+        low_event = mock.Mock(priority=1, GLOBAL=False)
+        high_event = mock.Mock(priority=20, GLOBAL=False)
+        self.handler.watch_events([low_event, high_event])
+        with mock.patch.object(self.handler, 'match', return_value=True):
+            self.assertEqual(
+                (high_event, low_event),
+                self.handler.matching_events(
+                    ROW_UPDATE, self._get_row('Port_Binding'), None))
+
+    def test_event_metrics_written(self):
+        ovn_conf.register_opts()
+        metrics_file = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                    'ovn-events.prom')
+        ovn_conf.cfg.CONF.set_override('ovsdb_event_metrics_file',
+                                       metrics_file, 'ovn')
+        mock.patch.object(ovsdb_monitor, '_event_metrics_written_at',
+                          0).start()
+        pb_update = _FakeRowEvent((ROW_UPDATE,), 'Port_Binding')
+        self.handler.observe_run(pb_update, 0.1)
+        with open('%s.%d' % (metrics_file, os.getpid())) as f:
+            self.assertIn(
+                '%s_count{event="_FakeRowEvent"} 1' %
+                ovsdb_monitor.EVENT_RUN_METRIC, f.read())
+
+        # The file is not written again before the write interval
+        with mock.patch.object(ovsdb_monitor.EVENT_METRICS,
+                               'write_file') as mock_write:
+            self.handler.observe_run(pb_update, 0.1)
+        mock_write.assert_not_called()
+
+
+class _FakeRowEvent(ovsdb_monitor.row_event.RowEvent):
+
+    def __init__(self, events, table, conditions=None):
+        super().__init__(events, table, conditions)
+        self.run_mock = mock.Mock()
+
+    def run(self, event, row, old):
+        self.run_mock(event, row, old)
+
 
 # class TestOvnBaseConnection(base.TestCase):
 #
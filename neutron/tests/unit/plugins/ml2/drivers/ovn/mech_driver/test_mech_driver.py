@@ -212,6 +212,9 @@ class TestOVNMechanismDriverBase(MechDriverSetupBase,
         p = mock.patch.object(ovn_revision_numbers_db, 'bump_revision')
         p.start()
         self.addCleanup(p.stop)
+        p = mock.patch.object(ovn_revision_numbers_db, 'bump_revisions')
+        p.start()
+        self.addCleanup(p.stop)
 
     def get_additional_service_plugins(self):
         p = super().get_additional_service_plugins()
@@ -277,8 +280,10 @@ class TestOVNMechanismDriver(TestOVNMechanismDriverBase):
             n_exc.InvalidInput,
             self._test__validate_network_segments_id_succeed, 300)
 
+    @mock.patch.object(ovn_revision_numbers_db, 'bump_revisions')
     @mock.patch.object(ovn_revision_numbers_db, 'bump_revision')
-    def _test__create_security_group(self, stateful, mock_bump):
+    def _test__create_security_group(self, stateful, mock_bump,
+                                     mock_bump_bulk):
         self.fake_sg["stateful"] = stateful
         self.mech_driver._create_security_group(
             resources.SECURITY_GROUP, events.AFTER_CREATE, {},
@@ -297,12 +302,11 @@ class TestOVNMechanismDriver(TestOVNMechanismDriverBase):
         for c in self.nb_ovn.pg_acl_add.call_args_list:
             self.assertEqual(expected, c[1]["action"])
 
-        calls = [mock.call(mock.ANY, self.fake_sg,
-                           ovn_const.TYPE_SECURITY_GROUPS)]
-        for sg_rule in self.fake_sg['security_group_rules']:
-            calls.append(mock.call(mock.ANY, sg_rule,
-                                   ovn_const.TYPE_SECURITY_GROUP_RULES))
-        mock_bump.assert_has_calls(calls)
+        mock_bump.assert_called_once_with(
+            mock.ANY, self.fake_sg, ovn_const.TYPE_SECURITY_GROUPS)
+        mock_bump_bulk.assert_called_once_with(
+            mock.ANY, self.fake_sg['security_group_rules'],
+            ovn_const.TYPE_SECURITY_GROUP_RULES)
 
     def test__create_security_group_stateful(self):
         self._test__create_security_group(True)
@@ -2495,6 +2499,29 @@ class TestOVNMechanismDriver(TestOVNMechanismDriverBase):
         mock_create_port.assert_called_once_with(mock.ANY, passed_fake_port)
         mock_notify_dhcp.assert_called_once_with(mock.ANY, fake_port['id'])
 
+    @mock.patch.object(mech_driver.OVNMechanismDriver, '_notify_dhcp_updated')
+    @mock.patch.object(ovn_client.OVNClient, 'create_ports')
+    def test_create_port_bulk_postcommit(self, mock_create_ports,
+                                         mock_notify_dhcp):
+        fake_ports = [
+            fakes.FakePort.create_one_port(
+                attrs={'status': const.PORT_STATUS_DOWN}).info()
+            for _ in range(3)]
+        plugin_context = mock.Mock()
+        fake_ctxs = [mock.Mock(current=port, plugin_context=plugin_context)
+                     for port in fake_ports]
+        self.mech_driver.create_port_bulk_postcommit(fake_ctxs)
+
+        passed_fake_ports = []
+        for fake_port, fake_ctx in zip(fake_ports, fake_ctxs):
+            passed_fake_port = copy.deepcopy(fake_port)
+            passed_fake_port['network'] = fake_ctx.network.current
+            passed_fake_ports.append(passed_fake_port)
+        mock_create_ports.assert_called_once_with(plugin_context,
+                                                  passed_fake_ports)
+        mock_notify_dhcp.assert_has_calls(
+            [mock.call(plugin_context, port['id']) for port in fake_ports])
+
     @mock.patch.object(mech_driver.OVNMechanismDriver,
                        '_is_port_provisioning_required', lambda *_: True)
     @mock.patch.object(mech_driver.OVNMechanismDriver, '_notify_dhcp_updated')
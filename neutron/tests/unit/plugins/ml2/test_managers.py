@@ -259,6 +259,29 @@ class TestMechManager(base.BaseTestCase):
 
         self.assertEqual(['a', 'b'], call_order)
 
+    def test_create_port_bulk_postcommit(self):
+        self._set_two_drivers()
+        del self.driver_b.obj.create_port_bulk_postcommit
+        contexts = [mock.Mock(), mock.Mock()]
+
+        self._manager.create_port_bulk_postcommit(contexts)
+
+        self.driver_a.obj.create_port_bulk_postcommit.assert_called_once_with(
+            contexts)
+        self.driver_a.obj.create_port_postcommit.assert_not_called()
+        self.driver_b.obj.create_port_postcommit.assert_has_calls(
+            [mock.call(contexts[0]), mock.call(contexts[1])])
+
+    def test_create_port_bulk_postcommit_failure(self):
+        self._set_two_drivers()
+        self.driver_a.obj.create_port_bulk_postcommit.side_effect = (
+            Exception)
+
+        self.assertRaises(ml2_exc.MechanismDriverError,
+                          self._manager.create_port_bulk_postcommit,
+                          [mock.Mock()])
+        self.driver_b.obj.create_port_bulk_postcommit.assert_not_called()
+
 
 class TestMechDriverTriStateChecks(base.BaseTestCase):
     """Unit tests for vlan_transparent / qinq mechanism-driver aggregation."""
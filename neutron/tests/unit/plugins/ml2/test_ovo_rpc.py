@@ -11,11 +11,14 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import atexit
 from unittest import mock
 
 from neutron_lib import context
 from neutron_lib.db import api as db_api
 from neutron_lib.plugins import directory
+from oslo_config import cfg
+from oslo_service import backend as oslo_service_backend
 
 from neutron.objects import address_group
 from neutron.objects import network
@@ -142,3 +145,85 @@ class OVOServerRpcInterfaceTestCase(test_plugin.Ml2PluginV2TestCase):
         self.plugin.delete_address_group(self.ctx, ag['id'])
         self._assert_object_received(
             address_group.AddressGroup, ag['id'], 'deleted')
+
+
+class OVOServerRpcInterfaceCoalescingTestCase(test_plugin.Ml2PluginV2TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.plugin = directory.get_plugin()
+        self.ctx = context.get_admin_context()
+        self.pushed = []
+
+        def receive(s, ctx, obs, evt):
+            return self.pushed.append(([o.id for o in obs], evt))
+        mock.patch('neutron.api.rpc.handlers.resources_rpc.'
+                   'ResourcesPushRpcApi.push', new=receive).start()
+        cfg.CONF.set_override('resource_push_coalesce_interval', 60, 'ml2')
+        cfg.CONF.set_override('resource_push_batch_size', 2, 'ml2')
+        self.ovo_push_interface_p.stop()
+        self.plugin._ovo_notifier = ovo_rpc.OVOServerRpcInterface()
+        self.handler = self.plugin._ovo_notifier._resource_handlers[
+            'network']
+        self.addCleanup(self.handler.flush)
+        self.addCleanup(atexit.unregister, self.plugin._ovo_notifier.flush)
+
+    def test_changes_coalesced_and_batched(self):
+        net_ids = []
+        for name in ('n1', 'n2', 'n3'):
+            net = self.plugin.create_network(
+                self.ctx, {'network': {'name': name, 'tenant_id': 'p',
+                                       'admin_state_up': True,
+                                       'shared': False}})
+            net_ids.append(net['id'])
+        self.plugin.update_network(self.ctx, net_ids[0],
+                                   {'network': {'name': 'n1-new'}})
+        self.plugin.delete_network(self.ctx, net_ids[1])
+        self.assertEqual([], self.pushed)
+
+        self.handler.flush()
+        self.assertEqual(
+            [(sorted([net_ids[2], net_ids[0]]), 'updated'),
+             ([net_ids[1]], 'deleted')],
+            [(sorted(ids), evt) for ids, evt in self.pushed])
+        self.assertIsNone(self.handler._flush_timer)
+
+    def _create_network(self, name, project_id='p'):
+        return self.plugin.create_network(
+            self.ctx, {'network': {'name': name, 'tenant_id': project_id,
+                                   'admin_state_up': True,
+                                   'shared': False}})
+
+    def test_changes_of_several_projects_coalesced(self):
+        net_ids = [self._create_network('n1', project_id='p1')['id'],
+                   self._create_network('n2', project_id='p2')['id']]
+        self.handler.flush()
+        self.pushed = []
+        for net_id, project_id in zip(net_ids, ('p1', 'p2')):
+            ctx = context.Context('user', project_id)
+            self.handler._enqueue_event(net_id, ctx.to_dict())
+
+        self.handler.flush()
+        self.assertEqual([(sorted(net_ids), 'updated')],
+                         [(sorted(ids), evt) for ids, evt in self.pushed])
+
+    def test_flush_rpc_notifiers(self):
+        net = self._create_network('n1')
+        self.assertEqual([], self.pushed)
+        self.plugin.flush_rpc_notifiers()
+        # the default security group of the project is pushed as well
+        self.assertIn(([net['id']], 'updated'), self.pushed)
+
+    def test_flush_nothing_pending(self):
+        self.handler._batch_size = None
+        self.assertEqual([], list(self.handler._batches([])))
+        self.handler.flush()
+        self.assertEqual([], self.pushed)
+
+    def test_no_coalescing_with_eventlet(self):
+        with mock.patch.object(
+                oslo_service_backend, 'get_backend_type',
+                return_value=oslo_service_backend.BackendType.EVENTLET):
+            notifier = ovo_rpc.OVOServerRpcInterface()
+        self.assertEqual(
+            0, notifier._resource_handlers['network']._coalesce_interval)
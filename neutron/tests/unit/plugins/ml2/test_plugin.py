@@ -54,9 +54,11 @@ from neutron.common import utils
 from neutron.db import agents_db
 from neutron.db import ipam_pluggable_backend
 from neutron.db import provisioning_blocks
+from neutron.db import request_cache
 from neutron.db import securitygroups_db as sg_db
 from neutron.db import segments_db
 from neutron.ipam import driver
+from neutron.ipam.drivers.neutrondb_ipam import driver as neutrondb_ipam
 from neutron.objects import base as base_obj
 from neutron.objects import network as network_obj
 from neutron.objects import ports as port_obj
@@ -998,6 +1000,9 @@ class TestMl2DbOperationBounds(test_plugin.DbOperationBoundMixin,
         # NOTE(slaweq): In this class we are not testing any operations related
         # to policy module so we don't need to checu policies
         mock.patch('neutron.policy.check').start()
+        mock.patch('neutron.policy.check_batch',
+                   side_effect=lambda context, action, targets, **kwargs:
+                   [True] * len(targets)).start()
 
     def make_network(self):
         return self._make_network(self.fmt, 'name', True, **self.kwargs)
@@ -1607,6 +1612,82 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
                 self._validate_behavior_on_bulk_failure(
                     res, 'ports', webob.exc.HTTPServerError.code)
 
+    def test_create_port_request_cache(self):
+        with self.network() as net, \
+                mock.patch.object(request_cache, 'LOG') as m_log:
+            res = self._create_port(self.fmt, net['network']['id'],
+                                    arg_list=(portbindings.HOST_ID,),
+                                    is_admin=True,
+                                    **{portbindings.HOST_ID: 'host1'})
+            self.assertEqual(webob.exc.HTTPCreated.code, res.status_int)
+            stats = [c[0][1] for c in m_log.debug.call_args_list
+                     if c[0][1]['name'] == 'create_port']
+            self.assertEqual(1, len(stats))
+            # The network, its segments and subnets are read from the DB
+            # once and then served from the request cache.
+            self.assertGreater(stats[0]['hits'], 0)
+            self.assertGreater(stats[0]['misses'], 0)
+
+    def test_create_ports_bulk_single_postcommit(self):
+        with self.network() as net, \
+                mock.patch.object(managers.MechanismManager,
+                                  'create_port_bulk_postcommit') as m_post:
+            res = self._create_port_bulk(self.fmt, 3, net['network']['id'],
+                                         'test', True)
+            ports = self.deserialize(self.fmt, res)['ports']
+            m_post.assert_called_once_with(mock.ANY)
+            self.assertEqual(
+                sorted(port['id'] for port in ports),
+                sorted(mech_context.current['id']
+                       for mech_context in m_post.call_args[0][0]))
+
+    def test_create_ports_bulk_postcommit_failure(self):
+        ctx = context.get_admin_context()
+        with self.network() as net, \
+                mock.patch.object(managers.MechanismManager,
+                                  'create_port_bulk_postcommit',
+                                  side_effect=ml2_exc.MechanismDriverError(
+                                      method='create_port_bulk_postcommit')):
+            res = self._create_port_bulk(self.fmt, 2, net['network']['id'],
+                                         'test', True, context=ctx)
+
+            # We expect a 500 as we injected a fault in the plugin
+            self._validate_behavior_on_bulk_failure(
+                res, 'ports', webob.exc.HTTPServerError.code)
+            query_params = "network_id=%s" % net['network']['id']
+            ports = self._list('ports', query_params=query_params)
+            self.assertFalse(ports['ports'])
+
+    def test_create_ports_bulk_postcommit_failure_delete_error(self):
+        ctx = context.get_admin_context()
+        plugin = directory.get_plugin()
+        delete_port = plugin.delete_port
+        deleted = []
+
+        def _delete_port(context, port_id, **kwargs):
+            if not deleted:
+                deleted.append(None)
+                raise RuntimeError()
+            deleted.append(port_id)
+            return delete_port(context, port_id, **kwargs)
+
+        with self.network() as net, \
+                mock.patch.object(managers.MechanismManager,
+                                  'create_port_bulk_postcommit',
+                                  side_effect=ml2_exc.MechanismDriverError(
+                                      method='create_port_bulk_postcommit')),\
+                mock.patch.object(plugin, 'delete_port',
+                                  side_effect=_delete_port):
+            res = self._create_port_bulk(self.fmt, 2, net['network']['id'],
+                                         'test', True, context=ctx)
+
+            self.assertEqual(webob.exc.HTTPServerError.code, res.status_int)
+            query_params = "network_id=%s" % net['network']['id']
+            ports = self._list('ports', query_params=query_params)
+            # Only the port whose deletion failed is left
+            self.assertEqual(1, len(ports['ports']))
+            self.assertNotIn(ports['ports'][0]['id'], deleted)
+
     def test_create_ports_bulk_with_sec_grp(self):
         plugin = directory.get_plugin()
         with self.network() as net,\
@@ -1991,7 +2072,8 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
             with self.port():
                 pass
 
-        self._test_operation_resillient_to_ipallocation_failure(make_port)
+        self._test_operation_resillient_to_ipallocation_failure(
+            make_port, 'create_port')
 
     def test_port_update_resillient_to_duplicate_records(self):
         cidr = '10.0.0.0/24'
@@ -2007,9 +2089,10 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
                                      req.get_response(self.api).status_int)
 
                 self._test_operation_resillient_to_ipallocation_failure(
-                    do_request)
+                    do_request, 'update_port')
 
-    def _test_operation_resillient_to_ipallocation_failure(self, func):
+    def _test_operation_resillient_to_ipallocation_failure(self, func,
+                                                           operation):
 
         class IPAllocationsGrenade:
             insert_ip_called = False
@@ -2031,9 +2114,16 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
         db_api.sqla_listen(engine, 'before_cursor_execute',
                            listener.execute)
         db_api.sqla_listen(engine, 'commit', listener.commit)
+        retries = neutrondb_ipam.METRICS.get_counter(
+            neutrondb_ipam.RETRY_METRIC, operation=operation,
+            error='DBDuplicateEntry')
         func()
         # make sure that the grenade went off during the commit
         self.assertTrue(listener.except_raised)
+        # and that the retry was counted
+        self.assertEqual(retries + 1, neutrondb_ipam.METRICS.get_counter(
+            neutrondb_ipam.RETRY_METRIC, operation=operation,
+            error='DBDuplicateEntry'))
 
     def test_list_ports_filtered_by_fixed_ip_substring(self):
         with self.port() as port1, self.port():
@@ -197,6 +197,24 @@ class PolicyTestCase(base.BaseTestCase):
             system_scope='all')
         self.assertFalse(policy.check(system_admin_ctx, action, target))
 
+    def test_check_batch_invalid_scope(self):
+        cfg.CONF.set_override(
+            'enforce_new_defaults', True, group='oslo_policy')
+        action = "get_example:only_project_user_allowed"
+        targets = [{'project_id': 'some-project'}, {'project_id': 'fake'}]
+        system_admin_ctx = context.Context(
+            user_id="fake",
+            roles=['admin', 'member', 'reader'],
+            system_scope='all')
+        self.assertFalse(any(
+            policy.check_batch(system_admin_ctx, action, targets)))
+        project_reader_ctx = context.Context(
+            user_id="fake", project_id="fake", roles=['reader'])
+        self.assertEqual(
+            [policy.check(project_reader_ctx, action, target)
+             for target in targets],
+            policy.check_batch(project_reader_ctx, action, targets))
+
     def test_enforce_good_action(self):
         action = "example:allowed"
         result = policy.enforce(self.context, action, self.target)
@@ -707,6 +725,79 @@ class NeutronPolicyTestCase(base.BaseTestCase):
         result = policy.enforce(self.context, action, target)
         self.assertTrue(result)
 
+    def test_check_batch(self):
+        action = "get_network"
+        targets = [
+            {'shared': False, 'project_id': 'fake'},
+            {'shared': True, 'project_id': 'somebody_else'},
+            {'shared': False, 'project_id': 'somebody_else'},
+            {'shared': False, 'project_id': 'fake'},
+        ]
+        expected = [policy.check(self.context, action, target)
+                    for target in targets]
+        self.assertFalse(expected[2])
+        self.assertEqual(3, expected.count(True))
+        self.assertEqual(expected,
+                         policy.check_batch(self.context, action, targets))
+
+    def test_check_batch_evaluates_distinct_targets_once(self):
+        action = "get_port"
+        targets = [{'id': _uuid(), 'project_id': project_id}
+                   for project_id in ('fake', 'other', 'fake', 'other')]
+        with mock.patch.object(policy.OwnerCheck, '__call__',
+                               autospec=True,
+                               side_effect=lambda self, target, *args:
+                               target['project_id'] == 'fake') as owner:
+            result = policy.check_batch(self.context, action, targets)
+        self.assertEqual([t['project_id'] == 'fake' for t in targets],
+                         result)
+        # the rule only references the project_id of the targets
+        self.assertEqual(2, owner.call_count)
+
+    def test_check_batch_credentials_only_rule(self):
+        action = "get_port"
+        advsvc_context = context.Context('', 'fake',
+                                         roles=['user', 'advsvc'])
+        targets = [{'project_id': 'other'}, {'project_id': 'another'},
+                   {'project_id': 'other'}]
+        with mock.patch.object(oslo_policy.Enforcer, 'enforce',
+                               autospec=True,
+                               side_effect=oslo_policy.Enforcer.enforce) as \
+                enforce:
+            result = policy.check_batch(advsvc_context, action, targets)
+        self.assertTrue(all(result))
+        self.assertEqual(2, enforce.call_count)
+
+    def test_check_batch_unknown_target_keys(self):
+        action = "get_port"
+        targets = [{'project_id': 'fake'}, {'project_id': 'fake'}]
+        with mock.patch.object(policy, '_get_rule_target_keys',
+                               return_value=None), \
+                mock.patch.object(oslo_policy.Enforcer, 'enforce',
+                                  return_value=True) as enforce:
+            result = policy.check_batch(self.context, action, targets)
+        self.assertTrue(all(result))
+        self.assertEqual(2, enforce.call_count)
+
+    def test_get_rule_target_keys(self):
+        policy.init()
+        rule = policy._ENFORCER.rules['get_network']
+        keys = policy._get_rule_target_keys(rule)
+        self.assertIn('project_id', keys)
+        self.assertIn('shared', keys)
+        rules = oslo_policy.Rules.from_dict(
+            {'remote': 'http://example.com or rule:get_network'})
+        self.assertIsNone(policy._get_rule_target_keys(rules['remote']))
+
+    def test_check_batch_attribute_based_action(self):
+        action = "create_network"
+        targets = [{'project_id': 'fake'},
+                   {'project_id': 'fake', 'shared': True}]
+        self.assertEqual(
+            [policy.check(self.context, action, target)
+             for target in targets],
+            policy.check_batch(self.context, action, targets))
+
     def test_enforce_project_id_check(self):
         # Trigger a policy with rule admin_or_owner
         action = "create_network"
@@ -17,11 +17,13 @@ from unittest import mock
 
 from oslo_concurrency import processutils
 from oslo_config import cfg
+from oslo_messaging import server as rpc_server
 
 from neutron.plugins.ml2.drivers.ovn.mech_driver.ovsdb import worker as \
     ovn_worker
 from neutron import service as neutron_service
 from neutron.tests import base
+from neutron import worker as neutron_worker
 
 
 class TestServiceHelpers(base.BaseTestCase):
@@ -45,8 +47,24 @@ class TestRpcWorker(base.BaseTestCase):
     def test_reset(self):
         _plugin = mock.Mock()
 
-        rpc_worker = neutron_service.RpcWorker(_plugin)
+        rpc_worker = neutron_service.RpcWorker([_plugin])
         self._test_reset(rpc_worker)
+        _plugin.flush_rpc_notifiers.assert_called_once_with()
+
+    def test_stop_flushes_rpc_notifiers(self):
+        _plugin = mock.Mock(spec=['start_rpc_listeners',
+                                  'flush_rpc_notifiers'])
+        server = mock.Mock(spec=rpc_server.MessageHandlingServer)
+        _plugin.start_rpc_listeners.return_value = [server]
+        other_plugin = mock.Mock(spec=['start_rpc_listeners'])
+        other_plugin.start_rpc_listeners.return_value = []
+
+        rpc_worker = neutron_service.RpcWorker([_plugin, other_plugin])
+        with mock.patch.object(neutron_worker.NeutronBaseWorker, 'start'):
+            rpc_worker.start()
+        rpc_worker.stop()
+        server.stop.assert_called_once_with()
+        _plugin.flush_rpc_notifiers.assert_called_once_with()
 
 
 class TestPreparePeriodicWorkers(base.BaseTestCase):